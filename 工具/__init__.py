@@ -16,7 +16,27 @@ from .数据清洗 import (
     清洗数据,
     按动作类别平衡,
     清洗数据文件,
-    批量清洗数据
+    批量清洗数据,
+    按组限量,
+    清洗索引,
+    平衡索引
+)
+
+# 列式数据集格式
+from .数据集格式 import (
+    分片信息,
+    样本视图,
+    分片写入器,
+    数据集写入器,
+    后台数据集写入器,
+    是否分片目录,
+    加载分片,
+    加载样本,
+    读取标签,
+    读取类别计数,
+    列出数据集,
+    转换旧格式文件,
+    批量转换
 )
 
 # 类别权重工具
@@ -39,6 +59,9 @@ from .目标检测 import (
     计算IoU,
     绘制边界框,
     解码网络输出,
+    解码网络输出数组,
+    检测数组转边界框,
+    非极大值抑制,
     查找最近目标
 )
 
@@ -52,7 +75,12 @@ from .模型转换 import (
     验证结果,
     快速转换,
     快速验证,
-    确保目录存在
+    确保目录存在,
+    训练数据校准读取器,
+    量化评估,
+    量化报告,
+    帧转模型输入,
+    快速量化
 )
 
 # 性能基准测试工具
@@ -63,5 +91,9 @@ from .性能基准测试 import (
     延迟测量器,
     性能基准测试器,
     运行基准测试,
-    快速测试ONNX
+    快速测试ONNX,
+    决策吞吐量测试,
+    并发负载模拟器,
+    调优结果,
+    会话参数调优器
 )
@@ -6,6 +6,7 @@
 - 延迟测量和统计
 - TFLearn 和 ONNX 后端性能对比
 - 性能报告生成
+- ONNX Runtime 会话选项调优（并发负载下按 P95 延迟选择）
 
 需求: 3.1, 3.2, 3.3
 """
@@ -14,6 +15,7 @@ import os
 import time
 import json
 import logging
+import threading
 from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass, field, asdict
 from collections import deque
@@ -644,6 +646,408 @@ def 快速测试ONNX(模型路径: str, 测试次数: int = 100, 使用GPU: bool
         return 延迟统计()
 
 
+def 决策吞吐量测试(测试次数: int = 10000, 上下文数量: int = 256,
+                   最大检测数量: int = 10, 随机种子: int = 0) -> Dict[str, float]:
+    """
+    测试决策引擎的规则分派吞吐量 (决策/秒)
+    
+    使用 获取所有规则() 的完整规则集，在随机生成的各游戏状态上下文上
+    反复执行规则匹配。每次决策都新建决策上下文 (与运行时每帧一致)，
+    不记录动作执行，冷却始终可用，每轮都走完整的分派路径。
+    
+    参数:
+        测试次数: 决策次数
+        上下文数量: 预先生成的随机帧数量 (循环使用)
+        最大检测数量: 每帧检测结果数量上限
+        随机种子: 随机数种子
+        
+    返回:
+        {"规则数量", "测试次数", "总耗时_秒", "决策每秒", "平均延迟_微秒"}
+    """
+    from 核心.数据类型 import (
+        游戏状态, 实体类型, 方向, 检测结果, 决策上下文, 决策策略
+    )
+    from 核心.决策引擎 import 决策引擎
+    from 核心.决策规则 import 获取所有规则
+    
+    rng = np.random.default_rng(随机种子)
+    状态列表 = list(游戏状态)
+    类型列表 = [实体类型.怪物, 实体类型.NPC, 实体类型.物品]
+    方向列表 = list(方向)
+    
+    帧列表 = []
+    for _ in range(上下文数量):
+        检测列表 = [
+            检测结果(
+                类型=类型列表[rng.integers(len(类型列表))],
+                置信度=float(rng.uniform(0.5, 1.0)),
+                边界框=(0, 0, 10, 10),
+                中心点=(5, 5),
+                方向=方向列表[rng.integers(len(方向列表))],
+                距离=float(rng.uniform(0, 400))
+            )
+            for _ in range(int(rng.integers(0, 最大检测数量 + 1)))
+        ]
+        帧列表.append(dict(
+            游戏状态=状态列表[rng.integers(len(状态列表))],
+            检测结果=检测列表,
+            血量百分比=float(rng.uniform(0, 1)),
+            附近敌人数量=int(rng.integers(0, 5))
+        ))
+    
+    引擎 = 决策引擎(策略=决策策略.规则优先, 启用ONNX推理=False, 启用状态检测=False)
+    for 规则 in 获取所有规则():
+        引擎.添加规则(规则)
+    
+    # 预热
+    for 帧 in 帧列表:
+        引擎._应用规则(决策上下文(**帧))
+    
+    开始 = time.perf_counter()
+    for i in range(测试次数):
+        引擎._应用规则(决策上下文(**帧列表[i % 上下文数量]))
+    总耗时 = time.perf_counter() - 开始
+    
+    return {
+        "规则数量": len(引擎.规则列表),
+        "测试次数": 测试次数,
+        "总耗时_秒": 总耗时,
+        "决策每秒": 测试次数 / 总耗时 if 总耗时 > 0 else 0.0,
+        "平均延迟_微秒": 总耗时 / 测试次数 * 1e6 if 测试次数 > 0 else 0.0,
+    }
+
+
+class 并发负载模拟器:
+    """并发负载模拟器
+    
+    在后台线程中按目标帧率模拟截图和目标检测，让调优时的推理与运行时一样
+    和这些线程争用 CPU 核心。用作上下文管理器：
+    
+        with 并发负载模拟器():
+            ...  # 在负载下测量
+    """
+    
+    def __init__(self, 截图尺寸: Tuple[int, int] = (1920, 1080), 目标帧率: float = 30.0,
+                 检测模型路径: str = None, 检测输入尺寸: Tuple[int, int] = (640, 640)):
+        """
+        初始化负载模拟器
+    
+        参数:
+            截图尺寸: 模拟截图的 (宽度, 高度)
+            目标帧率: 截图和检测线程每秒处理的帧数
+            检测模型路径: YOLO ONNX 检测模型路径（可选），不提供时用等量的缩放和卷积代替
+            检测输入尺寸: 无检测模型时模拟的检测输入 (宽度, 高度)
+        """
+        self.截图尺寸 = 截图尺寸
+        self.帧间隔 = 1.0 / 目标帧率 if 目标帧率 > 0 else 0.0
+        self.检测模型路径 = 检测模型路径
+        self.检测输入尺寸 = 检测输入尺寸
+        self.处理帧数: Dict[str, int] = {"截图": 0, "检测": 0}
+        self._停止 = threading.Event()
+        self._线程列表: List[threading.Thread] = []
+        宽度, 高度 = 截图尺寸
+        self._画面 = np.random.RandomState(0).randint(0, 256, (高度, 宽度, 3), dtype=np.uint8)
+    
+    def 启动(self):
+        """启动截图和检测线程"""
+        if self._线程列表:
+            return
+        self._停止.clear()
+        self._线程列表 = [
+            threading.Thread(target=self._循环, args=("截图", self._创建截图任务()),
+                             name="负载-截图", daemon=True),
+            threading.Thread(target=self._循环, args=("检测", self._创建检测任务()),
+                             name="负载-检测", daemon=True),
+        ]
+        for 线程 in self._线程列表:
+            线程.start()
+    
+    def 停止(self):
+        """停止并等待后台线程退出"""
+        self._停止.set()
+        for 线程 in self._线程列表:
+            线程.join(timeout=5)
+        self._线程列表 = []
+    
+    def __enter__(self) -> '并发负载模拟器':
+        self.启动()
+        return self
+    
+    def __exit__(self, *异常信息):
+        self.停止()
+    
+    def _创建截图任务(self):
+        """复制整帧并缩放到模型输入尺寸，与截图线程的每帧工作量相当"""
+        import cv2
+    
+        缓冲 = np.empty_like(self._画面)
+    
+        def 任务():
+            np.copyto(缓冲, self._画面)
+            cv2.resize(缓冲, (480, 270), interpolation=cv2.INTER_AREA)
+        return 任务
+    
+    def _创建检测任务(self):
+        """运行检测模型；没有模型时做 letterbox 缩放和一次卷积"""
+        import cv2
+    
+        if self.检测模型路径:
+            from 核心.ONNX检测后端 import ONNX检测后端
+            后端 = ONNX检测后端(self.检测模型路径)
+            return lambda: 后端.检测(self._画面, 0.5, 0.45)
+    
+        def 任务():
+            缩放 = cv2.resize(self._画面, self.检测输入尺寸, interpolation=cv2.INTER_LINEAR)
+            cv2.GaussianBlur(缩放, (7, 7), 0)
+        return 任务
+    
+    def _循环(self, 名称: str, 任务):
+        while not self._停止.is_set():
+            开始 = time.perf_counter()
+            try:
+                任务()
+            except Exception as e:
+                日志.warning(f"负载线程 {名称} 出错，停止: {e}")
+                return
+            self.处理帧数[名称] += 1
+            剩余 = self.帧间隔 - (time.perf_counter() - 开始)
+            if 剩余 > 0:
+                self._停止.wait(剩余)
+
+
+@dataclass
+class 调优结果:
+    """会话选项调优结果"""
+    模型路径: str = ""
+    最佳参数: Dict[str, Any] = field(default_factory=dict)
+    最佳延迟统计: 延迟统计 = field(default_factory=延迟统计)
+    默认延迟统计: 延迟统计 = field(default_factory=延迟统计)
+    候选结果: List[Dict[str, Any]] = field(default_factory=list)  # [{"参数", "延迟统计"}]
+    CPU核心数: int = 0
+    并发负载: bool = True
+    测试时间: str = ""
+    
+    @property
+    def P95改善比例(self) -> float:
+        """最佳参数相对默认参数的 P95 延迟降低比例"""
+        默认 = self.默认延迟统计.P95延迟
+        return (默认 - self.最佳延迟统计.P95延迟) / 默认 if 默认 > 0 else 0.0
+    
+    def to_dict(self) -> dict:
+        """转换为字典"""
+        return {
+            '模型路径': self.模型路径,
+            '最佳参数': self.最佳参数,
+            '最佳延迟统计': self.最佳延迟统计.to_dict(),
+            '默认延迟统计': self.默认延迟统计.to_dict(),
+            '候选结果': [
+                {'参数': r['参数'], '延迟统计': r['延迟统计'].to_dict()} for r in self.候选结果
+            ],
+            'CPU核心数': self.CPU核心数,
+            '并发负载': self.并发负载,
+            '测试时间': self.测试时间,
+        }
+
+
+class 会话参数调优器:
+    """ONNX Runtime 会话选项调优器
+    
+    在本机 CPU 上用 性能基准测试器 逐个测量候选会话选项（线程数、执行模式、
+    图优化级别、内存池），按 P95 延迟选出最佳组合并写入 推理配置.json，
+    统一推理引擎 加载同一模型时自动应用。
+    
+    默认逐项搜索：依次调整线程数、执行模式、图优化级别和内存池，每项保留当前最佳值，
+    候选数量约为完整网格的十分之一。
+    """
+    
+    def __init__(self, 测试次数: int = 100, 预热次数: int = 10,
+                 并发负载: bool = True, 检测模型路径: str = None,
+                 输入宽度: int = None, 输入高度: int = None):
+        """
+        初始化调优器
+    
+        参数:
+            测试次数: 每个候选的测量次数（至少 20 次，否则没有 P95 统计）
+            预热次数: 每个候选的预热次数
+            并发负载: 是否在截图和检测负载下测量
+            检测模型路径: 负载中使用的 YOLO ONNX 检测模型（可选）
+            输入宽度: 模型输入为动态尺寸时使用的宽度
+            输入高度: 模型输入为动态尺寸时使用的高度
+        """
+        self.测试次数 = max(20, 测试次数)
+        self.预热次数 = 预热次数
+        self.并发负载 = 并发负载
+        self.检测模型路径 = 检测模型路径
+        self.输入宽度 = 输入宽度
+        self.输入高度 = 输入高度
+    
+    @staticmethod
+    def 线程数候选(核心数: int = None) -> List[int]:
+        """intra 线程数候选：1、四分之一、一半和全部核心"""
+        核心数 = 核心数 or os.cpu_count() or 1
+        return sorted({1, max(1, 核心数 // 4), max(1, 核心数 // 2), 核心数})
+    
+    def 生成网格候选(self, 核心数: int = None) -> list:
+        """生成完整网格的候选参数"""
+        from 核心.ONNX推理 import 会话调优参数
+    
+        核心数 = 核心数 or os.cpu_count() or 1
+        候选列表 = []
+        for intra in self.线程数候选(核心数):
+            for 执行模式, inter候选 in (("sequential", [1]),
+                                       ("parallel", sorted({2, max(2, 核心数 // 2)}))):
+                for inter in inter候选:
+                    for 级别 in ("basic", "extended", "all"):
+                        for 内存池 in (True, False):
+                            候选列表.append(会话调优参数(
+                                intra线程数=intra, inter线程数=inter, 执行模式=执行模式,
+                                图优化级别=级别, 启用内存池=内存池, 启用内存模式=内存池
+                            ))
+        return 候选列表
+    
+    def 测量(self, 模型路径: str, 参数) -> 延迟统计:
+        """用给定会话参数创建引擎并测量单帧延迟"""
+        from 核心.ONNX推理 import ONNX推理引擎
+    
+        引擎 = ONNX推理引擎(
+            模型路径, 使用GPU=False, 预热=False,
+            输入宽度=self.输入宽度, 输入高度=self.输入高度,
+            启用优化缓存=False, 会话参数=参数
+        )
+        规格 = 引擎.获取预处理规格()
+        if 规格.布局 == "NCHW":
+            输入形状 = (规格.通道数, 规格.高度, 规格.宽度)
+        else:
+            输入形状 = (规格.宽度, 规格.高度, 规格.通道数)
+    
+        测试器 = 性能基准测试器(测试次数=self.测试次数, 预热次数=self.预热次数, 输入形状=输入形状)
+        return 测试器.测试引擎(引擎, 参数.描述()).延迟统计
+    
+    def 调优(self, 模型路径: str, 候选列表: list = None, 完整网格: bool = False) -> 调优结果:
+        """
+        测量候选会话参数并选出 P95 延迟最低的组合
+    
+        参数:
+            模型路径: ONNX 模型路径
+            候选列表: 指定的候选参数列表（可选），默认逐项搜索
+            完整网格: 未指定候选列表时是否测量完整网格
+    
+        返回:
+            调优结果，默认参数总在候选中
+        """
+        from 核心.ONNX推理 import 会话调优参数
+    
+        默认参数 = 会话调优参数()
+        已测量: Dict[Tuple, 延迟统计] = {}
+        候选结果: List[Dict[str, Any]] = []
+    
+        def 评估(参数) -> 延迟统计:
+            键 = tuple(参数.to_dict().values())
+            if 键 not in 已测量:
+                已测量[键] = self.测量(模型路径, 参数)
+                候选结果.append({'参数': 参数.to_dict(), '延迟统计': 已测量[键]})
+                日志.info(f"  {参数.描述()}: P95 {已测量[键].P95延迟:.3f} ms")
+            return 已测量[键]
+    
+        def 更优(统计: 延迟统计, 最佳: 延迟统计) -> bool:
+            return (统计.P95延迟, 统计.平均延迟) < (最佳.P95延迟, 最佳.平均延迟)
+    
+        日志.info(f"开始调优会话参数: {模型路径} (并发负载: {'是' if self.并发负载 else '否'})")
+        负载 = 并发负载模拟器(检测模型路径=self.检测模型路径) if self.并发负载 else None
+        if 负载:
+            负载.启动()
+        try:
+            默认统计 = 评估(默认参数)
+            最佳参数, 最佳统计 = 默认参数, 默认统计
+    
+            if 候选列表 is not None or 完整网格:
+                for 参数 in (候选列表 if 候选列表 is not None else self.生成网格候选()):
+                    统计 = 评估(参数)
+                    if 更优(统计, 最佳统计):
+                        最佳参数, 最佳统计 = 参数, 统计
+            else:
+                # 逐项搜索：每一步只改变一个维度，保留当前最佳值
+                步骤 = [
+                    [dict(intra线程数=n) for n in self.线程数候选()],
+                    [dict(执行模式="sequential", inter线程数=1), dict(执行模式="parallel", inter线程数=2)],
+                    [dict(图优化级别=级别) for 级别 in ("basic", "extended", "all")],
+                    [dict(启用内存池=值, 启用内存模式=值) for 值 in (True, False)],
+                ]
+                for 修改列表 in 步骤:
+                    for 修改 in 修改列表:
+                        参数 = 会话调优参数.from_dict({**最佳参数.to_dict(), **修改})
+                        统计 = 评估(参数)
+                        if 更优(统计, 最佳统计):
+                            最佳参数, 最佳统计 = 参数, 统计
+        finally:
+            if 负载:
+                负载.停止()
+    
+        结果 = 调优结果(
+            模型路径=模型路径,
+            最佳参数=最佳参数.to_dict(),
+            最佳延迟统计=最佳统计,
+            默认延迟统计=默认统计,
+            候选结果=候选结果,
+            CPU核心数=os.cpu_count() or 1,
+            并发负载=self.并发负载,
+            测试时间=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        )
+        日志.info(f"最佳会话参数: {最佳参数.描述()}，P95 {最佳统计.P95延迟:.3f} ms "
+                  f"(默认 {默认统计.P95延迟:.3f} ms，改善 {结果.P95改善比例 * 100:.1f}%)")
+        return 结果
+    
+    @staticmethod
+    def 保存到配置(结果: 调优结果, 配置文件路径: str = "配置/推理配置.json") -> bool:
+        """
+        把调优结果写入推理配置文件的 会话调优 字段，保留其他字段
+    
+        参数:
+            结果: 调优结果
+            配置文件路径: 推理配置文件路径
+    
+        返回:
+            是否保存成功
+        """
+        try:
+            import onnxruntime as ort
+            版本 = ort.__version__
+        except ImportError:
+            版本 = ""
+    
+        try:
+            配置 = {}
+            if os.path.exists(配置文件路径):
+                with open(配置文件路径, 'r', encoding='utf-8') as f:
+                    配置 = json.load(f)
+    
+            配置["会话调优"] = {
+                "模型路径": 结果.模型路径,
+                "参数": 结果.最佳参数,
+                "P95延迟_ms": round(结果.最佳延迟统计.P95延迟, 3),
+                "默认P95延迟_ms": round(结果.默认延迟统计.P95延迟, 3),
+                "CPU核心数": 结果.CPU核心数,
+                "onnxruntime版本": 版本,
+                "并发负载": 结果.并发负载,
+                "调优时间": 结果.测试时间,
+            }
+            if isinstance(配置.get("说明"), dict):
+                配置["说明"]["会话调优"] = ("性能基准测试 --autotune 生成的 ONNX Runtime 会话选项，"
+                                          "CPU 核心数或模型不同时不应用")
+    
+            目录 = os.path.dirname(配置文件路径)
+            if 目录:
+                os.makedirs(目录, exist_ok=True)
+            with open(配置文件路径, 'w', encoding='utf-8') as f:
+                json.dump(配置, f, ensure_ascii=False, indent=2)
+    
+            日志.info(f"会话调优结果已保存到: {配置文件路径}")
+            return True
+        except Exception as e:
+            日志.error(f"保存会话调优结果失败: {e}")
+            return False
+
+
 # 命令行入口
 if __name__ == "__main__":
     import argparse
@@ -654,9 +1058,36 @@ if __name__ == "__main__":
     parser.add_argument("--iterations", type=int, default=100, help="测试迭代次数")
     parser.add_argument("--no-gpu", action="store_true", help="禁用 GPU")
     parser.add_argument("--output", type=str, default="日志/基准测试", help="输出目录")
+    parser.add_argument("--decision", action="store_true", help="测试决策引擎规则分派吞吐量")
+    parser.add_argument("--autotune", action="store_true",
+                        help="调优 ONNX 模型的会话选项并写入 配置/推理配置.json")
+    parser.add_argument("--full-grid", action="store_true", help="调优时测量完整参数网格")
+    parser.add_argument("--no-load", action="store_true", help="调优时不模拟截图和检测负载")
+    parser.add_argument("--detector", type=str, help="调优负载中使用的 YOLO ONNX 检测模型")
+    parser.add_argument("--config", type=str, default="配置/推理配置.json", help="推理配置文件")
     
     args = parser.parse_args()
     
+    if args.autotune:
+        if not args.onnx:
+            print("请指定要调优的 ONNX 模型 (--onnx)")
+            exit(1)
+        调优器 = 会话参数调优器(
+            测试次数=args.iterations, 并发负载=not args.no_load, 检测模型路径=args.detector
+        )
+        结果 = 调优器.调优(args.onnx, 完整网格=args.full_grid)
+        print(f"最佳会话参数: {结果.最佳参数}")
+        print(f"P95 延迟: {结果.最佳延迟统计.P95延迟:.3f} ms "
+              f"(默认 {结果.默认延迟统计.P95延迟:.3f} ms)")
+        exit(0 if 会话参数调优器.保存到配置(结果, args.config) else 1)
+    
+    if args.decision:
+        结果 = 决策吞吐量测试(测试次数=args.iterations)
+        print(f"规则数量: {结果['规则数量']}")
+        print(f"决策吞吐量: {结果['决策每秒']:.0f} 决策/秒 "
+              f"(平均 {结果['平均延迟_微秒']:.1f} μs)")
+        exit(0)
+    
     if not args.onnx and not args.tflearn:
         print("请指定至少一个模型路径 (--onnx 或 --tflearn)")
         exit(1)
@@ -2,6 +2,10 @@
 数据清洗工具
 用于平衡训练数据，避免某些动作类别过多导致模型偏向
 
+清洗只在标签数组上进行：先按直方图分箱或动作类别分组，
+再对每组随机保留至多 N 个样本，得到保留的样本索引；
+图像最后按索引一次性收集（分片目录通过 mmap 按块读取），不会逐条复制。
+
 使用方法:
 1. 运行此脚本
 2. 选择要清洗的数据文件
@@ -9,86 +13,194 @@
 """
 
 import numpy as np
-import pandas as pd
 import os
 import sys
-from random import shuffle
-import matplotlib.pyplot as plt
+import time
+from typing import Optional, Tuple, Union
 
 # 添加项目根目录到路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from 配置.设置 import 数据保存路径, 总动作数, 动作定义
+from 工具.数据集格式 import (
+    样本视图, 分片写入器, 是否分片目录, 加载分片, 列出数据集
+)
+
+
+# 清洗后写入分片时每次从 mmap 收集的样本数
+写入块大小 = 512
+
+
+# ==================== 索引计算 ====================
+
+def 按组限量(组号: np.ndarray, 上限: Union[int, np.ndarray], 随机种子: Optional[int] = None) -> np.ndarray:
+    """
+    每组随机保留至多 上限 个样本
+    
+    先随机打乱，再按组号稳定排序，组内名次小于上限的样本被保留，
+    全程只对索引数组做向量化运算。
+    
+    参数:
+        组号: 每个样本所属的组 (样本数,)，非负整数
+        上限: 每组最多保留的样本数，或按组号索引的上限数组
+        随机种子: 随机种子
+    
+    返回:
+        保留样本的索引（升序）
+    """
+    组号 = np.asarray(组号)
+    if len(组号) == 0:
+        return np.zeros(0, dtype=np.int64)
+    
+    乱序 = np.random.default_rng(随机种子).permutation(len(组号))
+    顺序 = 乱序[np.argsort(组号[乱序], kind="stable")]
+    排序组号 = 组号[顺序]
+    
+    # 每个样本在组内的名次 = 位置 - 所在组的起点
+    组内名次 = np.arange(len(组号)) - np.searchsorted(排序组号, 排序组号, side="left")
+    上限 = np.asarray(上限)
+    各样本上限 = 上限 if 上限.ndim == 0 else 上限[排序组号]
+    
+    return np.sort(顺序[组内名次 < 各样本上限])
+
+
+def 计算分箱(值: np.ndarray, 分箱数: int = 25) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    直方图分箱
+    
+    分箱方式与 np.histogram 相同: 各箱左闭右开，最后一箱包含右端点
+    
+    参数:
+        值: 一维数值数组
+        分箱数: 箱数
+    
+    返回:
+        (每个值的箱号, 分箱边界)
+    """
+    值 = np.asarray(值, dtype=np.float64)
+    分箱边界 = np.histogram_bin_edges(值, 分箱数)
+    箱号 = np.digitize(值, 分箱边界[1:-1], right=False)
+    return 箱号, 分箱边界
 
 
-def 数据帧转数组_输入(数据帧, 索引):
-    """将数据帧的一行转换为numpy数组"""
-    列表 = 数据帧.loc[[索引]].values.tolist()
-    数组 = np.array(列表).ravel()
-    return 数组
+def 标签转类别(标签: np.ndarray) -> np.ndarray:
+    """one-hot 标签矩阵取最大值所在列，一维标签直接作为类别"""
+    标签 = np.asarray(标签)
+    if 标签.ndim == 2:
+        return np.argmax(标签, axis=1)
+    return 标签.astype(np.int64)
 
 
-def 数据帧转数组_图像(图像数据帧, 索引):
-    """将图像数据帧的一行转换为numpy数组"""
-    图像数据 = 图像数据帧.loc[[索引]].T.to_numpy()
-    列表 = 图像数据.tolist()
-    展平列表 = [val.tolist() for sublist in 列表 for val in sublist]
-    数组 = np.array(展平列表)
-    return 数组
+def 清洗索引(
+    标签: np.ndarray,
+    目标列: int = 0,
+    分箱数: int = 25,
+    每箱样本数: Optional[int] = None,
+    随机种子: Optional[int] = None
+) -> np.ndarray:
+    """
+    按目标列的取值分布清洗，计算保留的样本索引
+    
+    参数:
+        标签: 标签矩阵 (样本数, 动作数) 或一维标签
+        目标列: 用于平衡的目标列索引
+        分箱数: 直方图箱数
+        每箱样本数: 每箱最多保留的样本数，None 表示 max(目标列非零数, 100)
+        随机种子: 随机种子
+    
+    返回:
+        保留样本的索引（升序）
+    """
+    标签 = np.asarray(标签)
+    值 = 标签[:, 目标列] if 标签.ndim == 2 else 标签
+    if len(值) == 0:
+        return np.zeros(0, dtype=np.int64)
+    
+    if 每箱样本数 is None:
+        每箱样本数 = max(int(np.count_nonzero(值)), 100)
+    
+    箱号, _ = 计算分箱(值, 分箱数)
+    return 按组限量(箱号, 每箱样本数, 随机种子)
 
 
-def 清洗数据(训练数据, 目标列=0, 显示图表=False):
+def 平衡索引(
+    标签: np.ndarray,
+    最大每类样本数: Optional[int] = None,
+    随机种子: Optional[int] = None
+) -> np.ndarray:
+    """
+    按动作类别平衡，计算保留的样本索引
+    
+    参数:
+        标签: 标签矩阵 (样本数, 动作数) 或一维动作索引
+        最大每类样本数: 每个类别最多保留的样本数，None 表示非空类别样本数的中位数
+        随机种子: 随机种子
+    
+    返回:
+        保留样本的索引（升序）
+    """
+    类别 = 标签转类别(标签)
+    if len(类别) == 0:
+        return np.zeros(0, dtype=np.int64)
+    
+    if 最大每类样本数 is None:
+        计数 = np.bincount(类别)
+        最大每类样本数 = int(np.median(计数[计数 > 0]))
+    
+    return 按组限量(类别, 最大每类样本数, 随机种子)
+
+
+def 提取标签(训练数据) -> np.ndarray:
+    """
+    取出训练数据的标签数组，不触及图像
+    
+    参数:
+        训练数据: 样本视图，或 [(图像, 动作), ...] 列表/对象数组
+    
+    返回:
+        标签矩阵 (样本数, 动作数)，动作为索引时为一维数组
+    """
+    if isinstance(训练数据, 样本视图):
+        return np.asarray(训练数据.标签)
+    if len(训练数据) == 0:
+        return np.zeros(0, dtype=np.int64)
+    return np.stack([np.asarray(样本[1]) for 样本 in 训练数据])
+
+
+def _显示分布(类别计数: np.ndarray, 标题: str) -> None:
+    """打印各动作类别的样本数"""
+    print(f"\n📊 {标题}:")
+    for 类别 in np.flatnonzero(类别计数):
+        动作名 = 动作定义.get(int(类别), {}).get("名称", f"动作{类别}")
+        print(f"   {动作名}: {类别计数[类别]} 样本")
+
+
+# ==================== 内存中的数据 ====================
+
+def 清洗数据(训练数据, 目标列=0, 显示图表=False, 随机种子=None):
     """
     清洗训练数据，平衡各类别样本数量
     
     参数:
-        训练数据: 原始训练数据 [(图像, 动作), ...]
+        训练数据: 原始训练数据，样本视图或 [(图像, 动作), ...]
         目标列: 用于平衡的目标列索引 (默认为第一个动作)
         显示图表: 是否显示分布图表
+        随机种子: 随机种子
     
     返回:
-        tuple: (清洗后的图像数据帧, 清洗后的输入数据帧)
-    """
-    # 创建输入数据帧
-    输入数据帧 = pd.DataFrame()
-    for i in range(len(训练数据)):
-        行 = list(训练数据[i][1])
-        临时帧 = pd.DataFrame([行])
-        输入数据帧 = pd.concat([输入数据帧, 临时帧])
-    输入数据帧 = 输入数据帧.reset_index(drop=True)
-    
-    # 清洗参数
-    分箱数 = 25
-    # 计算阈值 (非零值的数量)
-    阈值 = (输入数据帧[目标列] != 0).astype(int).sum(axis=0)
-    每箱样本数 = max(阈值, 100)  # 至少保留100个样本
-    
-    # 计算直方图
-    直方图, 分箱边界 = np.histogram(输入数据帧[目标列], 分箱数)
-    中心点 = (分箱边界[:-1] + 分箱边界[1:]) * 0.5
-    
-    # 清洗过程 - 移除过多的样本
-    移除列表 = []
-    for j in range(分箱数):
-        当前箱列表 = []
-        for i in range(len(输入数据帧[目标列])):
-            序列 = 输入数据帧[目标列].iloc[[i]]
-            值 = 序列.tolist()[0]
-            if 值 >= 分箱边界[j] and 值 <= 分箱边界[j+1]:
-                当前箱列表.append(i)
-        
-        # 随机打乱后移除超出阈值的样本
-        shuffle(当前箱列表)
-        移除列表.extend(当前箱列表[每箱样本数:])
-    
-    # 执行清洗
-    输入数据帧.drop(输入数据帧.index[移除列表], inplace=True)
-    print(f'✅ 清洗后剩余样本数: {len(输入数据帧)}')
-    输入数据帧 = 输入数据帧.reset_index(drop=True)
+        tuple: (清洗后的图像数组, 清洗后的标签数组)
+    """
+    标签 = 提取标签(训练数据)
+    保留 = 清洗索引(标签, 目标列, 随机种子=随机种子)
+    print(f'✅ 清洗后剩余样本数: {len(保留)}')
     
     if 显示图表:
-        # 可视化清洗结果
-        直方图, _ = np.histogram(输入数据帧[目标列], 分箱数)
+        import matplotlib.pyplot as plt
+        
+        值 = 标签[:, 目标列] if 标签.ndim == 2 else 标签
+        每箱样本数 = max(int(np.count_nonzero(值)), 100)
+        直方图, 分箱边界 = np.histogram(值[保留], np.histogram_bin_edges(值, 25))
+        中心点 = (分箱边界[:-1] + 分箱边界[1:]) * 0.5
         plt.figure(figsize=(10, 6))
         plt.bar(中心点, 直方图, width=0.05)
         plt.axhline(y=每箱样本数, color='r', linestyle='--', label=f'阈值: {每箱样本数}')
@@ -98,106 +210,118 @@ def 清洗数据(训练数据, 目标列=0, 显示图表=False):
         plt.legend()
         plt.show()
     
-    # 创建图像数据帧
-    图像数据帧 = pd.DataFrame()
-    for i in range(len(训练数据)):
-        行 = list(训练数据[i][0])
-        临时帧 = pd.DataFrame([行])
-        图像数据帧 = pd.concat([图像数据帧, 临时帧])
-    图像数据帧 = 图像数据帧.reset_index(drop=True)
-    
-    # 同步清洗图像数据
-    图像数据帧.drop(图像数据帧.index[移除列表], inplace=True)
-    图像数据帧 = 图像数据帧.reset_index(drop=True)
+    # 图像按保留索引一次性收集
+    if isinstance(训练数据, 样本视图):
+        图像 = 训练数据.图像[保留]
+    else:
+        图像 = np.stack([np.asarray(训练数据[i][0]) for i in 保留]) if len(保留) else np.zeros((0,))
     
-    # 验证维度一致
-    assert len(输入数据帧) == len(图像数据帧), "❌ 清洗后维度不一致!"
-    
-    return 图像数据帧, 输入数据帧
+    return 图像, 标签[保留]
 
 
-def 按动作类别平衡(训练数据, 最大每类样本数=None):
+def 按动作类别平衡(训练数据, 最大每类样本数=None, 随机种子=None):
     """
     按动作类别平衡数据
     
     参数:
-        训练数据: 原始训练数据 [(图像, 动作), ...]
+        训练数据: 原始训练数据 [(图像, 动作), ...] 或样本视图
         最大每类样本数: 每个类别最多保留的样本数 (None表示自动计算)
+        随机种子: 随机种子
     
     返回:
-        list: 平衡后的训练数据
+        list: 平衡后的训练数据（顺序已打乱）
     """
-    # 统计各类别数量
-    类别统计 = {i: [] for i in range(总动作数)}
-    
-    for 索引, (图像, 动作) in enumerate(训练数据):
-        if isinstance(动作, (list, np.ndarray)):
-            类别 = np.argmax(动作)
-        else:
-            类别 = 动作
-        类别统计[类别].append(索引)
-    
-    # 显示原始分布
-    print("\n📊 原始数据分布:")
-    for 类别, 索引列表 in 类别统计.items():
-        if len(索引列表) > 0:
-            动作名 = 动作定义.get(类别, {}).get("名称", f"动作{类别}")
-            print(f"   {动作名}: {len(索引列表)} 样本")
-    
-    # 计算平衡阈值
-    非空类别数量 = [len(v) for v in 类别统计.values() if len(v) > 0]
-    if not 非空类别数量:
+    标签 = 提取标签(训练数据)
+    if len(标签) == 0:
         print("❌ 没有有效数据")
         return 训练数据
     
+    类别 = 标签转类别(标签)
+    _显示分布(np.bincount(类别, minlength=总动作数), "原始数据分布")
+    
     if 最大每类样本数 is None:
-        # 使用中位数作为阈值
-        最大每类样本数 = int(np.median(非空类别数量))
+        计数 = np.bincount(类别)
+        最大每类样本数 = int(np.median(计数[计数 > 0]))
     
     print(f"\n🎯 平衡阈值: 每类最多 {最大每类样本数} 样本")
     
-    # 平衡数据
-    平衡后索引 = []
-    for 类别, 索引列表 in 类别统计.items():
-        if len(索引列表) > 0:
-            shuffle(索引列表)
-            平衡后索引.extend(索引列表[:最大每类样本数])
-    
-    # 打乱顺序
-    shuffle(平衡后索引)
+    保留 = 平衡索引(标签, 最大每类样本数, 随机种子)
+    np.random.default_rng(随机种子).shuffle(保留)
     
-    # 构建平衡后的数据
-    平衡后数据 = [训练数据[i] for i in 平衡后索引]
+    平衡后数据 = [训练数据[i] for i in 保留]
     
     print(f"\n✅ 平衡后总样本数: {len(平衡后数据)}")
     
     return 平衡后数据
 
 
-def 清洗数据文件(文件路径, 输出路径=None):
+# ==================== 文件 ====================
+
+def 写入保留样本(数据: 样本视图, 保留: np.ndarray, 输出目录: str) -> str:
+    """
+    把保留的样本写入新分片
+    
+    保留索引升序排列，按块从 mmap 收集后写入，内存占用与块大小成正比
+    
+    参数:
+        数据: 原始样本视图（通常是 mmap）
+        保留: 保留样本的索引（升序）
+        输出目录: 新分片目录
+    
+    返回:
+        输出目录
+    """
+    with 分片写入器(输出目录, 数据.图像.shape[1:], 数据.标签.shape[1],
+                    来源="清洗", 刷新间隔=max(1, len(保留))) as 写入器:
+        for 起点 in range(0, len(保留), 写入块大小):
+            块 = 保留[起点:起点 + 写入块大小]
+            写入器.批量写入(数据.图像[块], 数据.标签[块])
+    return 输出目录
+
+
+def 清洗数据文件(文件路径, 输出路径=None, 随机种子=None):
     """
     清洗单个数据文件
     
+    分片目录输出为新的分片目录，旧的 .npy 文件输出为同格式的 .npy 文件
+    
     参数:
-        文件路径: 输入文件路径
-        输出路径: 输出文件路径 (None表示覆盖原文件)
+        文件路径: 分片目录或旧格式 .npy 文件路径
+        输出路径: 输出路径 (None 表示在原名后加 _cleaned)
+        随机种子: 随机种子
     """
     print(f"\n📂 加载数据: {文件路径}")
+    开始时间 = time.perf_counter()
     
     try:
-        数据 = np.load(文件路径, allow_pickle=True)
-        print(f"   原始样本数: {len(数据)}")
+        if 是否分片目录(文件路径):
+            数据 = 加载分片(文件路径, mmap模式="r")
+            标签 = np.asarray(数据.标签)
+        else:
+            数据 = np.load(文件路径, allow_pickle=True)
+            标签 = 提取标签(数据)
+        print(f"   原始样本数: {len(标签)}")
         
-        # 平衡数据
-        平衡后数据 = 按动作类别平衡(list(数据))
+        if len(标签) == 0:
+            print("❌ 没有有效数据")
+            return
         
-        # 保存
-        if 输出路径 is None:
-            输出路径 = 文件路径.replace('.npy', '_cleaned.npy')
+        类别 = 标签转类别(标签)
+        _显示分布(np.bincount(类别, minlength=总动作数), "原始数据分布")
+        保留 = 平衡索引(标签, 随机种子=随机种子)
         
-        np.save(输出路径, 平衡后数据)
-        print(f"💾 已保存到: {输出路径}")
+        if 是否分片目录(文件路径):
+            if 输出路径 is None:
+                输出路径 = os.path.normpath(文件路径) + '_cleaned'
+            写入保留样本(数据, 保留, 输出路径)
+        else:
+            if 输出路径 is None:
+                输出路径 = 文件路径.replace('.npy', '_cleaned.npy')
+            np.save(输出路径, 数据[保留])
         
+        print(f"\n✅ 平衡后总样本数: {len(保留)}")
+        print(f"💾 已保存到: {输出路径} ({time.perf_counter() - 开始时间:.2f}s)")
+    
     except Exception as e:
         print(f"❌ 处理失败: {e}")
 
@@ -209,12 +333,11 @@ def 批量清洗数据():
     print("🧹 数据清洗工具")
     print("=" * 50)
     
-    # 获取所有数据文件
-    数据文件列表 = []
-    if os.path.exists(数据保存路径):
-        for 文件名 in os.listdir(数据保存路径):
-            if 文件名.endswith('.npy') and 'cleaned' not in 文件名:
-                数据文件列表.append(os.path.join(数据保存路径, 文件名))
+    # 获取所有数据文件（分片目录和旧 .npy 文件）
+    数据文件列表 = [
+        路径 for 路径 in 列出数据集(数据保存路径)
+        if 'cleaned' not in os.path.basename(路径)
+    ]
     
     if not 数据文件列表:
         print(f"❌ 未找到数据文件: {数据保存路径}")
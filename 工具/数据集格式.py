@@ -0,0 +1,821 @@
+"""
+列式训练数据集格式
+用定长 uint8 数组代替 pickle 对象数组保存训练数据
+
+每个分片是一个目录（如 数据/训练数据-3/），包含:
+- 图像.npy: uint8 数组，形状 (样本数, 高, 宽, 通道)
+- 标签.npy: uint8 one-hot 数组，形状 (样本数, 动作数)
+- 索引.json: 样本数、形状、各类别计数等元数据
+
+两个数组都是普通 .npy 文件，可以用 np.load(mmap_mode='r') 直接映射读取；
+只统计标签时读取 标签.npy 或 索引.json 即可，不需要加载图像。
+
+使用方法:
+    python 工具/数据集格式.py [数据目录] [--删除原文件]
+    将目录中旧的 训练数据-N.npy 文件转换为分片目录
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import queue
+import struct
+import shutil
+import threading
+from datetime import datetime
+from dataclasses import dataclass, field
+from typing import List, Optional, Dict, Tuple, Union, Sequence
+import logging
+
+import numpy as np
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+日志 = logging.getLogger(__name__)
+
+
+# 格式常量
+格式版本 = 1
+图像文件名 = "图像.npy"
+标签文件名 = "标签.npy"
+索引文件名 = "索引.json"
+默认前缀 = "训练数据"
+
+# npy 头部预留的额外空间，保证之后改写样本数时头部长度不变
+_头部预留字节 = 32
+_NPY魔数 = b"\x93NUMPY\x01\x00"
+
+
+@dataclass
+class 分片信息:
+    """
+    分片索引信息
+    
+    保存在分片目录的 索引.json 中
+    """
+    样本数: int = 0
+    图像形状: Tuple[int, ...] = ()  # 单个样本的图像形状 (高, 宽, 通道)
+    标签维度: int = 0
+    类别计数: List[int] = field(default_factory=list)  # 各动作类别的样本数
+    已完成: bool = False  # 写入器是否正常关闭
+    创建时间: str = ""  # ISO 格式
+    来源: str = "录制"  # "录制" 或 "转换"
+    格式版本: int = 格式版本
+    
+    def to_dict(self) -> dict:
+        """转换为字典"""
+        return {
+            "格式版本": self.格式版本,
+            "样本数": self.样本数,
+            "图像形状": list(self.图像形状),
+            "图像类型": "uint8",
+            "标签维度": self.标签维度,
+            "标签类型": "uint8",
+            "类别计数": list(self.类别计数),
+            "已完成": self.已完成,
+            "创建时间": self.创建时间,
+            "来源": self.来源,
+        }
+    
+    @classmethod
+    def from_dict(cls, 数据: dict) -> '分片信息':
+        """从字典创建实例"""
+        return cls(
+            样本数=数据.get("样本数", 0),
+            图像形状=tuple(数据.get("图像形状", ())),
+            标签维度=数据.get("标签维度", 0),
+            类别计数=list(数据.get("类别计数", [])),
+            已完成=数据.get("已完成", False),
+            创建时间=数据.get("创建时间", ""),
+            来源=数据.get("来源", "录制"),
+            格式版本=数据.get("格式版本", 格式版本),
+        )
+
+
+class 样本视图(Sequence):
+    """
+    以 (图像, 标签) 对的形式访问列式数据
+    
+    兼容旧代码中 样本[0] / 样本[1] 和 for 图像, 动作 in 数据 的用法；
+    切片返回新的视图，不复制数据。
+    """
+    
+    def __init__(self, 图像: np.ndarray, 标签: np.ndarray):
+        """
+        参数:
+            图像: 图像数组 (样本数, 高, 宽, 通道)
+            标签: 标签数组 (样本数, 动作数)
+        """
+        if len(图像) != len(标签):
+            raise ValueError(f"图像数量 ({len(图像)}) 与标签数量 ({len(标签)}) 不一致")
+        self.图像 = 图像
+        self.标签 = 标签
+    
+    def __len__(self) -> int:
+        return len(self.标签)
+    
+    def __getitem__(self, 索引):
+        if isinstance(索引, slice):
+            return 样本视图(self.图像[索引], self.标签[索引])
+        return self.图像[索引], self.标签[索引]
+
+
+# ==================== npy 头部 ====================
+
+def _构造npy头(形状: Tuple[int, ...], 头部长度: Optional[int] = None) -> bytes:
+    """
+    构造 uint8 C 顺序数组的 npy 1.0 头部
+    
+    参数:
+        形状: 数组形状
+        头部长度: 头部总字节数；为 None 时按预留空间计算并对齐到 64 字节
+    
+    返回:
+        头部字节
+    """
+    描述 = "{'descr': '|u1', 'fortran_order': False, 'shape': %r, }" % (tuple(形状),)
+    基础长度 = len(_NPY魔数) + 2
+    if 头部长度 is None:
+        头部长度 = 基础长度 + len(描述) + 1 + _头部预留字节
+        头部长度 = (头部长度 + 63) // 64 * 64
+    填充数 = 头部长度 - 基础长度 - len(描述) - 1
+    if 填充数 < 0:
+        raise ValueError(f"npy 头部空间不足: 形状 {形状}")
+    头部 = 描述 + " " * 填充数 + "\n"
+    return _NPY魔数 + struct.pack("<H", len(头部)) + 头部.encode("latin1")
+
+
+def _原子写入JSON(路径: str, 数据: dict) -> None:
+    """写入临时文件后重命名，避免读到写了一半的 JSON"""
+    临时路径 = 路径 + ".tmp"
+    with open(临时路径, "w", encoding="utf-8") as f:
+        json.dump(数据, f, ensure_ascii=False, indent=2)
+    os.replace(临时路径, 路径)
+
+
+def _转为标签行(标签: Union[int, Sequence[int], np.ndarray], 标签维度: int) -> np.ndarray:
+    """将 one-hot 列表或动作索引转换为 uint8 one-hot 行"""
+    if np.isscalar(标签):
+        行 = np.zeros(标签维度, dtype=np.uint8)
+        行[int(标签)] = 1
+        return 行
+    行 = np.asarray(标签, dtype=np.uint8).ravel()
+    if 行.shape[0] != 标签维度:
+        raise ValueError(f"标签维度不匹配: 期望 {标签维度}, 实际 {行.shape[0]}")
+    return 行
+
+
+# ==================== 写入 ====================
+
+class 分片写入器:
+    """
+    增量写入单个分片
+    
+    图像和标签逐条追加到文件末尾，每 刷新间隔 条改写一次 npy 头部和索引，
+    因此录制中途崩溃也最多丢失最后一个刷新间隔内的数据。
+    """
+    
+    def __init__(self, 分片目录: str, 图像形状: Tuple[int, ...], 标签维度: int,
+                 来源: str = "录制", 刷新间隔: int = 50):
+        """
+        初始化分片写入器
+        
+        参数:
+            分片目录: 分片目录路径（不存在时自动创建）
+            图像形状: 单个样本的图像形状 (高, 宽, 通道)
+            标签维度: 动作数
+            来源: 记录在索引中的数据来源
+            刷新间隔: 每写入多少条样本刷新一次头部和索引
+        """
+        self.分片目录 = str(分片目录)
+        self.图像形状 = tuple(int(维度) for 维度 in 图像形状)
+        self.标签维度 = int(标签维度)
+        self.刷新间隔 = max(1, 刷新间隔)
+        
+        self._信息 = 分片信息(
+            图像形状=self.图像形状,
+            标签维度=self.标签维度,
+            类别计数=[0] * self.标签维度,
+            创建时间=datetime.now().isoformat(),
+            来源=来源,
+        )
+        self._已关闭 = False
+        
+        os.makedirs(self.分片目录, exist_ok=True)
+        self._图像文件 = open(os.path.join(self.分片目录, 图像文件名), "wb")
+        self._标签文件 = open(os.path.join(self.分片目录, 标签文件名), "wb")
+        self._图像头长度 = self._写入头部(self._图像文件, None, self.图像形状)
+        self._标签头长度 = self._写入头部(self._标签文件, None, (self.标签维度,))
+        self._写入索引()
+    
+    @property
+    def 样本数(self) -> int:
+        """已写入的样本数"""
+        return self._信息.样本数
+    
+    def 写入(self, 图像: np.ndarray, 标签: Union[int, Sequence[int], np.ndarray]) -> None:
+        """
+        追加一条样本
+        
+        参数:
+            图像: uint8 图像，形状必须与 图像形状 一致
+            标签: one-hot 列表/数组，或动作索引
+        """
+        if self._已关闭:
+            raise RuntimeError("分片写入器已关闭")
+        
+        图像 = np.ascontiguousarray(图像, dtype=np.uint8)
+        if 图像.shape != self.图像形状:
+            raise ValueError(f"图像形状不匹配: 期望 {self.图像形状}, 实际 {图像.shape}")
+        标签行 = _转为标签行(标签, self.标签维度)
+        
+        self._图像文件.write(图像.tobytes())
+        self._标签文件.write(标签行.tobytes())
+        self._信息.样本数 += 1
+        self._信息.类别计数[int(np.argmax(标签行))] += 1
+        
+        if self._信息.样本数 % self.刷新间隔 == 0:
+            self.刷新()
+    
+    def 批量写入(self, 图像: np.ndarray, 标签: np.ndarray) -> None:
+        """
+        一次追加多条样本
+        
+        参数:
+            图像: uint8 图像数组 (样本数, *图像形状)
+            标签: one-hot 标签数组 (样本数, 标签维度)
+        """
+        if self._已关闭:
+            raise RuntimeError("分片写入器已关闭")
+        
+        图像 = np.ascontiguousarray(图像, dtype=np.uint8)
+        标签 = np.ascontiguousarray(标签, dtype=np.uint8)
+        if 图像.shape[1:] != self.图像形状:
+            raise ValueError(f"图像形状不匹配: 期望 {self.图像形状}, 实际 {图像.shape[1:]}")
+        if 标签.shape != (len(图像), self.标签维度):
+            raise ValueError(f"标签形状不匹配: 期望 {(len(图像), self.标签维度)}, 实际 {标签.shape}")
+        
+        self._图像文件.write(图像.data)
+        self._标签文件.write(标签.data)
+        
+        之前 = self._信息.样本数
+        self._信息.样本数 += len(图像)
+        计数 = np.bincount(np.argmax(标签, axis=1), minlength=self.标签维度)
+        for 类别 in np.flatnonzero(计数):
+            self._信息.类别计数[类别] += int(计数[类别])
+        
+        if 之前 // self.刷新间隔 != self._信息.样本数 // self.刷新间隔:
+            self.刷新()
+    
+    def 刷新(self) -> None:
+        """改写 npy 头部中的样本数并更新索引，使已写入的数据可被读取"""
+        for 文件, 头长度, 形状 in (
+            (self._图像文件, self._图像头长度, self.图像形状),
+            (self._标签文件, self._标签头长度, (self.标签维度,)),
+        ):
+            文件.flush()
+            位置 = 文件.tell()
+            self._写入头部(文件, 头长度, 形状)
+            文件.seek(位置)
+            文件.flush()
+        self._写入索引()
+    
+    def 关闭(self) -> 分片信息:
+        """
+        完成分片写入
+        
+        返回:
+            分片信息
+        """
+        if self._已关闭:
+            return self._信息
+        self._信息.已完成 = True
+        self.刷新()
+        self._图像文件.close()
+        self._标签文件.close()
+        self._已关闭 = True
+        return self._信息
+    
+    def _写入头部(self, 文件, 头长度: Optional[int], 单样本形状: Tuple[int, ...]) -> int:
+        """在文件开头写入 npy 头部，返回头部长度"""
+        头部 = _构造npy头((self._信息.样本数,) + 单样本形状, 头长度)
+        文件.seek(0)
+        文件.write(头部)
+        return len(头部)
+    
+    def _写入索引(self) -> None:
+        """写入索引文件"""
+        _原子写入JSON(os.path.join(self.分片目录, 索引文件名), self._信息.to_dict())
+    
+    def __enter__(self) -> '分片写入器':
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.关闭()
+
+
+class 数据集写入器:
+    """
+    按分片写入训练数据
+    
+    每个分片写满 每分片样本数 后自动关闭并开始下一个编号的分片，
+    分片在写入第一条样本时才创建。
+    """
+    
+    def __init__(self, 数据目录: str, 图像形状: Tuple[int, ...], 标签维度: int,
+                 每分片样本数: int = 500, 前缀: str = 默认前缀,
+                 起始编号: Optional[int] = None, 刷新间隔: int = 50):
+        """
+        初始化数据集写入器
+        
+        参数:
+            数据目录: 数据保存目录
+            图像形状: 单个样本的图像形状 (高, 宽, 通道)
+            标签维度: 动作数
+            每分片样本数: 每个分片的样本数
+            前缀: 分片目录名前缀
+            起始编号: 第一个分片编号，None 表示使用第一个未被占用的编号
+            刷新间隔: 每写入多少条样本刷新一次头部和索引
+        """
+        self.数据目录 = str(数据目录)
+        self.图像形状 = tuple(图像形状)
+        self.标签维度 = 标签维度
+        self.每分片样本数 = max(1, 每分片样本数)
+        self.前缀 = 前缀
+        self.刷新间隔 = 刷新间隔
+        
+        os.makedirs(self.数据目录, exist_ok=True)
+        self.分片编号 = 起始编号 if 起始编号 is not None else 获取下一个编号(self.数据目录, 前缀)
+        self.总样本数 = 0
+        self._当前分片: Optional[分片写入器] = None
+    
+    @property
+    def 当前分片路径(self) -> str:
+        """当前（或下一个）分片目录路径"""
+        return os.path.join(self.数据目录, f"{self.前缀}-{self.分片编号}")
+    
+    @property
+    def 当前分片样本数(self) -> int:
+        """当前分片已写入的样本数"""
+        return self._当前分片.样本数 if self._当前分片 is not None else 0
+    
+    def 写入(self, 图像: np.ndarray, 标签: Union[int, Sequence[int], np.ndarray]) -> Optional[str]:
+        """
+        写入一条样本
+        
+        返回:
+            若本次写入使分片写满，返回已完成的分片路径，否则返回 None
+        """
+        if self._当前分片 is None:
+            while os.path.exists(self.当前分片路径) or os.path.exists(self.当前分片路径 + ".npy"):
+                self.分片编号 += 1
+            self._当前分片 = 分片写入器(
+                self.当前分片路径, self.图像形状, self.标签维度, 刷新间隔=self.刷新间隔
+            )
+        
+        self._当前分片.写入(图像, 标签)
+        self.总样本数 += 1
+        
+        if self._当前分片.样本数 >= self.每分片样本数:
+            return self._完成当前分片()
+        return None
+    
+    def 关闭(self) -> Optional[str]:
+        """
+        关闭写入器，完成未写满的分片
+        
+        返回:
+            最后完成的分片路径，没有未完成分片时返回 None
+        """
+        if self._当前分片 is None:
+            return None
+        return self._完成当前分片()
+    
+    def _完成当前分片(self) -> str:
+        """关闭当前分片并前进到下一个编号"""
+        路径 = self.当前分片路径
+        self._当前分片.关闭()
+        self._当前分片 = None
+        self.分片编号 += 1
+        return 路径
+    
+    def __enter__(self) -> '数据集写入器':
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.关闭()
+
+
+class 后台数据集写入器:
+    """
+    在后台线程中写入训练数据
+    
+    采集循环只把样本放入有界队列后立即返回，磁盘写入和头部刷新都在写入线程中完成；
+    队列满时 提交 会阻塞等待（背压），阻塞次数和时间可用于在进度中提示磁盘跟不上。
+    提交的图像在写入前不会被复制，调用方提交后不能再修改它们。
+    
+    设置帧环时样本中的图像为已固定的帧环槽位引用，写入线程从槽位读取并在写入后释放固定，
+    录制循环不再为每帧分配和复制整帧。
+    """
+    
+    _结束标记 = object()
+    
+    def __init__(self, 写入器: 数据集写入器, 队列长度: int = 8, 帧环=None):
+        """
+        初始化后台写入器并启动写入线程
+        
+        参数:
+            写入器: 实际执行写入的数据集写入器
+            队列长度: 最多排队的提交批次数
+            帧环: 可选的 核心.帧环.帧环，设置后提交的图像为该帧环中已固定的帧引用
+        """
+        self.写入器 = 写入器
+        self.帧环 = 帧环
+        self.队列长度 = max(1, 队列长度)
+        self._队列: queue.Queue = queue.Queue(maxsize=self.队列长度)
+        self._完成分片: List[str] = []
+        self._锁 = threading.Lock()
+        self._错误: Optional[BaseException] = None
+        self._已关闭 = False
+        
+        self.已提交样本数 = 0
+        self.阻塞次数 = 0
+        self.阻塞时间 = 0.0
+        
+        self._线程 = threading.Thread(target=self._写入循环, name="数据集写入", daemon=True)
+        self._线程.start()
+    
+    @property
+    def 队列深度(self) -> int:
+        """排队等待写入的批次数"""
+        return self._队列.qsize()
+    
+    @property
+    def 当前分片样本数(self) -> int:
+        """按已提交样本计算的当前分片样本数（包含尚未落盘的样本）"""
+        return self.已提交样本数 % self.写入器.每分片样本数
+    
+    @property
+    def 分片编号(self) -> int:
+        """写入线程正在写入的分片编号"""
+        return self.写入器.分片编号
+    
+    def 写入(self, 图像: np.ndarray, 标签: Union[int, Sequence[int], np.ndarray]) -> None:
+        """提交一条样本"""
+        self.提交([(图像, 标签)])
+    
+    def 提交(self, 样本列表: Sequence) -> None:
+        """
+        提交一批 (图像, 标签) 样本
+        
+        参数:
+            样本列表: (图像, 标签) 序列，例如一个片段的帧缓冲区
+        """
+        if self._已关闭:
+            raise RuntimeError("后台数据集写入器已关闭")
+        self._检查错误()
+        if len(样本列表) == 0:
+            return
+        
+        try:
+            self._队列.put_nowait(样本列表)
+        except queue.Full:
+            开始 = time.perf_counter()
+            self._队列.put(样本列表)
+            self.阻塞次数 += 1
+            self.阻塞时间 += time.perf_counter() - 开始
+        self.已提交样本数 += len(样本列表)
+    
+    def 取完成分片(self) -> List[str]:
+        """
+        取出自上次调用以来写满的分片路径
+        
+        返回:
+            分片目录路径列表
+        """
+        with self._锁:
+            结果, self._完成分片 = self._完成分片, []
+        return 结果
+    
+    def 关闭(self) -> Optional[str]:
+        """
+        等待队列写完并关闭写入器
+        
+        返回:
+            最后完成的（未写满的）分片路径，没有时返回 None
+        """
+        if not self._已关闭:
+            self._已关闭 = True
+            self._队列.put(self._结束标记)
+            self._线程.join()
+        try:
+            return self.写入器.关闭()
+        finally:
+            self._检查错误()
+    
+    def _写入循环(self) -> None:
+        """写入线程: 依次写入队列中的批次"""
+        while True:
+            批次 = self._队列.get()
+            if 批次 is self._结束标记:
+                return
+            if self._错误 is not None:
+                self._释放批次(批次)
+                continue
+            已处理 = 0
+            try:
+                for 图像, 标签 in 批次:
+                    已处理 += 1
+                    if self.帧环 is not None:
+                        完成分片 = self._读取并写入(图像, 标签)
+                    else:
+                        完成分片 = self.写入器.写入(图像, 标签)
+                    if 完成分片:
+                        with self._锁:
+                            self._完成分片.append(完成分片)
+            except BaseException as e:
+                日志.error(f"写入训练数据失败: {e}")
+                self._错误 = e
+                self._释放批次(批次[已处理:])
+    
+    def _读取并写入(self, 引用, 标签) -> Optional[str]:
+        """从帧环槽位读取图像写入，之后释放该槽位的固定"""
+        try:
+            图像 = self.帧环.读取(引用)
+            if 图像 is None:
+                raise RuntimeError(f"帧环槽位 {引用.槽号} 在写入前被覆盖")
+            return self.写入器.写入(图像, 标签)
+        finally:
+            self.帧环.释放(引用)
+    
+    def _释放批次(self, 批次: Sequence) -> None:
+        """释放未写入样本固定的帧环槽位"""
+        if self.帧环 is None:
+            return
+        for 引用, _ in 批次:
+            self.帧环.释放(引用)
+    
+    def _检查错误(self) -> None:
+        """写入线程出错后，之后的每次调用都在调用线程中抛出该错误"""
+        if self._错误 is not None:
+            raise self._错误
+    
+    def __enter__(self) -> '后台数据集写入器':
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.关闭()
+
+
+# ==================== 读取 ====================
+
+def 是否分片目录(路径: str) -> bool:
+    """判断路径是否为列式数据分片目录"""
+    return os.path.isdir(路径) and os.path.isfile(os.path.join(路径, 索引文件名))
+
+
+def 读取分片信息(分片目录: str) -> 分片信息:
+    """读取分片索引"""
+    with open(os.path.join(分片目录, 索引文件名), "r", encoding="utf-8") as f:
+        return 分片信息.from_dict(json.load(f))
+
+
+def 加载分片(分片目录: str, mmap模式: Optional[str] = "r") -> 样本视图:
+    """
+    加载分片
+    
+    参数:
+        分片目录: 分片目录路径
+        mmap模式: 传给 np.load 的 mmap_mode，None 表示完整读入内存
+    
+    返回:
+        样本视图
+    """
+    图像 = np.load(os.path.join(分片目录, 图像文件名), mmap_mode=mmap模式)
+    标签 = np.load(os.path.join(分片目录, 标签文件名), mmap_mode=mmap模式)
+    # 写入器中途崩溃时两个文件的头部可能相差一个刷新周期以内，取较小者
+    数量 = min(len(图像), len(标签))
+    return 样本视图(图像[:数量], 标签[:数量])
+
+
+def 加载样本(路径: str, mmap模式: Optional[str] = "r") -> 样本视图:
+    """
+    加载任意格式的训练数据（分片目录或旧的 pickle .npy 文件）
+    
+    参数:
+        路径: 分片目录或 .npy 文件路径
+        mmap模式: 分片目录的 mmap_mode，旧格式总是完整读入
+    
+    返回:
+        样本视图
+    """
+    if 是否分片目录(路径):
+        return 加载分片(路径, mmap模式)
+    return _加载旧格式(路径)
+
+
+def 读取标签(路径: str) -> np.ndarray:
+    """
+    只读取标签
+    
+    分片目录只读取 标签.npy（几 KB），不会触及图像数据
+    
+    返回:
+        标签数组 (样本数, 动作数)
+    """
+    if 是否分片目录(路径):
+        return 加载分片(路径, mmap模式="r").标签
+    return _加载旧格式(路径).标签
+
+
+def 读取类别计数(路径: str) -> Dict[int, int]:
+    """
+    统计各动作类别的样本数
+    
+    分片目录直接读取索引中的计数
+    
+    返回:
+        {类别索引: 样本数}
+    """
+    if 是否分片目录(路径):
+        信息 = 读取分片信息(路径)
+        if 信息.已完成 and sum(信息.类别计数) == 信息.样本数:
+            return {类别: 数量 for 类别, 数量 in enumerate(信息.类别计数) if 数量 > 0}
+    
+    标签 = 读取标签(路径)
+    if len(标签) == 0:
+        return {}
+    类别 = np.argmax(标签, axis=1) if 标签.ndim == 2 else 标签.astype(np.int64)
+    值, 数量 = np.unique(类别, return_counts=True)
+    return {int(v): int(n) for v, n in zip(值, 数量)}
+
+
+def 读取样本数(路径: str) -> int:
+    """获取样本数（分片目录只读取索引）"""
+    if 是否分片目录(路径):
+        return 读取分片信息(路径).样本数
+    return len(np.load(路径, allow_pickle=True))
+
+
+def 获取数据大小(路径: str) -> int:
+    """获取数据占用的字节数（分片目录为所有文件之和）"""
+    if os.path.isdir(路径):
+        return sum(
+            os.path.getsize(os.path.join(路径, 文件名))
+            for 文件名 in os.listdir(路径)
+            if os.path.isfile(os.path.join(路径, 文件名))
+        )
+    return os.path.getsize(路径)
+
+
+def 删除数据(路径: str) -> None:
+    """删除分片目录或数据文件"""
+    if os.path.isdir(路径):
+        shutil.rmtree(路径)
+    else:
+        os.remove(路径)
+
+
+def _加载旧格式(文件路径: str) -> 样本视图:
+    """加载旧的 [图像, 动作] pickle 对象数组"""
+    数据 = np.load(文件路径, allow_pickle=True)
+    if len(数据) == 0:
+        return 样本视图(np.zeros((0,), dtype=np.uint8), np.zeros((0,), dtype=np.uint8))
+    图像 = np.stack([np.asarray(样本[0], dtype=np.uint8) for 样本 in 数据])
+    标签 = np.asarray([np.asarray(样本[1]).ravel() for 样本 in 数据])
+    return 样本视图(图像, 标签)
+
+
+def _编号(名称: str, 前缀: str) -> Optional[int]:
+    """从 前缀-N 或 前缀-N.npy 中解析编号"""
+    匹配 = re.fullmatch(re.escape(前缀) + r"-(\d+)(\.npy)?", 名称)
+    return int(匹配.group(1)) if 匹配 else None
+
+
+def 列出数据集(数据目录: str, 前缀: str = 默认前缀) -> List[str]:
+    """
+    列出目录中的训练数据（分片目录和旧 .npy 文件），按编号排序
+    
+    同一编号同时存在分片目录和旧文件时（转换后保留了原文件）只返回分片目录
+    
+    返回:
+        路径列表
+    """
+    if not os.path.isdir(数据目录):
+        return []
+    
+    按编号: Dict[int, str] = {}
+    其他: List[str] = []
+    for 名称 in os.listdir(数据目录):
+        路径 = os.path.join(数据目录, 名称)
+        编号 = _编号(名称, 前缀)
+        if 是否分片目录(路径):
+            if 编号 is None:
+                其他.append(路径)
+            else:
+                按编号[编号] = 路径
+        elif 名称.endswith(".npy") and 前缀 in 名称 and os.path.isfile(路径):
+            if 编号 is None:
+                其他.append(路径)
+            elif 编号 not in 按编号:
+                按编号[编号] = 路径
+    return [按编号[编号] for 编号 in sorted(按编号)] + sorted(其他)
+
+
+def 获取下一个编号(数据目录: str, 前缀: str = 默认前缀) -> int:
+    """获取第一个既没有分片目录也没有旧文件的编号"""
+    编号 = 1
+    while (os.path.exists(os.path.join(数据目录, f"{前缀}-{编号}"))
+           or os.path.exists(os.path.join(数据目录, f"{前缀}-{编号}.npy"))):
+        编号 += 1
+    return 编号
+
+
+# ==================== 转换 ====================
+
+def 转换旧格式文件(文件路径: str, 输出目录: Optional[str] = None,
+                   删除原文件: bool = False) -> str:
+    """
+    将旧的 pickle .npy 文件转换为分片目录
+    
+    参数:
+        文件路径: 旧格式文件路径（如 数据/训练数据-3.npy）
+        输出目录: 分片目录路径，None 表示与原文件同名（去掉 .npy）
+        删除原文件: 转换并校验成功后是否删除原文件
+    
+    返回:
+        分片目录路径
+    """
+    if 输出目录 is None:
+        输出目录 = os.path.splitext(文件路径)[0]
+    
+    旧数据 = _加载旧格式(文件路径)
+    if len(旧数据) == 0:
+        raise ValueError(f"文件中没有样本: {文件路径}")
+    
+    临时目录 = 输出目录 + ".converting"
+    if os.path.exists(临时目录):
+        shutil.rmtree(临时目录)
+    
+    with 分片写入器(临时目录, 旧数据.图像.shape[1:], 旧数据.标签.shape[1],
+                    来源="转换", 刷新间隔=len(旧数据)) as 写入器:
+        for 图像, 标签 in 旧数据:
+            写入器.写入(图像, 标签)
+    
+    # 校验
+    新数据 = 加载分片(临时目录)
+    if not (np.array_equal(新数据.图像, 旧数据.图像) and np.array_equal(新数据.标签, 旧数据.标签)):
+        shutil.rmtree(临时目录)
+        raise ValueError(f"转换校验失败: {文件路径}")
+    del 新数据
+    
+    if os.path.exists(输出目录):
+        shutil.rmtree(输出目录)
+    os.replace(临时目录, 输出目录)
+    
+    if 删除原文件:
+        os.remove(文件路径)
+    
+    日志.info(f"已转换: {文件路径} -> {输出目录} ({len(旧数据)} 个样本)")
+    return 输出目录
+
+
+def 批量转换(数据目录: str, 前缀: str = 默认前缀, 删除原文件: bool = False) -> List[str]:
+    """
+    转换目录中所有旧格式训练数据文件
+    
+    返回:
+        新建的分片目录路径列表
+    """
+    结果 = []
+    for 路径 in 列出数据集(数据目录, 前缀):
+        if 是否分片目录(路径):
+            continue
+        try:
+            结果.append(转换旧格式文件(路径, 删除原文件=删除原文件))
+        except Exception as e:
+            日志.error(f"转换失败 {路径}: {e}")
+    return 结果
+
+
+def 主程序():
+    """命令行入口：转换数据目录中的旧格式文件"""
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    参数 = [值 for 值 in sys.argv[1:] if not 值.startswith("--")]
+    删除原文件 = "--删除原文件" in sys.argv
+    
+    if 参数:
+        数据目录 = 参数[0]
+    else:
+        from 配置.设置 import 数据保存路径
+        数据目录 = 数据保存路径
+    
+    print(f"\n📂 转换数据目录: {数据目录}")
+    结果 = 批量转换(数据目录, 删除原文件=删除原文件)
+    print(f"✅ 已转换 {len(结果)} 个文件")
+
+
+if __name__ == "__main__":
+    主程序()
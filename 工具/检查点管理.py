@@ -7,16 +7,29 @@
 - 加载检查点恢复训练
 - 管理检查点数量
 - 检查点元数据管理
+- 后台写入检查点（训练线程只等待内存快照）
+
+检查点文件格式:
+    新检查点保存为不压缩的 .npz 容器: 权重等数组各存为一个 .npy 成员，
+    其余数据（训练进度、指标、优化器状态中的标量等）存为 JSON 成员 "检查点.json"，
+    数组在 JSON 中以 {"__数组__": 成员名} 占位。数组成员不压缩，因此加载时可以
+    直接内存映射。旧版 pickle 格式的 .pt 检查点仍可加载。
 """
 
 import os
 import json
+import queue
+import struct
 import hashlib
+import zipfile
+import threading
 from datetime import datetime
 from dataclasses import dataclass, field, asdict
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Callable
 import logging
 
+import numpy as np
+
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 日志 = logging.getLogger(__name__)
@@ -56,6 +69,184 @@ class 检查点元数据:
         return cls(**数据)
 
 
+# ==================== 数组容器格式 ====================
+
+_数组标记 = "__数组__"
+_字典标记 = "__字典__"
+_结构成员名 = "检查点.json"
+
+
+def _是张量(值) -> bool:
+    """判断是否为 PyTorch 张量（不导入 torch）"""
+    return hasattr(值, 'detach') and hasattr(值, 'cpu') and hasattr(值, 'numpy')
+
+
+def _拆分数组(数据, 数组表: Dict[str, np.ndarray]):
+    """
+    把嵌套的检查点数据拆成可 JSON 序列化的结构和数组表
+
+    数组在这里被复制，返回后训练可以继续修改原权重。
+
+    参数:
+        数据: 检查点数据（字典、列表、标量、数组、张量的任意嵌套）
+        数组表: 输出参数，成员名 -> 数组副本
+
+    返回:
+        数组已替换为占位符的结构
+
+    异常:
+        TypeError: 数据中包含无法按此格式保存的对象
+    """
+    if isinstance(数据, np.ndarray) or _是张量(数据):
+        张量 = not isinstance(数据, np.ndarray)
+        数组 = 数据.detach().cpu().numpy() if 张量 else 数据
+        if 数组.dtype.hasobject:
+            raise TypeError("不支持对象类型的数组")
+        名称 = f"{len(数组表):05d}"
+        数组表[名称] = np.array(数组, copy=True)
+        占位 = {_数组标记: 名称}
+        if 张量:
+            占位['张量'] = True
+        return 占位
+    if isinstance(数据, np.generic):
+        return 数据.item()
+    if 数据 is None or isinstance(数据, (bool, int, float, str)):
+        return 数据
+    if isinstance(数据, (list, tuple)):
+        return [_拆分数组(项, 数组表) for 项 in 数据]
+    if isinstance(数据, dict):
+        if (all(isinstance(键, str) for 键 in 数据)
+                and _数组标记 not in 数据 and _字典标记 not in 数据):
+            return {键: _拆分数组(值, 数组表) for 键, 值 in 数据.items()}
+        # 非字符串键（如 PyTorch 优化器状态的整数键）按键值对列表保存
+        键值对 = []
+        for 键, 值 in 数据.items():
+            if not (键 is None or isinstance(键, (bool, int, float, str))):
+                raise TypeError(f"不支持的字典键类型: {type(键).__name__}")
+            键值对.append([键, _拆分数组(值, 数组表)])
+        return {_字典标记: 键值对}
+    raise TypeError(f"不支持的检查点数据类型: {type(数据).__name__}")
+
+
+def _转为张量(数组: np.ndarray):
+    """把数组还原为 PyTorch 张量，未安装 torch 时保持数组"""
+    try:
+        import torch
+    except ImportError:
+        return 数组
+    # 复制一份，内存映射的只读数组不能直接共享给张量
+    return torch.from_numpy(np.array(数组))
+
+
+def _合并数组(数据, 数组表: Dict[str, np.ndarray]):
+    """_拆分数组 的逆操作: 把占位符替换回数组"""
+    if isinstance(数据, dict):
+        if _数组标记 in 数据:
+            数组 = 数组表[数据[_数组标记]]
+            return _转为张量(数组) if 数据.get('张量') else 数组
+        if _字典标记 in 数据:
+            return {键: _合并数组(值, 数组表) for 键, 值 in 数据[_字典标记]}
+        return {键: _合并数组(值, 数组表) for 键, 值 in 数据.items()}
+    if isinstance(数据, list):
+        return [_合并数组(项, 数组表) for 项 in 数据]
+    return 数据
+
+
+class _校验写入流:
+    """
+    边写边计算 MD5 的文件包装
+
+    不提供 seek，zipfile 因此按流式方式写入（使用数据描述符，不回写本地文件头），
+    写入的字节与最终文件内容完全一致，校验和无需再读回文件计算。
+    """
+
+    def __init__(self, 文件):
+        self._文件 = 文件
+        self._md5 = hashlib.md5()
+        self.字节数 = 0
+
+    def write(self, 数据) -> int:
+        self._文件.write(数据)
+        self._md5.update(数据)
+        长度 = memoryview(数据).nbytes
+        self.字节数 += 长度
+        return 长度
+
+    def tell(self) -> int:
+        return self.字节数
+
+    def flush(self):
+        self._文件.flush()
+
+    @property
+    def 校验和(self) -> str:
+        return self._md5.hexdigest()
+
+
+def _写入数组容器(流, 结构: dict, 数组表: Dict[str, np.ndarray]):
+    """把结构和数组表写成不压缩的 .npz 容器"""
+    with zipfile.ZipFile(流, 'w', zipfile.ZIP_STORED, allowZip64=True) as 压缩包:
+        压缩包.writestr(_结构成员名, json.dumps(结构, ensure_ascii=False))
+        for 名称, 数组 in 数组表.items():
+            with 压缩包.open(名称 + '.npy', 'w', force_zip64=True) as 成员:
+                np.lib.format.write_array(成员, 数组, allow_pickle=False)
+
+
+def _映射数组成员(文件路径: str, 信息: zipfile.ZipInfo) -> np.ndarray:
+    """以只读内存映射方式打开容器中一个不压缩的 .npy 成员"""
+    with open(文件路径, 'rb') as f:
+        # 本地文件头: 固定 30 字节，文件名长度和扩展字段长度位于偏移 26、28
+        f.seek(信息.header_offset)
+        头部 = f.read(30)
+        文件名长度, 扩展长度 = struct.unpack('<HH', 头部[26:30])
+        f.seek(信息.header_offset + 30 + 文件名长度 + 扩展长度)
+        版本 = np.lib.format.read_magic(f)
+        if 版本 == (1, 0):
+            形状, fortran顺序, 类型 = np.lib.format.read_array_header_1_0(f)
+        else:
+            形状, fortran顺序, 类型 = np.lib.format.read_array_header_2_0(f)
+        偏移 = f.tell()
+    if int(np.prod(形状)) == 0:
+        return np.empty(形状, dtype=类型)
+    return np.memmap(文件路径, dtype=类型, mode='r', offset=偏移, shape=形状,
+                     order='F' if fortran顺序 else 'C')
+
+
+def _读取数组容器(文件路径: str, 内存映射: bool = False) -> dict:
+    """
+    读取 .npz 容器格式的检查点
+
+    参数:
+        文件路径: 检查点文件路径
+        内存映射: 是否以只读内存映射方式打开数组（不读入内存）
+
+    返回:
+        检查点数据字典
+    """
+    with zipfile.ZipFile(文件路径, 'r') as 压缩包:
+        结构 = json.loads(压缩包.read(_结构成员名).decode('utf-8'))
+        数组表 = {}
+        for 信息 in 压缩包.infolist():
+            if not 信息.filename.endswith('.npy'):
+                continue
+            名称 = 信息.filename[:-4]
+            if 内存映射 and 信息.compress_type == zipfile.ZIP_STORED:
+                数组表[名称] = _映射数组成员(文件路径, 信息)
+            else:
+                with 压缩包.open(信息) as 成员:
+                    数组表[名称] = np.lib.format.read_array(成员, allow_pickle=False)
+    return _合并数组(结构, 数组表)
+
+
+def _读取检查点文件(文件路径: str, 内存映射: bool = False) -> dict:
+    """按文件格式读取检查点（.npz 容器或旧版 pickle）"""
+    if zipfile.is_zipfile(文件路径):
+        return _读取数组容器(文件路径, 内存映射)
+    import pickle
+    with open(文件路径, 'rb') as f:
+        return pickle.load(f)
+
+
 class 检查点管理器:
     """管理训练检查点的保存和加载"""
     
@@ -63,13 +254,17 @@ class 检查点管理器:
     元数据文件名 = "metadata.json"
     最新检查点链接名 = "checkpoint_latest"
     
-    def __init__(self, 保存目录: str, 最大检查点数: int = 5):
+    def __init__(self, 保存目录: str, 最大检查点数: int = 5,
+                 异步写入: bool = False, 队列长度: int = 2):
         """
         初始化检查点管理器
         
         参数:
             保存目录: 检查点保存目录
             最大检查点数: 保留的最大检查点数量
+            异步写入: 是否在后台线程中写入检查点。启用后 保存检查点 只做内存快照，
+                      序列化、写盘、元数据更新和旧检查点清理都在写入线程中完成
+            队列长度: 异步写入时最多排队的快照数，队列满时 保存检查点 阻塞等待
         """
         self.保存目录 = 保存目录
         self.最大检查点数 = max(1, 最大检查点数)  # 至少保留1个
@@ -80,10 +275,22 @@ class 检查点管理器:
         
         # 加载现有元数据
         self._加载元数据()
+        
+        # 后台写入
+        self.异步写入 = 异步写入
+        self._写入队列: Optional[queue.Queue] = None
+        self._写入线程: Optional[threading.Thread] = None
+        self._写入错误: Optional[BaseException] = None
+        if 异步写入:
+            self._写入队列 = queue.Queue(maxsize=max(1, 队列长度))
+            self._写入线程 = threading.Thread(
+                target=self._写入循环, name="检查点写入", daemon=True
+            )
+            self._写入线程.start()
     
-    def _生成检查点文件名(self, epoch: int, batch: int) -> str:
+    def _生成检查点文件名(self, epoch: int, batch: int, 扩展名: str = ".npz") -> str:
         """生成检查点文件名"""
-        return f"checkpoint_epoch_{epoch:03d}_batch_{batch:04d}.pt"
+        return f"checkpoint_epoch_{epoch:03d}_batch_{batch:04d}{扩展名}"
     
     def _计算校验和(self, 文件路径: str) -> str:
         """计算文件MD5校验和"""
@@ -132,9 +339,12 @@ class 检查点管理器:
             '检查点列表': [项.to_dict() for 项 in self._元数据缓存]
         }
         
+        # 先写临时文件再替换，中断时不会留下半截的元数据
+        临时路径 = 元数据路径 + '.tmp'
         try:
-            with open(元数据路径, 'w', encoding='utf-8') as f:
+            with open(临时路径, 'w', encoding='utf-8') as f:
                 json.dump(数据, f, ensure_ascii=False, indent=2)
+            os.replace(临时路径, 元数据路径)
         except Exception as e:
             日志.error(f"保存元数据失败: {e}")
 
@@ -145,6 +355,9 @@ class 检查点管理器:
         """
         保存训练检查点
         
+        在调用线程中只对权重等数据做内存快照；序列化、写盘和元数据更新在
+        异步写入模式下由写入线程完成，否则在返回前完成。
+        
         参数:
             模型: 训练模型对象
             优化器状态: 优化器状态字典
@@ -154,18 +367,11 @@ class 检查点管理器:
             额外数据: 额外需要保存的数据
         
         返回:
-            检查点文件路径
+            检查点文件路径（异步写入时文件在写入线程提交后才出现）
         """
-        # 延迟导入，避免循环依赖
-        try:
-            import pickle
-        except ImportError:
-            日志.error("无法导入pickle模块")
-            raise
+        self._检查写入错误()
         
-        # 生成文件名和路径
-        文件名 = self._生成检查点文件名(当前epoch, 当前batch)
-        文件路径 = os.path.join(self.保存目录, 文件名)
+        创建时间 = datetime.now().isoformat()
         
         # 构建检查点数据
         检查点数据 = {
@@ -180,7 +386,7 @@ class 检查点管理器:
                 "loss": loss值,
             },
             "元数据": {
-                "创建时间": datetime.now().isoformat(),
+                "创建时间": 创建时间,
             }
         }
         
@@ -188,28 +394,68 @@ class 检查点管理器:
         if 额外数据:
             检查点数据["额外数据"] = 额外数据
         
-        # 保存检查点文件
+        # 内存快照: 数组在这里复制，之后训练可以继续更新权重
+        try:
+            数组表: Dict[str, np.ndarray] = {}
+            结构 = _拆分数组(检查点数据, 数组表)
+            扩展名 = ".npz"
+            
+            def 写入方法(流):
+                _写入数组容器(流, 结构, 数组表)
+        except TypeError as e:
+            # 无法拆成数组的数据（如直接保存的模型对象）退回旧版 pickle 格式
+            import pickle
+            日志.warning(f"检查点数据无法按数组格式保存，改用 pickle 格式: {e}")
+            内容 = pickle.dumps(检查点数据, protocol=pickle.HIGHEST_PROTOCOL)
+            扩展名 = ".pt"
+            
+            def 写入方法(流):
+                流.write(内容)
+        
+        # 生成文件名和路径
+        文件名 = self._生成检查点文件名(当前epoch, 当前batch, 扩展名)
+        文件路径 = os.path.join(self.保存目录, 文件名)
+        
+        任务 = (文件路径, 写入方法, 当前epoch, 当前batch, loss值, 创建时间)
+        if self._写入队列 is not None:
+            self._写入队列.put(任务)
+        else:
+            self._提交检查点(*任务)
+        
+        return 文件路径
+    
+    def _提交检查点(self, 文件路径: str, 写入方法: Callable,
+                    epoch: int, batch: int, loss值: float, 创建时间: str):
+        """
+        写入检查点文件并更新元数据
+        
+        先写入临时文件并在写入时计算校验和，落盘后再替换为正式文件名，
+        随后更新元数据、最新链接并清理旧检查点。
+        """
+        临时路径 = 文件路径 + '.tmp'
         try:
-            with open(文件路径, 'wb') as f:
-                pickle.dump(检查点数据, f)
+            with open(临时路径, 'wb') as f:
+                流 = _校验写入流(f)
+                写入方法(流)
+                流.flush()
+                os.fsync(f.fileno())
+            os.replace(临时路径, 文件路径)
             日志.info(f"检查点已保存: {文件路径}")
         except Exception as e:
             日志.error(f"保存检查点失败: {e}")
+            if os.path.exists(临时路径):
+                os.remove(临时路径)
             raise
         
-        # 获取文件大小和校验和
-        文件大小 = os.path.getsize(文件路径)
-        校验和 = self._计算校验和(文件路径)
-        
         # 创建元数据
         新元数据 = 检查点元数据(
             文件路径=文件路径,
-            创建时间=datetime.now().isoformat(),
-            epoch=当前epoch,
-            batch=当前batch,
+            创建时间=创建时间,
+            epoch=epoch,
+            batch=batch,
             loss值=loss值,
-            文件大小=文件大小,
-            校验和=校验和
+            文件大小=流.字节数,
+            校验和=流.校验和
         )
         
         # 更新元数据缓存
@@ -221,8 +467,47 @@ class 检查点管理器:
         
         # 清理旧检查点
         self.删除旧检查点()
+    
+    def _写入循环(self):
+        """写入线程: 依次提交队列中的检查点快照"""
+        while True:
+            任务 = self._写入队列.get()
+            try:
+                if 任务 is None:
+                    return
+                self._提交检查点(*任务)
+            except BaseException as e:
+                self._写入错误 = e
+            finally:
+                self._写入队列.task_done()
+    
+    def _等待写入(self):
+        """等待排队的检查点全部提交（在写入线程内调用时直接返回）"""
+        if self._写入队列 is not None and threading.current_thread() is not self._写入线程:
+            self._写入队列.join()
+    
+    def _检查写入错误(self):
+        """重新抛出写入线程中发生的错误"""
+        if self._写入错误 is not None:
+            错误, self._写入错误 = self._写入错误, None
+            raise 错误
+    
+    def 等待写入完成(self):
+        """
+        等待所有排队的检查点写入磁盘
         
-        return 文件路径
+        异常:
+            写入线程中保存检查点时发生的错误
+        """
+        self._等待写入()
+        self._检查写入错误()
+    
+    def 关闭(self):
+        """写完排队的检查点并停止写入线程"""
+        if self._写入线程 is not None and self._写入线程.is_alive():
+            self._写入队列.put(None)
+            self._写入线程.join()
+        self._检查写入错误()
     
     def _获取模型权重(self, 模型) -> dict:
         """获取模型权重，支持多种模型类型"""
@@ -281,7 +566,8 @@ class 检查点管理器:
 
     def 加载检查点(self, 检查点路径: str = None, 
                    epoch: int = None, 
-                   时间戳: str = None) -> Optional[dict]:
+                   时间戳: str = None,
+                   内存映射: bool = False) -> Optional[dict]:
         """
         加载检查点
         
@@ -289,6 +575,7 @@ class 检查点管理器:
             检查点路径: 指定检查点路径，None 则根据其他参数或加载最新
             epoch: 指定要加载的 epoch 编号
             时间戳: 指定要加载的时间戳（ISO格式字符串）
+            内存映射: 以只读内存映射方式打开权重数组（仅 .npz 格式）
             
         返回:
             检查点数据字典，加载失败返回 None
@@ -299,7 +586,7 @@ class 检查点管理器:
             - 如果指定了时间戳，加载最接近该时间戳的检查点
             - 如果都未指定，加载最新的检查点
         """
-        import pickle
+        self._等待写入()
         
         # 确定要加载的检查点路径
         if 检查点路径 is None:
@@ -320,17 +607,16 @@ class 检查点管理器:
             if not self._验证校验和(检查点路径, 元数据.校验和):
                 日志.error(f"检查点文件损坏: {检查点路径}")
                 # 尝试加载上一个检查点
-                return self._尝试加载备用检查点(检查点路径)
+                return self._尝试加载备用检查点(检查点路径, 内存映射)
         
         # 加载检查点
         try:
-            with open(检查点路径, 'rb') as f:
-                检查点数据 = pickle.load(f)
+            检查点数据 = _读取检查点文件(检查点路径, 内存映射)
             日志.info(f"检查点已加载: {检查点路径}")
             return 检查点数据
         except Exception as e:
             日志.error(f"加载检查点失败: {e}")
-            return self._尝试加载备用检查点(检查点路径)
+            return self._尝试加载备用检查点(检查点路径, 内存映射)
     
     def _按epoch查找检查点(self, 目标epoch: int) -> Optional[str]:
         """
@@ -404,7 +690,7 @@ class 检查点管理器:
                 return 元数据
         return None
     
-    def _尝试加载备用检查点(self, 排除路径: str) -> Optional[dict]:
+    def _尝试加载备用检查点(self, 排除路径: str, 内存映射: bool = False) -> Optional[dict]:
         """尝试加载备用检查点（排除指定路径）"""
         日志.info("尝试加载备用检查点...")
         
@@ -424,9 +710,7 @@ class 检查点管理器:
         # 尝试加载
         for 元数据 in 可用检查点:
             try:
-                import pickle
-                with open(元数据.文件路径, 'rb') as f:
-                    检查点数据 = pickle.load(f)
+                检查点数据 = _读取检查点文件(元数据.文件路径, 内存映射)
                 日志.info(f"已加载备用检查点: {元数据.文件路径}")
                 return 检查点数据
             except Exception as e:
@@ -442,6 +726,8 @@ class 检查点管理器:
         返回:
             检查点信息列表，按时间倒序排列
         """
+        self._等待写入()
+        
         # 刷新元数据（检查文件是否存在）
         有效检查点 = []
         
@@ -477,6 +763,8 @@ class 检查点管理器:
         返回:
             删除的检查点数量
         """
+        self._等待写入()
+        
         # 按epoch和batch排序
         self._元数据缓存.sort(key=lambda x: (x.epoch, x.batch), reverse=True)
         
@@ -503,6 +791,7 @@ class 检查点管理器:
     
     def 检查点存在(self) -> bool:
         """检查是否存在可用的检查点"""
+        self._等待写入()
         return self._获取最新检查点路径() is not None
     
     def 获取最新检查点信息(self) -> Optional[dict]:
@@ -512,6 +801,8 @@ class 检查点管理器:
     
     def 清空所有检查点(self):
         """清空所有检查点（谨慎使用）"""
+        self._等待写入()
+        
         for 元数据 in self._元数据缓存:
             if os.path.exists(元数据.文件路径):
                 try:
@@ -539,6 +830,8 @@ class 检查点管理器:
         返回:
             检查点验证结果对象
         """
+        self._等待写入()
+        
         # 检查文件是否存在
         if not os.path.exists(检查点路径):
             return 检查点验证结果(
@@ -574,10 +867,10 @@ class 检查点管理器:
                 )
         
         # 尝试加载检查点数据验证格式
+        import pickle
         try:
-            import pickle
-            with open(检查点路径, 'rb') as f:
-                检查点数据 = pickle.load(f)
+            # 数组以内存映射方式打开，验证格式时不把权重读入内存
+            检查点数据 = _读取检查点文件(检查点路径, 内存映射=True)
             
             # 验证必需字段
             必需字段 = ['版本', '模型权重', '优化器状态', '训练进度', '指标', '元数据']
@@ -599,7 +892,7 @@ class 检查点管理器:
                     错误消息="检查点训练进度缺少 epoch 或 batch 信息"
                 )
             
-        except pickle.UnpicklingError as e:
+        except (pickle.UnpicklingError, zipfile.BadZipFile, KeyError, ValueError) as e:
             return 检查点验证结果(
                 有效=False,
                 错误类型="反序列化错误",
@@ -624,6 +917,8 @@ class 检查点管理器:
         返回:
             建议的检查点路径，如果没有可用的返回 None
         """
+        self._等待写入()
+        
         # 按 epoch 和 batch 排序，获取可用的检查点
         可用检查点 = [
             元数据 for 元数据 in self._元数据缓存
@@ -647,7 +942,8 @@ class 检查点管理器:
     def 安全加载检查点(self, 检查点路径: str = None,
                        epoch: int = None,
                        时间戳: str = None,
-                       抛出异常: bool = False) -> Optional[dict]:
+                       抛出异常: bool = False,
+                       内存映射: bool = False) -> Optional[dict]:
         """
         安全加载检查点，带完整的损坏检测和处理
         
@@ -656,6 +952,7 @@ class 检查点管理器:
             epoch: 指定要加载的 epoch 编号
             时间戳: 指定要加载的时间戳（ISO格式字符串）
             抛出异常: 如果为 True，损坏时抛出异常而不是返回 None
+            内存映射: 以只读内存映射方式打开权重数组（仅 .npz 格式）
             
         返回:
             检查点数据字典，加载失败返回 None
@@ -663,7 +960,7 @@ class 检查点管理器:
         异常:
             检查点损坏错误: 当检查点损坏且 抛出异常=True 时
         """
-        import pickle
+        self._等待写入()
         
         # 确定要加载的检查点路径
         if 检查点路径 is None:
@@ -697,14 +994,14 @@ class 检查点管理器:
             # 尝试加载备用检查点
             if 建议路径:
                 日志.info(f"尝试加载备用检查点: {建议路径}")
-                return self.安全加载检查点(检查点路径=建议路径, 抛出异常=抛出异常)
+                return self.安全加载检查点(检查点路径=建议路径, 抛出异常=抛出异常,
+                                       内存映射=内存映射)
             
             return None
         
         # 加载检查点
         try:
-            with open(检查点路径, 'rb') as f:
-                检查点数据 = pickle.load(f)
+            检查点数据 = _读取检查点文件(检查点路径, 内存映射)
             日志.info(f"检查点已安全加载: {检查点路径}")
             return 检查点数据
         except Exception as e:
@@ -721,7 +1018,8 @@ class 检查点管理器:
             
             if 建议路径:
                 日志.info(f"尝试加载备用检查点: {建议路径}")
-                return self.安全加载检查点(检查点路径=建议路径, 抛出异常=抛出异常)
+                return self.安全加载检查点(检查点路径=建议路径, 抛出异常=抛出异常,
+                                       内存映射=内存映射)
             
             return None
 
@@ -17,6 +17,8 @@ from dataclasses import dataclass, field
 import numpy as np
 import logging
 
+from 工具.数据集格式 import 是否分片目录, 加载分片, 样本视图
+
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 日志 = logging.getLogger(__name__)
@@ -85,12 +87,13 @@ class 模型评估器:
         self.动作定义 = 动作定义
         self.类别数 = len(动作定义)
     
-    def 评估(self, 测试数据: List[Tuple[np.ndarray, int]]) -> 评估结果:
+    def 评估(self, 测试数据: List[Tuple[np.ndarray, int]], 批次大小: int = 64) -> 评估结果:
         """
         在测试数据上评估模型
         
         参数:
             测试数据: [(图像, 标签), ...] 列表
+            批次大小: 每次预测的样本数
             
         返回:
             评估结果对象
@@ -110,21 +113,16 @@ class 模型评估器:
         
         日志.info(f"开始评估，共 {len(测试数据)} 个样本...")
         
-        for i, (图像, 标签) in enumerate(测试数据):
-            try:
-                # 预测
-                预测结果 = self.模型.predict(np.expand_dims(图像, axis=0))
-                预测类别 = int(np.argmax(预测结果))
-                
-                预测列表.append(预测类别)
-                真实列表.append(标签)
-                
-                if (i + 1) % 100 == 0:
-                    日志.info(f"  进度: {i + 1}/{len(测试数据)}")
-                    
-            except Exception as e:
-                日志.warning(f"预测样本 {i} 失败: {e}")
-                continue
+        批次大小 = max(1, 批次大小)
+        for 起点 in range(0, len(测试数据), 批次大小):
+            块 = 测试数据[起点:起点 + 批次大小]
+            预测类别, 真实类别, _ = self.预测批次(块, 起点)
+            预测列表.extend(预测类别)
+            真实列表.extend(真实类别)
+            
+            结束 = 起点 + len(块)
+            if 结束 // 1000 > 起点 // 1000:
+                日志.info(f"  进度: {结束}/{len(测试数据)}")
         
         # 生成混淆矩阵
         混淆矩阵 = self.生成混淆矩阵(预测列表, 真实列表)
@@ -138,6 +136,50 @@ class 模型评估器:
         
         return 结果
     
+    def 预测批次(self, 样本块, 起始序号: int = 0) -> Tuple[List[int], List[int], int]:
+        """
+        对一块样本执行一次批量预测
+        
+        模型有 批量预测 方法时优先使用，否则把整块图像堆叠后调用 predict。
+        整块预测失败时逐个样本重试，跳过失败的样本。
+        
+        参数:
+            样本块: [(图像, 标签), ...] 或 样本视图
+            起始序号: 该块第一个样本的序号（用于日志）
+            
+        返回:
+            (预测类别列表, 真实标签列表, 失败样本数)
+        """
+        if isinstance(样本块, 样本视图):
+            图像批次 = np.asarray(样本块.图像)
+            标签列表 = list(样本块.标签)
+        else:
+            图像批次 = np.stack([样本[0] for 样本 in 样本块])
+            标签列表 = [样本[1] for 样本 in 样本块]
+        
+        try:
+            if hasattr(self.模型, '批量预测'):
+                输出 = np.asarray(self.模型.批量预测(图像批次))
+            else:
+                输出 = np.asarray(self.模型.predict(图像批次))
+            预测类别 = np.argmax(输出.reshape(len(标签列表), -1), axis=1)
+            return [int(类别) for 类别 in 预测类别], 标签列表, 0
+        except Exception as e:
+            日志.warning(f"批量预测样本 {起始序号}-{起始序号 + len(标签列表) - 1} 失败，逐个重试: {e}")
+        
+        预测列表 = []
+        真实列表 = []
+        失败数 = 0
+        for 偏移, (图像, 标签) in enumerate(zip(图像批次, 标签列表)):
+            try:
+                预测结果 = self.模型.predict(np.expand_dims(图像, axis=0))
+                预测列表.append(int(np.argmax(预测结果)))
+                真实列表.append(标签)
+            except Exception as e:
+                失败数 += 1
+                日志.warning(f"预测样本 {起始序号 + 偏移} 失败: {e}")
+        return 预测列表, 真实列表, 失败数
+    
     def 生成混淆矩阵(self, 预测: List[int], 真实: List[int]) -> np.ndarray:
         """
         生成混淆矩阵
@@ -1073,8 +1115,8 @@ class 测试数据加载器:
             日志.warning(f"数据路径不存在: {路径}")
             return []
         
-        # 判断是文件还是目录
-        if os.path.isfile(路径):
+        # 判断是文件、列式数据分片还是目录
+        if os.path.isfile(路径) or 是否分片目录(路径):
             return self._加载单个文件(路径, 最大样本数)
         else:
             return self._加载目录(路径, 测试比例, 随机种子, 最大样本数)
@@ -1084,7 +1126,9 @@ class 测试数据加载器:
         扩展名 = os.path.splitext(文件路径)[1].lower()
         
         try:
-            if 扩展名 == '.npy':
+            if 是否分片目录(文件路径):
+                return self._加载分片目录(文件路径, 最大样本数)
+            elif 扩展名 == '.npy':
                 return self._加载npy文件(文件路径, 最大样本数)
             elif 扩展名 == '.npz':
                 return self._加载npz文件(文件路径, 最大样本数)
@@ -1099,6 +1143,18 @@ class 测试数据加载器:
             日志.error(f"加载文件失败 {文件路径}: {e}")
             return []
     
+    def _加载分片目录(self, 分片目录: str, 最大样本数: int = None) -> List[Tuple[np.ndarray, int]]:
+        """加载列式数据分片（mmap 读取，只复制需要的样本）"""
+        数据 = 加载分片(分片目录)
+        if 最大样本数:
+            数据 = 数据[:最大样本数]
+        
+        标签列表 = np.argmax(数据.标签, axis=1)
+        测试数据 = [(np.array(图像), int(标签)) for 图像, 标签 in zip(数据.图像, 标签列表)]
+        
+        日志.info(f"从 {分片目录} 加载了 {len(测试数据)} 个样本")
+        return 测试数据
+    
     def _加载npy文件(self, 文件路径: str, 最大样本数: int = None) -> List[Tuple[np.ndarray, int]]:
         """加载 .npy 格式文件"""
         数据 = np.load(文件路径, allow_pickle=True)
@@ -1259,8 +1315,9 @@ class 测试数据加载器:
         数据文件列表 = []
         for 文件名 in os.listdir(目录路径):
             扩展名 = os.path.splitext(文件名)[1].lower()
-            if 扩展名 in self.支持格式:
-                数据文件列表.append(os.path.join(目录路径, 文件名))
+            文件路径 = os.path.join(目录路径, 文件名)
+            if 扩展名 in self.支持格式 or 是否分片目录(文件路径):
+                数据文件列表.append(文件路径)
         
         if not 数据文件列表:
             日志.warning(f"目录中没有找到支持的数据文件: {目录路径}")
@@ -1798,45 +1855,45 @@ class 批量评估器:
         日志.info(f"开始批量评估，共 {总样本数} 个样本...")
         
         # 创建进度条
+        进度条 = None
         if 显示进度 and self._tqdm可用:
             from tqdm import tqdm
-            迭代器 = tqdm(测试数据, desc="评估进度", unit="样本")
-        else:
-            迭代器 = 测试数据
+            进度条 = tqdm(total=总样本数, desc="评估进度", unit="样本")
         
         处理计数 = 0
         错误计数 = 0
         上次进度时间 = 开始时间
+        批次大小 = max(1, 批次大小)
         
-        for i, (图像, 标签) in enumerate(迭代器):
-            try:
-                # 预测
-                预测结果 = self.模型.predict(np.expand_dims(图像, axis=0))
-                预测类别 = int(np.argmax(预测结果))
-                
-                预测列表.append(预测类别)
-                真实列表.append(标签)
-                处理计数 += 1
-                
-            except Exception as e:
-                错误计数 += 1
-                if 错误计数 <= 5:  # 只记录前5个错误
-                    日志.warning(f"预测样本 {i} 失败: {e}")
-                continue
+        for 起点 in range(0, 总样本数, 批次大小):
+            块 = 测试数据[起点:起点 + 批次大小]
+            预测类别, 真实类别, 失败数 = self.评估器.预测批次(块, 起点)
+            
+            预测列表.extend(预测类别)
+            真实列表.extend(真实类别)
+            处理计数 += len(预测类别)
+            错误计数 += 失败数
+            
+            if 进度条 is not None:
+                进度条.update(len(块))
             
             # 简单进度显示（如果没有 tqdm）
-            if not self._tqdm可用 and 显示进度:
+            elif 显示进度:
                 当前时间 = time.time()
                 if 当前时间 - 上次进度时间 >= 2.0:  # 每2秒更新一次
-                    进度 = (i + 1) / 总样本数 * 100
+                    已完成 = 起点 + len(块)
+                    进度 = 已完成 / 总样本数 * 100
                     已用时间 = 当前时间 - 开始时间
-                    速度 = (i + 1) / 已用时间 if 已用时间 > 0 else 0
-                    剩余时间 = (总样本数 - i - 1) / 速度 if 速度 > 0 else 0
-                    print(f"\r进度: {进度:.1f}% ({i+1}/{总样本数}) | "
+                    速度 = 已完成 / 已用时间 if 已用时间 > 0 else 0
+                    剩余时间 = (总样本数 - 已完成) / 速度 if 速度 > 0 else 0
+                    print(f"\r进度: {进度:.1f}% ({已完成}/{总样本数}) | "
                           f"速度: {速度:.1f} 样本/秒 | "
                           f"剩余: {剩余时间:.0f}秒", end="")
                     上次进度时间 = 当前时间
         
+        if 进度条 is not None:
+            进度条.close()
+        
         if not self._tqdm可用 and 显示进度:
             print()  # 换行
         
@@ -6,12 +6,15 @@
 - TensorFlow 模型转 ONNX
 - 模型验证
 - 输出一致性检查
+- 动态批次维度检查
+- INT8 动态/静态量化、FP16 转换及量化评估报告
 - 错误处理和描述性信息
 
 需求: 1.1, 1.2, 1.3, 1.4
 """
 
 import os
+import json
 import logging
 from typing import Tuple, Optional, Dict, Any, List
 from dataclasses import dataclass, field
@@ -19,6 +22,8 @@ from enum import Enum
 
 import numpy as np
 
+from 工具.数据集格式 import 加载样本, 列出数据集, 是否分片目录, 读取样本数
+
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 日志 = logging.getLogger(__name__)
@@ -85,6 +90,7 @@ class 转换配置:
     输出名称: str = "output"
     opset版本: int = 13
     优化级别: int = 1  # 0: 无优化, 1: 基本优化, 2: 扩展优化
+    动态批次: bool = True  # 导出后确保批次维度为动态，支持批量预测
 
 
 class 模型转换器:
@@ -309,6 +315,11 @@ class 模型转换器:
                     警告=警告列表
                 )
             
+            # 批次维度固定时尝试改为动态，失败则只给出警告
+            if self.配置.动态批次 and self._onnx可用 and not self.检查动态批次(onnx输出路径):
+                if not self.设置动态批次(onnx输出路径):
+                    警告列表.append("模型批次维度固定，批量预测将按固定批次逐块执行")
+            
             日志.info(f"模型转换成功: {onnx输出路径}")
             return 转换结果(
                 成功=True,
@@ -523,6 +534,77 @@ class 模型转换器:
                 )
             )
     
+    def 检查动态批次(self, onnx模型路径: str) -> bool:
+        """
+        检查模型第一个输入的批次维度是否为动态维度
+        
+        参数:
+            onnx模型路径: ONNX 模型文件路径
+            
+        返回:
+            批次维度是否为动态（字符串或未知维度）
+        """
+        结果 = self.验证(onnx模型路径)
+        if not 结果.有效 or not 结果.输入信息 or not 结果.输入信息[0]['形状']:
+            return False
+        批次维度 = 结果.输入信息[0]['形状'][0]
+        return isinstance(批次维度, str) or 批次维度 == -1
+    
+    def 设置动态批次(self, onnx模型路径: str, 输出路径: str = None,
+                     批次名称: str = "batch") -> bool:
+        """
+        把模型输入输出的批次维度改为动态维度
+        
+        修改后用 ONNX Runtime 以批次 2 运行，并与逐个样本运行的结果比较；
+        图中含有固定批次的 Reshape 等节点时运行失败或结果不一致，此时不写入文件。
+        
+        参数:
+            onnx模型路径: ONNX 模型文件路径
+            输出路径: 输出路径，None 则覆盖原文件
+            批次名称: 动态维度名称
+            
+        返回:
+            是否修改成功
+        """
+        输出路径 = 输出路径 or onnx模型路径
+        临时路径 = 输出路径 + ".tmp"
+        
+        try:
+            import onnx
+            import onnxruntime as ort
+            
+            模型 = onnx.load(onnx模型路径)
+            初始化器名称 = {初始化器.name for 初始化器 in 模型.graph.initializer}
+            for 张量 in list(模型.graph.input) + list(模型.graph.output):
+                if 张量.name in 初始化器名称:
+                    continue
+                维度列表 = 张量.type.tensor_type.shape.dim
+                if len(维度列表) > 0:
+                    维度列表[0].dim_param = 批次名称
+            # 中间张量的形状信息可能带有固定批次，交给运行时重新推断
+            del 模型.graph.value_info[:]
+            onnx.save(模型, 临时路径)
+            
+            # 用批次 2 验证修改后的模型
+            会话 = ort.InferenceSession(临时路径, providers=['CPUExecutionProvider'])
+            输入 = 会话.get_inputs()[0]
+            帧形状 = [d if isinstance(d, int) and d > 0 else 1 for d in 输入.shape[1:]]
+            测试输入 = np.random.rand(2, *帧形状).astype(np.float32)
+            批量输出 = 会话.run(None, {输入.name: 测试输入})[0]
+            逐个输出 = np.concatenate([会话.run(None, {输入.name: 测试输入[i:i + 1]})[0] for i in range(2)])
+            if 批量输出.shape != 逐个输出.shape or not np.allclose(批量输出, 逐个输出, atol=1e-5):
+                raise ValueError("批量输出与逐个输出不一致")
+            
+            os.replace(临时路径, 输出路径)
+            日志.info(f"已将批次维度设为动态: {输出路径}")
+            return True
+        
+        except Exception as e:
+            日志.warning(f"无法将批次维度设为动态: {e}")
+            if os.path.exists(临时路径):
+                os.remove(临时路径)
+            return False
+    
     def _获取数据类型名称(self, 类型代码: int) -> str:
         """将 ONNX 数据类型代码转换为名称"""
         类型映射 = {
@@ -678,6 +760,338 @@ class 模型转换器:
         
         return 结果
     
+    def _检查量化依赖(self, onnx模型路径: str) -> Optional[转换结果]:
+        """量化前检查依赖和输入文件，有问题时返回失败结果"""
+        if not (self._onnx可用 and self._onnxruntime可用):
+            return 转换结果(
+                成功=False,
+                错误=转换错误(
+                    类型=转换错误类型.依赖缺失,
+                    消息="onnx 或 onnxruntime 未安装，无法量化",
+                    建议="请运行: pip install onnx onnxruntime"
+                )
+            )
+        if not os.path.exists(onnx模型路径):
+            return 转换结果(
+                成功=False,
+                错误=转换错误(
+                    类型=转换错误类型.文件不存在,
+                    消息=f"模型文件不存在: {onnx模型路径}",
+                    建议="请检查文件路径是否正确"
+                )
+            )
+        return None
+
+    def 量化动态(self, onnx模型路径: str, 输出路径: str, 按通道: bool = False) -> 转换结果:
+        """
+        INT8 动态量化
+
+        权重离线量化为 int8，激活值在运行时按批次计算量化参数，不需要校准数据。
+
+        参数:
+            onnx模型路径: FP32 ONNX 模型路径
+            输出路径: 量化模型输出路径
+            按通道: 是否按输出通道分别量化权重
+
+        返回:
+            转换结果
+        """
+        检查结果 = self._检查量化依赖(onnx模型路径)
+        if 检查结果 is not None:
+            return 检查结果
+
+        try:
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+
+            确保目录存在(os.path.dirname(输出路径))
+            quantize_dynamic(onnx模型路径, 输出路径, per_channel=按通道, weight_type=QuantType.QInt8)
+            日志.info(f"INT8 动态量化完成: {输出路径}")
+            return 转换结果(成功=True, 输出路径=输出路径)
+        except Exception as e:
+            return 转换结果(
+                成功=False,
+                错误=转换错误(
+                    类型=转换错误类型.转换失败,
+                    消息=f"INT8 动态量化失败: {e}",
+                    详情=type(e).__name__,
+                    建议="模型含有不支持量化的算子时，可以只使用 FP32 模型"
+                )
+            )
+
+    def 量化静态(self, onnx模型路径: str, 输出路径: str, 校准读取器: '训练数据校准读取器',
+                 按通道: bool = False, 校准方法: str = "minmax") -> 转换结果:
+        """
+        INT8 静态量化
+
+        用校准数据统计各激活值的范围，权重和激活值都量化为 int8（QDQ 格式，
+        激活 uint8 / 权重 int8）。量化前先做形状推断和图优化，失败时直接量化原模型。
+
+        参数:
+            onnx模型路径: FP32 ONNX 模型路径
+            输出路径: 量化模型输出路径
+            校准读取器: 提供校准输入的读取器（get_next / rewind）
+            按通道: 是否按输出通道分别量化权重
+            校准方法: "minmax", "entropy" 或 "percentile"
+
+        返回:
+            转换结果
+        """
+        检查结果 = self._检查量化依赖(onnx模型路径)
+        if 检查结果 is not None:
+            return 检查结果
+
+        预处理路径 = 输出路径 + ".pre.onnx"
+        警告列表 = []
+        try:
+            from onnxruntime.quantization import (
+                quantize_static, quant_pre_process, QuantType, QuantFormat, CalibrationMethod
+            )
+
+            方法映射 = {
+                "minmax": CalibrationMethod.MinMax,
+                "entropy": CalibrationMethod.Entropy,
+                "percentile": CalibrationMethod.Percentile,
+            }
+            if 校准方法 not in 方法映射:
+                raise ValueError(f"无效的校准方法: {校准方法}，有效值: {list(方法映射)}")
+
+            确保目录存在(os.path.dirname(输出路径))
+            源模型 = onnx模型路径
+            try:
+                quant_pre_process(onnx模型路径, 预处理路径)
+                源模型 = 预处理路径
+            except Exception as e:
+                警告列表.append(f"量化预处理失败，直接量化原模型: {e}")
+                日志.warning(警告列表[-1])
+
+            校准读取器.rewind()
+            quantize_static(
+                源模型, 输出路径, 校准读取器,
+                quant_format=QuantFormat.QDQ,
+                per_channel=按通道,
+                activation_type=QuantType.QUInt8,
+                weight_type=QuantType.QInt8,
+                calibrate_method=方法映射[校准方法]
+            )
+            日志.info(f"INT8 静态量化完成: {输出路径}")
+            return 转换结果(成功=True, 输出路径=输出路径, 警告=警告列表)
+        except Exception as e:
+            return 转换结果(
+                成功=False,
+                错误=转换错误(
+                    类型=转换错误类型.转换失败,
+                    消息=f"INT8 静态量化失败: {e}",
+                    详情=type(e).__name__,
+                    建议="请检查校准数据的形状是否与模型输入一致"
+                ),
+                警告=警告列表
+            )
+        finally:
+            if os.path.exists(预处理路径):
+                os.remove(预处理路径)
+
+    def 转换FP16(self, onnx模型路径: str, 输出路径: str) -> 转换结果:
+        """
+        把模型权重和计算转换为 FP16，输入输出保持 float32
+
+        需要 onnxconverter-common。
+
+        参数:
+            onnx模型路径: FP32 ONNX 模型路径
+            输出路径: FP16 模型输出路径
+
+        返回:
+            转换结果
+        """
+        检查结果 = self._检查量化依赖(onnx模型路径)
+        if 检查结果 is not None:
+            return 检查结果
+
+        try:
+            from onnxconverter_common import float16
+        except ImportError:
+            return 转换结果(
+                成功=False,
+                错误=转换错误(
+                    类型=转换错误类型.依赖缺失,
+                    消息="onnxconverter-common 未安装，无法转换为 FP16",
+                    建议="请运行: pip install onnxconverter-common"
+                )
+            )
+
+        try:
+            import onnx
+
+            确保目录存在(os.path.dirname(输出路径))
+            模型 = float16.convert_float_to_float16(onnx.load(onnx模型路径), keep_io_types=True)
+            onnx.save(模型, 输出路径)
+            日志.info(f"FP16 转换完成: {输出路径}")
+            return 转换结果(成功=True, 输出路径=输出路径)
+        except Exception as e:
+            return 转换结果(
+                成功=False,
+                错误=转换错误(
+                    类型=转换错误类型.转换失败,
+                    消息=f"FP16 转换失败: {e}",
+                    详情=type(e).__name__
+                )
+            )
+
+    def 评估量化模型(self, 基准模型路径: str, 候选模型: Dict[str, str], 数据路径,
+                     评估样本数: int = 500, 测试次数: int = 100, 一致率阈值: float = 0.98,
+                     批次大小: int = 32, 随机种子: int = 0) -> '量化报告':
+        """
+        在录制的训练数据上比较候选模型与 FP32 基准模型
+
+        每个模型都在 CPU 上用 性能基准测试器 测量单帧延迟；动作一致率为 top-1 动作
+        与 FP32 相同的帧比例，top-1 准确率以录制时的动作为标签。
+        帧按块从磁盘读取，每块依次送入所有模型，只读取一次。
+
+        参数:
+            基准模型路径: FP32 ONNX 模型路径
+            候选模型: {名称: 模型路径}
+            数据路径: 训练数据目录、分片目录 / .npy 文件或它们的列表
+            评估样本数: 抽取的评估帧数
+            测试次数: 每个模型的延迟测量次数
+            一致率阈值: 推荐部署要求的最低动作一致率
+            批次大小: 每块读取和推理的帧数
+            随机种子: 抽样随机种子
+
+        返回:
+            量化报告
+        """
+        from datetime import datetime
+        from 核心.ONNX推理 import ONNX推理引擎
+        from 工具.性能基准测试 import 性能基准测试器
+
+        模型表 = {"fp32": 基准模型路径, **候选模型}
+        结果表: Dict[str, 量化评估] = {}
+        引擎表 = {}
+        for 名称, 路径 in 模型表.items():
+            结果表[名称] = 量化评估(名称=名称, 路径=路径)
+            try:
+                引擎表[名称] = ONNX推理引擎(路径, 使用GPU=False, 预热=False, 启用优化缓存=False)
+                结果表[名称].文件大小MB = os.path.getsize(路径) / (1024 * 1024)
+            except Exception as e:
+                结果表[名称].错误 = str(e)
+                if 名称 == "fp32":
+                    raise
+
+        输入名称, 样本形状, _, _ = _读取模型输入(基准模型路径)
+        抽样 = _抽样索引(_解析数据路径(数据路径), 评估样本数, 随机种子)
+        总数 = 0
+        延迟输入形状 = None
+        一致数 = {名称: 0 for 名称 in 引擎表}
+        正确数 = {名称: 0 for 名称 in 引擎表}
+        最大差 = {名称: 0.0 for 名称 in 引擎表}
+
+        for 图像块, 标签块 in _逐块读取(抽样, 批次大小):
+            输入块 = 帧转模型输入(图像块, 样本形状)
+            延迟输入形状 = 输入块.shape[1:]
+            基准输出 = np.asarray(引擎表["fp32"].批量预测(输入块)).reshape(len(输入块), -1)
+            基准动作 = 基准输出.argmax(axis=1)
+            总数 += len(输入块)
+            for 名称, 引擎 in 引擎表.items():
+                输出 = 基准输出 if 名称 == "fp32" else np.asarray(引擎.批量预测(输入块)).reshape(len(输入块), -1)
+                动作 = 输出.argmax(axis=1)
+                一致数[名称] += int(np.sum(动作 == 基准动作))
+                正确数[名称] += int(np.sum(动作 == 标签块))
+                最大差[名称] = max(最大差[名称], float(np.max(np.abs(输出 - 基准输出))))
+
+        if 总数 == 0:
+            raise ValueError(f"没有可用的评估数据: {数据路径}")
+
+        测试器 = 性能基准测试器(测试次数=测试次数, 输入形状=延迟输入形状)
+        for 名称, 引擎 in 引擎表.items():
+            统计 = 测试器.测试引擎(引擎, 名称).延迟统计
+            结果 = 结果表[名称]
+            结果.平均延迟 = 统计.平均延迟
+            结果.P95延迟 = 统计.P95延迟
+            结果.动作一致率 = 一致数[名称] / 总数
+            结果.top1准确率 = 正确数[名称] / 总数
+            结果.最大概率差 = 最大差[名称]
+
+        基准延迟 = 结果表["fp32"].平均延迟
+        for 名称, 结果 in 结果表.items():
+            if 结果.错误 is None and 结果.平均延迟 > 0:
+                结果.加速比 = 基准延迟 / 结果.平均延迟
+            结果.推荐部署 = (名称 != "fp32" and 结果.错误 is None
+                             and 结果.动作一致率 >= 一致率阈值 and 结果.加速比 > 1.0)
+
+        推荐列表 = [结果 for 结果 in 结果表.values() if 结果.推荐部署]
+        报告 = 量化报告(
+            基准模型=基准模型路径,
+            评估样本数=总数,
+            一致率阈值=一致率阈值,
+            结果列表=list(结果表.values()),
+            推荐模型=max(推荐列表, key=lambda 结果: 结果.加速比).名称 if 推荐列表 else "fp32",
+            测试时间=datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        )
+        日志.info(f"量化评估完成，推荐部署: {报告.推荐模型}")
+        return 报告
+
+    def 量化流水线(self, onnx模型路径: str, 数据路径, 输出目录: str = None,
+                   方式: Tuple[str, ...] = ("dynamic", "static"),
+                   校准样本数: int = 200, 评估样本数: int = 500, 测试次数: int = 100,
+                   一致率阈值: float = 0.98, 校准方法: str = "minmax",
+                   报告路径: str = None) -> '量化报告':
+        """
+        生成量化模型并输出评估报告
+
+        依次生成 方式 中的变体（dynamic: INT8 动态量化，static: 用录制帧校准的
+        INT8 静态量化，fp16: FP16 转换），再在录制数据上与 FP32 模型比较延迟、
+        动作一致率和 top-1 准确率。生成失败的变体记录在报告中，不影响其他变体。
+
+        参数:
+            onnx模型路径: FP32 ONNX 模型路径
+            数据路径: 训练数据目录、分片目录 / .npy 文件或它们的列表
+            输出目录: 量化模型输出目录，None 表示与原模型相同
+            方式: 要生成的变体
+            校准样本数: 静态量化的校准帧数
+            评估样本数: 评估帧数
+            测试次数: 每个模型的延迟测量次数
+            一致率阈值: 推荐部署要求的最低动作一致率
+            校准方法: 静态量化校准方法
+            报告路径: JSON 报告路径，None 表示 输出目录/<模型名>.量化报告.json
+
+        返回:
+            量化报告
+        """
+        无效方式 = set(方式) - set(量化后缀)
+        if 无效方式:
+            raise ValueError(f"无效的量化方式: {sorted(无效方式)}，有效值: {list(量化后缀)}")
+
+        输出目录 = 输出目录 or os.path.dirname(os.path.abspath(onnx模型路径))
+        模型名 = os.path.splitext(os.path.basename(onnx模型路径))[0]
+
+        候选模型: Dict[str, str] = {}
+        失败: Dict[str, str] = {}
+        for 名称 in 方式:
+            输出路径 = os.path.join(输出目录, f"{模型名}.{量化后缀[名称]}.onnx")
+            if 名称 == "dynamic":
+                结果 = self.量化动态(onnx模型路径, 输出路径)
+            elif 名称 == "static":
+                读取器 = 训练数据校准读取器(onnx模型路径, 数据路径, 样本数=校准样本数)
+                结果 = self.量化静态(onnx模型路径, 输出路径, 读取器, 校准方法=校准方法)
+            else:
+                结果 = self.转换FP16(onnx模型路径, 输出路径)
+
+            if 结果.成功:
+                候选模型[量化后缀[名称]] = 输出路径
+            else:
+                失败[量化后缀[名称]] = str(结果.错误)
+                日志.warning(f"生成 {量化后缀[名称]} 模型失败: {结果.错误}")
+
+        报告 = self.评估量化模型(
+            onnx模型路径, 候选模型, 数据路径,
+            评估样本数=评估样本数, 测试次数=测试次数, 一致率阈值=一致率阈值
+        )
+        for 名称, 错误 in 失败.items():
+            报告.结果列表.append(量化评估(名称=名称, 路径="", 错误=错误))
+
+        报告.保存(报告路径 or os.path.join(输出目录, f"{模型名}.量化报告.json"))
+        return 报告
+
     def 获取依赖状态(self) -> Dict[str, bool]:
         """
         获取所有依赖的可用状态
@@ -718,6 +1132,241 @@ def 确保目录存在(目录路径: str):
         os.makedirs(目录路径, exist_ok=True)
 
 
+# ==================== 量化 ====================
+
+# 量化方式 -> 输出文件后缀（<模型名>.<后缀>.onnx），也是报告中的变体名称
+量化后缀 = {"dynamic": "int8_dynamic", "static": "int8_static", "fp16": "fp16"}
+
+
+def _读取模型输入(onnx模型路径: str) -> Tuple[str, Tuple[Optional[int], ...], Optional[int], float]:
+    """
+    读取模型的输入名称、单样本形状、固定批次和输入缩放
+
+    返回:
+        (输入名称, 单样本形状（动态维度为 None）, 固定批次（动态时为 None）, 输入缩放)
+    """
+    import onnxruntime as ort
+
+    会话 = ort.InferenceSession(onnx模型路径, providers=["CPUExecutionProvider"])
+    输入 = 会话.get_inputs()[0]
+    形状 = [维度 if isinstance(维度, int) and 维度 > 0 else None for 维度 in 输入.shape]
+    元数据 = 会话.get_modelmeta().custom_metadata_map
+    缩放 = float(元数据["输入缩放"]) if "输入缩放" in 元数据 else 1.0 / 255.0
+    return 输入.name, tuple(形状[1:]), 形状[0], 缩放
+
+
+def 帧转模型输入(帧批次: np.ndarray, 样本形状: Tuple[Optional[int], ...]) -> np.ndarray:
+    """
+    把录制的帧批次整理成模型输入形状
+
+    与训练时相同，元素数一致时直接 reshape（录制帧为 (高, 宽, 3)，模型输入为
+    (宽, 高, 3)）；样本形状含动态维度时原样返回。
+
+    参数:
+        帧批次: (N, ...) 帧数组
+        样本形状: 模型单样本输入形状
+
+    返回:
+        (N,) + 样本形状 的数组
+    """
+    if any(维度 is None for 维度 in 样本形状) or 帧批次.shape[1:] == tuple(样本形状):
+        return 帧批次
+    if int(np.prod(帧批次.shape[1:])) != int(np.prod(样本形状)):
+        raise ValueError(f"录制帧形状 {帧批次.shape[1:]} 与模型输入形状 {tuple(样本形状)} 不匹配")
+    return 帧批次.reshape((len(帧批次),) + tuple(样本形状))
+
+
+def _解析数据路径(数据路径) -> List[str]:
+    """数据目录展开为其中的训练数据，分片目录和 .npy 文件原样保留"""
+    路径列表 = [数据路径] if isinstance(数据路径, str) else list(数据路径)
+    结果 = []
+    for 路径 in 路径列表:
+        if os.path.isdir(路径) and not 是否分片目录(路径):
+            结果.extend(列出数据集(路径))
+        else:
+            结果.append(路径)
+    if not 结果:
+        raise ValueError(f"没有找到训练数据: {数据路径}")
+    return 结果
+
+
+def _抽样索引(路径列表: List[str], 样本数: int, 随机种子: int = 0) -> List[Tuple[str, np.ndarray]]:
+    """在所有数据中均匀随机抽取 样本数 个样本，返回 [(路径, 有序的局部索引)]"""
+    数量列表 = [读取样本数(路径) for 路径 in 路径列表]
+    总数 = sum(数量列表)
+    全局索引 = np.sort(np.random.RandomState(随机种子).choice(总数, min(样本数, 总数), replace=False))
+
+    结果 = []
+    起点 = 0
+    for 路径, 数量 in zip(路径列表, 数量列表):
+        局部 = 全局索引[(全局索引 >= 起点) & (全局索引 < 起点 + 数量)] - 起点
+        if len(局部):
+            结果.append((路径, 局部))
+        起点 += 数量
+    return 结果
+
+
+def _逐块读取(抽样: List[Tuple[str, np.ndarray]], 批次大小: int):
+    """按块读取抽样帧（分片目录通过 mmap 只读取被抽中的帧），生成 (图像块, 动作类别块)"""
+    for 路径, 索引 in 抽样:
+        数据 = 加载样本(路径)
+        for 起点 in range(0, len(索引), 批次大小):
+            块索引 = 索引[起点:起点 + 批次大小]
+            标签 = np.asarray(数据.标签[块索引])
+            yield np.asarray(数据.图像[块索引]), (标签.argmax(axis=1) if 标签.ndim == 2 else 标签)
+
+
+class 训练数据校准读取器:
+    """
+    从录制的训练数据中抽帧作为静态量化的校准输入
+
+    实现 onnxruntime.quantization.CalibrationDataReader 的接口（get_next / rewind），
+    帧按块从磁盘读取，不会把校准集整体读入内存。像素按模型元数据中的输入缩放归一化，
+    与 ONNX推理引擎 的预处理一致。
+    """
+
+    def __init__(self, onnx模型路径: str, 数据路径, 样本数: int = 200,
+                 批次大小: int = 1, 随机种子: int = 0):
+        """
+        参数:
+            onnx模型路径: 要量化的 FP32 模型路径
+            数据路径: 训练数据目录、分片目录 / .npy 文件或它们的列表
+            样本数: 校准帧数
+            批次大小: 每次提供的帧数，模型批次维度固定时使用模型的批次
+            随机种子: 抽样随机种子
+        """
+        self.输入名称, self.样本形状, self.固定批次, self.输入缩放 = _读取模型输入(onnx模型路径)
+        self.批次大小 = self.固定批次 or 批次大小
+        self._抽样 = _抽样索引(_解析数据路径(数据路径), 样本数, 随机种子)
+        self.样本数 = sum(len(索引) for _, 索引 in self._抽样)
+        self._迭代器 = None
+        self.rewind()
+
+    def get_next(self) -> Optional[Dict[str, np.ndarray]]:
+        """返回下一批校准输入，读完时返回 None"""
+        from 核心.ONNX推理 import 准备批次输入
+
+        图像块 = next(self._迭代器, (None, None))[0]
+        if 图像块 is None:
+            return None
+
+        输入 = 准备批次输入(帧转模型输入(图像块, self.样本形状), 缩放=self.输入缩放)
+        if self.固定批次 and len(输入) < self.固定批次:
+            输入 = np.concatenate([输入, np.repeat(输入[-1:], self.固定批次 - len(输入), axis=0)])
+        return {self.输入名称: 输入}
+
+    def rewind(self) -> None:
+        """回到第一批"""
+        self._迭代器 = _逐块读取(self._抽样, self.批次大小)
+
+
+@dataclass
+class 量化评估:
+    """单个模型变体的评估结果"""
+    名称: str
+    路径: str
+    文件大小MB: float = 0.0
+    平均延迟: float = 0.0       # 毫秒
+    P95延迟: float = 0.0        # 毫秒
+    加速比: float = 0.0         # FP32 平均延迟 / 本模型平均延迟
+    动作一致率: float = 0.0     # top-1 动作与 FP32 相同的比例
+    top1准确率: float = 0.0     # top-1 动作与录制动作相同的比例
+    最大概率差: float = 0.0     # 与 FP32 输出的最大绝对差
+    推荐部署: bool = False
+    错误: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典"""
+        return {
+            '名称': self.名称,
+            '路径': self.路径,
+            '文件大小MB': round(self.文件大小MB, 3),
+            '平均延迟': round(self.平均延迟, 3),
+            'P95延迟': round(self.P95延迟, 3),
+            '加速比': round(self.加速比, 3),
+            '动作一致率': round(self.动作一致率, 4),
+            'top1准确率': round(self.top1准确率, 4),
+            '最大概率差': round(self.最大概率差, 6),
+            '推荐部署': self.推荐部署,
+            '错误': self.错误,
+        }
+
+
+@dataclass
+class 量化报告:
+    """量化评估报告"""
+    基准模型: str
+    评估样本数: int
+    一致率阈值: float
+    结果列表: List[量化评估] = field(default_factory=list)
+    推荐模型: str = "fp32"
+    测试时间: str = ""
+
+    def 获取结果(self, 名称: str) -> Optional[量化评估]:
+        """按变体名称获取评估结果"""
+        return next((结果 for 结果 in self.结果列表 if 结果.名称 == 名称), None)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典"""
+        return {
+            '基准模型': self.基准模型,
+            '评估样本数': self.评估样本数,
+            '一致率阈值': self.一致率阈值,
+            '推荐模型': self.推荐模型,
+            '测试时间': self.测试时间,
+            '结果列表': [结果.to_dict() for 结果 in self.结果列表],
+        }
+
+    def 保存(self, 输出路径: str) -> bool:
+        """
+        保存 JSON 格式报告
+
+        参数:
+            输出路径: 输出文件路径
+
+        返回:
+            是否保存成功
+        """
+        try:
+            确保目录存在(os.path.dirname(输出路径))
+            with open(输出路径, 'w', encoding='utf-8') as f:
+                json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+            日志.info(f"量化报告已保存: {输出路径}")
+            return True
+        except Exception as e:
+            日志.error(f"保存量化报告失败: {e}")
+            return False
+
+    def 生成文本(self) -> str:
+        """生成文本报告"""
+        行列表 = [
+            "=" * 70,
+            "模型量化评估报告",
+            "=" * 70,
+            f"基准模型: {self.基准模型}",
+            f"评估样本数: {self.评估样本数}",
+            f"测试时间: {self.测试时间}",
+            "",
+            f"{'模型':<14}{'大小(MB)':>10}{'平均(ms)':>10}{'P95(ms)':>10}{'加速比':>8}{'一致率':>8}{'准确率':>8}",
+            "-" * 70,
+        ]
+        for 结果 in self.结果列表:
+            if 结果.错误:
+                行列表.append(f"{结果.名称:<14}失败: {结果.错误}")
+                continue
+            标记 = " *" if 结果.推荐部署 else ""
+            行列表.append(
+                f"{结果.名称:<14}{结果.文件大小MB:>10.2f}{结果.平均延迟:>10.3f}{结果.P95延迟:>10.3f}"
+                f"{结果.加速比:>7.2f}x{结果.动作一致率:>8.1%}{结果.top1准确率:>8.1%}{标记}"
+            )
+        行列表.extend([
+            "-" * 70,
+            f"推荐部署: {self.推荐模型}（动作一致率 >= {self.一致率阈值:.0%} 且快于 FP32）",
+            "=" * 70,
+        ])
+        return "\n".join(行列表)
+
+
 # 便捷函数
 def 快速转换(tf模型路径: str, onnx输出路径: str, 
              输入形状: Tuple[int, ...] = None) -> 转换结果:
@@ -754,6 +1403,30 @@ def 快速验证(onnx模型路径: str) -> 验证结果:
     return 转换器.验证(onnx模型路径)
 
 
+def 快速量化(onnx模型路径: str, 数据路径, 输出目录: str = None,
+             方式: Tuple[str, ...] = ("dynamic", "static"),
+             评估样本数: int = 500, 一致率阈值: float = 0.98) -> 量化报告:
+    """
+    快速量化模型并评估的便捷函数
+
+    参数:
+        onnx模型路径: FP32 ONNX 模型路径
+        数据路径: 训练数据目录、分片目录 / .npy 文件或它们的列表
+        输出目录: 量化模型输出目录，None 表示与原模型相同
+        方式: 要生成的变体（"dynamic", "static", "fp16"）
+        评估样本数: 评估帧数
+        一致率阈值: 推荐部署要求的最低动作一致率
+
+    返回:
+        量化报告
+    """
+    转换器 = 模型转换器()
+    return 转换器.量化流水线(
+        onnx模型路径, 数据路径, 输出目录,
+        方式=方式, 评估样本数=评估样本数, 一致率阈值=一致率阈值
+    )
+
+
 @dataclass
 class 输出比较结果:
     """输出比较结果
@@ -796,16 +1469,19 @@ class 输出一致性验证器:
     需求: 1.4 - 保持模型的输入/输出维度
     """
     
-    def __init__(self, 容差: float = 0.01, 输入形状: Tuple[int, ...] = (480, 270, 3)):
+    def __init__(self, 容差: float = 0.01, 输入形状: Tuple[int, ...] = (480, 270, 3),
+                 批次大小: int = 32):
         """
         初始化验证器
         
         参数:
             容差: 允许的最大差异，默认 0.01
             输入形状: 输入图像形状 (width, height, channels)
+            批次大小: 两个后端都支持 批量预测 时，每次比较的样本数
         """
         self.容差 = 容差
         self.输入形状 = 输入形状
+        self.批次大小 = max(1, 批次大小)
         self._onnxruntime可用 = False
         self._检查依赖()
     
@@ -893,6 +1569,8 @@ class 输出一致性验证器:
         返回:
             输出比较结果
             
+        两个后端都有 批量预测 方法时，每 批次大小 个样本只调用一次推理。
+            
         需求: 2.5 - 验证输出一致性
         """
         if 随机种子 is not None:
@@ -900,31 +1578,40 @@ class 输出一致性验证器:
         
         日志.info(f"开始批量输出比较: {后端A名称} vs {后端B名称}, 样本数: {测试样本数}")
         
-        所有差异 = []
-        详细差异 = []
+        差异块列表 = []
         
         try:
-            for i in range(测试样本数):
-                # 生成随机测试输入
-                测试输入 = np.random.rand(*self.输入形状).astype(np.float32)
-                
-                # 获取两个后端的输出
-                输出A = np.array(后端A.预测(测试输入))
-                输出B = np.array(后端B.预测(测试输入))
-                
-                # 计算差异
-                差异 = np.abs(输出A - 输出B)
-                所有差异.extend(差异.flatten().tolist())
-                详细差异.append(float(np.max(差异)))
-                
-                if (i + 1) % 20 == 0:
-                    日志.info(f"  进度: {i + 1}/{测试样本数}")
+            if hasattr(后端A, '批量预测') and hasattr(后端B, '批量预测'):
+                # 两个后端都支持批量推理：每块样本只运行一次会话
+                for 起点 in range(0, 测试样本数, self.批次大小):
+                    数量 = min(self.批次大小, 测试样本数 - 起点)
+                    测试输入 = np.random.rand(数量, *self.输入形状).astype(np.float32)
+                    
+                    输出A = np.asarray(后端A.批量预测(测试输入)).reshape(数量, -1)
+                    输出B = np.asarray(后端B.批量预测(测试输入)).reshape(数量, -1)
+                    差异块列表.append(np.abs(输出A - 输出B))
+                    
+                    日志.info(f"  进度: {起点 + 数量}/{测试样本数}")
+            else:
+                for i in range(测试样本数):
+                    # 生成随机测试输入
+                    测试输入 = np.random.rand(*self.输入形状).astype(np.float32)
+                    
+                    # 获取两个后端的输出
+                    输出A = np.array(后端A.预测(测试输入))
+                    输出B = np.array(后端B.预测(测试输入))
+                    
+                    # 计算差异
+                    差异块列表.append(np.abs(输出A - 输出B).reshape(1, -1))
+                    
+                    if (i + 1) % 20 == 0:
+                        日志.info(f"  进度: {i + 1}/{测试样本数}")
             
             # 计算统计数据
-            所有差异数组 = np.array(所有差异)
-            详细差异数组 = np.array(详细差异)
+            所有差异数组 = np.concatenate([差异.ravel() for 差异 in 差异块列表])
+            详细差异 = [float(np.max(行)) for 差异 in 差异块列表 for 行 in 差异]
             
-            最大差异 = float(np.max(详细差异数组))
+            最大差异 = float(np.max(详细差异))
             平均差异 = float(np.mean(所有差异数组))
             标准差 = float(np.std(所有差异数组))
             
@@ -1098,6 +1785,8 @@ class _ONNX推理包装器:
         
         self.会话 = ort.InferenceSession(模型路径)
         self.输入名称 = self.会话.get_inputs()[0].name
+        批次维度 = self.会话.get_inputs()[0].shape[0]
+        self.动态批次 = not (isinstance(批次维度, int) and 批次维度 > 0)
     
     def 预测(self, 图像: np.ndarray) -> List[float]:
         """执行预测"""
@@ -1115,6 +1804,19 @@ class _ONNX推理包装器:
             结果 = 结果[0]
         
         return 结果.tolist()
+    
+    def 批量预测(self, 图像批次: np.ndarray) -> np.ndarray:
+        """执行批量预测（批次维度固定时逐个运行）"""
+        if not self.动态批次:
+            return np.stack([np.asarray(self.预测(图像)) for 图像 in 图像批次])
+        
+        图像批次 = np.asarray(图像批次, dtype=np.float32)
+        需要归一化 = 图像批次.reshape(len(图像批次), -1).max(axis=1) > 1.0
+        if 需要归一化.any():
+            图像批次 = 图像批次.copy()
+            图像批次[需要归一化] /= 255.0
+        
+        return self.会话.run(None, {self.输入名称: 图像批次})[0]
 
 
 class _TFLearn推理包装器:
@@ -1134,6 +1836,10 @@ class _TFLearn推理包装器:
             结果 = 结果[0]
         
         return 结果.tolist()
+    
+    def 批量预测(self, 图像批次: np.ndarray) -> np.ndarray:
+        """执行批量预测"""
+        return np.asarray(self.模型.predict(np.asarray(图像批次)))
 
 
 # 便捷函数
@@ -4,7 +4,8 @@ YOLO目标检测工具
 
 功能:
 - 边界框处理
-- 非极大值抑制 (NMS)
+- 网络输出解码 (整张量向量化，结果为结构化数组)
+- 非极大值抑制 (NMS，基于重叠矩阵)
 - 目标绘制
 - IoU计算
 """
@@ -198,67 +199,166 @@ def 绘制边界框(图像, 边界框列表, 标签列表, 颜色=(0, 255, 0), 
     return 图像
 
 
-def 解码网络输出(网络输出, 锚框, 类别数, 目标阈值=0.3, NMS阈值=0.3):
+def 检测框类型(类别数):
     """
-    解码YOLO网络输出
+    解码结果的结构化数组类型
     
     参数:
-        网络输出: 网络输出张量
-        锚框: 锚框列表
+        类别数: 类别数量
+    
+    返回:
+        np.dtype: 字段为 框 (x最小, y最小, x最大, y最大)、置信度、类别概率、标签、分数
+    """
+    return np.dtype([
+        ('框', np.float64, (4,)),
+        ('置信度', np.float64),
+        ('类别概率', np.float64, (类别数,)),
+        ('标签', np.int64),
+        ('分数', np.float64),
+    ])
+
+
+def 非极大值抑制(框数组, 分数数组, NMS阈值=0.3, 类别数组=None, 重叠矩阵=None):
+    """
+    贪心非极大值抑制
+    
+    按分数从高到低处理，保留的框会抑制其后与之 IoU >= NMS阈值 的框。
+    给定 类别数组 时只在同类别的框之间抑制，一次完成所有类别。
+    
+    参数:
+        框数组: (N, 4) 边界框数组 (x最小, y最小, x最大, y最大)
+        分数数组: (N,) 分数
+        NMS阈值: IoU 阈值
+        类别数组: (N,) 类别标签，None 表示所有框视为同一类别
+        重叠矩阵: 预先计算的 (N, N) 重叠矩阵，None 时现场计算
+    
+    返回:
+        np.ndarray: 保留框的下标，按分数降序
+    """
+    分数数组 = np.asarray(分数数组)
+    数量 = len(分数数组)
+    if 数量 == 0:
+        return np.empty(0, dtype=np.intp)
+    
+    顺序 = np.argsort(-分数数组, kind='stable')
+    if 重叠矩阵 is None:
+        # float32 足够判断阈值，矩阵计算量减半
+        框数组 = np.asarray(框数组, dtype=np.float32)[顺序]
+        冲突 = 计算重叠矩阵(框数组, 框数组) >= NMS阈值
+    else:
+        冲突 = 重叠矩阵[np.ix_(顺序, 顺序)] >= NMS阈值
+    if 类别数组 is not None:
+        类别 = np.asarray(类别数组)[顺序]
+        冲突 &= 类别[:, np.newaxis] == 类别[np.newaxis, :]
+    np.fill_diagonal(冲突, False)
+    
+    # 冲突矩阵对称: 保留框 i 之前与其冲突的框必然已被抑制，整行合并即可
+    抑制 = np.zeros(数量, dtype=bool)
+    for i in np.flatnonzero(冲突.any(axis=1)):
+        if not 抑制[i]:
+            抑制 |= 冲突[i]
+    
+    return 顺序[~抑制]
+
+
+def 解码网络输出数组(网络输出, 锚框, 类别数, 目标阈值=0.3, NMS阈值=0.3):
+    """
+    解码YOLO网络输出为结构化数组
+    
+    激活、阈值筛选和坐标换算都在整个张量上完成，再对所有候选框计算一次
+    重叠矩阵，按类别做非极大值抑制。网络输出不会被修改。
+    
+    参数:
+        网络输出: (网格高度, 网格宽度, 框数量, 5 + 类别数) 网络输出张量
+        锚框: 锚框列表 [w0, h0, w1, h1, ...]
         类别数: 类别数量
         目标阈值: 目标置信度阈值
         NMS阈值: 非极大值抑制阈值
     
     返回:
-        list: 检测到的边界框列表
+        np.ndarray: 检测框类型 的结构化数组
     """
+    网络输出 = np.asarray(网络输出)
     网格高度, 网格宽度, 框数量 = 网络输出.shape[:3]
-    边界框列表 = []
     
-    # 解码网络输出
-    网络输出[..., 4] = _sigmoid(网络输出[..., 4])
-    网络输出[..., 5:] = 网络输出[..., 4][..., np.newaxis] * _softmax(网络输出[..., 5:])
-    网络输出[..., 5:] *= 网络输出[..., 5:] > 目标阈值
-    
-    for 行 in range(网格高度):
-        for 列 in range(网格宽度):
-            for b in range(框数量):
-                类别概率 = 网络输出[行, 列, b, 5:]
-                
-                if np.sum(类别概率) > 0:
-                    x, y, w, h = 网络输出[行, 列, b, :4]
-                    
-                    x = (列 + _sigmoid(x)) / 网格宽度
-                    y = (行 + _sigmoid(y)) / 网格高度
-                    w = 锚框[2 * b + 0] * np.exp(w) / 网格宽度
-                    h = 锚框[2 * b + 1] * np.exp(h) / 网格高度
-                    置信度 = 网络输出[行, 列, b, 4]
-                    
-                    框 = 边界框(x - w/2, y - h/2, x + w/2, y + h/2, 置信度, 类别概率)
-                    边界框列表.append(框)
-    
-    # 非极大值抑制
-    for c in range(类别数):
-        排序索引 = list(reversed(np.argsort([框.类别概率[c] for 框 in 边界框列表])))
-        
-        for i in range(len(排序索引)):
-            索引i = 排序索引[i]
-            
-            if 边界框列表[索引i].类别概率[c] == 0:
-                continue
-            
-            for j in range(i + 1, len(排序索引)):
-                索引j = 排序索引[j]
-                
-                if 计算IoU(边界框列表[索引i], 边界框列表[索引j]) >= NMS阈值:
-                    边界框列表[索引j].类别概率[c] = 0
+    # 目标置信度与类别概率
+    置信度 = _sigmoid(网络输出[..., 4])
+    类别概率 = 置信度[..., np.newaxis] * _softmax(网络输出[..., 5:])
+    类别概率 *= 类别概率 > 目标阈值
+    
+    # 只解码至少有一个类别超过阈值的候选
+    行, 列, 锚 = np.nonzero(类别概率.sum(axis=-1) > 0)
+    结果 = np.zeros(len(行), dtype=检测框类型(类别概率.shape[-1]))
+    if len(行) == 0:
+        return 结果
+    
+    x, y, w, h = 网络输出[行, 列, 锚, :4].T
+    锚框 = np.asarray(锚框, dtype=np.float64).reshape(-1, 2)
+    x = (列 + _sigmoid(x)) / 网格宽度
+    y = (行 + _sigmoid(y)) / 网格高度
+    w = 锚框[锚, 0] * np.exp(w) / 网格宽度
+    h = 锚框[锚, 1] * np.exp(h) / 网格高度
+    
+    框 = np.stack([x - w / 2, y - h / 2, x + w / 2, y + h / 2], axis=1)
+    概率 = 类别概率[行, 列, 锚]
+    
+    # 按类别非极大值抑制，被抑制的类别概率置零
+    for c in range(min(类别数, 概率.shape[1])):
+        候选 = np.flatnonzero(概率[:, c] > 0)
+        if len(候选) < 2:
+            continue
+        保留 = 非极大值抑制(框[候选], 概率[候选, c], NMS阈值)
+        抑制 = np.ones(len(候选), dtype=bool)
+        抑制[保留] = False
+        概率[候选[抑制], c] = 0
+    
+    结果['框'] = 框
+    结果['置信度'] = 置信度[行, 列, 锚]
+    结果['类别概率'] = 概率
+    结果['标签'] = 概率.argmax(axis=1)
+    结果['分数'] = 概率.max(axis=1)
     
     # 过滤低置信度的框
-    边界框列表 = [框 for 框 in 边界框列表 if 框.获取分数() > 目标阈值]
+    return 结果[结果['分数'] > 目标阈值]
+
+
+def 检测数组转边界框(检测数组):
+    """
+    将结构化检测数组转换为边界框对象列表
+    
+    参数:
+        检测数组: 检测框类型 的结构化数组
     
+    返回:
+        list: 边界框列表
+    """
+    边界框列表 = []
+    for 记录 in 检测数组:
+        x最小, y最小, x最大, y最大 = 记录['框'].tolist()
+        框 = 边界框(x最小, y最小, x最大, y最大, 记录['置信度'], 记录['类别概率'].copy())
+        框._标签 = int(记录['标签'])
+        框._分数 = float(记录['分数'])
+        边界框列表.append(框)
     return 边界框列表
 
 
+def 解码网络输出(网络输出, 锚框, 类别数, 目标阈值=0.3, NMS阈值=0.3):
+    """
+    解码YOLO网络输出
+    
+    参数:
+        网络输出: 网络输出张量
+        锚框: 锚框列表
+        类别数: 类别数量
+        目标阈值: 目标置信度阈值
+        NMS阈值: 非极大值抑制阈值
+    
+    返回:
+        list: 检测到的边界框列表
+    """
+    return 检测数组转边界框(解码网络输出数组(网络输出, 锚框, 类别数, 目标阈值, NMS阈值))
+
+
 def 计算重叠矩阵(a, b):
     """
     计算两组边界框之间的重叠矩阵
@@ -268,26 +368,34 @@ def 计算重叠矩阵(a, b):
         b: (K, 4) 边界框数组
     
     返回:
-        (N, K) 重叠矩阵
+        (N, K) 重叠矩阵，浮点输入保持原精度，整数输入按 float64 计算
     """
-    面积 = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
-    
-    交集宽度 = np.minimum(np.expand_dims(a[:, 2], axis=1), b[:, 2]) - \
-               np.maximum(np.expand_dims(a[:, 0], 1), b[:, 0])
-    交集高度 = np.minimum(np.expand_dims(a[:, 3], axis=1), b[:, 3]) - \
-               np.maximum(np.expand_dims(a[:, 1], 1), b[:, 1])
-    
-    交集宽度 = np.maximum(交集宽度, 0)
-    交集高度 = np.maximum(交集高度, 0)
-    
-    并集面积 = np.expand_dims((a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1]), axis=1) + \
-               面积 - 交集宽度 * 交集高度
-    
-    并集面积 = np.maximum(并集面积, np.finfo(float).eps)
-    
-    交集面积 = 交集宽度 * 交集高度
-    
-    return 交集面积 / 并集面积
+    a = np.asarray(a)
+    b = np.asarray(b)
+    if not np.issubdtype(a.dtype, np.floating):
+        a = a.astype(np.float64)
+    if not np.issubdtype(b.dtype, np.floating):
+        b = b.astype(np.float64)
+    
+    ax最小, ay最小, ax最大, ay最大 = (a[:, i, np.newaxis] for i in range(4))
+    bx最小, by最小, bx最大, by最大 = b.T
+    
+    # 原地运算，减少 (N, K) 临时数组
+    交集 = np.minimum(ax最大, bx最大)
+    交集 -= np.maximum(ax最小, bx最小)
+    np.maximum(交集, 0, out=交集)
+    交集高度 = np.minimum(ay最大, by最大)
+    交集高度 -= np.maximum(ay最小, by最小)
+    np.maximum(交集高度, 0, out=交集高度)
+    交集 *= 交集高度
+    
+    并集 = np.add((ax最大 - ax最小) * (ay最大 - ay最小), (bx最大 - bx最小) * (by最大 - by最小),
+                  out=交集高度)
+    并集 -= 交集
+    np.maximum(并集, np.finfo(并集.dtype).eps, out=并集)
+    
+    交集 /= 并集
+    return 交集
 
 
 def 计算平均精度(召回率, 精确率):
@@ -33,6 +33,8 @@ except ImportError:
     动作定义 = {}
     数据保存路径 = "数据"
 
+from 工具.数据集格式 import 是否分片目录, 读取类别计数
+
 
 # 动作映射字典
 动作映射 = {i: 动作定义.get(i, {}).get("名称", f"动作{i}") for i in range(总动作数)}
@@ -111,21 +113,14 @@ class 类别分析器:
             日志.warning(f"数据路径不存在: {self.数据路径}")
             return {}
         
-        # 遍历数据文件
+        # 遍历数据文件（分片目录只读取索引中的类别计数，不加载图像）
         for 文件名 in os.listdir(self.数据路径):
-            if 文件名.endswith('.npy'):
+            文件路径 = os.path.join(self.数据路径, 文件名)
+            if 文件名.endswith('.npy') or 是否分片目录(文件路径):
                 try:
-                    文件路径 = os.path.join(self.数据路径, 文件名)
-                    数据 = np.load(文件路径, allow_pickle=True)
-                    
-                    for _, 动作 in 数据:
-                        if isinstance(动作, (list, np.ndarray)):
-                            类别 = int(np.argmax(动作))
-                        else:
-                            类别 = int(动作)
-                        
-                        self._类别统计[类别] += 1
-                        self._总样本数 += 1
+                    for 类别, 数量 in 读取类别计数(文件路径).items():
+                        self._类别统计[类别] += 数量
+                        self._总样本数 += 数量
                         
                 except Exception as e:
                     日志.warning(f"加载 {文件名} 失败: {e}")
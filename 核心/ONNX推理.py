@@ -7,15 +7,21 @@ ONNX 推理引擎模块
 - GPU/CPU 自动选择（支持 CUDA、DirectML）
 - 性能统计和延迟监控
 - 与 TFLearn 后端的统一接口
+- 批量推理（多帧合并为一次会话运行）
+- 优化后模型缓存（再次启动时跳过图优化）
+- 应用 推理配置.json 中保存的会话选项调优结果
 
 需求: 2.1, 2.2, 2.3, 2.4, 2.5
 """
 
 import os
 import time
+import hashlib
 import logging
-from typing import List, Optional, Dict, Any, Tuple
-from dataclasses import dataclass, field
+import platform
+import functools
+from typing import List, Optional, Dict, Any, Tuple, Sequence, Union
+from dataclasses import dataclass, field, asdict, fields
 from collections import deque
 from enum import Enum
 
@@ -49,6 +55,280 @@ class 推理配置:
     预热次数: int = 10
     统计窗口: int = 100  # 统计最近N次推理的延迟
     最大延迟阈值: float = 50.0  # 最大允许延迟（毫秒），需求 2.2
+    最大批次: int = 32  # 批量预测时单次会话运行的最大样本数
+
+
+# 批量预测的输入：(N, ...) 数组或图像序列
+批次输入类型 = Union[np.ndarray, Sequence[np.ndarray]]
+
+
+def 是否动态维度(维度: Any) -> bool:
+    """判断 ONNX Runtime 报告的维度是否为动态维度（字符串、None 或非正数）"""
+    return not (isinstance(维度, int) and 维度 > 0)
+
+
+# 未在构造参数或模型元数据中指定时，整数像素按 1/255 归一化
+默认输入缩放 = 1.0 / 255.0
+
+
+def _写入输入(目标: np.ndarray, 图像: np.ndarray, 缩放: float) -> None:
+    """整数像素乘以缩放系数写入目标，浮点输入视为已归一化直接写入"""
+    if np.issubdtype(np.asarray(图像).dtype, np.integer):
+        np.multiply(图像, np.float32(缩放), out=目标, dtype=np.float32, casting='unsafe')
+    else:
+        目标[...] = 图像
+
+
+def 准备批次输入(图像批次: 批次输入类型, 缓冲: np.ndarray = None,
+               缩放: float = 默认输入缩放) -> np.ndarray:
+    """
+    把一批图像写入 float32 数组
+    
+    归一化规则与单帧预处理相同：整数像素乘以 缩放，浮点输入视为已归一化。
+    
+    参数:
+        图像批次: (N, ...) 数组或图像序列
+        缓冲: 可选的预分配 float32 数组，行数不少于 N，复用时不再分配内存
+        缩放: 整数像素的缩放系数
+    
+    返回:
+        (N, ...) float32 数组；提供缓冲时为缓冲的前 N 行
+    """
+    数量 = len(图像批次)
+    if 缓冲 is None:
+        输出 = np.empty((数量,) + np.shape(图像批次[0]), dtype=np.float32)
+    else:
+        输出 = 缓冲[:数量]
+    
+    if isinstance(图像批次, np.ndarray):
+        _写入输入(输出, 图像批次, 缩放)
+    else:
+        for i, 图像 in enumerate(图像批次):
+            _写入输入(输出[i], 图像, 缩放)
+    
+    return 输出
+
+
+# 优化后模型缓存的默认子目录（位于模型文件所在目录）
+优化缓存子目录 = ".ort_cache"
+
+
+@functools.lru_cache(maxsize=1)
+def 获取主机标识() -> str:
+    """
+    获取 CPU / 主机标识，用于区分优化缓存
+    
+    优化后的图可能包含针对当前 CPU 指令集的内核，模型目录复制到其他机器后不能复用。
+    标识包含系统、架构、处理器名称、逻辑核心数和 CPU 特性标志（Linux 读取 /proc/cpuinfo）。
+    """
+    部分 = [platform.system(), platform.machine(), platform.processor(), str(os.cpu_count())]
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8", errors="ignore") as f:
+            for 行 in f:
+                键, _, 值 = 行.partition(":")
+                if 键.strip() in ("model name", "flags", "Features"):
+                    部分.append(值.strip())
+                if 键.strip() in ("flags", "Features"):
+                    break
+    except OSError:
+        pass
+    return "|".join(部分)
+
+
+def 计算优化缓存键(模型路径: str, 提供者列表: Sequence[Any], 会话选项: Any) -> str:
+    """
+    计算优化后模型的缓存键
+    
+    由模型文件内容、ONNX Runtime 版本、执行提供者及其选项、图优化级别和主机 CPU
+    标识共同决定，任一变化都会生成新的缓存文件，不会加载与当前环境不匹配的优化结果。
+    
+    参数:
+        模型路径: ONNX 模型文件路径
+        提供者列表: 传给 InferenceSession 的 providers
+        会话选项: onnxruntime.SessionOptions
+    
+    返回:
+        十六进制摘要
+    """
+    import onnxruntime as ort
+    
+    摘要 = hashlib.sha256()
+    with open(模型路径, 'rb') as f:
+        for 块 in iter(lambda: f.read(1 << 20), b''):
+            摘要.update(块)
+    摘要.update(ort.__version__.encode())
+    摘要.update(repr(list(提供者列表)).encode())
+    摘要.update(str(会话选项.graph_optimization_level).encode())
+    摘要.update(str(会话选项.execution_mode).encode())
+    摘要.update(获取主机标识().encode())
+    return 摘要.hexdigest()
+
+
+def 创建推理会话(模型路径: str, 会话选项: Any, 提供者列表: Sequence[Any],
+               缓存目录: Optional[str] = None, 启用缓存: bool = True) -> Tuple[Any, bool]:
+    """
+    创建 ONNX Runtime 会话，复用或写入优化后模型缓存
+    
+    首次创建时让 ONNX Runtime 把优化后的图写入缓存目录；之后相同模型、版本和选项
+    直接加载优化后的图并关闭图优化，省去每次启动的图优化耗时。
+    缓存不可用（目录不可写、文件损坏、执行提供者不支持保存）时退回普通创建。
+    
+    参数:
+        模型路径: ONNX 模型文件路径
+        会话选项: onnxruntime.SessionOptions，会被修改
+        提供者列表: 执行提供者
+        缓存目录: 缓存目录，None 表示模型所在目录下的 .ort_cache
+        启用缓存: 是否使用缓存
+    
+    返回:
+        (会话, 是否命中缓存)
+    """
+    import onnxruntime as ort
+    
+    if not 启用缓存:
+        return ort.InferenceSession(模型路径, sess_options=会话选项, providers=提供者列表), False
+    
+    try:
+        缓存目录 = 缓存目录 or os.path.join(os.path.dirname(os.path.abspath(模型路径)), 优化缓存子目录)
+        缓存键 = 计算优化缓存键(模型路径, 提供者列表, 会话选项)
+        模型名 = os.path.splitext(os.path.basename(模型路径))[0]
+        缓存路径 = os.path.join(缓存目录, f"{模型名}.{缓存键[:16]}.onnx")
+    except OSError as e:
+        日志.debug(f"无法计算优化缓存键: {e}")
+        return ort.InferenceSession(模型路径, sess_options=会话选项, providers=提供者列表), False
+    
+    原优化级别 = 会话选项.graph_optimization_level
+    if os.path.exists(缓存路径):
+        try:
+            会话选项.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+            会话 = ort.InferenceSession(缓存路径, sess_options=会话选项, providers=提供者列表)
+            日志.info(f"使用优化缓存: {缓存路径}")
+            return 会话, True
+        except Exception as e:
+            日志.warning(f"优化缓存无效，重新生成: {e}")
+            会话选项.graph_optimization_level = 原优化级别
+            try:
+                os.remove(缓存路径)
+            except OSError:
+                pass
+    
+    临时路径 = f"{缓存路径}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(缓存目录, exist_ok=True)
+        会话选项.optimized_model_filepath = 临时路径
+        会话 = ort.InferenceSession(模型路径, sess_options=会话选项, providers=提供者列表)
+        os.replace(临时路径, 缓存路径)
+        日志.info(f"已写入优化缓存: {缓存路径}")
+        return 会话, False
+    except Exception as e:
+        日志.debug(f"写入优化缓存失败，不使用缓存: {e}")
+        try:
+            os.remove(临时路径)
+        except OSError:
+            pass
+    
+    会话选项.optimized_model_filepath = ""
+    return ort.InferenceSession(模型路径, sess_options=会话选项, providers=提供者列表), False
+
+
+# 推理配置.json 中保存的取值与 onnxruntime 枚举名称的对应关系
+图优化级别映射 = {
+    "disable": "ORT_DISABLE_ALL",
+    "basic": "ORT_ENABLE_BASIC",
+    "extended": "ORT_ENABLE_EXTENDED",
+    "all": "ORT_ENABLE_ALL",
+}
+执行模式映射 = {
+    "sequential": "ORT_SEQUENTIAL",
+    "parallel": "ORT_PARALLEL",
+}
+
+
+@dataclass
+class 会话调优参数:
+    """ONNX Runtime 会话选项
+    
+    默认值即未调优时引擎使用的选项；调优结果保存在 推理配置.json 的 会话调优 字段。
+    """
+    intra线程数: int = 0  # 单个算子内的线程数，0 表示由 ONNX Runtime 自动选择
+    inter线程数: int = 0  # 并行执行模式下算子之间的线程数
+    执行模式: str = "sequential"  # sequential / parallel
+    图优化级别: str = "all"  # disable / basic / extended / all
+    启用内存池: bool = True  # enable_cpu_mem_arena
+    启用内存模式: bool = True  # enable_mem_pattern
+    
+    def __post_init__(self):
+        if self.执行模式 not in 执行模式映射:
+            raise ValueError(f"无效的执行模式: {self.执行模式}，有效值: {list(执行模式映射)}")
+        if self.图优化级别 not in 图优化级别映射:
+            raise ValueError(f"无效的图优化级别: {self.图优化级别}，有效值: {list(图优化级别映射)}")
+        if self.intra线程数 < 0 or self.inter线程数 < 0:
+            raise ValueError("线程数不能为负数")
+    
+    def 应用到(self, 会话选项: Any) -> Any:
+        """把参数写入 onnxruntime.SessionOptions 并返回该对象"""
+        import onnxruntime as ort
+        
+        会话选项.intra_op_num_threads = self.intra线程数
+        会话选项.inter_op_num_threads = self.inter线程数
+        会话选项.execution_mode = getattr(ort.ExecutionMode, 执行模式映射[self.执行模式])
+        会话选项.graph_optimization_level = getattr(
+            ort.GraphOptimizationLevel, 图优化级别映射[self.图优化级别]
+        )
+        会话选项.enable_cpu_mem_arena = self.启用内存池
+        会话选项.enable_mem_pattern = self.启用内存模式
+        return 会话选项
+    
+    def 描述(self) -> str:
+        """简短描述，用于日志和报告"""
+        return (f"intra={self.intra线程数} inter={self.inter线程数} {self.执行模式} "
+                f"opt={self.图优化级别} arena={'on' if self.启用内存池 else 'off'} "
+                f"pattern={'on' if self.启用内存模式 else 'off'}")
+    
+    def to_dict(self) -> dict:
+        """转换为字典"""
+        return asdict(self)
+    
+    @classmethod
+    def from_dict(cls, 数据: Dict[str, Any]) -> '会话调优参数':
+        """从字典创建，忽略未知字段"""
+        字段名 = {f.name for f in fields(cls)}
+        return cls(**{键: 值 for 键, 值 in 数据.items() if 键 in 字段名})
+
+
+def 读取会话调优参数(配置: Dict[str, Any], 模型路径: str = None) -> Optional[会话调优参数]:
+    """
+    从推理配置读取调优后的会话参数
+    
+    调优结果只适用于调优时的 CPU 和模型：CPU 核心数不同或模型不同时返回 None，
+    引擎使用默认选项。
+    
+    参数:
+        配置: 推理配置字典，调优结果位于 "会话调优" 字段
+        模型路径: 即将加载的 ONNX 模型路径（可选）
+    
+    返回:
+        会话调优参数，没有可用的调优结果时返回 None
+    """
+    调优 = 配置.get("会话调优")
+    if not isinstance(调优, dict) or not 调优.get("参数"):
+        return None
+    
+    核心数 = 调优.get("CPU核心数")
+    if 核心数 is not None and 核心数 != os.cpu_count():
+        日志.warning(f"会话调优结果来自 {核心数} 核 CPU，与当前 {os.cpu_count()} 核不符，使用默认选项")
+        return None
+    
+    调优模型 = 调优.get("模型路径")
+    if 模型路径 and 调优模型 and os.path.abspath(调优模型) != os.path.abspath(模型路径):
+        日志.info(f"会话调优结果属于模型 {调优模型}，不应用到 {模型路径}")
+        return None
+    
+    try:
+        return 会话调优参数.from_dict(调优["参数"])
+    except (TypeError, ValueError) as e:
+        日志.warning(f"会话调优参数无效，使用默认选项: {e}")
+        return None
 
 
 @dataclass
@@ -76,7 +356,10 @@ class ONNX推理引擎:
     """
     
     def __init__(self, 模型路径: str, 使用GPU: bool = True, 预热: bool = True,
-                 输入宽度: int = None, 输入高度: int = None):
+                 输入宽度: int = None, 输入高度: int = None, 最大批次: int = 32,
+                 输入缩放: float = None, 预热次数: int = 10,
+                 启用优化缓存: bool = True, 缓存目录: str = None,
+                 会话参数: 会话调优参数 = None):
         """
         初始化推理引擎
         
@@ -86,6 +369,12 @@ class ONNX推理引擎:
             预热: 是否进行预热推理
             输入宽度: 输入图像宽度（可选，从模型自动获取）
             输入高度: 输入图像高度（可选，从模型自动获取）
+            最大批次: 批量预测时单次会话运行的最大样本数
+            输入缩放: 整数像素的归一化系数（可选，默认读取模型元数据，缺省为 1/255）
+            预热次数: 预热推理次数
+            启用优化缓存: 是否缓存优化后的模型，再次启动时跳过图优化
+            缓存目录: 优化缓存目录（可选，默认为模型所在目录下的 .ort_cache）
+            会话参数: 线程数、执行模式、图优化级别和内存池选项（可选，默认自动选择线程数并启用全部优化）
             
         需求: 2.1 - 加载 ONNX 模型并初始化推理会话
         """
@@ -102,6 +391,23 @@ class ONNX推理引擎:
         self._配置输入宽度 = 输入宽度
         self._配置输入高度 = 输入高度
         
+        # 批量推理配置
+        self.最大批次 = max(1, 最大批次)
+        self.支持动态批次: bool = False
+        self._批次缓冲: Optional[np.ndarray] = None
+        
+        # 归一化系数在加载模型时确定，之后每帧不再扫描像素最大值
+        self._配置输入缩放 = 输入缩放
+        self.输入缩放: float = 默认输入缩放
+        
+        # 优化后模型缓存
+        self._启用优化缓存 = 启用优化缓存
+        self._缓存目录 = 缓存目录
+        self.命中优化缓存: bool = False
+        
+        # 会话选项
+        self.会话参数 = 会话参数 or 会话调优参数()
+        
         # 性能统计
         self._延迟记录: deque = deque(maxlen=100)
         self._推理次数: int = 0
@@ -115,7 +421,7 @@ class ONNX推理引擎:
         self._初始化引擎()
         
         if 预热 and self._已初始化:
-            self._预热()
+            self._预热(预热次数)
     
     def _初始化引擎(self):
         """初始化 ONNX Runtime 会话
@@ -174,21 +480,13 @@ class ONNX推理引擎:
             if self.后端类型 == "CPU":
                 日志.info("使用 CPU 推理")
             
-            # 创建会话选项
-            会话选项 = ort.SessionOptions()
-            会话选项.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
-            会话选项.intra_op_num_threads = 0  # 自动选择线程数
-            会话选项.inter_op_num_threads = 0
-            
-            # 启用内存优化
-            会话选项.enable_mem_pattern = True
-            会话选项.enable_cpu_mem_arena = True
-            
-            # 创建推理会话
-            self.会话 = ort.InferenceSession(
-                self.模型路径,
-                sess_options=会话选项,
-                providers=providers
+            # 创建会话选项（线程数、执行模式、图优化级别、内存池）
+            会话选项 = self.会话参数.应用到(ort.SessionOptions())
+            
+            # 创建推理会话（复用优化后模型缓存）
+            self.会话, self.命中优化缓存 = 创建推理会话(
+                self.模型路径, 会话选项, providers,
+                缓存目录=self._缓存目录, 启用缓存=self._启用优化缓存
             )
             
             # 获取输入输出信息
@@ -199,6 +497,13 @@ class ONNX推理引擎:
             输出信息 = self.会话.get_outputs()[0]
             self.输出名称 = 输出信息.name
             
+            self.输入缩放 = self._确定输入缩放()
+            
+            # 批次维度固定的模型只能按固定大小运行，批量预测时分块并补齐
+            self.支持动态批次 = bool(self.输入形状) and 是否动态维度(self.输入形状[0])
+            if not self.支持动态批次:
+                日志.warning(f"模型批次维度固定为 {self.输入形状[:1]}，批量预测将按固定批次分块执行")
+            
             # 验证实际使用的提供者
             实际提供者 = self.会话.get_providers()
             日志.info(f"实际使用的提供者: {实际提供者}")
@@ -300,24 +605,122 @@ class ONNX推理引擎:
         # 后处理输出（需求 2.5: 与 TFLearn 相同的输出格式）
         return self._后处理(输出)
     
+    def 批量预测(self, 图像批次: 批次输入类型) -> np.ndarray:
+        """
+        批量推理预测
+        
+        把多帧写入预分配的输入缓冲，每 最大批次 帧执行一次会话运行；
+        批次维度固定的模型按固定批次分块，最后一块用缓冲中的旧数据补齐。
+        
+        参数:
+            图像批次: (N, width, height, 3) 数组或图像序列
+            
+        返回:
+            (N, 动作数) 输出数组，第 i 行与 预测(图像批次[i]) 相同
+        """
+        if self.会话 is None:
+            raise RuntimeError("推理引擎未初始化")
+        
+        if not self._已初始化:
+            raise RuntimeError(f"推理引擎初始化失败: {self._初始化错误}")
+        
+        数量 = len(图像批次)
+        if 数量 == 0:
+            return np.zeros((0, 0), dtype=np.float32)
+        
+        每块数量 = self.最大批次 if self.支持动态批次 else int(self.输入形状[0])
+        缓冲 = self._获取批次缓冲(每块数量, np.shape(图像批次[0]))
+        结果: Optional[np.ndarray] = None
+        
+        for 起点 in range(0, 数量, 每块数量):
+            块 = 图像批次[起点:起点 + 每块数量]
+            块数量 = len(块)
+            准备批次输入(块, 缓冲, self.输入缩放)
+            输入数据 = 缓冲[:块数量] if self.支持动态批次 else 缓冲
+            
+            输出 = self.会话.run([self.输出名称], {self.输入名称: 输入数据})[0]
+            
+            if 结果 is None:
+                结果 = np.empty((数量,) + 输出.shape[1:], dtype=输出.dtype)
+            结果[起点:起点 + 块数量] = 输出[:块数量]
+        
+        return 结果
+    
+    def _获取批次缓冲(self, 行数: int, 帧形状: Tuple[int, ...]) -> np.ndarray:
+        """获取预分配的批量输入缓冲，帧形状或行数变化时重新分配"""
+        期望形状 = (行数,) + tuple(帧形状)
+        if self._批次缓冲 is None or self._批次缓冲.shape != 期望形状:
+            self._批次缓冲 = np.zeros(期望形状, dtype=np.float32)
+        return self._批次缓冲
+    
+    def _确定输入缩放(self) -> float:
+        """确定整数像素的归一化系数：构造参数 > 模型元数据 '输入缩放' > 1/255"""
+        if self._配置输入缩放 is not None:
+            return float(self._配置输入缩放)
+        
+        try:
+            元数据 = self.会话.get_modelmeta().custom_metadata_map
+            if "输入缩放" in 元数据:
+                return float(元数据["输入缩放"])
+        except Exception as e:
+            日志.debug(f"读取模型元数据失败: {e}")
+        return 默认输入缩放
+    
+    def 获取预处理规格(self, 宽度: int = None, 高度: int = None, 颜色转换: Any = "默认"):
+        """获取与模型输入匹配的预处理规格
+        
+        输入形状为 (N, 3, H, W) 时使用 NCHW，否则按 (N, 宽度, 高度, 3) 解释为 NHWC；
+        动态维度依次使用参数、构造时的输入尺寸和 480x270。
+        
+        参数:
+            宽度: 动态维度时使用的输入宽度
+            高度: 动态维度时使用的输入高度
+            颜色转换: cv2 颜色转换码，None 表示不转换，默认与训练数据一致
+        
+        返回:
+            预处理规格
+        """
+        from 核心.帧预处理 import 预处理规格, 默认颜色转换
+        
+        def 维度(值: Any, 备选: Optional[int], 默认: int) -> int:
+            return 值 if not 是否动态维度(值) else (备选 or 默认)
+        
+        宽度 = 宽度 or self._配置输入宽度
+        高度 = 高度 or self._配置输入高度
+        样本形状 = tuple(self.输入形状[1:]) if len(self.输入形状) == 4 else (None, None, 3)
+        
+        if 样本形状[0] in (1, 3) and 样本形状[2] not in (1, 3):
+            布局 = "NCHW"
+            通道数 = 样本形状[0]
+            高度 = 维度(样本形状[1], 高度, 270)
+            宽度 = 维度(样本形状[2], 宽度, 480)
+        else:
+            布局 = "NHWC"
+            宽度 = 维度(样本形状[0], 宽度, 480)
+            高度 = 维度(样本形状[1], 高度, 270)
+            通道数 = 维度(样本形状[2], None, 3)
+        
+        return 预处理规格(
+            宽度=宽度, 高度=高度, 通道数=通道数, 布局=布局,
+            缩放=self.输入缩放,
+            颜色转换=默认颜色转换 if 颜色转换 == "默认" else 颜色转换
+        )
+    
     def _预处理(self, 图像: np.ndarray) -> np.ndarray:
         """预处理输入图像
         
         将输入图像转换为模型所需的格式：
-        - 转换为 float32
-        - 归一化到 0-1 范围
+        - 整数像素转换为 float32 并乘以加载时确定的 输入缩放
+        - float32 输入视为已归一化（如 帧预处理器 的输出），不复制
         - 添加 batch 维度
         
         需求: 2.2 - 图像预处理
         """
-        # 确保是 float32
-        if 图像.dtype != np.float32:
+        if np.issubdtype(图像.dtype, np.integer):
+            图像 = np.multiply(图像, np.float32(self.输入缩放), dtype=np.float32)
+        elif 图像.dtype != np.float32:
             图像 = 图像.astype(np.float32)
         
-        # 归一化到 0-1（如果需要）
-        if 图像.max() > 1.0:
-            图像 = 图像 / 255.0
-        
         # 添加 batch 维度
         if len(图像.shape) == 3:
             图像 = np.expand_dims(图像, axis=0)
@@ -467,6 +870,7 @@ class 统一推理引擎:
             "输入宽度": 480,
             "输入高度": 270,
             "预热次数": 10,
+            "最大批次": 32,
         }
         
         # 尝试从配置文件加载
@@ -510,7 +914,10 @@ class 统一推理引擎:
                 "输入宽度": self._配置.get("输入宽度", 480),
                 "输入高度": self._配置.get("输入高度", 270),
                 "预热次数": self._配置.get("预热次数", 10),
+                "最大批次": self._配置.get("最大批次", 32),
             }
+            if self._配置.get("会话调优"):
+                配置数据["会话调优"] = self._配置["会话调优"]
             
             with open(配置文件路径, 'w', encoding='utf-8') as f:
                 json.dump(配置数据, f, ensure_ascii=False, indent=2)
@@ -646,7 +1053,9 @@ class 统一推理引擎:
                 onnx路径, 
                 使用GPU=self.使用GPU,
                 输入宽度=self._配置.get("输入宽度"),
-                输入高度=self._配置.get("输入高度")
+                输入高度=self._配置.get("输入高度"),
+                最大批次=self._配置.get("最大批次", 32),
+                会话参数=读取会话调优参数(self._配置, onnx路径)
             )
             self.当前后端 = self.后端_ONNX
             日志.info(f"已初始化 ONNX 推理引擎: {onnx路径}")
@@ -684,7 +1093,7 @@ class 统一推理引擎:
             # 加载权重
             模型.load(self.模型路径)
             
-            self._引擎 = TFLearn推理包装器(模型)
+            self._引擎 = TFLearn推理包装器(模型, 最大批次=self._配置.get("最大批次", 32))
             self.当前后端 = self.后端_TFLearn
             日志.info(f"已初始化 TFLearn 推理引擎: {self.模型路径}")
             return True
@@ -743,6 +1152,26 @@ class 统一推理引擎:
         
         return self._引擎.预测(图像)
     
+    def 批量预测(self, 图像批次: 批次输入类型) -> np.ndarray:
+        """
+        批量推理预测
+        
+        参数:
+            图像批次: (N, width, height, 3) 数组或图像序列
+            
+        返回:
+            (N, 动作数) 输出数组
+        """
+        if self._引擎 is None:
+            raise RuntimeError("推理引擎未初始化")
+        
+        if not self._已初始化:
+            raise RuntimeError(f"推理引擎初始化失败: {self._初始化错误}")
+        
+        if hasattr(self._引擎, '批量预测'):
+            return self._引擎.批量预测(图像批次)
+        return np.array([self._引擎.预测(图像) for 图像 in 图像批次], dtype=np.float32)
+    
     def 获取当前后端(self) -> str:
         """获取当前使用的推理后端
         
@@ -759,6 +1188,27 @@ class 统一推理引擎:
         """
         return self.检测到的格式
     
+    def 获取预处理规格(self, 宽度: int = None, 高度: int = None):
+        """获取当前后端的预处理规格
+        
+        ONNX 后端由模型输入形状和加载时确定的缩放系数决定；
+        TFLearn 模型直接接收 uint8 像素，不做归一化。
+        
+        参数:
+            宽度: 输入宽度（默认使用配置中的 输入宽度）
+            高度: 输入高度（默认使用配置中的 输入高度）
+        
+        返回:
+            预处理规格
+        """
+        宽度 = 宽度 or self._配置.get("输入宽度", 480)
+        高度 = 高度 or self._配置.get("输入高度", 270)
+        if hasattr(self._引擎, '获取预处理规格'):
+            return self._引擎.获取预处理规格(宽度, 高度)
+        
+        from 核心.帧预处理 import 预处理规格
+        return 预处理规格(宽度=宽度, 高度=高度, 缩放=None)
+    
     def 获取延迟统计(self) -> 性能指标:
         """获取推理延迟统计
         
@@ -778,6 +1228,7 @@ class 统一推理引擎:
         返回:
             包含引擎状态的字典
         """
+        引擎 = getattr(self, '_引擎', None)
         return {
             "已初始化": self._已初始化,
             "模型路径": self.模型路径,
@@ -786,6 +1237,7 @@ class 统一推理引擎:
             "首选后端": self.首选后端,
             "使用GPU": self.使用GPU,
             "初始化错误": self._初始化错误,
+            "会话参数": 引擎.会话参数.to_dict() if isinstance(引擎, ONNX推理引擎) else None,
         }
     
     def 设置首选后端(self, 后端: str) -> None:
@@ -819,8 +1271,9 @@ class 统一推理引擎:
 class TFLearn推理包装器:
     """TFLearn 模型的推理包装器"""
     
-    def __init__(self, 模型):
+    def __init__(self, 模型, 最大批次: int = 32):
         self.模型 = 模型
+        self.最大批次 = max(1, 最大批次)
         self._延迟记录: deque = deque(maxlen=100)
         self._推理次数: int = 0
     
@@ -840,6 +1293,16 @@ class TFLearn推理包装器:
         
         return 结果[0].tolist() if len(结果.shape) > 1 else 结果.tolist()
     
+    def 批量预测(self, 图像批次: 批次输入类型) -> np.ndarray:
+        """按 最大批次 分块执行批量预测"""
+        结果列表 = []
+        for 起点 in range(0, len(图像批次), self.最大批次):
+            块 = 图像批次[起点:起点 + self.最大批次]
+            结果列表.append(np.asarray(self.模型.predict(np.asarray(块))))
+        if not 结果列表:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.concatenate(结果列表)
+    
     def 获取延迟统计(self) -> 性能指标:
         """获取延迟统计"""
         if not self._延迟记录:
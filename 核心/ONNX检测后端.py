@@ -0,0 +1,188 @@
+"""
+ONNX 检测后端模块
+直接用 ONNX Runtime (CPU) 运行导出的 YOLO .onnx 模型
+
+功能:
+- letterbox 预处理，画布和输入张量在帧间复用
+- 整批向量化解码 + 按类别非极大值抑制
+- 结果以 numpy 数组返回，由 YOLO检测器 一次性转换为检测结果
+
+不依赖 torch / ultralytics，适合只有 CPU 的主机。
+"""
+
+import ast
+import logging
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from 工具.目标检测 import 非极大值抑制
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+# letterbox 填充颜色 (与 ultralytics 导出时的预处理一致)
+填充值 = 114
+
+
+class ONNX检测后端:
+    """
+    YOLO ONNX 模型的 CPU 推理后端
+
+    支持两种常见导出格式:
+    - YOLOv8 及以后: 输出 (1, 4 + 类别数, 候选数)，每列为 cx, cy, w, h, 各类别分数
+    - YOLOv5: 输出 (1, 候选数, 5 + 类别数)，每行为 cx, cy, w, h, 目标置信度, 各类别概率
+    """
+
+    def __init__(self, 模型路径: str, 输入尺寸: Tuple[int, int] = (640, 640),
+                 线程数: int = 0, 最大检测数: int = 300):
+        """
+        初始化 ONNX 检测后端
+
+        Args:
+            模型路径: 导出的 YOLO .onnx 模型路径
+            输入尺寸: 模型输入尺寸 (宽度, 高度)，模型输入为固定尺寸时以模型为准
+            线程数: 推理线程数，0 表示由 ONNX Runtime 自动选择
+            最大检测数: 非极大值抑制后最多保留的检测数
+
+        Raises:
+            ImportError: 未安装 onnxruntime
+            RuntimeError: 模型加载失败
+        """
+        import onnxruntime as ort
+
+        self.模型路径 = 模型路径
+        self.最大检测数 = 最大检测数
+
+        会话选项 = ort.SessionOptions()
+        会话选项.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        会话选项.intra_op_num_threads = 线程数
+        try:
+            self.会话 = ort.InferenceSession(
+                模型路径, sess_options=会话选项, providers=['CPUExecutionProvider']
+            )
+        except Exception as e:
+            raise RuntimeError(f"加载 ONNX 检测模型失败: {e}") from e
+
+        输入信息 = self.会话.get_inputs()[0]
+        self.输入名称 = 输入信息.name
+        形状 = 输入信息.shape
+        宽度, 高度 = 输入尺寸
+        if len(形状) == 4 and isinstance(形状[2], int) and isinstance(形状[3], int):
+            高度, 宽度 = 形状[2], 形状[3]
+        self.输入尺寸 = (宽度, 高度)
+
+        self.类别名称 = self._读取类别名称()
+
+        # 帧间复用的缓冲
+        self._画布 = np.full((高度, 宽度, 3), 填充值, dtype=np.uint8)
+        self._输入缓冲 = np.empty((1, 3, 高度, 宽度), dtype=np.float32)
+        self._上次布局: Optional[Tuple[int, int, int, int]] = None
+
+        logger.info(f"ONNX 检测模型加载成功: {模型路径}, 输入尺寸: {self.输入尺寸}, "
+                    f"类别数: {len(self.类别名称) if self.类别名称 else '未知'}")
+
+    def _读取类别名称(self) -> Optional[Dict[int, str]]:
+        """从模型元数据读取 ultralytics 导出时写入的类别名称"""
+        try:
+            元数据 = self.会话.get_modelmeta().custom_metadata_map
+            名称 = 元数据.get("names")
+            return ast.literal_eval(名称) if 名称 else None
+        except Exception:
+            return None
+
+    def _letterbox(self, 图像: np.ndarray) -> Tuple[float, int, int]:
+        """
+        等比缩放图像并居中放入画布，再写入输入缓冲 (RGB, CHW, 0-1)
+
+        Returns:
+            (缩放比例, 左侧填充, 上方填充)
+        """
+        图像高度, 图像宽度 = 图像.shape[:2]
+        输入宽度, 输入高度 = self.输入尺寸
+        比例 = min(输入宽度 / 图像宽度, 输入高度 / 图像高度)
+        新宽度 = max(1, int(round(图像宽度 * 比例)))
+        新高度 = max(1, int(round(图像高度 * 比例)))
+        左 = (输入宽度 - 新宽度) // 2
+        上 = (输入高度 - 新高度) // 2
+
+        # 画面尺寸不变时填充区域保持不变，只覆盖图像区域
+        布局 = (左, 上, 新宽度, 新高度)
+        if 布局 != self._上次布局:
+            self._画布.fill(填充值)
+            self._上次布局 = 布局
+
+        if 图像.ndim == 2:
+            图像 = cv2.cvtColor(图像, cv2.COLOR_GRAY2BGR)
+        elif 图像.shape[2] == 4:
+            图像 = cv2.cvtColor(图像, cv2.COLOR_BGRA2BGR)
+        if (新宽度, 新高度) != (图像宽度, 图像高度):
+            图像 = cv2.resize(图像, (新宽度, 新高度), interpolation=cv2.INTER_LINEAR)
+        self._画布[上:上 + 新高度, 左:左 + 新宽度] = 图像
+
+        # BGR -> RGB, HWC -> CHW, 归一化
+        np.multiply(self._画布[..., ::-1].transpose(2, 0, 1), np.float32(1.0 / 255.0),
+                    out=self._输入缓冲[0], casting='unsafe')
+        return 比例, 左, 上
+
+    def _解码(self, 输出: np.ndarray, 置信度阈值: float
+              ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        把原始输出解码为 (中心点宽高框, 置信度, 类别)，只保留超过阈值的候选
+        """
+        输出 = 输出[0]
+        类别数 = len(self.类别名称) if self.类别名称 else None
+
+        # YOLOv8 导出为 (4 + 类别数, 候选数)，候选数远大于通道数
+        if 类别数 is not None:
+            v8布局 = 输出.shape[0] == 4 + 类别数
+        else:
+            v8布局 = 输出.shape[0] < 输出.shape[1]
+
+        if v8布局:
+            输出 = 输出.T
+            分数矩阵 = 输出[:, 4:]
+        else:
+            分数矩阵 = 输出[:, 5:] * 输出[:, 4:5]
+
+        类别 = 分数矩阵.argmax(axis=1)
+        置信度 = 分数矩阵[np.arange(len(类别)), 类别]
+        有效 = 置信度 >= 置信度阈值
+        return 输出[有效, :4], 置信度[有效], 类别[有效]
+
+    def 检测(self, 图像: np.ndarray, 置信度阈值: float, NMS阈值: float
+             ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        执行检测
+
+        Args:
+            图像: BGR 图像
+            置信度阈值: 置信度阈值
+            NMS阈值: 非极大值抑制 IoU 阈值
+
+        Returns:
+            (框, 置信度, 类别)，框为原图坐标 (x1, y1, x2, y2)，按置信度降序
+        """
+        比例, 左, 上 = self._letterbox(图像)
+        输出 = self.会话.run(None, {self.输入名称: self._输入缓冲})[0]
+
+        中心框, 置信度, 类别 = self._解码(输出, 置信度阈值)
+        if len(置信度) == 0:
+            return np.empty((0, 4), dtype=np.float32), 置信度, 类别
+
+        # cx, cy, w, h -> x1, y1, x2, y2
+        半宽高 = 中心框[:, 2:4] / 2
+        框 = np.concatenate([中心框[:, :2] - 半宽高, 中心框[:, :2] + 半宽高], axis=1)
+
+        保留 = 非极大值抑制(框, 置信度, NMS阈值, 类别数组=类别)[:self.最大检测数]
+        框, 置信度, 类别 = 框[保留], 置信度[保留], 类别[保留]
+
+        # 去除 letterbox 偏移并缩放回原图
+        图像高度, 图像宽度 = 图像.shape[:2]
+        框 -= np.array([左, 上, 左, 上], dtype=框.dtype)
+        框 /= 比例
+        np.clip(框[:, 0::2], 0, 图像宽度, out=框[:, 0::2])
+        np.clip(框[:, 1::2], 0, 图像高度, out=框[:, 1::2])
+        return 框, 置信度, 类别
@@ -23,7 +23,7 @@ from .动作检测 import 检测动作变化
 # 增强模块
 from .数据类型 import (
     实体类型, 方向, 游戏状态, 决策策略,
-    检测结果, 状态识别结果, 决策上下文, 决策结果, 决策规则, 决策日志
+    检测结果, 检测特征, 状态识别结果, 决策上下文, 决策结果, 决策规则, 决策日志
 )
 from .目标检测器 import YOLO检测器
 from .状态识别器 import 状态识别器
@@ -45,14 +45,14 @@ from .档案管理 import 档案管理器
 
 # 智能录制模块
 from .智能录制 import (
-    事件类型, 价值等级, GameEvent, RecordingSegment, RecordingStatistics,
+    事件类型, 价值等级, GameEvent, RecordingSegment, SegmentSummary, RecordingStatistics,
     StatisticsService, ValueEvaluator, DataFilter
 )
 
 # 自动调参模块
 from .自动调参 import (
     AggressivenessLevel, PerformanceMetric, ParameterSpace, TuningRecord,
-    AutoTuner, get_default_parameter_spaces
+    AutoTuner, MetricSeries, get_default_parameter_spaces
 )
 
 # 模块管理器（错误降级机制）
@@ -62,6 +62,6 @@ from .模块管理 import (
 
 # 模型热切换模块
 from .模型管理 import (
-    模型槽位, 切换事件, 模型配置, 管理器配置,
+    模型槽位, 切换事件, 模型配置, 管理器配置, 活动模型快照, 会话池,
     模型管理器 as 热切换模型管理器, 创建模型管理器
 )
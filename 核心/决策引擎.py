@@ -19,7 +19,7 @@ from 核心.数据类型 import (
 )
 from 配置.增强设置 import (
     决策引擎配置, 状态动作权重, 动作冷却时间, 紧急规则配置, 游戏状态枚举,
-    状态检测配置
+    状态检测配置, 推理服务配置
 )
 from 配置.设置 import 动作定义, 总动作数
 
@@ -94,6 +94,11 @@ class 决策引擎:
         # 动作冷却记录 {动作索引: 上次执行时间}
         self.动作冷却: Dict[int, float] = {}
         
+        # 编译后的规则索引 (由 _编译规则 维护)
+        # 动作可用时间[i] 为动作 i 下一次可执行的时间戳，0 表示随时可用
+        self._动作可用时间 = np.zeros(总动作数, dtype=np.float64)
+        self._编译规则()
+        
         # 决策日志
         日志长度 = 决策引擎配置.get("日志长度", 100)
         self.决策日志: deque = deque(maxlen=日志长度)
@@ -151,6 +156,7 @@ class 决策引擎:
         self.规则列表.append(规则)
         # 按优先级降序排序
         self.规则列表.sort(key=lambda r: r.优先级, reverse=True)
+        self._编译规则()
         logger.debug(f"添加规则: {规则.名称}, 优先级: {规则.优先级}")
     
     def 移除规则(self, 规则名称: str) -> bool:
@@ -166,6 +172,7 @@ class 决策引擎:
         原长度 = len(self.规则列表)
         self.规则列表 = [r for r in self.规则列表 if r.名称 != 规则名称]
         已移除 = len(self.规则列表) < 原长度
+        self._编译规则()
         if 已移除:
             logger.debug(f"移除规则: {规则名称}")
         return 已移除
@@ -173,8 +180,75 @@ class 决策引擎:
     def 清空规则(self) -> None:
         """清空所有规则"""
         self.规则列表.clear()
+        self._编译规则()
         logger.debug("已清空所有规则")
     
+    def _编译规则(self) -> None:
+        """
+        编译规则列表为按游戏状态分桶的索引
+        
+        规则按优先级排好序后，为每个游戏状态预先计算可能触发的规则下标
+        (含/不含紧急规则两份)，并把规则冷却和动作冷却转换为"下次可用时间"
+        数组。决策时只需一次向量比较即可筛掉冷却中的规则，只对剩下的规则
+        调用条件函数。
+        """
+        self._已编译规则 = self.规则列表
+        self._已编译数量 = len(self.规则列表)
+        
+        self._规则动作 = np.array([r.动作 for r in self.规则列表], dtype=np.int64)
+        
+        # 规则自身冷却: 上次触发时间 + 冷却时间
+        self._规则可用时间 = np.array([
+            self.动作冷却.get(f"rule_{r.名称}", 0) + r.冷却时间 if r.冷却时间 > 0 else 0.0
+            for r in self.规则列表
+        ], dtype=np.float64)
+        
+        # 动作冷却数组需覆盖规则引用的全部动作
+        所需长度 = int(self._规则动作.max()) + 1 if len(self._规则动作) else 0
+        self._扩展动作可用时间(所需长度)
+        
+        # 所有冷却的最晚结束时间，超过后可跳过逐条筛选
+        self._冷却截止 = max(
+            float(self._规则可用时间.max()) if len(self._规则可用时间) else 0.0,
+            float(self._动作可用时间.max())
+        )
+        
+        通用: List[int] = []
+        通用非紧急: List[int] = []
+        按状态: Dict[游戏状态, List[int]] = {状态: [] for 状态 in 游戏状态}
+        按状态非紧急: Dict[游戏状态, List[int]] = {状态: [] for 状态 in 游戏状态}
+        for 下标, 规则 in enumerate(self.规则列表):
+            if 规则.适用状态 is None:
+                目标 = [通用]
+                目标非紧急 = [通用非紧急]
+                for 状态 in 游戏状态:
+                    目标.append(按状态[状态])
+                    目标非紧急.append(按状态非紧急[状态])
+            else:
+                目标 = [按状态[状态] for 状态 in 规则.适用状态]
+                目标非紧急 = [按状态非紧急[状态] for 状态 in 规则.适用状态]
+            for 桶 in 目标:
+                桶.append(下标)
+            if not 规则.紧急:
+                for 桶 in 目标非紧急:
+                    桶.append(下标)
+        
+        def 转数组(下标列表: List[int]) -> np.ndarray:
+            return np.array(下标列表, dtype=np.int64)
+        
+        self._通用规则桶 = (转数组(通用), 转数组(通用非紧急))
+        self._状态规则桶 = {
+            状态: (转数组(按状态[状态]), 转数组(按状态非紧急[状态]))
+            for 状态 in 游戏状态
+        }
+    
+    def _扩展动作可用时间(self, 长度: int) -> None:
+        """确保动作可用时间数组至少为指定长度"""
+        if 长度 > len(self._动作可用时间):
+            扩展 = np.zeros(长度, dtype=np.float64)
+            扩展[:len(self._动作可用时间)] = self._动作可用时间
+            self._动作可用时间 = 扩展
+    
     def 决策(self, 上下文: 决策上下文) -> 决策结果:
         """
         执行决策，返回最终动作
@@ -271,18 +345,25 @@ class 决策引擎:
         Returns:
             匹配的规则结果，无匹配返回None
         """
-        for 规则 in self.规则列表:
-            # 排除紧急规则
-            if 排除紧急 and "紧急" in 规则.名称:
-                continue
-            
-            # 检查冷却
-            if not self._检查规则冷却(规则):
-                continue
-            
-            # 检查动作冷却
-            if not self.检查冷却(规则.动作):
-                continue
+        # 规则列表被直接修改时重新编译
+        if (self._已编译规则 is not self.规则列表
+                or self._已编译数量 != len(self.规则列表)):
+            self._编译规则()
+        
+        桶 = self._状态规则桶.get(上下文.游戏状态, self._通用规则桶)
+        候选 = 桶[1] if 排除紧急 else 桶[0]
+        if len(候选) == 0:
+            return None
+        
+        # 一次性筛掉规则冷却或动作冷却中的规则
+        现在 = time.time()
+        if 现在 < self._冷却截止:
+            可用 = ((self._规则可用时间[候选] <= 现在)
+                    & (self._动作可用时间[self._规则动作[候选]] <= 现在))
+            候选 = 候选[可用]
+        
+        for 下标 in 候选.tolist():
+            规则 = self.规则列表[下标]
             
             # 检查条件
             try:
@@ -351,15 +432,6 @@ class 决策引擎:
         
         return None
     
-    def _检查规则冷却(self, 规则: 决策规则) -> bool:
-        """检查规则是否在冷却中"""
-        if 规则.冷却时间 <= 0:
-            return True
-        
-        规则键 = f"rule_{规则.名称}"
-        上次时间 = self.动作冷却.get(规则键, 0)
-        return time.time() - 上次时间 >= 规则.冷却时间
-
     def _应用模型(self, 上下文: 决策上下文,
                  候选动作: List[Tuple[int, float]]) -> 决策结果:
         """
@@ -563,7 +635,13 @@ class 决策引擎:
         Args:
             动作索引: 执行的动作索引
         """
-        self.动作冷却[动作索引] = time.time()
+        现在 = time.time()
+        self.动作冷却[动作索引] = 现在
+        冷却时间 = 动作冷却时间.get(动作索引, 0)
+        if 动作索引 >= 0 and 冷却时间 > 0:
+            self._扩展动作可用时间(动作索引 + 1)
+            self._动作可用时间[动作索引] = 现在 + 冷却时间
+            self._冷却截止 = max(self._冷却截止, 现在 + 冷却时间)
         logger.debug(f"记录动作执行: {动作索引}")
     
     def 获取决策日志(self, 数量: int = 10) -> List[决策日志]:
@@ -587,6 +665,9 @@ class 决策引擎:
     def 重置冷却(self) -> None:
         """重置所有动作冷却"""
         self.动作冷却.clear()
+        self._动作可用时间.fill(0.0)
+        self._规则可用时间.fill(0.0)
+        self._冷却截止 = 0.0
         logger.debug("已重置所有动作冷却")
     
     def _获取动作名称(self, 动作索引: int) -> str:
@@ -865,6 +946,13 @@ class 决策引擎:
             # 使用传入的模型路径或配置中的路径
             实际模型路径 = 模型路径 or 配置.get("模型路径", "")
             
+            # 启用推理服务时与同进程的其他机器人共享推理会话
+            if 推理服务配置.get("启用", False):
+                from 核心.推理服务 import 获取共享客户端
+                self._推理引擎 = 获取共享客户端(实际模型路径, 配置=配置, 服务配置=推理服务配置)
+                logger.info(f"使用共享推理服务，后端: {self._推理引擎.获取当前后端()}")
+                return
+            
             self._推理引擎 = 统一推理引擎(
                 模型路径=实际模型路径,
                 首选后端=配置.get("首选后端", "auto"),
@@ -1019,6 +1107,15 @@ class 决策引擎:
         self._启用ONNX推理 = 启用
         logger.info(f"推理引擎已{'启用' if 启用 else '禁用'}")
     
+    def 关闭推理引擎(self) -> None:
+        """释放推理引擎
+        
+        使用共享推理服务时释放对服务的引用，最后一个使用者关闭时服务停止。
+        """
+        if self._推理引擎 is not None and hasattr(self._推理引擎, '关闭'):
+            self._推理引擎.关闭()
+        self._推理引擎 = None
+    
     # ==================== 模型管理集成方法 ====================
     
     def _初始化模型管理器(self) -> None:
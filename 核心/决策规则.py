@@ -3,11 +3,16 @@
 包含战斗、对话、采集、紧急情况等状态的规则
 """
 
-from typing import List
+from typing import Iterable, List, Optional
 
-from 核心.数据类型 import 游戏状态, 决策上下文, 决策规则, 实体类型
+from 核心.数据类型 import 游戏状态, 决策上下文, 决策规则, 实体类型, 方向
 from 配置.增强设置 import 紧急规则配置, 状态判定阈值
 
+# 规则条件通过 上下文.特征 查询检测结果，同一帧内各条件共享一次构建的特征视图
+
+_左侧方向 = (方向.左, 方向.左上, 方向.左下)
+_右侧方向 = (方向.右, 方向.右上, 方向.右下)
+
 
 # ==================== 战斗状态规则 ====================
 
@@ -17,11 +22,7 @@ def _战斗_有近距离敌人(上下文: 决策上下文) -> bool:
         return False
     
     敌人距离阈值 = 状态判定阈值.get("战斗_敌人距离", 200)
-    
-    for 检测 in 上下文.检测结果:
-        if 检测.类型 == 实体类型.怪物 and 检测.距离 < 敌人距离阈值:
-            return True
-    return False
+    return 上下文.特征.存在(实体类型.怪物, 敌人距离阈值)
 
 
 def _战斗_敌人在左侧(上下文: 决策上下文) -> bool:
@@ -29,13 +30,7 @@ def _战斗_敌人在左侧(上下文: 决策上下文) -> bool:
     if 上下文.游戏状态 != 游戏状态.战斗:
         return False
     
-    from 核心.数据类型 import 方向
-    
-    for 检测 in 上下文.检测结果:
-        if 检测.类型 == 实体类型.怪物:
-            if 检测.方向 in (方向.左, 方向.左上, 方向.左下):
-                return True
-    return False
+    return 上下文.特征.方向数量(实体类型.怪物, _左侧方向) > 0
 
 
 def _战斗_敌人在右侧(上下文: 决策上下文) -> bool:
@@ -43,13 +38,7 @@ def _战斗_敌人在右侧(上下文: 决策上下文) -> bool:
     if 上下文.游戏状态 != 游戏状态.战斗:
         return False
     
-    from 核心.数据类型 import 方向
-    
-    for 检测 in 上下文.检测结果:
-        if 检测.类型 == 实体类型.怪物:
-            if 检测.方向 in (方向.右, 方向.右上, 方向.右下):
-                return True
-    return False
+    return 上下文.特征.方向数量(实体类型.怪物, _右侧方向) > 0
 
 
 def _战斗_多个敌人(上下文: 决策上下文) -> bool:
@@ -73,35 +62,40 @@ def _战斗_需要使用技能(上下文: 决策上下文) -> bool:
         优先级=50,
         条件=_战斗_有近距离敌人,
         动作=9,  # 技能1
-        冷却时间=1.0
+        冷却时间=1.0,
+        适用状态=(游戏状态.战斗,)
     ),
     决策规则(
         名称="战斗_多敌人_使用AOE技能",
         优先级=60,
         条件=_战斗_多个敌人,
         动作=11,  # 技能3 (假设是AOE)
-        冷却时间=2.0
+        冷却时间=2.0,
+        适用状态=(游戏状态.战斗,)
     ),
     决策规则(
         名称="战斗_敌人在左_左移",
         优先级=30,
         条件=_战斗_敌人在左侧,
         动作=4,  # 前进+左移
-        冷却时间=0.5
+        冷却时间=0.5,
+        适用状态=(游戏状态.战斗,)
     ),
     决策规则(
         名称="战斗_敌人在右_右移",
         优先级=30,
         条件=_战斗_敌人在右侧,
         动作=5,  # 前进+右移
-        冷却时间=0.5
+        冷却时间=0.5,
+        适用状态=(游戏状态.战斗,)
     ),
     决策规则(
         名称="战斗_普通攻击",
         优先级=40,
         条件=_战斗_需要使用技能,
         动作=22,  # 鼠标左键
-        冷却时间=0.3
+        冷却时间=0.3,
+        适用状态=(游戏状态.战斗,)
     ),
 ]
 
@@ -119,10 +113,7 @@ def _对话_需要交互(上下文: 决策上下文) -> bool:
         return False
     
     # 检查是否有NPC在附近
-    for 检测 in 上下文.检测结果:
-        if 检测.类型 == 实体类型.NPC:
-            return True
-    return False
+    return 上下文.特征.存在(实体类型.NPC)
 
 
 # 对话状态规则列表
@@ -132,14 +123,16 @@ def _对话_需要交互(上下文: 决策上下文) -> bool:
         优先级=70,
         条件=_对话_需要确认,
         动作=22,  # 鼠标左键
-        冷却时间=0.5
+        冷却时间=0.5,
+        适用状态=(游戏状态.对话,)
     ),
     决策规则(
         名称="对话_按F交互",
         优先级=60,
         条件=_对话_需要交互,
         动作=21,  # 交互键F
-        冷却时间=0.5
+        冷却时间=0.5,
+        适用状态=(游戏状态.对话,)
     ),
 ]
 
@@ -165,14 +158,16 @@ def _采集_被攻击(上下文: 决策上下文) -> bool:
         优先级=40,
         条件=_采集_正在采集,
         动作=8,  # 无操作
-        冷却时间=0.1
+        冷却时间=0.1,
+        适用状态=(游戏状态.采集,)
     ),
     决策规则(
         名称="采集_被攻击_中断",
         优先级=80,
         条件=_采集_被攻击,
         动作=19,  # 跳跃/闪避
-        冷却时间=0.5
+        冷却时间=0.5,
+        适用状态=(游戏状态.采集,)
     ),
 ]
 
@@ -204,21 +199,24 @@ def _紧急_危险状态(上下文: 决策上下文) -> bool:
         优先级=100,
         条件=_紧急_危险状态,
         动作=19,  # 跳跃/闪避
-        冷却时间=0.5
+        冷却时间=0.5,
+        紧急=True
     ),
     决策规则(
         名称="紧急_低血量_闪避",
         优先级=95,
         条件=_紧急_低血量,
         动作=19,  # 跳跃/闪避
-        冷却时间=0.5
+        冷却时间=0.5,
+        紧急=True
     ),
     决策规则(
         名称="紧急_被围攻_闪避",
         优先级=90,
         条件=_紧急_被围攻,
         动作=19,  # 跳跃/闪避
-        冷却时间=0.5
+        冷却时间=0.5,
+        紧急=True
     ),
 ]
 
@@ -230,10 +228,7 @@ def _拾取_有物品(上下文: 决策上下文) -> bool:
     if 上下文.游戏状态 != 游戏状态.拾取:
         return False
     
-    for 检测 in 上下文.检测结果:
-        if 检测.类型 == 实体类型.物品:
-            return True
-    return False
+    return 上下文.特征.存在(实体类型.物品)
 
 
 def _拾取_物品在附近(上下文: 决策上下文) -> bool:
@@ -242,11 +237,7 @@ def _拾取_物品在附近(上下文: 决策上下文) -> bool:
         return False
     
     物品距离阈值 = 状态判定阈值.get("拾取_物品距离", 100)
-    
-    for 检测 in 上下文.检测结果:
-        if 检测.类型 == 实体类型.物品 and 检测.距离 < 物品距离阈值:
-            return True
-    return False
+    return 上下文.特征.存在(实体类型.物品, 物品距离阈值)
 
 
 # 拾取状态规则列表
@@ -256,14 +247,16 @@ def _拾取_物品在附近(上下文: 决策上下文) -> bool:
         优先级=50,
         条件=_拾取_物品在附近,
         动作=22,  # 鼠标左键
-        冷却时间=0.3
+        冷却时间=0.3,
+        适用状态=(游戏状态.拾取,)
     ),
     决策规则(
         名称="拾取_按F拾取",
         优先级=55,
         条件=_拾取_有物品,
         动作=21,  # 交互键F
-        冷却时间=0.3
+        冷却时间=0.3,
+        适用状态=(游戏状态.拾取,)
     ),
 ]
 
@@ -280,10 +273,7 @@ def _移动_有NPC附近(上下文: 决策上下文) -> bool:
     if 上下文.游戏状态 not in (游戏状态.移动, 游戏状态.空闲):
         return False
     
-    for 检测 in 上下文.检测结果:
-        if 检测.类型 == 实体类型.NPC and 检测.距离 < 150:
-            return True
-    return False
+    return 上下文.特征.存在(实体类型.NPC, 150)
 
 
 # 移动状态规则列表
@@ -293,14 +283,16 @@ def _移动_有NPC附近(上下文: 决策上下文) -> bool:
         优先级=20,
         条件=_移动_空闲状态,
         动作=0,  # 前进
-        冷却时间=0.1
+        冷却时间=0.1,
+        适用状态=(游戏状态.移动, 游戏状态.空闲)
     ),
     决策规则(
         名称="移动_与NPC交互",
         优先级=40,
         条件=_移动_有NPC附近,
         动作=21,  # 交互键F
-        冷却时间=0.5
+        冷却时间=0.5,
+        适用状态=(游戏状态.移动, 游戏状态.空闲)
     ),
 ]
 
@@ -319,7 +311,8 @@ def _菜单_需要关闭(上下文: 决策上下文) -> bool:
         优先级=60,
         条件=_菜单_需要关闭,
         动作=22,  # 鼠标左键
-        冷却时间=0.5
+        冷却时间=0.5,
+        适用状态=(游戏状态.菜单,)
     ),
 ]
 
@@ -380,7 +373,9 @@ def 获取菜单规则() -> List[决策规则]:
 
 
 def 创建自定义规则(名称: str, 优先级: int, 条件函数, 
-                  动作索引: int, 冷却时间: float = 0.0) -> 决策规则:
+                  动作索引: int, 冷却时间: float = 0.0,
+                  适用状态: Optional[Iterable[游戏状态]] = None,
+                  紧急: bool = False) -> 决策规则:
     """
     创建自定义规则
     
@@ -390,6 +385,8 @@ def 创建自定义规则(名称: str, 优先级: int, 条件函数,
         条件函数: 条件判断函数，接收决策上下文，返回布尔值
         动作索引: 要执行的动作索引
         冷却时间: 规则冷却时间（秒）
+        适用状态: 规则可能触发的游戏状态，None 表示任意状态
+        紧急: 是否为紧急规则
         
     Returns:
         决策规则对象
@@ -399,5 +396,7 @@ def 创建自定义规则(名称: str, 优先级: int, 条件函数,
         优先级=优先级,
         条件=条件函数,
         动作=动作索引,
-        冷却时间=冷却时间
+        冷却时间=冷却时间,
+        适用状态=tuple(适用状态) if 适用状态 is not None else None,
+        紧急=紧急
     )
@@ -257,7 +257,7 @@ def 从配置自动检测() -> Optional[Tuple[int, int, int, int]]:
         return 自动检测游戏窗口()
 
 
-def 截取屏幕(区域=None, region=None, 使用优化=True):
+def 截取屏幕(区域=None, region=None, 使用优化=True, 输出=None):
     """
     截取屏幕指定区域
     
@@ -271,9 +271,10 @@ def 截取屏幕(区域=None, region=None, 使用优化=True):
         区域: tuple (左, 上, 右, 下) 或 None (全屏)
         region: 区域的别名，保持向后兼容
         使用优化: 是否使用优化截取器
+        输出: 可选的预分配数组（如帧环槽位），颜色转换结果直接写入其中
     
     返回:
-        numpy数组: RGB格式的图像
+        numpy数组: RGB格式的图像（提供 输出 时即为 输出）
     """
     global _优化截取器实例
     
@@ -301,17 +302,82 @@ def 截取屏幕(区域=None, region=None, 使用优化=True):
             
             if 图像 is not None:
                 # 优化截取器返回 BGR 格式，转换为 RGB 以保持兼容性
-                return cv2.cvtColor(图像, cv2.COLOR_BGR2RGB)
+                return _转换颜色(图像, cv2.COLOR_BGR2RGB, 输出)
             else:
                 logger.warning("优化截取器返回 None，回退到标准方式")
         except Exception as e:
             logger.warning(f"优化截取器失败，回退到标准方式: {e}")
     
     # 标准截取方式（GDI）
-    return _标准GDI截取(实际区域)
+    return _标准GDI截取(实际区域, 输出)
+
+
+def _转换颜色(图像: np.ndarray, 转换码: int, 输出: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    颜色转换，提供 输出 时直接写入输出数组
+    
+    参数:
+        图像: 截取得到的原始图像
+        转换码: cv2 颜色转换码
+        输出: 可选的预分配数组
+    
+    返回:
+        转换后的图像
+    """
+    if 输出 is None:
+        return cv2.cvtColor(图像, 转换码)
+    
+    # 形状不一致时 cv2 会另行分配而不写入 输出，这里提前报错
+    if 输出.shape[:2] != 图像.shape[:2] or 输出.ndim != 3 or 输出.shape[2] != 3:
+        raise ValueError(f"输出数组形状 {输出.shape} 与截取图像 {图像.shape[:2]} 不一致")
+    cv2.cvtColor(图像, 转换码, dst=输出)
+    return 输出
+
 
+def 截取到帧环(帧环实例, 区域=None, 使用优化=True):
+    """
+    截取屏幕并直接写入帧环的下一个槽位
+    
+    参数:
+        帧环实例: 核心.帧环.帧环，帧形状需与截取区域一致
+        区域: tuple (左, 上, 右, 下) 或 None (全屏)
+        使用优化: 是否使用优化截取器
+    
+    返回:
+        帧引用: 新写入帧的引用
+    """
+    槽号, 槽位 = 帧环实例.开始写入()
+    try:
+        截取屏幕(区域, 使用优化=使用优化, 输出=槽位)
+    except Exception:
+        帧环实例.取消写入(槽号)
+        raise
+    return 帧环实例.完成写入(槽号)
 
-def 截取并缩放(区域=None, 目标尺寸=(480, 270), 使用优化=True):
+
+def 截取缩放到帧环(帧环实例, 预处理器, 区域=None, 使用优化=True):
+    """
+    截取屏幕，按预处理器规格缩放并转换颜色后直接写入帧环的下一个槽位
+    
+    参数:
+        帧环实例: 核心.帧环.帧环，帧形状需与预处理器输出一致
+        预处理器: 帧预处理器
+        区域: tuple (左, 上, 右, 下) 或 None (全屏)
+        使用优化: 是否使用优化截取器
+    
+    返回:
+        帧引用: 新写入帧的引用
+    """
+    槽号, 槽位 = 帧环实例.开始写入()
+    try:
+        预处理器.缩放(截取屏幕(区域, 使用优化=使用优化), 输出=槽位)
+    except Exception:
+        帧环实例.取消写入(槽号)
+        raise
+    return 帧环实例.完成写入(槽号)
+
+
+def 截取并缩放(区域=None, 目标尺寸=(480, 270), 使用优化=True, 预处理器=None):
     """
     截取屏幕并缩放到指定尺寸
     
@@ -319,16 +385,37 @@ def 截取并缩放(区域=None, 目标尺寸=(480, 270), 使用优化=True):
         区域: tuple (左, 上, 右, 下) 或 None (全屏)
         目标尺寸: tuple (宽度, 高度)
         使用优化: 是否使用优化截取器
+        预处理器: 可选的 帧预处理器，提供时按其规格缩放并转换颜色（忽略 目标尺寸），
+                  结果写入预处理器的缓冲
+    
+    返回:
+        numpy数组: 缩放后的图像
+    """
+    图像 = 截取屏幕(区域, 使用优化=使用优化)
+    if 预处理器 is not None:
+        return 预处理器.缩放(图像)
+    return cv2.resize(图像, 目标尺寸)
+
+
+def 截取并预处理(预处理器, 区域=None, 使用优化=True):
+    """
+    截取屏幕并直接生成模型输入
+    
+    缩放、颜色转换和归一化由 帧预处理器 在预分配的缓冲中完成，
+    各入口（运行、录制、界面线程）共用这一阶段。
+    
+    参数:
+        预处理器: 帧预处理器
+        区域: tuple (左, 上, 右, 下) 或 None (全屏)
+        使用优化: 是否使用优化截取器
     
     返回:
-        numpy数组: 缩放后的RGB图像
+        (缩放后的 uint8 图像, 模型输入张量)
     """
-    图像 = 截取屏幕(区域, 使用优化)
-    图像 = cv2.resize(图像, 目标尺寸)
-    return 图像
+    return 预处理器.处理(截取屏幕(区域, 使用优化=使用优化))
 
 
-def _标准GDI截取(区域=None):
+def _标准GDI截取(区域=None, 输出=None):
     """
     标准 GDI 截取方式（回退方案）
     
@@ -336,6 +423,7 @@ def _标准GDI截取(区域=None):
     
     参数:
         区域: tuple (左, 上, 右, 下) 或 None (全屏)
+        输出: 可选的预分配数组
     
     返回:
         numpy数组: RGB格式的图像
@@ -370,7 +458,7 @@ def _标准GDI截取(区域=None):
     win32gui.ReleaseDC(桌面窗口, 窗口DC)
     win32gui.DeleteObject(位图.GetHandle())
 
-    return cv2.cvtColor(图像, cv2.COLOR_BGRA2RGB)
+    return _转换颜色(图像, cv2.COLOR_BGRA2RGB, 输出)
 
 
 def 自动检测游戏窗口(窗口标题关键字: str = None, 进程名: str = None):
@@ -516,7 +604,7 @@ def 截取游戏窗口(窗口标题关键字: str = None, 目标尺寸=None, 使
     if 目标尺寸:
         return 截取并缩放(区域, 目标尺寸, 使用优化)
     else:
-        return 截取屏幕(区域, 使用优化)
+        return 截取屏幕(区域, 使用优化=使用优化)
 
 
 def 获取窗口列表():
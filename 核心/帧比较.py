@@ -6,11 +6,12 @@
 - 直方图比较
 - 结构相似度 (SSIM)
 - 区域比较
+- 预处理帧（灰度图、金字塔缩小图、哈希、统计量只计算一次，多次比较复用）
 """
 
 import cv2
 import numpy as np
-from typing import Tuple, List, Optional
+from typing import Any, Dict, Tuple, List, Optional, Union
 import logging
 
 # 配置日志
@@ -18,6 +19,100 @@ logging.basicConfig(level=logging.INFO)
 日志 = logging.getLogger(__name__)
 
 
+class 预处理帧:
+    """
+    预处理后的帧
+    
+    灰度图和感知哈希在创建时计算，直方图和 SSIM 统计量在首次使用时计算并缓存。
+    作为参考帧保存后，之后每次比较（包括各优先区域的比较）都直接复用这些结果。
+    """
+    
+    # SSIM 在金字塔缩小图上计算，缩小到最长边不超过该值
+    SSIM最大边长 = 160
+    # 缩小后最短边不低于该值，避免小图被缩得过小
+    SSIM最小边长 = 32
+    
+    __slots__ = ("图像", "灰度", "签名", "_缓存")
+    
+    def __init__(self, 图像: np.ndarray):
+        """
+        创建预处理帧
+        
+        参数:
+            图像: BGR 或灰度图像（不会被复制，调用方需保证之后不再修改）
+        """
+        self.图像 = 图像
+        if len(图像.shape) == 3:
+            self.灰度 = cv2.cvtColor(图像, cv2.COLOR_BGR2GRAY)
+        else:
+            self.灰度 = 图像
+        self.签名 = 计算感知哈希(图像)
+        self._缓存: Dict[Any, Any] = {}
+    
+    @property
+    def 形状(self) -> Tuple[int, ...]:
+        """原图形状"""
+        return self.图像.shape
+    
+    @property
+    def 直方图(self) -> np.ndarray:
+        """归一化的 256 级灰度直方图"""
+        直方图 = self._缓存.get("直方图")
+        if 直方图 is None:
+            直方图 = _计算直方图(self.灰度)
+            self._缓存["直方图"] = 直方图
+        return 直方图
+    
+    @property
+    def SSIM统计(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        金字塔缩小图上的 SSIM 统计量
+        
+        返回:
+            (缩小灰度, 均值, 均值平方, 方差)，均为 float32
+        """
+        统计 = self._缓存.get("SSIM统计")
+        if 统计 is None:
+            缩小图 = self.灰度
+            while (max(缩小图.shape[:2]) > self.SSIM最大边长
+                   and min(缩小图.shape[:2]) >= self.SSIM最小边长 * 2):
+                缩小图 = cv2.pyrDown(缩小图)
+            统计 = _计算SSIM统计(缩小图)
+            self._缓存["SSIM统计"] = 统计
+        return 统计
+    
+    def 区域直方图(self, 区域: Tuple[int, int, int, int]) -> np.ndarray:
+        """
+        获取指定区域的归一化直方图（按区域缓存）
+        
+        参数:
+            区域: (x, y, width, height) 区域坐标
+        """
+        键 = ("区域直方图", 区域)
+        直方图 = self._缓存.get(键)
+        if 直方图 is None:
+            直方图 = _计算直方图(_裁剪(self.灰度, 区域))
+            self._缓存[键] = 直方图
+        return 直方图
+    
+    def 区域签名(self, 区域: Tuple[int, int, int, int]) -> int:
+        """
+        获取指定区域的感知哈希（按区域缓存）
+        
+        参数:
+            区域: (x, y, width, height) 区域坐标
+        """
+        键 = ("区域签名", 区域)
+        签名 = self._缓存.get(键)
+        if 签名 is None:
+            签名 = 计算感知哈希(_裁剪(self.图像, 区域))
+            self._缓存[键] = 签名
+        return 签名
+
+
+帧类型 = Union[np.ndarray, 预处理帧]
+
+
 class 帧比较器:
     """计算帧之间的相似度"""
     
@@ -36,23 +131,36 @@ class 帧比较器:
         
         self.方法 = 方法
     
-    def 比较(self, 帧1: np.ndarray, 帧2: np.ndarray) -> float:
+    def 预处理(self, 图像: 帧类型) -> Optional[预处理帧]:
+        """
+        预处理一帧，供之后多次比较复用
+        
+        参数:
+            图像: 输入图像或已预处理的帧
+        
+        返回:
+            预处理帧，图像为 None 时返回 None
+        """
+        if 图像 is None or isinstance(图像, 预处理帧):
+            return 图像
+        return 预处理帧(图像)
+    
+    def 比较(self, 帧1: 帧类型, 帧2: 帧类型) -> float:
         """
         比较两帧的相似度
         
         参数:
-            帧1: 第一帧图像
-            帧2: 第二帧图像
-            
+            帧1: 第一帧图像（或预处理帧）
+            帧2: 第二帧图像（或预处理帧）
+        
         返回:
             相似度分数 (0.0-1.0)，1.0 表示完全相同
         """
         if 帧1 is None or 帧2 is None:
             return 0.0
         
-        # 确保尺寸相同
-        if 帧1.shape != 帧2.shape:
-            帧2 = cv2.resize(帧2, (帧1.shape[1], 帧1.shape[0]))
+        帧1 = self.预处理(帧1)
+        帧2 = self._对齐(帧2, 帧1.形状)
         
         try:
             if self.方法 == "histogram":
@@ -60,7 +168,7 @@ class 帧比较器:
             elif self.方法 == "ssim":
                 return self._SSIM比较(帧1, 帧2)
             elif self.方法 == "mse":
-                return self._MSE比较(帧1, 帧2)
+                return self._MSE比较(帧1.图像, 帧2.图像)
             elif self.方法 == "hash":
                 return self._哈希比较(帧1, 帧2)
             else:
@@ -69,139 +177,227 @@ class 帧比较器:
             日志.warning(f"帧比较失败: {e}")
             return 0.0
     
-    def _直方图比较(self, 帧1: np.ndarray, 帧2: np.ndarray) -> float:
+    def _对齐(self, 帧: 帧类型, 形状: Tuple[int, ...]) -> 预处理帧:
+        """确保帧与目标形状相同，尺寸不同时缩放后重新预处理"""
+        图像 = 帧.图像 if isinstance(帧, 预处理帧) else 帧
+        if 图像.shape != 形状:
+            return 预处理帧(cv2.resize(图像, (形状[1], 形状[0])))
+        return self.预处理(帧)
+    
+    def _直方图比较(self, 帧1: 预处理帧, 帧2: 预处理帧) -> float:
         """使用直方图比较"""
-        # 转换为灰度图
-        if len(帧1.shape) == 3:
-            灰度1 = cv2.cvtColor(帧1, cv2.COLOR_BGR2GRAY)
-            灰度2 = cv2.cvtColor(帧2, cv2.COLOR_BGR2GRAY)
-        else:
-            灰度1, 灰度2 = 帧1, 帧2
-        
-        # 计算直方图
-        hist1 = cv2.calcHist([灰度1], [0], None, [256], [0, 256])
-        hist2 = cv2.calcHist([灰度2], [0], None, [256], [0, 256])
-        
-        # 归一化
-        cv2.normalize(hist1, hist1)
-        cv2.normalize(hist2, hist2)
-        
-        # 比较直方图（使用相关性方法）
-        相似度 = cv2.compareHist(hist1, hist2, cv2.HISTCMP_CORREL)
-        
-        # 将结果映射到 0-1 范围
-        return max(0.0, min(1.0, (相似度 + 1) / 2))
+        return _直方图相似度(帧1.直方图, 帧2.直方图)
     
-    def _SSIM比较(self, 帧1: np.ndarray, 帧2: np.ndarray) -> float:
-        """使用结构相似度 (SSIM) 比较"""
-        # 转换为灰度图
-        if len(帧1.shape) == 3:
-            灰度1 = cv2.cvtColor(帧1, cv2.COLOR_BGR2GRAY)
-            灰度2 = cv2.cvtColor(帧2, cv2.COLOR_BGR2GRAY)
-        else:
-            灰度1, 灰度2 = 帧1, 帧2
-        
-        # 简化的 SSIM 计算
-        C1 = 6.5025  # (0.01 * 255)^2
-        C2 = 58.5225  # (0.03 * 255)^2
-        
-        灰度1 = 灰度1.astype(np.float64)
-        灰度2 = 灰度2.astype(np.float64)
-        
-        # 计算均值
-        mu1 = cv2.GaussianBlur(灰度1, (11, 11), 1.5)
-        mu2 = cv2.GaussianBlur(灰度2, (11, 11), 1.5)
-        
-        mu1_sq = mu1 ** 2
-        mu2_sq = mu2 ** 2
-        mu1_mu2 = mu1 * mu2
-        
-        # 计算方差和协方差
-        sigma1_sq = cv2.GaussianBlur(灰度1 ** 2, (11, 11), 1.5) - mu1_sq
-        sigma2_sq = cv2.GaussianBlur(灰度2 ** 2, (11, 11), 1.5) - mu2_sq
-        sigma12 = cv2.GaussianBlur(灰度1 * 灰度2, (11, 11), 1.5) - mu1_mu2
-        
-        # SSIM 公式
-        ssim_map = ((2 * mu1_mu2 + C1) * (2 * sigma12 + C2)) / \
-                   ((mu1_sq + mu2_sq + C1) * (sigma1_sq + sigma2_sq + C2))
-        
-        return float(np.mean(ssim_map))
+    def _SSIM比较(self, 帧1: 预处理帧, 帧2: 预处理帧) -> float:
+        """使用结构相似度 (SSIM) 比较（金字塔缩小图，float32）"""
+        return _SSIM相似度(帧1.SSIM统计, 帧2.SSIM统计)
     
-    def _MSE比较(self, 帧1: np.ndarray, 帧2: np.ndarray) -> float:
+    def _MSE比较(self, 图像1: np.ndarray, 图像2: np.ndarray) -> float:
         """使用均方误差 (MSE) 比较"""
-        mse = np.mean((帧1.astype(np.float64) - 帧2.astype(np.float64)) ** 2)
+        # cv2.norm 直接累加平方差，不创建中间数组
+        mse = cv2.norm(图像1, 图像2, cv2.NORM_L2SQR) / 图像1.size
         # 将 MSE 转换为相似度（MSE 越小，相似度越高）
         # 假设最大 MSE 为 255^2
         相似度 = 1.0 - (mse / (255 ** 2))
         return max(0.0, min(1.0, 相似度))
     
-    def _哈希比较(self, 帧1: np.ndarray, 帧2: np.ndarray) -> float:
+    def _哈希比较(self, 帧1: 预处理帧, 帧2: 预处理帧) -> float:
         """使用感知哈希比较"""
-        hash1 = self._计算感知哈希(帧1)
-        hash2 = self._计算感知哈希(帧2)
+        return _哈希相似度(帧1.签名, 帧2.签名)
+    
+    def 计算签名(self, 图像: 帧类型) -> int:
+        """
+        计算图像的紧凑签名，用于缓存索引的快速预筛选
+        
+        参数:
+            图像: 输入图像或预处理帧
         
-        # 计算汉明距离
-        距离 = bin(hash1 ^ hash2).count('1')
+        返回:
+            64 位感知哈希
+        """
+        if isinstance(图像, 预处理帧):
+            return 图像.签名
+        return 计算感知哈希(图像)
+    
+    @staticmethod
+    def 签名距离(签名1: int, 签名2: int) -> int:
+        """
+        计算两个签名之间的汉明距离
         
-        # 转换为相似度（64位哈希）
-        相似度 = 1.0 - (距离 / 64.0)
-        return 相似度
+        返回:
+            不同的位数 (0-64)
+        """
+        return bin(签名1 ^ 签名2).count('1')
     
     def _计算感知哈希(self, 图像: np.ndarray) -> int:
         """计算图像的感知哈希"""
-        # 缩小到 8x8
-        缩小图 = cv2.resize(图像, (8, 8))
-        
-        # 转换为灰度
-        if len(缩小图.shape) == 3:
-            灰度图 = cv2.cvtColor(缩小图, cv2.COLOR_BGR2GRAY)
-        else:
-            灰度图 = 缩小图
-        
-        # 计算均值
-        均值 = np.mean(灰度图)
-        
-        # 生成哈希
-        哈希值 = 0
-        for i in range(8):
-            for j in range(8):
-                if 灰度图[i, j] > 均值:
-                    哈希值 |= 1 << (i * 8 + j)
-        
-        return 哈希值
+        return 计算感知哈希(图像)
     
-    def 比较区域(self, 帧1: np.ndarray, 帧2: np.ndarray,
+    def 比较区域(self, 帧1: 帧类型, 帧2: 帧类型,
                  区域: Tuple[int, int, int, int]) -> float:
         """
         比较指定区域的相似度
         
         参数:
-            帧1: 第一帧图像
-            帧2: 第二帧图像
+            帧1: 第一帧图像（或预处理帧）
+            帧2: 第二帧图像（或预处理帧）
             区域: (x, y, width, height) 区域坐标
-            
+        
         返回:
             区域相似度分数
         """
-        x, y, w, h = 区域
+        if 帧1 is None or 帧2 is None:
+            return 0.0
+        
+        帧1 = self.预处理(帧1)
+        帧2 = self._对齐(帧2, 帧1.形状)
+        区域 = tuple(int(值) for 值 in 区域)
         
-        # 提取区域
-        区域1 = 帧1[y:y+h, x:x+w]
-        区域2 = 帧2[y:y+h, x:x+w]
+        if _裁剪(帧1.图像, 区域).size == 0:
+            return 0.0
         
-        return self.比较(区域1, 区域2)
+        try:
+            if self.方法 == "histogram":
+                return _直方图相似度(帧1.区域直方图(区域), 帧2.区域直方图(区域))
+            elif self.方法 == "ssim":
+                return _SSIM相似度(
+                    _计算SSIM统计(_裁剪(帧1.灰度, 区域)),
+                    _计算SSIM统计(_裁剪(帧2.灰度, 区域))
+                )
+            elif self.方法 == "mse":
+                return self._MSE比较(_裁剪(帧1.图像, 区域), _裁剪(帧2.图像, 区域))
+            elif self.方法 == "hash":
+                return _哈希相似度(帧1.区域签名(区域), 帧2.区域签名(区域))
+            else:
+                return _直方图相似度(帧1.区域直方图(区域), 帧2.区域直方图(区域))
+        except Exception as e:
+            日志.warning(f"区域比较失败: {e}")
+            return 0.0
     
-    def 比较多区域(self, 帧1: np.ndarray, 帧2: np.ndarray,
+    def 比较多区域(self, 帧1: 帧类型, 帧2: 帧类型,
                    区域列表: List[Tuple[int, int, int, int]]) -> List[float]:
         """
         比较多个区域的相似度
         
+        两帧只预处理一次，各区域共享灰度图
+        
         返回:
             各区域相似度列表
         """
+        if 帧1 is None or 帧2 is None:
+            return [0.0 for _ in 区域列表]
+        
+        帧1 = self.预处理(帧1)
+        帧2 = self._对齐(帧2, 帧1.形状)
         return [self.比较区域(帧1, 帧2, 区域) for 区域 in 区域列表]
 
 
+# ==================== 比较内核 ====================
+
+# SSIM 常数
+_C1 = 6.5025  # (0.01 * 255)^2
+_C2 = 58.5225  # (0.03 * 255)^2
+_高斯核 = (11, 11)
+_高斯标准差 = 1.5
+
+
+def 计算感知哈希(图像: np.ndarray) -> int:
+    """
+    计算图像的 64 位平均感知哈希
+    
+    第 i 行第 j 列的像素高于均值时，哈希值的第 (i * 8 + j) 位为 1
+    
+    参数:
+        图像: BGR 或灰度图像
+    
+    返回:
+        64 位哈希值
+    """
+    # 缩小到 8x8
+    缩小图 = cv2.resize(图像, (8, 8))
+    
+    # 转换为灰度
+    if len(缩小图.shape) == 3:
+        灰度图 = cv2.cvtColor(缩小图, cv2.COLOR_BGR2GRAY)
+    else:
+        灰度图 = 缩小图
+    
+    # 按位打包（低位在前），与逐位拼接的结果一致
+    位 = (灰度图 > 灰度图.mean()).ravel()
+    return int.from_bytes(np.packbits(位, bitorder="little").tobytes(), "little")
+
+
+def _裁剪(图像: np.ndarray, 区域: Tuple[int, int, int, int]) -> np.ndarray:
+    """按 (x, y, width, height) 裁剪图像（返回视图）"""
+    x, y, w, h = 区域
+    return 图像[y:y+h, x:x+w]
+
+
+def _计算直方图(灰度: np.ndarray) -> np.ndarray:
+    """计算归一化的 256 级灰度直方图"""
+    直方图 = cv2.calcHist([np.ascontiguousarray(灰度)], [0], None, [256], [0, 256])
+    cv2.normalize(直方图, 直方图)
+    return 直方图
+
+
+def _直方图相似度(直方图1: np.ndarray, 直方图2: np.ndarray) -> float:
+    """直方图相关性映射到 0-1 范围"""
+    相似度 = cv2.compareHist(直方图1, 直方图2, cv2.HISTCMP_CORREL)
+    return max(0.0, min(1.0, (相似度 + 1) / 2))
+
+
+def _计算SSIM统计(灰度: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    计算单帧的 SSIM 统计量
+    
+    返回:
+        (灰度 float32, 均值, 均值平方, 方差)
+    """
+    灰度 = 灰度.astype(np.float32)
+    mu = cv2.GaussianBlur(灰度, _高斯核, _高斯标准差)
+    mu_sq = mu * mu
+    sigma_sq = cv2.GaussianBlur(灰度 * 灰度, _高斯核, _高斯标准差)
+    sigma_sq -= mu_sq
+    return 灰度, mu, mu_sq, sigma_sq
+
+
+def _SSIM相似度(统计1: Tuple[np.ndarray, ...], 统计2: Tuple[np.ndarray, ...]) -> float:
+    """
+    由两帧的 SSIM 统计量计算 SSIM
+    
+    单帧统计量已预先计算，这里只需对乘积做一次高斯模糊
+    """
+    灰度1, mu1, mu1_sq, sigma1_sq = 统计1
+    灰度2, mu2, mu2_sq, sigma2_sq = 统计2
+    
+    mu1_mu2 = mu1 * mu2
+    sigma12 = cv2.GaussianBlur(灰度1 * 灰度2, _高斯核, _高斯标准差)
+    sigma12 -= mu1_mu2
+    
+    # SSIM 公式（原地运算减少临时数组）
+    分子 = mu1_mu2
+    分子 *= 2
+    分子 += _C1
+    sigma12 *= 2
+    sigma12 += _C2
+    分子 *= sigma12
+    
+    分母 = mu1_sq + mu2_sq
+    分母 += _C1
+    方差和 = sigma1_sq + sigma2_sq
+    方差和 += _C2
+    分母 *= 方差和
+    
+    分子 /= 分母
+    return float(分子.mean())
+
+
+def _哈希相似度(签名1: int, 签名2: int) -> float:
+    """由两个 64 位哈希的汉明距离计算相似度"""
+    距离 = 帧比较器.签名距离(签名1, 签名2)
+    return 1.0 - (距离 / 64.0)
+
+
 def 快速帧差异检测(帧1: np.ndarray, 帧2: np.ndarray, 阈值: float = 0.1) -> bool:
     """
     快速检测两帧是否有显著差异
@@ -210,7 +406,7 @@ def 快速帧差异检测(帧1: np.ndarray, 帧2: np.ndarray, 阈值: float = 0.
         帧1: 第一帧
         帧2: 第二帧
         阈值: 差异阈值
-        
+    
     返回:
         True 表示有显著差异
     """
@@ -220,8 +416,7 @@ def 快速帧差异检测(帧1: np.ndarray, 帧2: np.ndarray, 阈值: float = 0.
     if 帧1.shape != 帧2.shape:
         return True
     
-    # 快速计算差异
-    差异 = np.abs(帧1.astype(np.float32) - 帧2.astype(np.float32))
-    平均差异 = np.mean(差异) / 255.0
+    # 快速计算差异（L1 范数直接累加绝对差，不创建中间数组）
+    平均差异 = cv2.norm(帧1, 帧2, cv2.NORM_L1) / 帧1.size / 255.0
     
     return 平均差异 > 阈值
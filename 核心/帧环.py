@@ -0,0 +1,374 @@
+"""
+帧环模块
+预分配的帧槽环形缓冲区，截取直接写入槽位，各消费者按槽位引用读取
+
+功能:
+- 预分配: 所有槽位在创建时一次分配，运行中不再为每帧分配整帧内存
+- 代数计数: 每个槽位带代数，写入中为奇数、写入完成为偶数，引用过期可立即发现
+- 固定槽位: 消费者固定仍在使用的槽位，写入方自动跳过，不会被覆盖
+- 共享内存: 可选使用 multiprocessing.shared_memory，其他进程按名称连接后读取
+
+使用示例:
+    帧环实例 = 帧环(槽数=8, 帧形状=(1080, 1920, 3))
+    引用 = 截取到帧环(帧环实例, 区域)
+    图像 = 帧环实例.读取(引用)  # 只读视图，不复制
+"""
+
+import os
+import time
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+import numpy as np
+import logging
+
+try:
+    from multiprocessing import shared_memory, resource_tracker
+    共享内存可用 = True
+except ImportError:
+    shared_memory = resource_tracker = None
+    共享内存可用 = False
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+日志 = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class 帧引用:
+    """指向帧环中某个槽位某一代数据的引用"""
+    槽号: int
+    代数: int
+    帧编号: int
+    时间戳: float
+    
+    def to_dict(self) -> dict:
+        return {
+            '槽号': self.槽号,
+            '代数': self.代数,
+            '帧编号': self.帧编号,
+            '时间戳': self.时间戳
+        }
+    
+    @classmethod
+    def from_dict(cls, 数据: dict) -> '帧引用':
+        return cls(
+            槽号=int(数据['槽号']),
+            代数=int(数据['代数']),
+            帧编号=int(数据['帧编号']),
+            时间戳=float(数据['时间戳'])
+        )
+
+
+class 帧环:
+    """
+    帧槽环形缓冲区
+    
+    写入方按顺序轮流使用槽位（跳过被固定的槽位），写入前后各把该槽代数加一。
+    读取方持有 帧引用，代数与槽位当前代数一致时数据有效。
+    
+    固定计数只在本进程内有效；其他进程中的读取方应使用 复制()，
+    它在复制前后检查代数，保证得到完整的一帧。
+    """
+    
+    # 元数据区中每个槽位的字段数: 代数, 帧编号, 时间戳
+    _元数据字段数 = 3
+    
+    def __init__(self, 槽数: int, 帧形状: Tuple[int, ...],
+                 数据类型=np.uint8, 共享内存: bool = False,
+                 名称: Optional[str] = None, _连接: bool = False):
+        """
+        初始化帧环
+        
+        参数:
+            槽数: 槽位数量（至少 2）
+            帧形状: 每帧的形状，例如 (1080, 1920, 3)
+            数据类型: 帧的数据类型
+            共享内存: 是否在共享内存中分配，以便其他进程连接
+            名称: 共享内存名称，None 时自动生成
+        """
+        if 槽数 < 2:
+            raise ValueError("槽数至少为 2")
+        if (共享内存 or _连接) and not 共享内存可用:
+            raise RuntimeError("当前环境不支持 multiprocessing.shared_memory")
+        
+        self.槽数 = 槽数
+        self.帧形状 = tuple(int(维度) for 维度 in 帧形状)
+        self.数据类型 = np.dtype(数据类型)
+        
+        元数据字节 = (槽数 * self._元数据字段数 + 1) * 8
+        帧字节 = int(np.prod(self.帧形状)) * self.数据类型.itemsize
+        # 帧数据按 64 字节对齐
+        帧偏移 = -(-元数据字节 // 64) * 64
+        总字节 = 帧偏移 + 槽数 * 帧字节
+        
+        self._共享内存 = None
+        self._创建者 = not _连接
+        if 共享内存 or _连接:
+            self._共享内存 = shared_memory.SharedMemory(name=名称, create=not _连接, size=总字节)
+            if _连接 and os.name != "nt":
+                # 连接方不拥有共享内存：取消 resource_tracker 登记，避免连接进程退出时销毁创建方的内存
+                resource_tracker.unregister(self._共享内存._name, "shared_memory")
+            缓冲 = self._共享内存.buf
+        else:
+            缓冲 = bytearray(总字节)
+        
+        # 元数据: [代数 × 槽数][帧编号 × 槽数][时间戳 × 槽数][最新槽]
+        self._代数 = np.ndarray((槽数,), dtype=np.int64, buffer=缓冲, offset=0)
+        self._帧编号 = np.ndarray((槽数,), dtype=np.int64, buffer=缓冲, offset=槽数 * 8)
+        self._时间戳 = np.ndarray((槽数,), dtype=np.float64, buffer=缓冲, offset=槽数 * 16)
+        self._最新槽 = np.ndarray((1,), dtype=np.int64, buffer=缓冲, offset=槽数 * 24)
+        self._帧 = np.ndarray((槽数,) + self.帧形状, dtype=self.数据类型, buffer=缓冲, offset=帧偏移)
+        
+        if self._创建者:
+            self._代数[:] = 0
+            self._帧编号[:] = 0
+            self._时间戳[:] = 0.0
+            self._最新槽[0] = -1
+        
+        self._锁 = threading.Lock()
+        self._固定计数: Dict[int, int] = {}
+        self._下一槽 = 0
+        self._写入帧数 = int(self._帧编号.max()) if not self._创建者 else 0
+        self._跳过次数 = 0
+        
+        日志.debug(f"帧环已创建: {槽数} 槽, 帧形状 {self.帧形状}, "
+                  f"共享内存 {self.名称 or '否'}")
+    
+    @classmethod
+    def 连接(cls, 名称: str, 槽数: int, 帧形状: Tuple[int, ...], 数据类型=np.uint8) -> '帧环':
+        """
+        连接其他进程创建的共享内存帧环
+        
+        参数:
+            名称: 共享内存名称
+            槽数: 与创建方相同的槽数
+            帧形状: 与创建方相同的帧形状
+            数据类型: 与创建方相同的数据类型
+        
+        返回:
+            帧环
+        """
+        return cls(槽数, 帧形状, 数据类型, 名称=名称, _连接=True)
+    
+    @property
+    def 名称(self) -> Optional[str]:
+        """共享内存名称，未使用共享内存时为 None"""
+        return self._共享内存.name if self._共享内存 is not None else None
+    
+    # ==================== 写入 ====================
+    
+    def 开始写入(self) -> Tuple[int, np.ndarray]:
+        """
+        取得下一个可写槽位
+        
+        返回:
+            (槽号, 可写的槽位数组)，写完后调用 完成写入(槽号)
+        """
+        with self._锁:
+            for 偏移 in range(self.槽数):
+                槽号 = (self._下一槽 + 偏移) % self.槽数
+                if 槽号 not in self._固定计数:
+                    break
+                self._跳过次数 += 1
+            else:
+                raise RuntimeError("所有槽位都被固定，无法写入")
+            
+            self._下一槽 = (槽号 + 1) % self.槽数
+            # 奇数代数表示写入中，旧引用立即失效
+            self._代数[槽号] += 1
+        return 槽号, self._帧[槽号]
+    
+    def 完成写入(self, 槽号: int) -> 帧引用:
+        """
+        结束写入并发布该槽位
+        
+        参数:
+            槽号: 开始写入返回的槽号
+        
+        返回:
+            新帧的引用
+        """
+        with self._锁:
+            self._写入帧数 += 1
+            self._帧编号[槽号] = self._写入帧数
+            self._时间戳[槽号] = time.time()
+            self._代数[槽号] += 1
+            self._最新槽[0] = 槽号
+            return self._当前引用(槽号)
+    
+    def 取消写入(self, 槽号: int) -> None:
+        """
+        放弃写入（如截取失败），该槽位不会被发布
+        
+        参数:
+            槽号: 开始写入返回的槽号
+        """
+        with self._锁:
+            self._代数[槽号] += 1
+            self._帧编号[槽号] = 0
+    
+    def 写入(self, 图像: np.ndarray) -> 帧引用:
+        """
+        把已有图像复制进下一个槽位
+        
+        参数:
+            图像: 形状与帧形状相同的图像
+        
+        返回:
+            新帧的引用
+        """
+        if 图像.shape != self.帧形状:
+            raise ValueError(f"图像形状 {图像.shape} 与帧形状 {self.帧形状} 不一致")
+        
+        槽号, 槽位 = self.开始写入()
+        try:
+            np.copyto(槽位, 图像, casting='unsafe')
+        except Exception:
+            self.取消写入(槽号)
+            raise
+        return self.完成写入(槽号)
+    
+    # ==================== 读取 ====================
+    
+    def _当前引用(self, 槽号: int) -> 帧引用:
+        return 帧引用(
+            槽号=槽号,
+            代数=int(self._代数[槽号]),
+            帧编号=int(self._帧编号[槽号]),
+            时间戳=float(self._时间戳[槽号])
+        )
+    
+    def 最新(self) -> Optional[帧引用]:
+        """
+        获取最近写入完成的帧引用
+        
+        返回:
+            帧引用，尚未写入任何帧时返回 None
+        """
+        with self._锁:
+            槽号 = int(self._最新槽[0])
+            if 槽号 < 0 or self._代数[槽号] % 2:
+                return None
+            return self._当前引用(槽号)
+    
+    def 是否有效(self, 引用: 帧引用) -> bool:
+        """引用的数据是否仍在槽位中（未被覆盖）"""
+        return int(self._代数[引用.槽号]) == 引用.代数 and 引用.代数 % 2 == 0
+    
+    def 读取(self, 引用: 帧引用) -> Optional[np.ndarray]:
+        """
+        按引用获取槽位的只读视图，不复制
+        
+        未固定的槽位可能在使用过程中被覆盖，使用完后可用 是否有效() 确认。
+        
+        参数:
+            引用: 帧引用
+        
+        返回:
+            只读视图，引用已过期时返回 None
+        """
+        if not self.是否有效(引用):
+            return None
+        视图 = self._帧[引用.槽号].view()
+        视图.flags.writeable = False
+        return 视图
+    
+    def 复制(self, 引用: 帧引用, 输出: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        """
+        把引用的帧复制出来，复制前后检查代数，保证数据完整
+        
+        参数:
+            引用: 帧引用
+            输出: 可选的目标数组（形状与帧形状相同），用于复用内存
+        
+        返回:
+            复制的帧，引用已过期或复制期间被覆盖时返回 None
+        """
+        if not self.是否有效(引用):
+            return None
+        if 输出 is None:
+            输出 = np.empty(self.帧形状, dtype=self.数据类型)
+        np.copyto(输出, self._帧[引用.槽号])
+        return 输出 if self.是否有效(引用) else None
+    
+    # ==================== 固定 ====================
+    
+    def 固定(self, 引用: 帧引用) -> bool:
+        """
+        固定槽位，释放前写入方不会覆盖它
+        
+        至少保留一个未固定的槽位供写入，槽位不足时固定失败。
+        
+        参数:
+            引用: 帧引用
+        
+        返回:
+            是否固定成功（引用过期或槽位不足时为 False）
+        """
+        with self._锁:
+            if not self.是否有效(引用):
+                return False
+            计数 = self._固定计数.get(引用.槽号, 0)
+            if 计数 == 0 and len(self._固定计数) >= self.槽数 - 1:
+                return False
+            self._固定计数[引用.槽号] = 计数 + 1
+            return True
+    
+    def 释放(self, 引用: 帧引用) -> None:
+        """
+        释放一次固定
+        
+        引用的代数与槽位当前代数不一致时忽略（槽位已被重新写入，旧引用不能解除新帧的固定）。
+        
+        参数:
+            引用: 固定时使用的帧引用
+        """
+        with self._锁:
+            if int(self._代数[引用.槽号]) != 引用.代数:
+                return
+            计数 = self._固定计数.get(引用.槽号, 0)
+            if 计数 <= 1:
+                self._固定计数.pop(引用.槽号, None)
+            else:
+                self._固定计数[引用.槽号] = 计数 - 1
+    
+    def 获取固定槽数(self) -> int:
+        """当前被固定的槽位数"""
+        with self._锁:
+            return len(self._固定计数)
+    
+    # ==================== 统计与释放 ====================
+    
+    def 获取统计(self) -> dict:
+        """获取帧环统计"""
+        with self._锁:
+            return {
+                '槽数': self.槽数,
+                '帧形状': self.帧形状,
+                '写入帧数': self._写入帧数,
+                '固定槽数': len(self._固定计数),
+                '跳过次数': self._跳过次数,
+                '共享内存': self.名称
+            }
+    
+    def 关闭(self) -> None:
+        """关闭共享内存映射；创建方同时销毁共享内存"""
+        if self._共享内存 is None:
+            return
+        
+        # 先释放指向共享内存的数组，否则无法关闭映射
+        self._代数 = self._帧编号 = self._时间戳 = self._最新槽 = self._帧 = None
+        self._共享内存.close()
+        if self._创建者:
+            try:
+                self._共享内存.unlink()
+            except FileNotFoundError:
+                pass
+        self._共享内存 = None
+    
+    def __enter__(self) -> '帧环':
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.关闭()
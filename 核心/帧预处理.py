@@ -0,0 +1,226 @@
+"""
+帧预处理模块
+把截取的画面一次性转换为模型输入，所有中间结果写入预分配的缓冲
+
+功能:
+- 先缩放: 在原始分辨率上只做一次缩放，之后的颜色转换和归一化都在小图上进行
+- 颜色转换: cvtColor 直接写入缓冲，不再为每帧分配新数组
+- 归一化: 缩放系数在模型加载时确定，uint8 到 float32 的转换与乘法一步完成
+- 布局: 支持 NHWC（与 TFLearn 训练时的 reshape 方式一致）和 NCHW
+
+使用示例:
+    预处理器 = 帧预处理器(引擎.获取预处理规格())
+    图像, 张量 = 预处理器.处理(截取屏幕(region=游戏窗口区域))
+    引擎.预测(张量)
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+import cv2
+import numpy as np
+import logging
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+日志 = logging.getLogger(__name__)
+
+
+# 训练数据在录制时对截取结果做了 BGR2RGB 转换，推理时必须使用相同的通道顺序
+默认颜色转换 = cv2.COLOR_BGR2RGB
+
+
+@dataclass
+class 预处理规格:
+    """
+    模型输入的预处理规格
+    
+    NHWC 布局下张量形状为 (宽度, 高度, 通道数)，与训练时
+    图像.reshape(宽度, 高度, 3) 的方式相同（内存布局仍是缩放后的图像本身）；
+    NCHW 布局下张量形状为 (通道数, 高度, 宽度)。
+    """
+    宽度: int
+    高度: int
+    通道数: int = 3
+    布局: str = "NHWC"
+    缩放: Optional[float] = 1.0 / 255.0  # None 表示模型直接接收 uint8 像素
+    颜色转换: Optional[int] = 默认颜色转换
+    插值: int = cv2.INTER_LINEAR
+    
+    def __post_init__(self):
+        if self.布局 not in ("NHWC", "NCHW"):
+            raise ValueError(f"不支持的布局: {self.布局}，支持: NHWC, NCHW")
+    
+    @property
+    def 张量形状(self) -> Tuple[int, int, int]:
+        """单个样本的张量形状（不含批次维度）"""
+        if self.布局 == "NCHW":
+            return (self.通道数, self.高度, self.宽度)
+        return (self.宽度, self.高度, self.通道数)
+    
+    def to_dict(self) -> dict:
+        return {
+            '宽度': self.宽度,
+            '高度': self.高度,
+            '通道数': self.通道数,
+            '布局': self.布局,
+            '缩放': self.缩放,
+            '颜色转换': self.颜色转换,
+            '插值': self.插值
+        }
+    
+    @classmethod
+    def from_dict(cls, 数据: dict) -> '预处理规格':
+        return cls(
+            宽度=int(数据['宽度']),
+            高度=int(数据['高度']),
+            通道数=int(数据.get('通道数', 3)),
+            布局=数据.get('布局', "NHWC"),
+            缩放=数据.get('缩放', 1.0 / 255.0),
+            颜色转换=数据.get('颜色转换', 默认颜色转换),
+            插值=int(数据.get('插值', cv2.INTER_LINEAR))
+        )
+
+
+class _缓冲组:
+    """一帧预处理用到的全部缓冲"""
+    
+    __slots__ = ("缩放", "颜色", "张量")
+    
+    def __init__(self):
+        self.缩放: Optional[np.ndarray] = None
+        self.颜色: Optional[np.ndarray] = None
+        self.张量: Optional[np.ndarray] = None
+
+
+def _取缓冲(现有: Optional[np.ndarray], 形状: Tuple[int, ...], 数据类型) -> np.ndarray:
+    """形状和类型一致时复用现有缓冲，否则重新分配"""
+    if 现有 is None or 现有.shape != 形状 or 现有.dtype != 数据类型:
+        return np.empty(形状, dtype=数据类型)
+    return 现有
+
+
+class 帧预处理器:
+    """
+    截取画面 → 模型输入 的融合预处理阶段
+    
+    顺序为 缩放 → 颜色转换 → 归一化，每一步都写入预分配的缓冲。
+    返回的数组在之后第 缓冲数 次调用时会被覆盖：需要跨帧保留的结果应自行复制，
+    多线程流水线中应把 缓冲数 设为同时在处理中的帧数。
+    """
+    
+    def __init__(self, 规格: 预处理规格, 缓冲数: int = 1):
+        """
+        初始化帧预处理器
+        
+        参数:
+            规格: 预处理规格
+            缓冲数: 轮流使用的缓冲组数量
+        """
+        self.规格 = 规格
+        self._缓冲组: List[_缓冲组] = [_缓冲组() for _ in range(max(1, 缓冲数))]
+        self._下一组 = 0
+        self._缩放系数 = np.float32(规格.缩放) if 规格.缩放 is not None else None
+    
+    @property
+    def 张量形状(self) -> Tuple[int, int, int, int]:
+        """输出张量形状（含批次维度 1）"""
+        return (1,) + self.规格.张量形状
+    
+    def _取缓冲组(self, 复用缓冲: bool) -> _缓冲组:
+        if not 复用缓冲:
+            return _缓冲组()
+        组 = self._缓冲组[self._下一组]
+        self._下一组 = (self._下一组 + 1) % len(self._缓冲组)
+        return 组
+    
+    def _缩放到(self, 图像: np.ndarray, 组: _缓冲组,
+              输出: Optional[np.ndarray] = None) -> np.ndarray:
+        """缩放并转换颜色，返回 (高度, 宽度, 通道数) 的 uint8 图像，给定 输出 时写入其中"""
+        规格 = self.规格
+        
+        if 图像.shape[:2] == (规格.高度, 规格.宽度):
+            缩放图 = 图像
+        elif 输出 is not None and 规格.颜色转换 is None:
+            缩放图 = cv2.resize(图像, (规格.宽度, 规格.高度), dst=输出, interpolation=规格.插值)
+        else:
+            组.缩放 = _取缓冲(组.缩放, (规格.高度, 规格.宽度) + 图像.shape[2:], 图像.dtype)
+            缩放图 = cv2.resize(图像, (规格.宽度, 规格.高度), dst=组.缩放, interpolation=规格.插值)
+        
+        if 规格.颜色转换 is None:
+            结果 = 缩放图
+        elif 输出 is not None:
+            结果 = cv2.cvtColor(缩放图, 规格.颜色转换, dst=输出)
+        else:
+            组.颜色 = _取缓冲(组.颜色, (规格.高度, 规格.宽度, 规格.通道数), 缩放图.dtype)
+            return cv2.cvtColor(缩放图, 规格.颜色转换, dst=组.颜色)
+        
+        if 输出 is not None and 结果 is not 输出:
+            np.copyto(输出, 结果)
+            return 输出
+        return 结果
+    
+    def _张量到(self, 图像: np.ndarray, 组: _缓冲组) -> np.ndarray:
+        """把缩放后的图像转换为 (1, *张量形状) 的模型输入"""
+        规格 = self.规格
+        
+        if self._缩放系数 is None:
+            # 模型直接接收像素值: NHWC 只需改变形状，不复制
+            if 规格.布局 == "NHWC":
+                return np.ascontiguousarray(图像).reshape(self.张量形状)
+            组.张量 = _取缓冲(组.张量, self.张量形状, 图像.dtype)
+            np.copyto(组.张量[0], 图像.transpose(2, 0, 1))
+            return 组.张量
+        
+        组.张量 = _取缓冲(组.张量, self.张量形状, np.float32)
+        if 规格.布局 == "NCHW":
+            源 = 图像.transpose(2, 0, 1)
+            目标 = 组.张量[0]
+        else:
+            源 = 图像
+            目标 = 组.张量.reshape(图像.shape)
+        # 类型转换和归一化在同一次遍历中完成
+        np.multiply(源, self._缩放系数, out=目标, dtype=np.float32, casting='unsafe')
+        return 组.张量
+    
+    def 缩放(self, 图像: np.ndarray, 复用缓冲: bool = True,
+           输出: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        缩放并转换颜色
+        
+        参数:
+            图像: 截取的画面
+            复用缓冲: False 时结果使用新分配的数组，可长期保存
+            输出: 可选的目标数组（如帧环槽位），结果直接写入其中
+        
+        返回:
+            (高度, 宽度, 通道数) uint8 图像
+        """
+        return self._缩放到(图像, self._取缓冲组(复用缓冲), 输出)
+    
+    def 转为张量(self, 图像: np.ndarray, 复用缓冲: bool = True) -> np.ndarray:
+        """
+        把 缩放() 的结果转换为模型输入张量
+        
+        参数:
+            图像: (高度, 宽度, 通道数) 图像
+            复用缓冲: False 时结果使用新分配的数组
+        
+        返回:
+            (1, *张量形状) 张量
+        """
+        return self._张量到(图像, self._取缓冲组(复用缓冲))
+    
+    def 处理(self, 图像: np.ndarray, 复用缓冲: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        完整预处理: 缩放 → 颜色转换 → 归一化
+        
+        参数:
+            图像: 截取的画面
+            复用缓冲: False 时结果使用新分配的数组
+        
+        返回:
+            (缩放后的 uint8 图像, 模型输入张量)
+        """
+        组 = self._取缓冲组(复用缓冲)
+        缩放图 = self._缩放到(图像, 组)
+        return 缩放图, self._张量到(缩放图, 组)
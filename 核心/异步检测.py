@@ -29,6 +29,7 @@ class 检测任务:
     图像: np.ndarray
     提交时间: float
     帧编号: int
+    帧引用: Any = None  # 来自帧环时的槽位引用，检测完成后释放
 
 
 @dataclass
@@ -69,12 +70,14 @@ class 检测队列:
         self._帧计数: int = 0
         self._锁 = threading.Lock()
     
-    def 放入(self, 图像: np.ndarray) -> bool:
+    def 放入(self, 图像: np.ndarray, 复制: bool = True, 帧引用: Any = None) -> bool:
         """
         放入图像帧
         
         参数:
             图像: 输入图像
+            复制: 是否复制图像（图像来自已固定的帧环槽位时无需复制）
+            帧引用: 帧环槽位引用
             
         返回:
             是否成功放入
@@ -84,9 +87,10 @@ class 检测队列:
             帧编号 = self._帧计数
         
         任务 = 检测任务(
-            图像=图像.copy(),
+            图像=图像.copy() if 复制 else 图像,
             提交时间=time.time(),
-            帧编号=帧编号
+            帧编号=帧编号,
+            帧引用=帧引用
         )
         
         try:
@@ -112,13 +116,20 @@ class 检测队列:
         except queue.Empty:
             return None
     
-    def 清空(self):
-        """清空队列"""
+    def 清空(self) -> List[检测任务]:
+        """
+        清空队列
+        
+        返回:
+            被移除的任务列表
+        """
+        已移除 = []
         while not self._队列.empty():
             try:
-                self._队列.get_nowait()
+                已移除.append(self._队列.get_nowait())
             except queue.Empty:
                 break
+        return 已移除
     
     def 获取深度(self) -> int:
         """获取当前队列深度"""
@@ -249,7 +260,8 @@ class 异步检测器:
     def __init__(self, 检测器=None, 
                  队列大小: int = 3,
                  检测间隔: int = 3,
-                 最大缓存年龄: float = 1.0):
+                 最大缓存年龄: float = 1.0,
+                 帧环=None):
         """
         初始化异步检测器
         
@@ -258,8 +270,10 @@ class 异步检测器:
             队列大小: 检测队列最大大小
             检测间隔: 每 N 帧检测一次
             最大缓存年龄: 缓存最大有效年龄（秒）
+            帧环: 可选的 核心.帧环.帧环，提交帧引用时按槽位读取而不复制
         """
         self.检测器 = 检测器
+        self.帧环 = 帧环
         self.检测间隔 = max(1, 检测间隔)
         self.最大缓存年龄 = 最大缓存年龄
         
@@ -335,6 +349,10 @@ class 异步检测器:
                 日志.warning("检测线程未能在超时时间内停止")
                 return False
         
+        # 释放队列中剩余任务固定的帧环槽位
+        for 任务 in self._队列.清空():
+            self._释放帧(任务)
+        
         日志.info("异步检测线程已停止")
         return True
     
@@ -354,9 +372,14 @@ class 异步检测器:
                 开始时间 = time.time()
                 
                 try:
-                    结果 = self.检测器.检测(任务.图像)
+                    if 任务.帧引用 is not None:
+                        # 检测器的缓存据此固定参考帧而不复制
+                        结果 = self.检测器.检测(任务.图像, 帧引用=任务.帧引用)
+                    else:
+                        结果 = self.检测器.检测(任务.图像)
                     self._连续错误数 = 0
                 except Exception as e:
+                    self._释放帧(任务)
                     日志.error(f"检测执行失败: {e}")
                     self._连续错误数 += 1
                     
@@ -366,6 +389,8 @@ class 异步检测器:
                         break
                     continue
                 
+                self._释放帧(任务)
+                
                 # 计算延迟
                 延迟 = (time.time() - 开始时间) * 1000
                 self._监控器.记录延迟(延迟)
@@ -402,6 +427,43 @@ class 异步检测器:
         # 提交到队列
         return self._队列.放入(图像)
     
+    def 提交帧引用(self, 引用) -> bool:
+        """
+        按帧环槽位引用提交检测，不复制图像
+        
+        槽位在检测完成前保持固定；槽位已过期或无法固定时放弃本帧。
+        
+        参数:
+            引用: 帧环中的帧引用
+            
+        返回:
+            是否成功提交
+        """
+        if self.帧环 is None:
+            raise RuntimeError("未设置帧环，无法按引用提交")
+        
+        self._帧计数 += 1
+        if self._帧计数 % self.检测间隔 != 0:
+            return False
+        
+        if self._回退到同步:
+            图像 = self.帧环.读取(引用)
+            return 图像 is not None and self._同步检测(图像)
+        
+        if not self.帧环.固定(引用):
+            return False
+        
+        图像 = self.帧环.读取(引用)
+        if 图像 is None or not self._队列.放入(图像, 复制=False, 帧引用=引用):
+            self.帧环.释放(引用)
+            return False
+        return True
+    
+    def _释放帧(self, 任务: 检测任务) -> None:
+        """释放任务固定的帧环槽位"""
+        if 任务.帧引用 is not None and self.帧环 is not None:
+            self.帧环.释放(任务.帧引用)
+    
     def _同步检测(self, 图像: np.ndarray) -> bool:
         """同步执行检测（回退模式）"""
         if self.检测器 is None:
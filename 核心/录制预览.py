@@ -0,0 +1,133 @@
+"""
+录制预览模块
+在独立线程中以较低帧率显示最新一帧，录制循环不再等待窗口刷新
+
+功能:
+- 只保存最新一帧的引用: 更新() 不复制、不缩放、不加锁，录制循环几乎没有额外开销
+- 固定刷新率: 预览线程按 帧率 取最新帧显示，中间的帧直接跳过
+- 退出按键: 预览窗口中按 ESC 会设置 已请求退出，由录制循环决定何时停止
+- 无界面模式: 帧率为 0 或 无界面=True 时不创建窗口和线程
+
+使用示例:
+    with 录制预览(帧率=10) as 预览:
+        while not 预览.已请求退出:
+            图像 = 截取()
+            预览.更新(图像)
+"""
+
+import threading
+from typing import Optional, Tuple
+import cv2
+import numpy as np
+import logging
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+日志 = logging.getLogger(__name__)
+
+
+class 录制预览:
+    """
+    录制预览窗口
+    
+    HighGUI 的所有调用（imshow、waitKey、destroyWindow）都在预览线程中进行。
+    传给 更新() 的图像只保存引用，调用方之后不能原地修改它（新分配的帧可以直接传入）。
+    """
+    
+    def __init__(self, 窗口名: str = "录制预览 (ESC退出)", 帧率: float = 10.0,
+                 尺寸: Tuple[int, int] = (640, 360),
+                 颜色转换: Optional[int] = cv2.COLOR_RGB2BGR, 无界面: bool = False):
+        """
+        初始化录制预览
+        
+        参数:
+            窗口名: 预览窗口标题
+            帧率: 预览刷新帧率，<= 0 表示无界面模式
+            尺寸: 显示尺寸 (宽, 高)
+            颜色转换: 显示前的颜色转换代码，None 表示不转换
+            无界面: 为 True 时不显示预览
+        """
+        self.窗口名 = 窗口名
+        self.帧率 = 帧率
+        self.尺寸 = tuple(尺寸)
+        self.颜色转换 = 颜色转换
+        self.无界面 = 无界面 or 帧率 <= 0
+        
+        self._最新帧: Optional[np.ndarray] = None
+        self._停止事件 = threading.Event()
+        self._退出事件 = threading.Event()
+        self._线程: Optional[threading.Thread] = None
+        self._缩放缓冲: Optional[np.ndarray] = None
+        self._显示缓冲: Optional[np.ndarray] = None
+        self.已显示帧数 = 0
+    
+    @property
+    def 已请求退出(self) -> bool:
+        """预览窗口中是否按下了 ESC"""
+        return self._退出事件.is_set()
+    
+    def 启动(self) -> None:
+        """启动预览线程（无界面模式下不做任何事）"""
+        if self.无界面 or self._线程 is not None:
+            return
+        self._停止事件.clear()
+        self._线程 = threading.Thread(target=self._显示循环, name="录制预览", daemon=True)
+        self._线程.start()
+    
+    def 更新(self, 图像: np.ndarray) -> None:
+        """
+        提交最新一帧
+        
+        参数:
+            图像: 最新的画面（只保存引用）
+        """
+        self._最新帧 = 图像
+    
+    def 停止(self) -> None:
+        """停止预览线程并关闭窗口"""
+        if self._线程 is None:
+            return
+        self._停止事件.set()
+        self._线程.join()
+        self._线程 = None
+    
+    def _准备显示图(self, 图像: np.ndarray) -> np.ndarray:
+        """缩放并转换颜色，结果写入预览自己的缓冲"""
+        宽度, 高度 = self.尺寸
+        if 图像.shape[:2] != (高度, 宽度):
+            self._缩放缓冲 = cv2.resize(图像, (宽度, 高度), dst=self._缩放缓冲)
+            图像 = self._缩放缓冲
+        if self.颜色转换 is None:
+            return 图像
+        self._显示缓冲 = cv2.cvtColor(图像, self.颜色转换, dst=self._显示缓冲)
+        return self._显示缓冲
+    
+    def _显示循环(self) -> None:
+        """预览线程: 按固定间隔显示最新帧并处理窗口事件"""
+        间隔 = 1.0 / self.帧率
+        上次帧 = None
+        try:
+            while not self._停止事件.wait(间隔):
+                图像 = self._最新帧
+                if 图像 is not None and 图像 is not 上次帧:
+                    上次帧 = 图像
+                    cv2.imshow(self.窗口名, self._准备显示图(图像))
+                    self.已显示帧数 += 1
+                if cv2.waitKey(1) & 0xFF == 27:  # ESC
+                    self._退出事件.set()
+        except cv2.error as e:
+            # 没有显示环境时预览不可用，录制继续
+            日志.warning(f"预览窗口不可用，切换为无界面模式: {e}")
+        finally:
+            try:
+                cv2.destroyWindow(self.窗口名)
+                cv2.waitKey(1)
+            except cv2.error:
+                pass
+    
+    def __enter__(self) -> '录制预览':
+        self.启动()
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.停止()
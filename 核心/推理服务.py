@@ -0,0 +1,1061 @@
+"""
+推理服务模块
+多个机器人实例共享同一个推理会话，把并发的单帧请求合并成批次执行
+
+功能:
+- 微批处理: 在很短的等待窗口内收集请求，合并后调用一次 批量预测
+- 共享会话: 同一模型路径只创建一个推理引擎，各机器人通过客户端提交帧
+- 跨进程共享: 推理服务器进程持有唯一的引擎，各机器人进程通过本地连接提交帧，
+  输入张量经共享内存帧环传递
+- 延迟统计: 记录排队时间、端到端延迟和批次大小
+
+运行/增强机器人.py 为每个游戏客户端启动一个进程。服务配置中 跨进程 为 True 时，
+获取共享客户端 连接按模型路径确定地址的推理服务器（不存在时自动启动），
+整机只加载一份模型；为 False 时只在同一进程内的机器人之间共享。
+
+使用示例:
+    客户端 = 获取共享客户端("模型/model.onnx")
+    动作概率 = 客户端.预测(图像)
+    客户端.关闭()
+
+    # 手动启动推理服务器
+    python -m 核心.推理服务 模型/model.onnx
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import hashlib
+import argparse
+import tempfile
+import threading
+import subprocess
+from multiprocessing.connection import Listener, Client
+from concurrent.futures import Future
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional
+import numpy as np
+import logging
+
+from 核心.ONNX推理 import 统一推理引擎, 性能指标
+from 核心.帧环 import 帧环, 帧引用
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+日志 = logging.getLogger(__name__)
+
+
+@dataclass
+class 推理请求:
+    """单帧推理请求"""
+    图像: np.ndarray
+    提交时间: float
+    结果: Future = field(default_factory=Future)
+
+
+@dataclass
+class 服务统计:
+    """推理服务统计（延迟单位: 毫秒）"""
+    请求数: int = 0
+    批次数: int = 0
+    拒绝数: int = 0
+    失败数: int = 0
+    平均批次大小: float = 0.0
+    平均排队时间: float = 0.0
+    平均延迟: float = 0.0
+    P95延迟: float = 0.0
+    最大延迟: float = 0.0
+    平均批次耗时: float = 0.0
+    队列深度: int = 0
+    
+    def to_dict(self) -> dict:
+        return {
+            '请求数': self.请求数,
+            '批次数': self.批次数,
+            '拒绝数': self.拒绝数,
+            '失败数': self.失败数,
+            '平均批次大小': round(self.平均批次大小, 2),
+            '平均排队时间': round(self.平均排队时间, 2),
+            '平均延迟': round(self.平均延迟, 2),
+            'P95延迟': round(self.P95延迟, 2),
+            '最大延迟': round(self.最大延迟, 2),
+            '平均批次耗时': round(self.平均批次耗时, 2),
+            '队列深度': self.队列深度
+        }
+
+
+class 推理服务:
+    """
+    微批处理推理服务
+    
+    工作线程取到第一个请求后最多再等待 等待窗口 秒，
+    期间到达的请求（不超过 最大批次）合并为一个批次执行，
+    每个请求通过自己的 Future 取回对应的一行输出。
+    """
+    
+    def __init__(self, 引擎: Any, 最大批次: int = 8, 等待窗口: float = 0.002,
+                 队列容量: int = 64, 统计窗口: int = 1000):
+        """
+        初始化推理服务
+        
+        参数:
+            引擎: 提供 批量预测(图像列表) 的推理引擎（ONNX推理引擎、统一推理引擎等）
+            最大批次: 单个批次的最大请求数
+            等待窗口: 收到首个请求后等待后续请求的最长时间（秒）
+            队列容量: 待处理请求上限，满时拒绝新请求
+            统计窗口: 延迟统计保留的最近请求数
+        """
+        if 最大批次 <= 0:
+            raise ValueError("最大批次必须大于 0")
+        
+        self.引擎 = 引擎
+        self.最大批次 = 最大批次
+        self.等待窗口 = max(0.0, 等待窗口)
+        
+        self._队列: queue.Queue = queue.Queue(maxsize=max(1, 队列容量))
+        self._执行锁 = threading.Lock()
+        self._停止事件 = threading.Event()
+        self._线程: Optional[threading.Thread] = None
+        
+        # 统计
+        self._统计锁 = threading.Lock()
+        self._延迟记录: Deque[float] = deque(maxlen=统计窗口)
+        self._排队记录: Deque[float] = deque(maxlen=统计窗口)
+        self._批次记录: Deque[int] = deque(maxlen=统计窗口)
+        self._批次耗时记录: Deque[float] = deque(maxlen=统计窗口)
+        self._请求数 = 0
+        self._批次数 = 0
+        self._拒绝数 = 0
+        self._失败数 = 0
+    
+    # ==================== 生命周期 ====================
+    
+    def 启动(self) -> None:
+        """启动工作线程"""
+        if self.是否运行():
+            return
+        
+        self._停止事件.clear()
+        self._线程 = threading.Thread(target=self._工作循环, name="推理服务", daemon=True)
+        self._线程.start()
+        日志.info(f"推理服务已启动: 最大批次 {self.最大批次}, 等待窗口 {self.等待窗口 * 1000:.1f}ms")
+    
+    def 停止(self, 超时: float = 2.0) -> None:
+        """
+        停止工作线程，未处理的请求以异常结束
+        
+        参数:
+            超时: 等待工作线程退出的时间（秒）
+        """
+        self._停止事件.set()
+        if self._线程 is not None:
+            self._线程.join(timeout=超时)
+            self._线程 = None
+        
+        while True:
+            try:
+                请求 = self._队列.get_nowait()
+            except queue.Empty:
+                break
+            if 请求.结果.set_running_or_notify_cancel():
+                请求.结果.set_exception(RuntimeError("推理服务已停止"))
+    
+    def 是否运行(self) -> bool:
+        """工作线程是否在运行"""
+        return self._线程 is not None and self._线程.is_alive()
+    
+    def __enter__(self) -> '推理服务':
+        self.启动()
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.停止()
+    
+    # ==================== 提交 ====================
+    
+    def 提交(self, 图像: np.ndarray) -> Future:
+        """
+        提交单帧推理请求
+        
+        参数:
+            图像: 输入图像
+        
+        返回:
+            Future，结果为该帧的输出行 (动作数,)
+        """
+        if not self.是否运行():
+            raise RuntimeError("推理服务未运行")
+        
+        请求 = 推理请求(图像=图像, 提交时间=time.perf_counter())
+        try:
+            self._队列.put_nowait(请求)
+        except queue.Full:
+            with self._统计锁:
+                self._拒绝数 += 1
+            raise RuntimeError("推理服务队列已满")
+        return 请求.结果
+    
+    def 预测(self, 图像: np.ndarray, 超时: Optional[float] = 1.0) -> List[float]:
+        """
+        提交并等待单帧推理结果
+        
+        参数:
+            图像: 输入图像
+            超时: 等待结果的最长时间（秒），None 表示一直等待
+        
+        返回:
+            动作概率列表
+        """
+        return self.提交(图像).result(timeout=超时).tolist()
+    
+    def 执行独占(self, 操作: Callable[[], Any]) -> Any:
+        """
+        在没有批次执行时运行操作（如重新加载模型）
+        
+        参数:
+            操作: 无参数可调用对象
+        
+        返回:
+            操作的返回值
+        """
+        with self._执行锁:
+            return 操作()
+    
+    # ==================== 工作线程 ====================
+    
+    def _收集批次(self) -> List[推理请求]:
+        """阻塞取首个请求，再在等待窗口内收集后续请求"""
+        try:
+            首个 = self._队列.get(timeout=0.1)
+        except queue.Empty:
+            return []
+        
+        批次 = [首个]
+        截止时间 = 首个.提交时间 + self.等待窗口
+        while len(批次) < self.最大批次:
+            剩余 = 截止时间 - time.perf_counter()
+            try:
+                if 剩余 > 0:
+                    批次.append(self._队列.get(timeout=剩余))
+                else:
+                    # 窗口已过，只取已经在排队的请求
+                    批次.append(self._队列.get_nowait())
+            except queue.Empty:
+                break
+        return 批次
+    
+    def _执行批次(self, 批次: List[推理请求]) -> None:
+        """执行一个批次并分发结果"""
+        # 跳过调用方已取消的请求
+        批次 = [请求 for 请求 in 批次 if 请求.结果.set_running_or_notify_cancel()]
+        if not 批次:
+            return
+        
+        开始时间 = time.perf_counter()
+        try:
+            with self._执行锁:
+                输出 = np.asarray(self.引擎.批量预测([请求.图像 for 请求 in 批次]))
+            if len(输出) != len(批次):
+                raise RuntimeError(f"批量预测返回 {len(输出)} 行，期望 {len(批次)} 行")
+        except Exception as e:
+            日志.warning(f"批次推理失败: {e}")
+            with self._统计锁:
+                self._失败数 += len(批次)
+            for 请求 in 批次:
+                请求.结果.set_exception(e)
+            return
+        
+        结束时间 = time.perf_counter()
+        for i, 请求 in enumerate(批次):
+            请求.结果.set_result(输出[i])
+        
+        with self._统计锁:
+            self._请求数 += len(批次)
+            self._批次数 += 1
+            self._批次记录.append(len(批次))
+            self._批次耗时记录.append((结束时间 - 开始时间) * 1000)
+            for 请求 in 批次:
+                self._排队记录.append((开始时间 - 请求.提交时间) * 1000)
+                self._延迟记录.append((结束时间 - 请求.提交时间) * 1000)
+    
+    def _工作循环(self) -> None:
+        """收集并执行批次直到停止"""
+        while not self._停止事件.is_set():
+            批次 = self._收集批次()
+            if 批次:
+                self._执行批次(批次)
+    
+    # ==================== 统计 ====================
+    
+    def 获取统计(self) -> 服务统计:
+        """获取服务统计"""
+        with self._统计锁:
+            统计 = 服务统计(
+                请求数=self._请求数,
+                批次数=self._批次数,
+                拒绝数=self._拒绝数,
+                失败数=self._失败数,
+                队列深度=self._队列.qsize()
+            )
+            if self._延迟记录:
+                延迟 = np.array(self._延迟记录)
+                统计.平均延迟 = float(延迟.mean())
+                统计.P95延迟 = float(np.percentile(延迟, 95))
+                统计.最大延迟 = float(延迟.max())
+                统计.平均排队时间 = float(np.mean(self._排队记录))
+                统计.平均批次大小 = float(np.mean(self._批次记录))
+                统计.平均批次耗时 = float(np.mean(self._批次耗时记录))
+        return 统计
+    
+    def 获取延迟统计(self) -> 性能指标:
+        """以 性能指标 形式返回端到端延迟（含排队时间）"""
+        with self._统计锁:
+            延迟列表 = list(self._延迟记录)
+            推理次数 = self._请求数
+        
+        后端类型 = self.引擎.获取当前后端() if hasattr(self.引擎, '获取当前后端') else ""
+        if not 延迟列表:
+            return 性能指标(后端类型=后端类型)
+        
+        平均延迟 = float(np.mean(延迟列表))
+        return 性能指标(
+            平均延迟=平均延迟,
+            最小延迟=float(np.min(延迟列表)),
+            最大延迟=float(np.max(延迟列表)),
+            推理次数=推理次数,
+            后端类型=后端类型,
+            P95延迟=float(np.percentile(延迟列表, 95)) if len(延迟列表) >= 20 else 0.0,
+            P99延迟=float(np.percentile(延迟列表, 99)) if len(延迟列表) >= 100 else 0.0,
+            满足延迟要求=平均延迟 < 50.0
+        )
+
+
+class 推理客户端:
+    """
+    共享推理服务的客户端
+    
+    提供与 统一推理引擎 相同的 预测 / 获取当前后端 / 获取延迟统计 等接口，
+    可直接替换机器人和决策引擎中的推理引擎。
+    """
+    
+    def __init__(self, 服务: 推理服务, 键: Optional[str] = None, 超时: float = 1.0):
+        """
+        参数:
+            服务: 共享的推理服务
+            键: 共享注册表中的键，关闭时据此释放引用
+            超时: 单次预测等待结果的最长时间（秒）
+        """
+        self.服务 = 服务
+        self.超时 = 超时
+        self._键 = 键
+        self._已关闭 = False
+    
+    @property
+    def 模型路径(self) -> str:
+        return getattr(self.服务.引擎, '模型路径', "")
+    
+    @property
+    def 首选后端(self) -> str:
+        return getattr(self.服务.引擎, '首选后端', "auto")
+    
+    @property
+    def 使用GPU(self) -> bool:
+        return getattr(self.服务.引擎, '使用GPU', False)
+    
+    def 预测(self, 图像: np.ndarray) -> List[float]:
+        """提交单帧并等待结果"""
+        if self._已关闭:
+            raise RuntimeError("推理客户端已关闭")
+        return self.服务.预测(图像, 超时=self.超时)
+    
+    def 批量预测(self, 图像批次) -> np.ndarray:
+        """逐帧提交后一起等待，由服务合并批次"""
+        if self._已关闭:
+            raise RuntimeError("推理客户端已关闭")
+        结果列表 = [self.服务.提交(图像) for 图像 in 图像批次]
+        return np.array([结果.result(timeout=self.超时) for 结果 in 结果列表], dtype=np.float32)
+    
+    def 获取当前后端(self) -> str:
+        引擎 = self.服务.引擎
+        return 引擎.获取当前后端() if hasattr(引擎, '获取当前后端') else "onnx"
+    
+    def 获取检测到的格式(self) -> str:
+        引擎 = self.服务.引擎
+        return 引擎.获取检测到的格式() if hasattr(引擎, '获取检测到的格式') else "unknown"
+    
+    def 获取预处理规格(self, 宽度: int = None, 高度: int = None):
+        """获取共享引擎的预处理规格，引擎不提供时按 uint8 像素输入处理"""
+        引擎 = self.服务.引擎
+        if hasattr(引擎, '获取预处理规格'):
+            return 引擎.获取预处理规格(宽度, 高度)
+        
+        from 核心.帧预处理 import 预处理规格
+        return 预处理规格(宽度=宽度 or 480, 高度=高度 or 270, 缩放=None)
+    
+    def 获取延迟统计(self) -> 性能指标:
+        return self.服务.获取延迟统计()
+    
+    def 获取服务统计(self) -> 服务统计:
+        return self.服务.获取统计()
+    
+    def 是否已初始化(self) -> bool:
+        引擎 = self.服务.引擎
+        已初始化 = 引擎.是否已初始化() if hasattr(引擎, '是否已初始化') else True
+        return 已初始化 and self.服务.是否运行() and not self._已关闭
+    
+    def 设置首选后端(self, 后端: str) -> None:
+        """设置共享引擎的首选后端（影响所有客户端）"""
+        if hasattr(self.服务.引擎, '设置首选后端'):
+            self.服务.执行独占(lambda: self.服务.引擎.设置首选后端(后端))
+    
+    def 加载模型(self, 模型路径: str, 首选后端: str = None) -> bool:
+        """在共享引擎上重新加载模型（影响所有客户端）"""
+        if not hasattr(self.服务.引擎, '加载模型'):
+            return False
+        return self.服务.执行独占(lambda: self.服务.引擎.加载模型(模型路径, 首选后端))
+    
+    def 关闭(self) -> None:
+        """释放对共享服务的引用，最后一个客户端关闭时停止服务"""
+        if self._已关闭:
+            return
+        self._已关闭 = True
+        if self._键 is not None:
+            释放共享服务(self._键)
+
+
+# ==================== 共享注册表 ====================
+
+_共享服务: Dict[str, 推理服务] = {}
+_引用计数: Dict[str, int] = {}
+_注册锁 = threading.Lock()
+
+
+def _默认引擎工厂(模型路径: str, 配置: Dict[str, Any]) -> 统一推理引擎:
+    return 统一推理引擎(
+        模型路径=模型路径,
+        首选后端=配置.get("首选后端", "auto"),
+        使用GPU=配置.get("使用GPU", True),
+        配置=配置
+    )
+
+
+def _创建服务(模型路径: str, 配置: Dict[str, Any], 服务配置: Dict[str, Any],
+             引擎工厂: Callable[[str, Dict[str, Any]], Any] = None) -> 推理服务:
+    """按服务配置创建推理引擎和（未启动的）推理服务"""
+    引擎 = (引擎工厂 or _默认引擎工厂)(模型路径, dict(配置 or {}))
+    if hasattr(引擎, '是否已初始化') and not 引擎.是否已初始化():
+        raise RuntimeError(f"推理引擎初始化失败: {模型路径}")
+    return 推理服务(
+        引擎,
+        最大批次=服务配置.get("最大批次", 8),
+        等待窗口=服务配置.get("等待窗口毫秒", 2.0) / 1000,
+        队列容量=服务配置.get("队列容量", 64)
+    )
+
+
+def 获取共享客户端(模型路径: str,
+                 配置: Dict[str, Any] = None,
+                 服务配置: Dict[str, Any] = None,
+                 引擎工厂: Callable[[str, Dict[str, Any]], Any] = None):
+    """
+    获取模型对应的共享推理客户端
+    
+    服务配置中 跨进程 为 True 时连接该模型的推理服务器进程（见 连接推理服务器），
+    本机所有机器人进程共享一个推理引擎；否则同一进程内相同模型路径的调用
+    共享一个推理引擎和工作线程。
+    
+    参数:
+        模型路径: 模型文件路径
+        配置: 传给推理引擎的推理配置
+        服务配置: 推理服务配置（最大批次、等待窗口毫秒、队列容量、请求超时、跨进程等）
+        引擎工厂: 自定义引擎创建函数 (模型路径, 配置) -> 引擎，默认创建 统一推理引擎
+                  （仅用于进程内共享）
+    
+    返回:
+        推理客户端 或 远程推理客户端
+    """
+    if 服务配置 is None:
+        from 配置.增强设置 import 推理服务配置
+        服务配置 = 推理服务配置
+    
+    if 服务配置.get("跨进程", False):
+        return 连接推理服务器(模型路径, 配置, 服务配置)
+    
+    键 = os.path.abspath(模型路径)
+    with _注册锁:
+        服务 = _共享服务.get(键)
+        if 服务 is None:
+            服务 = _创建服务(模型路径, 配置, 服务配置, 引擎工厂)
+            服务.启动()
+            _共享服务[键] = 服务
+            _引用计数[键] = 0
+        _引用计数[键] += 1
+    
+    return 推理客户端(服务, 键=键, 超时=服务配置.get("请求超时", 1.0))
+
+
+def 释放共享服务(键: str) -> None:
+    """
+    减少共享服务的引用计数，归零时停止服务
+    
+    参数:
+        键: 模型路径的绝对路径
+    """
+    with _注册锁:
+        if 键 not in _引用计数:
+            return
+        _引用计数[键] -= 1
+        if _引用计数[键] > 0:
+            return
+        del _引用计数[键]
+        服务 = _共享服务.pop(键)
+    服务.停止()
+
+
+def 获取共享服务列表() -> Dict[str, 服务统计]:
+    """获取所有共享服务的统计，键为模型路径"""
+    with _注册锁:
+        服务列表 = dict(_共享服务)
+    return {键: 服务.获取统计() for 键, 服务 in 服务列表.items()}
+
+
+# ==================== 跨进程共享 ====================
+
+_密钥环境变量 = "MMORPG_AI_INFERENCE_KEY"
+
+
+def 服务器地址(模型路径: str, 服务配置: Dict[str, Any] = None) -> str:
+    """
+    获取模型对应的推理服务器地址
+    
+    服务配置中指定了 地址 时直接使用；否则按模型绝对路径生成，
+    Windows 上为命名管道，其他系统为临时目录中的 Unix 套接字。
+    
+    参数:
+        模型路径: 模型文件路径
+        服务配置: 推理服务配置
+    
+    返回:
+        multiprocessing.connection 地址
+    """
+    if 服务配置 and 服务配置.get("地址"):
+        return 服务配置["地址"]
+    摘要 = hashlib.md5(os.path.abspath(模型路径).encode("utf-8")).hexdigest()[:12]
+    if sys.platform == "win32":
+        return rf"\\.\pipe\mmorpg_ai_inference_{摘要}"
+    return os.path.join(tempfile.gettempdir(), f"mmorpg_ai_inference_{摘要}.sock")
+
+
+def _认证密钥(服务配置: Dict[str, Any]) -> bytes:
+    return str(服务配置.get("认证密钥") or "mmorpg-ai-inference").encode("utf-8")
+
+
+class 推理服务器:
+    """
+    跨进程推理服务器
+    
+    持有唯一的推理引擎和微批处理 推理服务，各机器人进程通过 multiprocessing.connection 连接。
+    客户端把输入张量写入自己创建的共享内存帧环，请求中只携带帧引用；
+    服务器按引用复制出张量后提交到推理服务，不同进程的帧在同一个批次中执行。
+    每个连接由单独的线程处理，同一连接上的请求按顺序回复。
+    """
+    
+    def __init__(self, 服务: 推理服务, 地址: str, 认证密钥: bytes,
+                 请求超时: float = 1.0, 空闲退出: Optional[float] = None):
+        """
+        参数:
+            服务: 推理服务（由服务器启动和停止）
+            地址: 监听地址
+            认证密钥: 客户端连接时使用的认证密钥
+            请求超时: 单帧等待推理结果的最长时间（秒）
+            空闲退出: 没有客户端连接的时间达到该秒数后 运行() 返回，None 表示一直运行
+        """
+        self.服务 = 服务
+        self.地址 = 地址
+        self.请求超时 = 请求超时
+        self.空闲退出 = 空闲退出
+        self._认证密钥 = 认证密钥
+        
+        self._监听器: Optional[Listener] = None
+        self._接受线程: Optional[threading.Thread] = None
+        self._停止事件 = threading.Event()
+        self._计数锁 = threading.Lock()
+        self._连接数 = 0
+        self._最后断开时间 = time.time()
+    
+    @property
+    def 连接数(self) -> int:
+        """当前连接的客户端数"""
+        with self._计数锁:
+            return self._连接数
+    
+    # ==================== 生命周期 ====================
+    
+    def 启动(self) -> None:
+        """开始监听并启动推理服务"""
+        if self._监听器 is not None:
+            return
+        
+        if os.name != "nt" and os.path.exists(self.地址):
+            try:
+                Client(self.地址, authkey=self._认证密钥).close()
+            except OSError:
+                # 上次异常退出留下的套接字文件
+                os.unlink(self.地址)
+            else:
+                raise RuntimeError(f"该地址已有推理服务器在运行: {self.地址}")
+        
+        self._监听器 = Listener(self.地址, authkey=self._认证密钥)
+        self._停止事件.clear()
+        self._最后断开时间 = time.time()
+        self.服务.启动()
+        self._接受线程 = threading.Thread(target=self._接受循环, name="推理服务器", daemon=True)
+        self._接受线程.start()
+        日志.info(f"推理服务器已启动: {self.地址}")
+    
+    def 运行(self) -> None:
+        """启动并阻塞，直到 停止() 被调用或空闲超时"""
+        self.启动()
+        try:
+            while not self._停止事件.wait(0.2):
+                if self._空闲超时():
+                    日志.info("客户端已全部断开，推理服务器退出")
+                    break
+        finally:
+            self.停止()
+    
+    def 停止(self) -> None:
+        """停止监听和推理服务"""
+        if self._监听器 is None:
+            return
+        
+        self._停止事件.set()
+        try:
+            # 连接一次以唤醒阻塞在 accept 中的线程
+            Client(self.地址, authkey=self._认证密钥).close()
+        except Exception:
+            pass
+        if self._接受线程 is not None:
+            self._接受线程.join(timeout=2.0)
+            self._接受线程 = None
+        self._监听器.close()
+        self._监听器 = None
+        self.服务.停止()
+        日志.info("推理服务器已停止")
+    
+    def _空闲超时(self) -> bool:
+        if self.空闲退出 is None:
+            return False
+        with self._计数锁:
+            return self._连接数 == 0 and time.time() - self._最后断开时间 >= self.空闲退出
+    
+    # ==================== 连接处理 ====================
+    
+    def _接受循环(self) -> None:
+        """接受客户端连接，每个连接交给一个处理线程"""
+        while not self._停止事件.is_set():
+            try:
+                连接 = self._监听器.accept()
+            except Exception as e:
+                if self._停止事件.is_set():
+                    break
+                日志.warning(f"拒绝推理客户端连接: {e}")
+                continue
+            
+            if self._停止事件.is_set():
+                连接.close()
+                break
+            with self._计数锁:
+                self._连接数 += 1
+            threading.Thread(target=self._处理连接, args=(连接,), name="推理服务器连接", daemon=True).start()
+    
+    def _处理连接(self, 连接) -> None:
+        """按顺序处理一个客户端的请求，断开时关闭其帧环映射"""
+        帧环表: Dict[str, 帧环] = {}
+        try:
+            while not self._停止事件.is_set():
+                try:
+                    请求 = 连接.recv()
+                except (EOFError, OSError):
+                    break
+                
+                try:
+                    回复 = self._处理请求(请求, 帧环表)
+                except Exception as e:
+                    回复 = {"错误": f"{type(e).__name__}: {e}"}
+                回复["编号"] = 请求.get("编号")
+                
+                try:
+                    连接.send(回复)
+                except OSError:
+                    break
+        finally:
+            for 环 in 帧环表.values():
+                环.关闭()
+            连接.close()
+            with self._计数锁:
+                self._连接数 -= 1
+                self._最后断开时间 = time.time()
+    
+    def _处理请求(self, 请求: Dict[str, Any], 帧环表: Dict[str, 帧环]) -> Dict[str, Any]:
+        """执行一个请求，返回回复字典"""
+        操作 = 请求.get("操作")
+        引擎 = self.服务.引擎
+        
+        if 操作 == "预测":
+            环 = 帧环表[请求["帧环"]]
+            图像列表 = []
+            for 数据 in 请求["引用"]:
+                图像 = 环.复制(帧引用.from_dict(数据))
+                if 图像 is None:
+                    raise RuntimeError("输入帧在读取前已被覆盖")
+                图像列表.append(图像)
+            结果列表 = [self.服务.提交(图像) for 图像 in 图像列表]
+            return {"结果": np.stack([结果.result(timeout=self.请求超时) for 结果 in 结果列表])}
+        
+        if 操作 == "连接帧环":
+            旧帧环 = 帧环表.pop(请求["名称"], None)
+            if 旧帧环 is not None:
+                旧帧环.关闭()
+            帧环表[请求["名称"]] = 帧环.连接(
+                请求["名称"], 请求["槽数"], tuple(请求["帧形状"]), np.dtype(请求["数据类型"])
+            )
+            return {}
+        
+        if 操作 == "断开帧环":
+            旧帧环 = 帧环表.pop(请求["名称"], None)
+            if 旧帧环 is not None:
+                旧帧环.关闭()
+            return {}
+        
+        if 操作 == "信息":
+            return {
+                "模型路径": getattr(引擎, '模型路径', ""),
+                "首选后端": getattr(引擎, '首选后端', "auto"),
+                "使用GPU": getattr(引擎, '使用GPU', False),
+                "后端": 引擎.获取当前后端() if hasattr(引擎, '获取当前后端') else "onnx",
+                "格式": 引擎.获取检测到的格式() if hasattr(引擎, '获取检测到的格式') else "unknown",
+                "已初始化": 引擎.是否已初始化() if hasattr(引擎, '是否已初始化') else True,
+            }
+        
+        if 操作 == "预处理规格":
+            if not hasattr(引擎, '获取预处理规格'):
+                return {"规格": None}
+            return {"规格": 引擎.获取预处理规格(请求.get("宽度"), 请求.get("高度")).to_dict()}
+        
+        if 操作 == "统计":
+            return {"统计": self.服务.获取统计().to_dict(), "延迟": self.服务.获取延迟统计()}
+        
+        if 操作 == "设置首选后端":
+            if hasattr(引擎, '设置首选后端'):
+                self.服务.执行独占(lambda: 引擎.设置首选后端(请求["后端"]))
+            return {}
+        
+        if 操作 == "加载模型":
+            if not hasattr(引擎, '加载模型'):
+                return {"结果": False}
+            return {"结果": bool(self.服务.执行独占(
+                lambda: 引擎.加载模型(请求["模型路径"], 请求.get("首选后端"))
+            ))}
+        
+        raise ValueError(f"未知操作: {操作}")
+
+
+class 远程推理客户端:
+    """
+    推理服务器的客户端，在机器人进程中使用
+    
+    接口与 推理客户端 相同。输入张量写入本客户端创建的共享内存帧环（槽数不小于一次提交的帧数），
+    请求只携带帧引用。请求同步等待回复，超时后迟到的回复按请求编号丢弃；
+    服务器复制帧时检查代数，已被新请求覆盖的槽位不会被误用。
+    """
+    
+    # 加载模型、查询信息等控制请求的等待时间（秒）
+    _控制超时 = 30.0
+    
+    def __init__(self, 地址: str, 认证密钥: bytes, 超时: float = 1.0, 槽数: int = 8):
+        """
+        参数:
+            地址: 推理服务器地址
+            认证密钥: 认证密钥
+            超时: 单次预测等待结果的最长时间（秒）
+            槽数: 输入帧环的槽数，也是单个预测请求携带的最大帧数
+        """
+        self.地址 = 地址
+        self.超时 = 超时
+        self._槽数 = max(2, 槽数)
+        self._连接 = Client(地址, authkey=认证密钥)
+        self._请求锁 = threading.Lock()
+        self._预测锁 = threading.Lock()
+        self._编号 = 0
+        self._帧环: Optional[帧环] = None
+        self._已关闭 = False
+        self._信息 = self._请求({"操作": "信息"}, 超时=self._控制超时)
+    
+    @property
+    def 模型路径(self) -> str:
+        return self._信息.get("模型路径", "")
+    
+    @property
+    def 首选后端(self) -> str:
+        return self._信息.get("首选后端", "auto")
+    
+    @property
+    def 使用GPU(self) -> bool:
+        return self._信息.get("使用GPU", False)
+    
+    def _请求(self, 消息: Dict[str, Any], 超时: Optional[float] = None) -> Dict[str, Any]:
+        """发送请求并等待对应编号的回复"""
+        with self._请求锁:
+            if self._已关闭:
+                raise RuntimeError("推理客户端已关闭")
+            self._编号 += 1
+            消息["编号"] = self._编号
+            self._连接.send(消息)
+            
+            截止时间 = time.perf_counter() + (self.超时 if 超时 is None else 超时)
+            while True:
+                剩余 = 截止时间 - time.perf_counter()
+                if 剩余 <= 0 or not self._连接.poll(剩余):
+                    raise TimeoutError(f"等待推理服务器回复超时: {消息['操作']}")
+                回复 = self._连接.recv()
+                if 回复.get("编号") == self._编号:
+                    break
+        
+        if "错误" in 回复:
+            raise RuntimeError(f"推理服务器错误: {回复['错误']}")
+        return 回复
+    
+    def _确保帧环(self, 形状: tuple, 数据类型: np.dtype) -> 帧环:
+        """按输入张量的形状和类型创建（或重建）共享内存帧环并通知服务器"""
+        环 = self._帧环
+        if 环 is not None and 环.帧形状 == 形状 and 环.数据类型 == 数据类型:
+            return 环
+        
+        if 环 is not None:
+            self._帧环 = None
+            self._请求({"操作": "断开帧环", "名称": 环.名称}, 超时=self._控制超时)
+            环.关闭()
+        环 = 帧环(self._槽数, 形状, 数据类型, 共享内存=True)
+        try:
+            self._请求({
+                "操作": "连接帧环", "名称": 环.名称, "槽数": 环.槽数,
+                "帧形状": list(环.帧形状), "数据类型": 环.数据类型.str
+            }, 超时=self._控制超时)
+        except Exception:
+            环.关闭()
+            raise
+        self._帧环 = 环
+        return 环
+    
+    def 预测(self, 图像: np.ndarray) -> List[float]:
+        """提交单帧并等待结果"""
+        return self.批量预测([图像])[0].tolist()
+    
+    def 批量预测(self, 图像批次) -> np.ndarray:
+        """把各帧写入帧环后一起提交，由服务器与其他客户端的请求合并批次"""
+        if self._已关闭:
+            raise RuntimeError("推理客户端已关闭")
+        图像列表 = [np.asarray(图像) for 图像 in 图像批次]
+        if not 图像列表:
+            return np.array([], dtype=np.float32)
+        
+        输出列表 = []
+        with self._预测锁:
+            for 起点 in range(0, len(图像列表), self._槽数):
+                分块 = 图像列表[起点:起点 + self._槽数]
+                环 = self._确保帧环(分块[0].shape, 分块[0].dtype)
+                引用列表 = [环.写入(图像).to_dict() for 图像 in 分块]
+                回复 = self._请求({"操作": "预测", "帧环": 环.名称, "引用": 引用列表})
+                输出列表.append(回复["结果"])
+        return np.concatenate(输出列表).astype(np.float32, copy=False)
+    
+    def 获取当前后端(self) -> str:
+        return self._信息.get("后端", "onnx")
+    
+    def 获取检测到的格式(self) -> str:
+        return self._信息.get("格式", "unknown")
+    
+    def 获取预处理规格(self, 宽度: int = None, 高度: int = None):
+        """获取服务器引擎的预处理规格，引擎不提供时按 uint8 像素输入处理"""
+        from 核心.帧预处理 import 预处理规格
+        
+        数据 = self._请求({"操作": "预处理规格", "宽度": 宽度, "高度": 高度}, 超时=self._控制超时)["规格"]
+        if 数据 is None:
+            return 预处理规格(宽度=宽度 or 480, 高度=高度 or 270, 缩放=None)
+        return 预处理规格.from_dict(数据)
+    
+    def 获取延迟统计(self) -> 性能指标:
+        return self._请求({"操作": "统计"}, 超时=self._控制超时)["延迟"]
+    
+    def 获取服务统计(self) -> 服务统计:
+        return 服务统计(**self._请求({"操作": "统计"}, 超时=self._控制超时)["统计"])
+    
+    def 是否已初始化(self) -> bool:
+        return not self._已关闭 and bool(self._信息.get("已初始化", False))
+    
+    def 设置首选后端(self, 后端: str) -> None:
+        """设置服务器引擎的首选后端（影响所有客户端）"""
+        self._请求({"操作": "设置首选后端", "后端": 后端}, 超时=self._控制超时)
+        self._信息 = self._请求({"操作": "信息"}, 超时=self._控制超时)
+    
+    def 加载模型(self, 模型路径: str, 首选后端: str = None) -> bool:
+        """在服务器引擎上重新加载模型（影响所有客户端）"""
+        结果 = self._请求({"操作": "加载模型", "模型路径": 模型路径, "首选后端": 首选后端},
+                        超时=self._控制超时)["结果"]
+        self._信息 = self._请求({"操作": "信息"}, 超时=self._控制超时)
+        return 结果
+    
+    def 关闭(self) -> None:
+        """断开与服务器的连接并销毁输入帧环"""
+        with self._请求锁:
+            if self._已关闭:
+                return
+            self._已关闭 = True
+            self._连接.close()
+        if self._帧环 is not None:
+            self._帧环.关闭()
+            self._帧环 = None
+
+
+def 创建推理服务器(模型路径: str,
+                 配置: Dict[str, Any] = None,
+                 服务配置: Dict[str, Any] = None,
+                 引擎工厂: Callable[[str, Dict[str, Any]], Any] = None) -> 推理服务器:
+    """
+    创建模型对应的推理服务器（未启动）
+    
+    参数:
+        模型路径: 模型文件路径
+        配置: 传给推理引擎的推理配置
+        服务配置: 推理服务配置，地址、认证密钥、空闲退出秒数也从中读取
+        引擎工厂: 自定义引擎创建函数 (模型路径, 配置) -> 引擎，默认创建 统一推理引擎
+    
+    返回:
+        推理服务器
+    """
+    if 服务配置 is None:
+        from 配置.增强设置 import 推理服务配置
+        服务配置 = 推理服务配置
+    
+    return 推理服务器(
+        _创建服务(模型路径, 配置, 服务配置, 引擎工厂),
+        服务器地址(模型路径, 服务配置),
+        _认证密钥(服务配置),
+        请求超时=服务配置.get("请求超时", 1.0),
+        空闲退出=服务配置.get("空闲退出秒数")
+    )
+
+
+def _服务器日志路径() -> str:
+    return os.path.join(tempfile.gettempdir(), "mmorpg_ai_inference.log")
+
+
+def _启动服务器进程(模型路径: str, 配置: Dict[str, Any], 服务配置: Dict[str, Any]) -> subprocess.Popen:
+    """在后台启动推理服务器进程，输出追加到临时目录中的日志文件"""
+    项目根目录 = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    日志路径 = _服务器日志路径()
+    公开配置 = {键: 值 for 键, 值 in 服务配置.items() if 键 != "认证密钥"}
+    命令 = [
+        sys.executable, "-m", "核心.推理服务", os.path.abspath(模型路径),
+        "--配置", json.dumps(配置 or {}, ensure_ascii=False, default=str),
+        "--服务配置", json.dumps(公开配置, ensure_ascii=False, default=str),
+    ]
+    # 密钥通过环境变量传递，不出现在进程命令行中
+    环境 = dict(os.environ, **{_密钥环境变量: _认证密钥(服务配置).decode("utf-8")})
+    # 服务器不依附于启动它的机器人的控制台，该机器人退出后仍为其他机器人服务
+    if sys.platform == "win32":
+        平台参数 = {"creationflags": getattr(subprocess, "CREATE_NO_WINDOW", 0)}
+    else:
+        平台参数 = {"start_new_session": True}
+    
+    with open(日志路径, "ab") as 日志文件:
+        进程 = subprocess.Popen(
+            命令, cwd=项目根目录, env=环境, stdin=subprocess.DEVNULL,
+            stdout=日志文件, stderr=subprocess.STDOUT, **平台参数
+        )
+    日志.info(f"已启动推理服务器进程 (PID {进程.pid})，日志: {日志路径}")
+    return 进程
+
+
+def 连接推理服务器(模型路径: str,
+                 配置: Dict[str, Any] = None,
+                 服务配置: Dict[str, Any] = None) -> 远程推理客户端:
+    """
+    连接模型对应的推理服务器进程
+    
+    服务器未运行且服务配置允许 自动启动 时，先在后台启动服务器进程再连接。
+    多个机器人同时启动时可能各自启动一个服务器，只有先监听的那个保留下来，
+    其余因地址被占用而退出，所有机器人最终连接到同一个服务器。
+    
+    参数:
+        模型路径: 模型文件路径
+        配置: 服务器创建推理引擎时使用的推理配置
+        服务配置: 推理服务配置
+    
+    返回:
+        远程推理客户端
+    """
+    if 服务配置 is None:
+        from 配置.增强设置 import 推理服务配置
+        服务配置 = 推理服务配置
+    
+    地址 = 服务器地址(模型路径, 服务配置)
+    密钥 = _认证密钥(服务配置)
+    客户端参数 = {"超时": 服务配置.get("请求超时", 1.0), "槽数": 服务配置.get("最大批次", 8)}
+    
+    try:
+        return 远程推理客户端(地址, 密钥, **客户端参数)
+    except OSError:
+        if not 服务配置.get("自动启动", True):
+            raise
+    
+    进程 = _启动服务器进程(模型路径, 配置, 服务配置)
+    截止时间 = time.time() + 服务配置.get("启动超时", 30.0)
+    while True:
+        time.sleep(0.2)
+        try:
+            return 远程推理客户端(地址, 密钥, **客户端参数)
+        except OSError:
+            # 启动的进程因地址已被占用而退出时，占用地址的服务器已在监听，上面的连接会成功
+            if 进程.poll() is not None:
+                raise RuntimeError(
+                    f"推理服务器启动失败 (退出码 {进程.returncode})，"
+                    f"详见 {_服务器日志路径()}"
+                )
+            if time.time() >= 截止时间:
+                raise RuntimeError(f"推理服务器未在规定时间内就绪: {地址}")
+
+
+def 主程序() -> None:
+    """命令行入口: 启动推理服务器，客户端全部断开一段时间后退出"""
+    解析器 = argparse.ArgumentParser(description="跨进程共享推理服务器")
+    解析器.add_argument("模型路径", help="模型文件路径")
+    解析器.add_argument("--配置", default="{}", help="推理配置 (JSON)")
+    解析器.add_argument("--服务配置", default=None,
+                      help="推理服务配置 (JSON)，默认使用 配置/增强设置.py 中的 推理服务配置")
+    解析器.add_argument("--常驻", action="store_true", help="客户端全部断开后不退出")
+    参数 = 解析器.parse_args()
+    
+    if 参数.服务配置 is None:
+        from 配置.增强设置 import 推理服务配置
+        服务配置 = dict(推理服务配置)
+    else:
+        服务配置 = json.loads(参数.服务配置)
+    if os.environ.get(_密钥环境变量):
+        服务配置["认证密钥"] = os.environ[_密钥环境变量]
+    if 参数.常驻:
+        服务配置["空闲退出秒数"] = None
+    
+    服务器 = 创建推理服务器(参数.模型路径, json.loads(参数.配置), 服务配置)
+    try:
+        服务器.运行()
+    except KeyboardInterrupt:
+        服务器.停止()
+
+
+if __name__ == "__main__":
+    主程序()
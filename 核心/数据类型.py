@@ -5,7 +5,7 @@
 
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import List, Optional, Tuple, Callable
+from typing import Dict, Iterable, List, Optional, Tuple, Callable
 import time
 
 
@@ -73,6 +73,75 @@ class 检测结果:
             raise ValueError(f"距离不能为负数，当前值: {self.距离}")
 
 
+# ==================== 检测特征视图 ====================
+class 检测特征:
+    """
+    一帧检测结果的特征视图
+    
+    某一实体类型首次被查询时筛出该类型的距离和方向，之后的计数、距离阈值
+    计数、最近距离、方向计数都基于筛选结果计算并缓存。同一帧的所有规则
+    条件和状态判定共享一个实例，每种类型只筛选一次检测列表。
+    """
+    
+    def __init__(self, 检测列表: List[检测结果]):
+        """
+        Args:
+            检测列表: 本帧的检测结果
+        """
+        self.总数 = len(检测列表)
+        self._检测列表 = 检测列表
+        # {实体类型: (同类检测列表, 距离列表, 查询缓存)}
+        self._分组: Dict[实体类型, Tuple[List[检测结果], List[float], Dict]] = {}
+    
+    def _类型分组(self, 类型: 实体类型) -> Tuple[List[检测结果], List[float], Dict]:
+        """指定类型实体的 (同类检测列表, 距离列表, 查询缓存)"""
+        分组 = self._分组.get(类型)
+        if 分组 is None:
+            同类 = [检测 for 检测 in self._检测列表 if 检测.类型 == 类型]
+            分组 = (同类, [检测.距离 for 检测 in 同类], {})
+            self._分组[类型] = 分组
+        return 分组
+    
+    def 数量(self, 类型: 实体类型, 距离阈值: Optional[float] = None) -> int:
+        """
+        指定类型的实体数量
+        
+        Args:
+            类型: 实体类型
+            距离阈值: 只统计距离严格小于该值的实体，None 表示不限距离
+        """
+        _, 距离, 缓存 = self._类型分组(类型)
+        if 距离阈值 is None:
+            return len(距离)
+        结果 = 缓存.get(距离阈值)
+        if 结果 is None:
+            结果 = 缓存[距离阈值] = sum(1 for 值 in 距离 if 值 < 距离阈值)
+        return 结果
+    
+    def 存在(self, 类型: 实体类型, 距离阈值: Optional[float] = None) -> bool:
+        """是否存在指定类型 (且距离小于阈值) 的实体"""
+        return self.数量(类型, 距离阈值) > 0
+    
+    def 最近距离(self, 类型: 实体类型) -> float:
+        """指定类型实体的最近距离，不存在时为 inf"""
+        return min(self._类型分组(类型)[1], default=float("inf"))
+    
+    def 方向计数(self, 类型: 实体类型) -> Dict[方向, int]:
+        """指定类型实体在各方向上的数量"""
+        同类, _, 缓存 = self._类型分组(类型)
+        计数 = 缓存.get("方向计数")
+        if 计数 is None:
+            计数 = 缓存["方向计数"] = {}
+            for 检测 in 同类:
+                计数[检测.方向] = 计数.get(检测.方向, 0) + 1
+        return 计数
+    
+    def 方向数量(self, 类型: 实体类型, 方向集合: Iterable[方向]) -> int:
+        """指定类型实体中位于给定方向之一的数量"""
+        计数 = self.方向计数(类型)
+        return sum(计数.get(方位, 0) for 方位 in 方向集合)
+
+
 # ==================== 状态识别结果数据类 ====================
 @dataclass
 class 状态识别结果:
@@ -101,6 +170,8 @@ class 决策上下文:
     附近敌人数量: int = 0
     上次动作: Optional[int] = None
     上次动作时间: float = 0.0
+    # 上游已构建的本帧检测特征，None 时首次访问 特征 再构建
+    特征缓存: Optional[检测特征] = field(default=None, repr=False, compare=False)
 
     def __post_init__(self):
         """验证数据有效性"""
@@ -109,6 +180,15 @@ class 决策上下文:
         if self.附近敌人数量 < 0:
             raise ValueError(f"附近敌人数量不能为负数，当前值: {self.附近敌人数量}")
 
+    @property
+    def 特征(self) -> 检测特征:
+        """本帧检测结果的特征视图 (首次访问时构建，检测列表被替换或增删后重建)"""
+        缓存 = self.特征缓存
+        if (缓存 is None or 缓存._检测列表 is not self.检测结果
+                or 缓存.总数 != len(self.检测结果)):
+            self.特征缓存 = 检测特征(self.检测结果)
+        return self.特征缓存
+
 
 @dataclass
 class 决策结果:
@@ -137,6 +217,8 @@ class 决策规则:
     条件: Callable[['决策上下文'], bool]
     动作: int  # 动作索引
     冷却时间: float = 0.0  # 秒
+    适用状态: Optional[Tuple[游戏状态, ...]] = None  # None 表示任意状态
+    紧急: bool = False  # 紧急规则 (混合加权策略中由专用紧急检查接管)
 
     def 检查条件(self, 上下文: 决策上下文) -> bool:
         """检查规则条件是否满足"""
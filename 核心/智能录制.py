@@ -4,8 +4,9 @@
 以及价值评估器和数据过滤器接口
 """
 
+from collections import Counter, deque
 from dataclasses import dataclass, field
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Union
 from enum import Enum
 import time
 import uuid
@@ -113,6 +114,43 @@ class RecordingSegment:
             self.tags.append(tag)
 
 
+# ==================== 片段摘要数据类 ====================
+@dataclass
+class SegmentSummary:
+    """录制片段摘要
+
+    只保留统计需要的字段，不引用画面帧和动作序列，
+    统计服务长期保存摘要而不是片段本身。
+    """
+    id: str
+    start_time: float
+    end_time: float
+    value_score: float
+    value_level: str
+    action_counts: Dict[int, int] = field(default_factory=dict)  # 动作ID -> 该片段中的次数
+    event_count: int = 0
+    tags: List[str] = field(default_factory=list)
+
+    @property
+    def duration(self) -> float:
+        """获取片段时长（秒）"""
+        return self.end_time - self.start_time
+
+    @classmethod
+    def from_segment(cls, segment: RecordingSegment) -> 'SegmentSummary':
+        """从录制片段创建摘要"""
+        return cls(
+            id=segment.id,
+            start_time=segment.start_time,
+            end_time=segment.end_time,
+            value_score=segment.value_score,
+            value_level=segment.value_level,
+            action_counts=dict(Counter(segment.actions)),
+            event_count=len(segment.events),
+            tags=list(segment.tags)
+        )
+
+
 
 # ==================== 录制统计数据类 ====================
 @dataclass
@@ -125,6 +163,7 @@ class RecordingStatistics:
     action_distribution: Dict[int, int] = field(default_factory=dict)  # 动作ID -> 样本数量
     total_duration: float = 0.0  # 总时长（秒）
     average_value_score: float = 0.0  # 平均价值评分
+    total_value_score: float = 0.0  # 价值评分总和
 
     def __post_init__(self):
         """验证数据有效性"""
@@ -143,37 +182,68 @@ class RecordingStatistics:
             if self.average_value_score != 0.0:
                 raise ValueError(f"平均价值评分必须在0-100范围内，当前值: {self.average_value_score}")
 
-    def update_from_segments(self, segments: List[RecordingSegment]) -> None:
-        """从片段列表更新统计数据"""
-        self.total_segments = len(segments)
+    def update_from_segments(self, segments: List[Union[RecordingSegment, SegmentSummary]]) -> None:
+        """从片段列表重新计算统计数据"""
+        self.total_segments = 0
         self.high_value_count = 0
         self.medium_value_count = 0
         self.low_value_count = 0
         self.action_distribution = {}
         self.total_duration = 0.0
-        total_score = 0.0
+        self.total_value_score = 0.0
+        self.average_value_score = 0.0
 
         for segment in segments:
-            # 统计价值等级
-            if segment.value_level == "high":
-                self.high_value_count += 1
-            elif segment.value_level == "medium":
-                self.medium_value_count += 1
-            else:
-                self.low_value_count += 1
+            self.add_segment(segment)
+
+    def add_segment(self, segment: Union[RecordingSegment, SegmentSummary]) -> None:
+        """累加一个片段，耗时只与该片段的动作种类数有关
+
+        Args:
+            segment: 录制片段或片段摘要
+        """
+        if isinstance(segment, RecordingSegment):
+            segment = SegmentSummary.from_segment(segment)
+        self._apply(segment, 1)
+
+    def remove_segment(self, summary: SegmentSummary) -> None:
+        """减去之前累加过的片段（用于滑动窗口）
+
+        Args:
+            summary: 之前累加过的片段摘要
+        """
+        self._apply(summary, -1)
+
+    def _apply(self, summary: SegmentSummary, sign: int) -> None:
+        """按符号累加或减去一个片段摘要"""
+        self.total_segments += sign
 
-            # 统计动作分布
-            for action in segment.actions:
-                self.action_distribution[action] = self.action_distribution.get(action, 0) + 1
+        # 统计价值等级
+        if summary.value_level == "high":
+            self.high_value_count += sign
+        elif summary.value_level == "medium":
+            self.medium_value_count += sign
+        else:
+            self.low_value_count += sign
+
+        # 统计动作分布
+        for action, count in summary.action_counts.items():
+            new_count = self.action_distribution.get(action, 0) + sign * count
+            if new_count > 0:
+                self.action_distribution[action] = new_count
+            else:
+                self.action_distribution.pop(action, None)
 
-            # 累计时长和评分
-            self.total_duration += segment.duration
-            total_score += segment.value_score
+        # 累计时长和评分
+        self.total_duration += sign * summary.duration
+        self.total_value_score += sign * summary.value_score
 
-        # 计算平均评分
+        # 计算平均评分（窗口清空时归零，避免浮点误差残留）
         if self.total_segments > 0:
-            self.average_value_score = total_score / self.total_segments
+            self.average_value_score = self.total_value_score / self.total_segments
         else:
+            self.total_duration = 0.0
+            self.total_value_score = 0.0
             self.average_value_score = 0.0
 
     def get_action_suggestions(self, min_samples: int = 100) -> List[Tuple[int, int]]:
@@ -256,22 +326,46 @@ class StatisticsService:
     
     提供录制数据的统计分析和质量报告生成功能。
     
+    统计按片段增量累加，片段只以不含画面帧的摘要形式保留（最多 max_summaries 个），
+    长时间录制时内存占用和每次添加的耗时都不随录制时长增长。
+    设置 recent_window 后另外维护最近 N 个片段的滑动窗口统计。
+    
     需求: 3.2, 3.3, 3.4, 3.5
     """
     
-    def __init__(self):
-        """初始化统计服务"""
+    def __init__(self, recent_window: Optional[int] = None, max_summaries: int = 1000):
+        """初始化统计服务
+        
+        Args:
+            recent_window: 近期统计的窗口片段数，None 表示不维护近期统计
+            max_summaries: 最多保留的片段摘要数（不影响累计统计）
+        """
         self._current_statistics = RecordingStatistics()
-        self._segments: List[RecordingSegment] = []
+        self._summaries: deque = deque(maxlen=max(1, max_summaries))
+        self._last_value_score = 0.0
+        
+        self._recent_window = recent_window if recent_window and recent_window > 0 else None
+        self._recent_statistics: Optional[RecordingStatistics] = (
+            RecordingStatistics() if self._recent_window else None
+        )
+        self._recent_summaries: deque = deque()
     
     def add_segment(self, segment: RecordingSegment) -> None:
         """添加录制片段并更新统计
         
         Args:
-            segment: 录制片段
+            segment: 录制片段（之后不再引用，其画面帧可以释放）
         """
-        self._segments.append(segment)
-        self._current_statistics.update_from_segments(self._segments)
+        summary = SegmentSummary.from_segment(segment)
+        self._current_statistics.add_segment(summary)
+        self._summaries.append(summary)
+        self._last_value_score = summary.value_score
+        
+        if self._recent_statistics is not None:
+            self._recent_summaries.append(summary)
+            self._recent_statistics.add_segment(summary)
+            if len(self._recent_summaries) > self._recent_window:
+                self._recent_statistics.remove_segment(self._recent_summaries.popleft())
     
     def add_segments(self, segments: List[RecordingSegment]) -> None:
         """批量添加录制片段并更新统计
@@ -279,8 +373,8 @@ class StatisticsService:
         Args:
             segments: 录制片段列表
         """
-        self._segments.extend(segments)
-        self._current_statistics.update_from_segments(self._segments)
+        for segment in segments:
+            self.add_segment(segment)
     
     def get_statistics(self) -> RecordingStatistics:
         """获取当前统计数据
@@ -290,6 +384,22 @@ class StatisticsService:
         """
         return self._current_statistics
     
+    def get_recent_statistics(self) -> Optional[RecordingStatistics]:
+        """获取最近 recent_window 个片段的统计
+        
+        Returns:
+            录制统计对象，未设置 recent_window 时返回 None
+        """
+        return self._recent_statistics
+    
+    def get_segment_summaries(self) -> List[SegmentSummary]:
+        """获取保留的片段摘要（从旧到新）
+        
+        Returns:
+            片段摘要列表
+        """
+        return list(self._summaries)
+    
     def get_value_counts(self) -> Dict[str, int]:
         """获取高/中/低价值片段计数
         
@@ -368,7 +478,7 @@ class StatisticsService:
         # 改进建议
         suggestions = self._generate_suggestions(min_samples_threshold)
         
-        return {
+        report = {
             "summary": summary,
             "value_distribution": value_distribution,
             "action_distribution": action_distribution,
@@ -377,6 +487,21 @@ class StatisticsService:
             "suggestions": suggestions,
             "generated_at": time.time()
         }
+        
+        # 近期质量
+        recent = self._recent_statistics
+        if recent is not None:
+            recent_score = recent.get_quality_score()
+            report["recent"] = {
+                "window": self._recent_window,
+                "segments": recent.total_segments,
+                "average_value_score": round(recent.average_value_score, 2),
+                "quality_score": round(recent_score, 2),
+                "quality_level": self._get_quality_level(recent_score),
+                "value_ratios": recent.get_value_distribution_ratio()
+            }
+        
+        return report
     
     def _generate_suggestions(self, min_samples_threshold: int) -> List[Dict[str, Any]]:
         """生成改进建议
@@ -501,8 +626,12 @@ class StatisticsService:
     
     def reset(self) -> None:
         """重置统计数据"""
-        self._segments.clear()
+        self._summaries.clear()
+        self._recent_summaries.clear()
+        self._last_value_score = 0.0
         self._current_statistics = RecordingStatistics()
+        if self._recent_statistics is not None:
+            self._recent_statistics = RecordingStatistics()
     
     def get_current_value_score(self) -> float:
         """获取当前（最新片段）的价值评分
@@ -512,9 +641,7 @@ class StatisticsService:
         Returns:
             最新片段的价值评分，如果没有片段则返回0
         """
-        if self._segments:
-            return self._segments[-1].value_score
-        return 0.0
+        return self._last_value_score
     
     def format_report_as_text(self, report: Dict[str, Any]) -> str:
         """将质量报告格式化为文本
@@ -566,6 +693,12 @@ class StatisticsService:
         }
         lines.append(f"  质量等级: {quality_level_map.get(report['quality_level'], report['quality_level'])}")
         
+        # 近期质量
+        recent = report.get("recent")
+        if recent:
+            lines.append(f"  近期质量 (最近{recent['segments']}个片段): {recent['quality_score']}/100 "
+                         f"({quality_level_map.get(recent['quality_level'], recent['quality_level'])})")
+        
         # 改进建议
         if report["suggestions"]:
             lines.append("\n【改进建议】")
@@ -5,6 +5,7 @@
 功能:
 - 封装检测器
 - 缓存存储和查询
+- 多场景缓存（签名索引 + LRU 淘汰）
 - 基于帧相似度的缓存决策
 - 缓存过期机制
 - 缓存统计
@@ -14,11 +15,13 @@
 
 import time
 import logging
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass, field
-from typing import List, Optional, Any, TYPE_CHECKING
+from typing import Dict, List, Optional, Any, Tuple, TYPE_CHECKING
 import numpy as np
 
-from 核心.帧比较 import 帧比较器
+from 核心.帧比较 import 帧比较器, 预处理帧
 from 核心.缓存策略 import 缓存策略, 获取默认缓存策略
 
 if TYPE_CHECKING:
@@ -46,6 +49,9 @@ class 缓存统计:
     相似度失效数: int = 0
     无缓存失效数: int = 0
     强制刷新数: int = 0
+    淘汰数: int = 0  # 超出最大条目数被 LRU 淘汰的条目数
+    过期淘汰数: int = 0  # 因超过过期时间被移除的条目数
+    签名跳过数: int = 0  # 签名预筛后跳过完整比较的条目数
     
     @property
     def 命中率(self) -> float:
@@ -135,6 +141,19 @@ class 缓存统计:
         """记录一次强制刷新"""
         self.强制刷新数 += 1
     
+    def 记录淘汰(self, 数量: int = 1, 过期: bool = False) -> None:
+        """
+        记录条目淘汰
+        
+        参数:
+            数量: 淘汰的条目数
+            过期: 是否因过期而淘汰（否则为 LRU 淘汰）
+        """
+        if 过期:
+            self.过期淘汰数 += 数量
+        else:
+            self.淘汰数 += 数量
+    
     def 重置(self) -> None:
         """重置所有统计"""
         self.总请求数 = 0
@@ -145,6 +164,9 @@ class 缓存统计:
         self.相似度失效数 = 0
         self.无缓存失效数 = 0
         self.强制刷新数 = 0
+        self.淘汰数 = 0
+        self.过期淘汰数 = 0
+        self.签名跳过数 = 0
     
     def 获取摘要(self) -> str:
         """
@@ -158,7 +180,8 @@ class 缓存统计:
             f"命中={self.缓存命中数}({self.命中率:.1%}), "
             f"未命中={self.缓存未命中数}({self.未命中率:.1%}), "
             f"过期={self.过期失效数}, 区域={self.区域失效数}, "
-            f"相似度={self.相似度失效数}, 强制刷新={self.强制刷新数}"
+            f"相似度={self.相似度失效数}, 强制刷新={self.强制刷新数}, "
+            f"淘汰={self.淘汰数}, 过期淘汰={self.过期淘汰数}"
         )
     
     def to_dict(self) -> dict:
@@ -172,6 +195,9 @@ class 缓存统计:
             "相似度失效数": self.相似度失效数,
             "无缓存失效数": self.无缓存失效数,
             "强制刷新数": self.强制刷新数,
+            "淘汰数": self.淘汰数,
+            "过期淘汰数": self.过期淘汰数,
+            "签名跳过数": self.签名跳过数,
             "命中率": self.命中率,
             "未命中率": self.未命中率,
             "过期失效率": self.过期失效率,
@@ -198,7 +224,10 @@ class 缓存统计:
             区域失效数=数据.get("区域失效数", 0),
             相似度失效数=数据.get("相似度失效数", 0),
             无缓存失效数=数据.get("无缓存失效数", 0),
-            强制刷新数=数据.get("强制刷新数", 0)
+            强制刷新数=数据.get("强制刷新数", 0),
+            淘汰数=数据.get("淘汰数", 0),
+            过期淘汰数=数据.get("过期淘汰数", 0),
+            签名跳过数=数据.get("签名跳过数", 0)
         )
 
 
@@ -212,6 +241,17 @@ class 缓存条目:
     结果: List['检测结果']  # 检测结果列表
     时间戳: float  # 缓存创建时间
     参考帧: np.ndarray  # 用于比较的参考帧
+    签名: int = 0  # 参考帧的感知签名，用于快速预筛选
+    命中次数: int = 0  # 该条目被命中的次数
+    预处理参考帧: Optional[预处理帧] = None  # 参考帧的灰度图、直方图等，比较时复用
+    帧引用: Any = None  # 参考帧直接使用帧环槽位时的引用，条目移除时释放
+    
+    @property
+    def 比较帧(self) -> Any:
+        """用于比较的参考帧（优先使用预处理结果）"""
+        if self.预处理参考帧 is not None:
+            return self.预处理参考帧
+        return self.参考帧
     
     @property
     def 年龄(self) -> float:
@@ -228,7 +268,11 @@ class 智能缓存:
     """
     智能检测结果缓存
     
-    根据画面变化程度决定是否重新执行检测，减少不必要的计算开销
+    根据画面变化程度决定是否重新执行检测，减少不必要的计算开销。
+    
+    同时保留最多 策略.最大条目数 个场景的检测结果，按最近使用顺序排列，
+    画面在几个场景之间来回切换（开关菜单、镜头转回）时也能命中。
+    查询时先按签名汉明距离挑选候选条目，只对最接近的少数条目做完整相似度比较。
     
     需求: 2.1, 2.2, 4.1, 4.2, 4.3, 4.4
     """
@@ -237,7 +281,8 @@ class 智能缓存:
                  检测器: Any = None,
                  策略: 缓存策略 = None,
                  相似度阈值: float = None,
-                 过期时间: float = None):
+                 过期时间: float = None,
+                 帧环: Any = None):
         """
         初始化智能缓存
         
@@ -246,10 +291,12 @@ class 智能缓存:
             策略: 缓存策略实例，如果为 None 则使用默认策略
             相似度阈值: 使用缓存的相似度阈值（覆盖策略设置）
             过期时间: 缓存过期时间（秒）（覆盖策略设置）
+            帧环: 可选的 核心.帧环.帧环，存储时按槽位引用保存参考帧而不复制
             
         需求: 2.1, 2.2
         """
         self._检测器 = 检测器
+        self._帧环 = 帧环
         
         # 初始化策略
         if 策略 is not None:
@@ -266,8 +313,14 @@ class 智能缓存:
         # 初始化帧比较器
         self._帧比较器 = 帧比较器(方法=self._策略.比较方法)
         
-        # 缓存存储
-        self._缓存条目: Optional[缓存条目] = None
+        # 缓存存储（按最近使用顺序，最后一个为最近使用）
+        self._条目表: "OrderedDict[int, 缓存条目]" = OrderedDict()
+        self._签名索引: Dict[int, int] = {}  # 签名 -> 条目编号
+        self._下一条目编号 = 0
+        self._锁 = threading.RLock()
+        
+        # 最近一次查询的预处理帧，供下游（如状态识别）复用灰度图
+        self._最近预处理帧: Optional[预处理帧] = None
         
         # 统计信息
         self._统计 = 缓存统计()
@@ -291,6 +344,14 @@ class 智能缓存:
         self._帧比较器 = 帧比较器(方法=新策略.比较方法)
         日志.info(f"缓存策略已更新: 阈值={新策略.全局阈值}, 过期时间={新策略.过期时间}s")
     
+    @property
+    def _当前条目(self) -> Optional[缓存条目]:
+        """最近使用的缓存条目"""
+        with self._锁:
+            if not self._条目表:
+                return None
+            return next(reversed(self._条目表.values()))
+    
     def 获取(self, 图像: np.ndarray) -> Optional[List['检测结果']]:
         """
         尝试从缓存获取检测结果
@@ -303,41 +364,127 @@ class 智能缓存:
             
         需求: 2.1, 2.2
         """
-        # 检查是否有缓存
-        if self._缓存条目 is None:
-            self._统计.记录未命中("无缓存")
-            日志.debug("缓存未命中: 无缓存")
+        with self._锁:
+            # 检查是否有缓存
+            if not self._条目表:
+                self._统计.记录未命中("无缓存")
+                日志.debug("缓存未命中: 无缓存")
+                return None
+            
+            # 当前帧只预处理一次，所有候选条目的全局和区域比较共用
+            当前帧 = self._帧比较器.预处理(图像)
+            self._最近预处理帧 = 当前帧
+            签名 = 当前帧.签名 if 当前帧 is not None else 0
+            失效原因 = ""
+            
+            for 条目编号, 条目 in self._查找候选(签名):
+                # 计算缓存年龄
+                缓存年龄 = 条目.年龄
+                
+                # 计算全局相似度
+                全局相似度 = self._帧比较器.比较(当前帧, 条目.比较帧)
+                
+                # 计算优先区域相似度
+                区域相似度列表 = self._计算区域相似度(当前帧, 条目.比较帧)
+                
+                # 使用策略判断是否应该使用缓存
+                if self._策略.应该使用缓存(全局相似度, 区域相似度列表, 缓存年龄):
+                    self._条目表.move_to_end(条目编号)
+                    条目.命中次数 += 1
+                    self._统计.记录命中()
+                    日志.debug(f"缓存命中: 相似度={全局相似度:.3f}, 年龄={缓存年龄:.3f}s")
+                    return 条目.结果
+                
+                # 记录最接近条目的失效原因
+                if not 失效原因:
+                    失效原因 = self._策略.获取失效原因(全局相似度, 区域相似度列表, 缓存年龄)
+            
+            self._统计.记录未命中(失效原因)
+            日志.debug(f"缓存未命中: {失效原因}")
+            
+            self._淘汰过期条目()
             return None
+    
+    def _查找候选(self, 签名: int) -> List[Tuple[int, 缓存条目]]:
+        """
+        按签名挑选需要做完整比较的候选条目
         
-        # 计算缓存年龄
-        缓存年龄 = self._缓存条目.年龄
+        签名完全一致的条目通过索引直接定位；其余按汉明距离从近到远排序，
+        只保留距离不超过阈值的条目（至少保留最接近的一个），
+        数量不超过 策略.最大比较数。
         
-        # 计算全局相似度
-        全局相似度 = self._帧比较器.比较(图像, self._缓存条目.参考帧)
+        参数:
+            签名: 当前帧签名
+            
+        返回:
+            [(条目编号, 条目), ...]，按优先级排序
+        """
+        最大比较数 = self._策略.最大比较数
         
-        # 计算优先区域相似度
-        区域相似度列表 = self._计算区域相似度(图像, self._缓存条目.参考帧)
+        候选: List[Tuple[int, int, 缓存条目]] = []
+        精确编号 = self._签名索引.get(签名)
+        if 精确编号 is not None and 精确编号 in self._条目表:
+            候选.append((0, 精确编号, self._条目表[精确编号]))
         
-        # 使用策略判断是否应该使用缓存
-        if self._策略.应该使用缓存(全局相似度, 区域相似度列表, 缓存年龄):
-            self._统计.记录命中()
-            日志.debug(f"缓存命中: 相似度={全局相似度:.3f}, 年龄={缓存年龄:.3f}s")
-            return self._缓存条目.结果
+        if len(候选) < 最大比较数 or not 候选:
+            # 逆序遍历，距离相同时最近使用的条目排在前面
+            for 条目编号, 条目 in reversed(self._条目表.items()):
+                if 条目编号 == 精确编号:
+                    continue
+                候选.append((帧比较器.签名距离(签名, 条目.签名), 条目编号, 条目))
+            候选.sort(key=lambda 项: 项[0])
         
-        # 获取失效原因并记录
-        失效原因 = self._策略.获取失效原因(全局相似度, 区域相似度列表, 缓存年龄)
-        self._统计.记录未命中(失效原因)
-        日志.debug(f"缓存未命中: {失效原因}")
+        已选 = [
+            (条目编号, 条目) for 序号, (距离, 条目编号, 条目) in enumerate(候选)
+            if 序号 == 0 or 距离 <= self._策略.签名距离阈值
+        ][:最大比较数]
         
-        return None
+        self._统计.签名跳过数 += len(self._条目表) - len(已选)
+        return 已选
     
-    def _计算区域相似度(self, 图像: np.ndarray, 参考帧: np.ndarray) -> List[float]:
+    def _淘汰过期条目(self) -> int:
+        """
+        移除所有超过过期时间的条目
+        
+        返回:
+            移除的条目数
+        """
+        if not self._策略.启用时间过期:
+            return 0
+        
+        过期编号 = [
+            条目编号 for 条目编号, 条目 in self._条目表.items()
+            if 条目.年龄 > self._策略.过期时间
+        ]
+        for 条目编号 in 过期编号:
+            self._移除条目(条目编号)
+        
+        if 过期编号:
+            self._统计.记录淘汰(len(过期编号), 过期=True)
+        return len(过期编号)
+    
+    def _移除条目(self, 条目编号: int) -> None:
+        """从条目表和签名索引中移除条目"""
+        条目 = self._条目表.pop(条目编号, None)
+        if 条目 is None:
+            return
+        if self._签名索引.get(条目.签名) == 条目编号:
+            del self._签名索引[条目.签名]
+        self._释放帧(条目)
+    
+    def _释放帧(self, 条目: 缓存条目) -> None:
+        """释放条目固定的帧环槽位"""
+        if 条目.帧引用 is not None and self._帧环 is not None:
+            self._帧环.释放(条目.帧引用)
+            条目.帧引用 = None
+    
+    def _计算区域相似度(self, 图像: Any, 参考帧: Any) -> List[float]:
         """
         计算所有优先区域的相似度
         
         参数:
-            图像: 当前帧
-            参考帧: 参考帧
+            图像: 当前帧（图像或预处理帧）
+            参考帧: 参考帧（图像或预处理帧）
             
         返回:
             各优先区域的相似度列表
@@ -349,7 +496,7 @@ class 智能缓存:
             return [0.0] * len(self._策略.优先区域列表)
         
         # 获取图像尺寸
-        高度, 宽度 = 图像.shape[:2]
+        高度, 宽度 = (图像.形状 if isinstance(图像, 预处理帧) else 图像.shape)[:2]
         
         # 获取像素坐标区域列表
         像素区域列表 = self._策略.获取像素区域列表(宽度, 高度)
@@ -357,20 +504,64 @@ class 智能缓存:
         # 计算各区域相似度
         return self._帧比较器.比较多区域(图像, 参考帧, 像素区域列表)
     
-    def 存储(self, 图像: np.ndarray, 结果: List['检测结果']) -> None:
+    def 设置帧环(self, 帧环: Any) -> None:
+        """
+        设置帧环，之后带帧引用存储的参考帧直接固定槽位而不复制
+        
+        参数:
+            帧环: 核心.帧环.帧环 实例，None 表示不使用
+        """
+        self.清空()
+        self._帧环 = 帧环
+    
+    def 存储(self, 图像: np.ndarray, 结果: List['检测结果'], 帧引用: Any = None) -> None:
         """
         存储检测结果到缓存
         
         参数:
             图像: 当前帧图像（作为参考帧）
             结果: 检测结果列表
-        """
-        self._缓存条目 = 缓存条目(
-            结果=结果,
-            时间戳=time.time(),
-            参考帧=图像.copy() if 图像 is not None else None
-        )
-        日志.debug(f"缓存已更新: {len(结果)} 个检测结果")
+            帧引用: 图像所在的帧环槽位引用；能固定该槽位时参考帧不复制
+        """
+        # 参考帧在存储时预处理一次，之后每次查询直接复用
+        已固定 = False
+        if 图像 is not None and 帧引用 is not None and self._帧环 is not None:
+            已固定 = self._帧环.固定(帧引用)
+        if 已固定:
+            参考帧 = self._帧比较器.预处理(self._帧环.读取(帧引用))
+        else:
+            参考帧 = self._帧比较器.预处理(图像.copy()) if 图像 is not None else None
+        签名 = 参考帧.签名 if 参考帧 is not None else 0
+        
+        with self._锁:
+            # 相同签名的旧条目直接被新结果替换
+            旧编号 = self._签名索引.get(签名)
+            if 旧编号 is not None:
+                self._移除条目(旧编号)
+            
+            self._淘汰过期条目()
+            
+            条目编号 = self._下一条目编号
+            self._下一条目编号 += 1
+            self._条目表[条目编号] = 缓存条目(
+                结果=结果,
+                时间戳=time.time(),
+                参考帧=参考帧.图像 if 参考帧 is not None else None,
+                签名=签名,
+                预处理参考帧=参考帧,
+                帧引用=帧引用 if 已固定 else None
+            )
+            self._签名索引[签名] = 条目编号
+            
+            # LRU 淘汰
+            淘汰数 = 0
+            while len(self._条目表) > self._策略.最大条目数:
+                self._移除条目(next(iter(self._条目表)))
+                淘汰数 += 1
+            if 淘汰数:
+                self._统计.记录淘汰(淘汰数)
+        
+        日志.debug(f"缓存已更新: {len(结果)} 个检测结果, 条目数={len(self._条目表)}")
     
     def 检测(self, 图像: np.ndarray) -> List['检测结果']:
         """
@@ -429,19 +620,44 @@ class 智能缓存:
             
         except Exception as e:
             日志.error(f"检测执行失败: {e}")
-            # 如果有缓存，返回缓存结果
-            if self._缓存条目 is not None:
-                return self._缓存条目.结果
+            # 如果有缓存，返回最近使用的缓存结果
+            当前条目 = self._当前条目
+            if 当前条目 is not None:
+                return 当前条目.结果
             return []
     
     def 清空(self) -> None:
         """清空缓存"""
-        self._缓存条目 = None
+        with self._锁:
+            for 条目 in self._条目表.values():
+                self._释放帧(条目)
+            self._条目表.clear()
+            self._签名索引.clear()
+            self._最近预处理帧 = None
         日志.debug("缓存已清空")
     
+    def 获取预处理帧(self, 图像: np.ndarray) -> Optional[预处理帧]:
+        """
+        获取最近一次 获取() 为同一图像计算的预处理帧
+        
+        参数:
+            图像: 传给 获取() 的同一图像对象
+            
+        返回:
+            预处理帧，该图像未经过查询时返回 None
+        """
+        帧 = self._最近预处理帧
+        if 帧 is not None and 帧.图像 is 图像:
+            return 帧
+        return None
+    
     def 是否有缓存(self) -> bool:
         """检查是否有缓存"""
-        return self._缓存条目 is not None
+        return bool(self._条目表)
+    
+    def 获取条目数(self) -> int:
+        """获取当前缓存的场景条目数"""
+        return len(self._条目表)
     
     def 是否过期(self) -> bool:
         """
@@ -452,30 +668,32 @@ class 智能缓存:
             
         需求: 4.1, 4.2
         """
-        if self._缓存条目 is None:
+        当前条目 = self._当前条目
+        if 当前条目 is None:
             return True
         
         if not self._策略.启用时间过期:
             return False
         
-        已过期 = self._缓存条目.年龄 > self._策略.过期时间
+        已过期 = 当前条目.年龄 > self._策略.过期时间
         
         # 记录过期事件（需求 4.4）
         if 已过期:
-            日志.debug(f"缓存过期: 年龄={self._缓存条目.年龄:.3f}s > 过期时间={self._策略.过期时间}s")
+            日志.debug(f"缓存过期: 年龄={当前条目.年龄:.3f}s > 过期时间={self._策略.过期时间}s")
         
         return 已过期
     
     def 获取缓存年龄(self) -> float:
         """
-        获取当前缓存的年龄
+        获取最近使用的缓存条目的年龄
         
         返回:
             缓存年龄（秒），如果无缓存则返回 -1
         """
-        if self._缓存条目 is None:
+        当前条目 = self._当前条目
+        if 当前条目 is None:
             return -1.0
-        return self._缓存条目.年龄
+        return 当前条目.年龄
     
     def 获取统计(self) -> dict:
         """
@@ -488,6 +706,8 @@ class 智能缓存:
         """
         统计字典 = self._统计.to_dict()
         统计字典["有缓存"] = self.是否有缓存()
+        统计字典["条目数"] = self.获取条目数()
+        统计字典["最大条目数"] = self._策略.最大条目数
         统计字典["缓存年龄"] = self.获取缓存年龄()
         统计字典["是否过期"] = self.是否过期()
         统计字典["预热完成"] = self._预热完成
@@ -558,25 +778,22 @@ class 智能缓存:
     
     def 检查并处理过期(self) -> bool:
         """
-        检查缓存是否过期，如果过期则清空缓存
+        检查缓存条目是否过期，移除所有已过期的条目
         
         返回:
-            如果缓存已过期并被清空则返回 True
+            如果有条目已过期并被移除则返回 True
             
         需求: 4.1, 4.2, 4.4
         """
-        if self._缓存条目 is None:
-            return False
-        
-        if not self._策略.启用时间过期:
-            return False
-        
-        缓存年龄 = self._缓存条目.年龄
+        with self._锁:
+            if not self._条目表 or not self._策略.启用时间过期:
+                return False
+            
+            移除数 = self._淘汰过期条目()
         
-        if 缓存年龄 > self._策略.过期时间:
+        if 移除数:
             # 记录过期事件（需求 4.4）
-            日志.info(f"缓存过期事件: 年龄={缓存年龄:.3f}s, 过期时间={self._策略.过期时间}s")
-            self.清空()
+            日志.info(f"缓存过期事件: 移除 {移除数} 个条目, 过期时间={self._策略.过期时间}s")
             return True
         
         return False
@@ -590,14 +807,15 @@ class 智能缓存:
             
         需求: 4.4
         """
-        if self._缓存条目 is None:
+        当前条目 = self._当前条目
+        if 当前条目 is None:
             return {
                 "有缓存": False,
                 "启用时间过期": self._策略.启用时间过期,
                 "过期时间设置": self._策略.过期时间
             }
         
-        缓存年龄 = self._缓存条目.年龄
+        缓存年龄 = 当前条目.年龄
         剩余时间 = max(0, self._策略.过期时间 - 缓存年龄)
         
         return {
@@ -5,27 +5,32 @@
 功能:
 - 多模型加载和管理
 - 运行时模型切换（线程安全、原子性）
+- 无锁预测读路径，可选会话池支持并发预测
 - 自动切换规则
 - 快捷键集成
 - 配置热重载
 - 预加载优化（100ms 内完成切换）
+- 内存预算：超出预算时按最后使用时间驱逐冷模型，切换时按需重新加载
 
 需求: 1.1, 1.2, 1.3, 1.4, 1.5, 2.1, 2.2, 2.3, 2.4
 """
 
 import os
-import sys
 import time
 import json
 import logging
+import queue
 import threading
-from typing import List, Dict, Optional, Any, Tuple, Callable
+from contextlib import contextmanager
+from typing import List, Dict, Optional, Any, Tuple, Callable, Iterator
 from dataclasses import dataclass, field
 from enum import Enum
 from concurrent.futures import ThreadPoolExecutor, Future
 
 import numpy as np
 
+from 核心.ONNX推理 import 准备批次输入, 是否动态维度, 批次输入类型, 默认输入缩放, 创建推理会话
+
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 日志 = logging.getLogger(__name__)
@@ -33,6 +38,29 @@ logging.basicConfig(level=logging.INFO)
 
 # ==================== 数据类定义 ====================
 
+class 会话池:
+    """
+    同一模型的多个推理会话
+    
+    并发预测各自借用一个会话，互不等待；会话全部借出时借用方阻塞到有会话归还。
+    """
+    
+    def __init__(self, 会话列表: List[Any]):
+        self.大小 = len(会话列表)
+        self._空闲: queue.SimpleQueue = queue.SimpleQueue()
+        for 会话 in 会话列表:
+            self._空闲.put(会话)
+    
+    @contextmanager
+    def 借用(self) -> Iterator[Any]:
+        """借出一个会话，退出上下文时归还"""
+        会话 = self._空闲.get()
+        try:
+            yield 会话
+        finally:
+            self._空闲.put(会话)
+
+
 @dataclass
 class 模型槽位:
     """
@@ -55,12 +83,38 @@ class 模型槽位:
     # 预加载相关
     预加载状态: str = "未预加载"  # "未预加载", "预加载中", "已预加载", "预加载失败"
     预热完成: bool = False  # 模型是否已预热（执行过一次推理）
+    # 并发预测用的会话池（会话池大小 > 1 的 ONNX 模型）
+    会话池: Optional[会话池] = None
+    # 因超出内存预算被驱逐（保留元数据，切换时从磁盘重新加载）
+    已驱逐: bool = False
 
     def 获取内存占用MB(self) -> float:
         """获取内存占用（MB）"""
         return self.内存占用 / (1024 * 1024)
 
 
+@dataclass(frozen=True)
+class 活动模型快照:
+    """
+    活动模型的不可变快照
+    
+    切换时整体替换引用（读-复制-更新），预测只读取一次引用，无需加锁；
+    正在进行的预测继续使用旧快照，新的预测看到新快照，不会混用两个模型。
+    """
+    名称: str
+    模型实例: Any = None
+    会话池: Optional[会话池] = None
+    
+    @contextmanager
+    def 借用(self) -> Iterator[Any]:
+        """借出用于本次推理的模型实例，有会话池时从池中借用"""
+        if self.会话池 is None:
+            yield self.模型实例
+        else:
+            with self.会话池.借用() as 会话:
+                yield 会话
+
+
 @dataclass
 class 切换事件:
     """
@@ -186,6 +240,7 @@ class 管理器配置:
     默认模型: str = ""
     自动切换启用: bool = True
     冷却时间: float = 5.0  # 秒
+    内存预算MB: Optional[float] = None  # None 表示未配置，0 表示不限制
     
     @classmethod
     def 从字典创建(cls, 数据: dict) -> '管理器配置':
@@ -200,7 +255,8 @@ class 管理器配置:
             模型列表=模型列表,
             默认模型=数据.get("默认模型", ""),
             自动切换启用=自动切换配置.get("启用", True),
-            冷却时间=自动切换配置.get("冷却时间", 5.0)
+            冷却时间=自动切换配置.get("冷却时间", 5.0),
+            内存预算MB=数据.get("内存预算MB")
         )
 
 
@@ -220,20 +276,32 @@ class 模型管理器:
     需求: 1.1, 1.3, 1.5, 2.1, 2.2, 2.3, 2.4
     """
     
-    def __init__(self, 配置路径: str = None):
+    def __init__(self, 配置路径: str = None, 会话池大小: int = 1, 内存预算MB: float = 0,
+                 启用优化缓存: bool = True, 预加载并发数: int = None):
         """
         初始化模型管理器
         
         参数:
             配置路径: 模型配置文件路径（JSON/YAML）
+            会话池大小: 每个 ONNX 模型创建的推理会话数，大于 1 时多个线程可各用一个会话并发预测
+            内存预算MB: 常驻模型的内存上限，0 表示不限制；配置文件中的 内存预算MB 优先
+            启用优化缓存: ONNX 模型是否缓存优化后的图，再次启动时跳过图优化
+            预加载并发数: 预加载线程数，默认按 CPU 核数（2-8）
             
         需求: 1.2, 5.1
         """
         # 模型槽位字典 {名称: 模型槽位}
         self._槽位: Dict[str, 模型槽位] = {}
         
-        # 当前活动模型名称
-        self._活动模型: str = ""
+        # 当前活动模型快照，预测路径只读取此引用
+        self._活动快照: Optional[活动模型快照] = None
+        
+        self._会话池大小 = max(1, 会话池大小)
+        self._启用优化缓存 = 启用优化缓存
+        
+        # 内存预算（MB），超出时驱逐最久未使用的非活动模型
+        self._内存预算MB = max(0.0, float(内存预算MB))
+        self._驱逐次数 = 0
         
         # 线程安全锁
         # 使用 RLock 支持同一线程重入
@@ -260,17 +328,52 @@ class 模型管理器:
         
         # 预加载相关
         # 需求: 2.2 - 预加载模型到内存，100ms 内完成切换
-        self._预加载线程池 = ThreadPoolExecutor(max_workers=2, thread_name_prefix="模型预加载")
+        # 图优化基本是单线程的，多个模型并行加载可以缩短启动时间
+        if 预加载并发数 is None:
+            预加载并发数 = min(8, max(2, os.cpu_count() or 2))
+        self._预加载线程池 = ThreadPoolExecutor(max_workers=预加载并发数, thread_name_prefix="模型预加载")
         self._预加载任务: Dict[str, Future] = {}
         
         # 切换性能目标（毫秒）
         self._切换性能目标 = 100  # 100ms
         
+        # 批量预测的预分配输入缓冲，按线程各自保存 {(行数, 帧形状): 数组}
+        self._线程缓冲 = threading.local()
+        
         # 加载配置
         if 配置路径:
             self.加载配置(配置路径)
         
         日志.info("模型管理器初始化完成")
+    
+    @property
+    def _活动模型(self) -> str:
+        """当前活动模型名称"""
+        快照 = self._活动快照
+        return 快照.名称 if 快照 is not None else ""
+    
+    @_活动模型.setter
+    def _活动模型(self, 名称: str) -> None:
+        self._发布活动快照(名称)
+    
+    def _发布活动快照(self, 名称: str) -> None:
+        """
+        按槽位当前内容为指定模型创建快照并原子替换（调用方持有 self._锁）
+        
+        参数:
+            名称: 活动模型名称，空字符串表示没有活动模型
+        """
+        if not 名称:
+            self._活动快照 = None
+            return
+        
+        槽位 = self._槽位.get(名称)
+        if 槽位 is None or not 槽位.已加载:
+            self._活动快照 = 活动模型快照(名称=名称)
+        else:
+            self._活动快照 = 活动模型快照(
+                名称=名称, 模型实例=槽位.模型实例, 会话池=槽位.会话池
+            )
 
     # ==================== 配置加载方法 ====================
     
@@ -312,6 +415,8 @@ class 模型管理器:
             # 解析配置
             self._配置 = 管理器配置.从字典创建(数据)
             self._配置路径 = 配置路径
+            if self._配置.内存预算MB is not None:
+                self.设置内存预算(self._配置.内存预算MB)
             
             日志.info(f"配置加载成功: {配置路径}")
             日志.info(f"  模型数量: {len(self._配置.模型列表)}")
@@ -358,6 +463,12 @@ class 模型管理器:
         if 默认模型 and 默认模型 not in 模型名称集合:
             错误列表.append(f"默认模型不存在: {默认模型}")
         
+        # 检查内存预算
+        内存预算 = 数据.get("内存预算MB")
+        if 内存预算 is not None and (
+                not isinstance(内存预算, (int, float)) or isinstance(内存预算, bool) or 内存预算 < 0):
+            错误列表.append(f"内存预算MB 必须是非负数: {内存预算}")
+        
         # 报告错误
         if 错误列表:
             for 错误 in 错误列表:
@@ -400,6 +511,8 @@ class 模型管理器:
                     "冷却时间": self._配置.冷却时间 if self._配置 else 5.0
                 }
             }
+            if self._内存预算MB > 0:
+                数据["内存预算MB"] = self._内存预算MB
             
             # 添加模型信息
             for 名称, 槽位 in self._槽位.items():
@@ -450,45 +563,64 @@ class 模型管理器:
             
         需求: 1.1, 1.3
         """
+        # 验证模型文件
+        if not self._验证模型文件(路径):
+            日志.error(f"模型文件验证失败: {路径}")
+            return False
+        
+        # 创建槽位
+        槽位 = 模型槽位(
+            名称=名称,
+            路径=路径,
+            描述=描述,
+            适用状态=适用状态 or [],
+            快捷键=快捷键
+        )
+        
+        # 加载模型实例（不持有管理器锁，多个模型可并行加载）
+        开始时间 = time.perf_counter()
+        模型实例 = self._加载模型实例(路径)
+        加载耗时 = time.perf_counter() - 开始时间
+        
+        if 模型实例 is None:
+            日志.error(f"模型加载失败: {名称}")
+            return False
+        
+        # 更新槽位信息
+        槽位.模型实例 = 模型实例
+        槽位.已加载 = True
+        槽位.加载时间 = 加载耗时
+        槽位.内存占用 = self._测量内存占用(模型实例, 路径)
+        槽位.最后使用时间 = time.time()
+        
+        # 并发预测的会话池，每个会话各自持有一份权重
+        if self._会话池大小 > 1 and self._是ONNX会话(模型实例):
+            会话列表 = [模型实例]
+            while len(会话列表) < self._会话池大小:
+                额外会话 = self._加载ONNX模型(路径)
+                if 额外会话 is None:
+                    break
+                会话列表.append(额外会话)
+            if len(会话列表) > 1:
+                槽位.会话池 = 会话池(会话列表)
+                槽位.内存占用 *= len(会话列表)
+        
         with self._锁:
-            # 检查是否已存在
-            if 名称 in self._槽位:
+            # 检查是否已存在（已驱逐或未加载的槽位直接替换）
+            if 名称 in self._槽位 and self._槽位[名称].已加载:
                 日志.warning(f"模型槽位已存在: {名称}，将覆盖")
                 self.卸载模型(名称)
             
-            # 验证模型文件
-            if not self._验证模型文件(路径):
-                日志.error(f"模型文件验证失败: {路径}")
-                return False
-            
-            # 创建槽位
-            槽位 = 模型槽位(
-                名称=名称,
-                路径=路径,
-                描述=描述,
-                适用状态=适用状态 or [],
-                快捷键=快捷键
-            )
-            
-            # 加载模型实例
-            开始时间 = time.perf_counter()
-            模型实例 = self._加载模型实例(路径)
-            加载耗时 = time.perf_counter() - 开始时间
-            
-            if 模型实例 is None:
-                日志.error(f"模型加载失败: {名称}")
-                return False
-            
-            # 更新槽位信息
-            槽位.模型实例 = 模型实例
-            槽位.已加载 = True
-            槽位.加载时间 = 加载耗时
-            槽位.内存占用 = self._估算内存占用(模型实例)
-            槽位.最后使用时间 = time.time()
-            
             # 添加到槽位字典
             self._槽位[名称] = 槽位
             
+            # 覆盖当前活动模型时重新发布快照
+            if 名称 == self._活动模型:
+                self._发布活动快照(名称)
+            
+            # 超出内存预算时驱逐冷模型（不驱逐刚加载的模型）
+            self._执行内存预算(保留=名称)
+            
             日志.info(f"模型加载成功: {名称}")
             日志.info(f"  路径: {路径}")
             日志.info(f"  加载耗时: {加载耗时*1000:.1f}ms")
@@ -577,11 +709,11 @@ class 模型管理器:
                 providers.append('DmlExecutionProvider')
             providers.append('CPUExecutionProvider')
             
-            # 创建会话
+            # 创建会话（复用优化后模型缓存）
             会话选项 = ort.SessionOptions()
             会话选项.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
             
-            会话 = ort.InferenceSession(路径, sess_options=会话选项, providers=providers)
+            会话, _ = 创建推理会话(路径, 会话选项, providers, 启用缓存=self._启用优化缓存)
             
             日志.info(f"ONNX 模型加载成功，使用: {会话.get_providers()[0]}")
             return 会话
@@ -655,45 +787,187 @@ class 模型管理器:
             日志.error(f"SavedModel 加载失败: {e}")
             return None
 
-    def _估算内存占用(self, 模型实例: Any) -> int:
+    def _测量内存占用(self, 模型实例: Any, 路径: str = "") -> int:
         """
-        估算模型内存占用
+        测量模型常驻内存（字节）
+        
+        按实际权重大小计算：ONNX 会话按模型文件大小（会话常驻全部初始化器），
+        PyTorch 按参数和缓冲区的实际字节数，Keras 按 weights、SavedModel 按 variables
+        的实际字节数，TFLearn 按会话图中全部变量的字节数；
+        其他情况按模型文件（或检查点文件）在磁盘上的大小，最少计 1MB。
+        ONNX 会话池中每个会话各持有一份权重。
         
         需求: 1.4 - 报告每个已加载模型的内存使用情况
         """
         try:
-            # 尝试使用 sys.getsizeof
-            基础大小 = sys.getsizeof(模型实例)
-            
             # ONNX Runtime 会话
-            if hasattr(模型实例, 'get_inputs'):
-                # 估算：输入输出张量大小
-                输入信息 = 模型实例.get_inputs()
-                if 输入信息:
-                    形状 = 输入信息[0].shape
-                    if all(isinstance(d, int) for d in 形状):
-                        元素数 = 1
-                        for d in 形状:
-                            元素数 *= d
-                        基础大小 += 元素数 * 4  # float32
+            if self._是ONNX会话(模型实例):
+                if 路径 and os.path.isfile(路径):
+                    return os.path.getsize(路径)
             
             # PyTorch 模型
             elif hasattr(模型实例, 'parameters'):
-                import torch
-                参数数 = sum(p.numel() for p in 模型实例.parameters())
-                基础大小 = 参数数 * 4  # float32
-            
-            # TensorFlow/Keras 模型
-            elif hasattr(模型实例, 'count_params'):
-                参数数 = 模型实例.count_params()
-                基础大小 = 参数数 * 4
-            
-            return max(基础大小, 1024 * 1024)  # 至少 1MB
+                张量列表 = list(模型实例.parameters())
+                if hasattr(模型实例, 'buffers'):
+                    张量列表.extend(模型实例.buffers())
+                return sum(t.numel() * t.element_size() for t in 张量列表)
+            
+            # TensorFlow/Keras 模型（weights）和 SavedModel（variables）
+            elif hasattr(模型实例, 'weights') or hasattr(模型实例, 'variables'):
+                变量列表 = getattr(模型实例, 'weights', None) or getattr(模型实例, 'variables', [])
+                字节数 = self._变量字节数(变量列表)
+                if 字节数 > 0:
+                    return 字节数
+            
+            # TFLearn 模型（变量保存在模型自己的 TensorFlow 会话图中）
+            elif hasattr(模型实例, 'session') and hasattr(模型实例.session, 'graph'):
+                字节数 = self._变量字节数(模型实例.session.graph.get_collection('variables'))
+                if 字节数 > 0:
+                    return 字节数
+            
+            # 无法从对象测量时按磁盘大小
+            return max(self._磁盘大小(路径), 1024 * 1024)
             
         except Exception as e:
-            日志.warning(f"估算内存占用失败: {e}")
+            日志.warning(f"测量内存占用失败: {e}")
             return 10 * 1024 * 1024  # 默认 10MB
     
+    @staticmethod
+    def _变量字节数(变量列表) -> int:
+        """计算 TensorFlow 变量（或具有 shape / dtype 的张量）的总字节数"""
+        总数 = 0
+        for 变量 in 变量列表:
+            形状 = [int(d) for d in 变量.shape]
+            总数 += int(np.prod(形状)) * 变量.dtype.size
+        return 总数
+    
+    @staticmethod
+    def _磁盘大小(路径: str) -> int:
+        """
+        模型在磁盘上的大小（字节）
+        
+        文件取文件大小，目录（SavedModel）取其中全部文件大小之和，
+        TFLearn 检查点（model.tfl 或 model.tfl.index）取 前缀.* 各文件
+        （.index / .data-* / .meta）之和。
+        """
+        if not 路径:
+            return 0
+        if 路径.endswith('.index'):
+            路径 = 路径[:-len('.index')]
+        if os.path.isfile(路径):
+            return os.path.getsize(路径)
+        if os.path.isdir(路径):
+            return sum(
+                os.path.getsize(os.path.join(目录, 文件))
+                for 目录, _, 文件列表 in os.walk(路径) for 文件 in 文件列表
+            )
+        
+        目录 = os.path.dirname(路径) or "."
+        前缀 = os.path.basename(路径) + "."
+        if not os.path.isdir(目录):
+            return 0
+        return sum(
+            os.path.getsize(os.path.join(目录, 文件))
+            for 文件 in os.listdir(目录)
+            if 文件.startswith(前缀) and os.path.isfile(os.path.join(目录, 文件))
+        )
+    
+    # ==================== 内存预算方法 ====================
+    
+    def 设置内存预算(self, 预算MB: float) -> List[str]:
+        """
+        设置常驻模型的内存预算并立即执行
+        
+        参数:
+            预算MB: 内存上限（MB），0 表示不限制
+            
+        返回:
+            被驱逐的模型名称列表
+        """
+        with self._锁:
+            self._内存预算MB = max(0.0, float(预算MB))
+            return self._执行内存预算()
+    
+    def 获取内存预算(self) -> float:
+        """获取内存预算（MB），0 表示不限制"""
+        return self._内存预算MB
+    
+    def _执行内存预算(self, 保留: str = "") -> List[str]:
+        """
+        常驻模型总内存超出预算时，按最后使用时间驱逐最久未用的模型（调用方持有 self._锁）
+        
+        活动模型和 保留 指定的模型不会被驱逐。
+        
+        返回:
+            被驱逐的模型名称列表
+        """
+        if self._内存预算MB <= 0:
+            return []
+        
+        预算 = self._内存预算MB * 1024 * 1024
+        驱逐列表 = []
+        while True:
+            常驻槽位 = [槽位 for 槽位 in self._槽位.values() if 槽位.已加载]
+            if sum(槽位.内存占用 for 槽位 in 常驻槽位) <= 预算:
+                break
+            
+            候选 = [槽位 for 槽位 in 常驻槽位
+                    if 槽位.名称 != self._活动模型 and 槽位.名称 != 保留]
+            if not 候选:
+                日志.warning(f"常驻模型内存超出预算 {self._内存预算MB:.1f}MB，但没有可驱逐的模型")
+                break
+            
+            最冷槽位 = min(候选, key=lambda 槽位: 槽位.最后使用时间)
+            self._驱逐槽位(最冷槽位)
+            驱逐列表.append(最冷槽位.名称)
+        
+        return 驱逐列表
+    
+    def _驱逐槽位(self, 槽位: 模型槽位) -> None:
+        """释放槽位的模型实例，保留元数据以便按需重新加载（调用方持有 self._锁）"""
+        内存占用 = 槽位.获取内存占用MB()
+        槽位.模型实例 = None
+        槽位.会话池 = None
+        槽位.已加载 = False
+        槽位.已驱逐 = True
+        槽位.内存占用 = 0
+        槽位.预热完成 = False
+        槽位.预加载状态 = "未预加载"
+        self._驱逐次数 += 1
+        日志.info(f"模型已驱逐: {槽位.名称}，释放约 {内存占用:.2f}MB")
+    
+    def _按需重新加载(self, 名称: str) -> float:
+        """
+        切换目标已被驱逐或尚未加载时从磁盘加载
+        
+        目标正在后台预加载时等待预加载完成，不重复加载。
+        
+        返回:
+            加载耗时（毫秒），无需加载时为 0
+        """
+        with self._锁:
+            槽位 = self._槽位.get(名称)
+            if 槽位 is None or 槽位.已加载:
+                return 0.0
+            任务 = self._预加载任务.get(名称)
+        
+        开始时间 = time.perf_counter()
+        if 任务 is not None and not 任务.done():
+            try:
+                任务.result(timeout=30.0)
+            except Exception as e:
+                日志.warning(f"等待预加载失败: {名称}, {e}")
+        else:
+            日志.info(f"按需重新加载模型: {名称}")
+            self.加载模型(
+                名称=槽位.名称,
+                路径=槽位.路径,
+                描述=槽位.描述,
+                适用状态=槽位.适用状态,
+                快捷键=槽位.快捷键
+            )
+        return (time.perf_counter() - 开始时间) * 1000
+    
     def 卸载模型(self, 名称: str) -> bool:
         """
         卸载指定模型以释放内存
@@ -721,6 +995,7 @@ class 模型管理器:
             
             # 清理模型实例
             槽位.模型实例 = None
+            槽位.会话池 = None
             槽位.已加载 = False
             
             # 从槽位字典移除
@@ -784,6 +1059,9 @@ class 模型管理器:
             # 设置切换状态标志
             self._正在切换.set()
             
+            # 目标已被驱逐时先从磁盘加载，预测继续使用当前模型
+            重新加载耗时 = self._按需重新加载(名称)
+            
             with self._锁:
                 # 检查目标模型是否存在
                 if 名称 not in self._槽位:
@@ -799,23 +1077,28 @@ class 模型管理器:
                 # 如果已经是活动模型，无需切换
                 if 名称 == self._活动模型:
                     日志.debug(f"模型已是活动状态: {名称}")
+                    self._执行内存预算()
                     return True
                 
                 # 记录原模型
                 原模型 = self._活动模型
                 
-                # 执行原子切换
+                # 执行原子切换：一次引用替换发布新快照
                 # 需求: 2.1 - 在不停止 AI 的情况下切换活动模型
-                self._活动模型 = 名称
+                self._发布活动快照(名称)
                 目标槽位.最后使用时间 = time.time()
                 
+                # 原活动模型变为可驱逐，重新检查内存预算
+                self._执行内存预算()
+                
                 # 计算切换耗时
                 切换耗时 = (time.perf_counter() - 开始时间) * 1000  # 毫秒
                 
                 # 检查是否满足性能目标
                 # 需求: 2.2 - 100ms 内完成切换
                 if 切换耗时 > self._切换性能目标:
-                    日志.warning(f"切换耗时 {切换耗时:.2f}ms 超过目标 {self._切换性能目标}ms")
+                    日志.warning(f"切换耗时 {切换耗时:.2f}ms 超过目标 {self._切换性能目标}ms"
+                                 + (f"（含重新加载 {重新加载耗时:.2f}ms）" if 重新加载耗时 else ""))
                 
                 # 记录切换事件
                 事件 = 切换事件(
@@ -824,7 +1107,8 @@ class 模型管理器:
                     新模型=名称,
                     触发方式=触发方式,
                     触发原因=触发原因 or f"切换到 {名称}",
-                    切换耗时=切换耗时
+                    切换耗时=切换耗时,
+                    额外信息={"重新加载": True, "加载耗时": 重新加载耗时} if 重新加载耗时 else {}
                 )
                 self._记录切换事件(事件)
                 
@@ -902,15 +1186,13 @@ class 模型管理器:
     
     def 获取活动模型实例(self) -> Any:
         """获取当前活动模型实例"""
-        with self._锁:
-            if not self._活动模型:
-                return None
-            
-            槽位 = self._槽位.get(self._活动模型)
-            if 槽位 and 槽位.已加载:
-                return 槽位.模型实例
-            
-            return None
+        快照 = self._活动快照
+        return 快照.模型实例 if 快照 is not None else None
+    
+    @staticmethod
+    def _是ONNX会话(模型实例: Any) -> bool:
+        """判断模型实例是否为 ONNX Runtime 会话"""
+        return hasattr(模型实例, 'run') and hasattr(模型实例, 'get_inputs')
 
     # ==================== 推理方法 ====================
     
@@ -927,43 +1209,32 @@ class 模型管理器:
         需求: 2.1 - 切换过程中不应返回无效预测结果
         需求: 2.3 - 确保线程安全
         """
-        # 等待切换完成，确保不在切换过程中进行预测
+        # 只读取一次快照引用：整次预测使用同一个模型，切换不会阻塞预测
         # 需求: 2.1 - 切换过程中不应返回无效预测结果
-        if self._正在切换.is_set():
-            if not self.等待切换完成(超时=0.5):
-                日志.warning("等待切换完成超时，跳过本次预测")
-                return []
+        快照 = self._活动快照
+        if 快照 is None or 快照.模型实例 is None:
+            日志.warning("没有可用的活动模型")
+            return []
         
-        with self._锁:
-            模型实例 = self.获取活动模型实例()
-            
-            if 模型实例 is None:
-                日志.warning("没有可用的活动模型")
-                return []
-            
-            # 再次检查切换状态（双重检查）
-            if self._正在切换.is_set():
-                日志.warning("检测到切换正在进行，跳过本次预测")
-                return []
-            
-            try:
+        try:
+            with 快照.借用() as 模型实例:
                 return self._执行预测(模型实例, 图像)
-            except Exception as e:
-                日志.error(f"预测失败: {e}")
-                return []
+        except Exception as e:
+            日志.error(f"预测失败: {e}")
+            return []
     
     def _执行预测(self, 模型实例: Any, 图像: np.ndarray) -> List[float]:
         """执行模型预测"""
-        # 预处理图像
-        if 图像.dtype != np.float32:
+        # 预处理图像（与 准备批次输入 规则相同：整数像素归一化，浮点输入视为已归一化）
+        if np.issubdtype(图像.dtype, np.integer):
+            图像 = np.multiply(图像, np.float32(默认输入缩放), dtype=np.float32)
+        elif 图像.dtype != np.float32:
             图像 = 图像.astype(np.float32)
-        if 图像.max() > 1.0:
-            图像 = 图像 / 255.0
         if len(图像.shape) == 3:
             图像 = np.expand_dims(图像, axis=0)
         
         # ONNX Runtime 会话
-        if hasattr(模型实例, 'run') and hasattr(模型实例, 'get_inputs'):
+        if self._是ONNX会话(模型实例):
             输入名 = 模型实例.get_inputs()[0].name
             输出名 = 模型实例.get_outputs()[0].name
             结果 = 模型实例.run([输出名], {输入名: 图像})[0]
@@ -991,6 +1262,88 @@ class 模型管理器:
             日志.error("不支持的模型类型")
             return []
     
+    def 批量预测(self, 图像批次: 批次输入类型, 最大批次: int = 32) -> np.ndarray:
+        """
+        使用活动模型进行批量预测
+        
+        多帧合并为尽量少的推理调用，与 预测 一样只读取一次活动模型快照。
+        
+        参数:
+            图像批次: (N, ...) 数组或图像序列
+            最大批次: 单次推理调用的最大样本数
+            
+        返回:
+            (N, 动作数) 输出数组；没有活动模型、正在切换或预测失败时返回空数组
+        """
+        空结果 = np.zeros((0, 0), dtype=np.float32)
+        
+        快照 = self._活动快照
+        if 快照 is None or 快照.模型实例 is None:
+            日志.warning("没有可用的活动模型")
+            return 空结果
+        
+        try:
+            with 快照.借用() as 模型实例:
+                return self._执行批量预测(模型实例, 图像批次, max(1, 最大批次))
+        except Exception as e:
+            日志.error(f"批量预测失败: {e}")
+            return 空结果
+    
+    def _执行批量预测(self, 模型实例: Any, 图像批次: 批次输入类型, 最大批次: int) -> np.ndarray:
+        """按块执行批量预测（输入缓冲按线程分配，可并发调用）"""
+        数量 = len(图像批次)
+        if 数量 == 0:
+            return np.zeros((0, 0), dtype=np.float32)
+        
+        是ONNX会话 = self._是ONNX会话(模型实例)
+        每块数量 = 最大批次
+        固定批次 = False
+        if 是ONNX会话:
+            批次维度 = 模型实例.get_inputs()[0].shape[0]
+            if not 是否动态维度(批次维度):
+                每块数量 = int(批次维度)
+                固定批次 = True
+        
+        缓冲键 = (每块数量, tuple(np.shape(图像批次[0])))
+        缓冲表 = getattr(self._线程缓冲, '批次缓冲', {})
+        缓冲 = 缓冲表.get(缓冲键)
+        if 缓冲 is None:
+            缓冲 = np.zeros(缓冲键[:1] + 缓冲键[1], dtype=np.float32)
+            self._线程缓冲.批次缓冲 = {缓冲键: 缓冲}  # 只保留当前形状的缓冲
+        
+        结果: Optional[np.ndarray] = None
+        for 起点 in range(0, 数量, 每块数量):
+            块 = 图像批次[起点:起点 + 每块数量]
+            块数量 = len(块)
+            输入 = 准备批次输入(块, 缓冲)
+            
+            # ONNX Runtime 会话（固定批次时用缓冲整体补齐）
+            if 是ONNX会话:
+                输入名 = 模型实例.get_inputs()[0].name
+                输出名 = 模型实例.get_outputs()[0].name
+                if 固定批次:
+                    输入 = 缓冲
+                输出 = 模型实例.run([输出名], {输入名: 输入})[0]
+            
+            # PyTorch 模型
+            elif hasattr(模型实例, 'forward'):
+                import torch
+                with torch.no_grad():
+                    输出 = 模型实例(torch.from_numpy(输入)).cpu().numpy()
+            
+            # TensorFlow/Keras 模型
+            elif hasattr(模型实例, 'predict'):
+                输出 = np.asarray(模型实例.predict(输入, verbose=0))
+            
+            else:
+                raise TypeError("不支持的模型类型")
+            
+            if 结果 is None:
+                结果 = np.empty((数量,) + 输出.shape[1:], dtype=输出.dtype)
+            结果[起点:起点 + 块数量] = 输出[:块数量]
+        
+        return 结果
+    
     # ==================== 查询方法 ====================
     
     def 获取模型列表(self) -> List[str]:
@@ -1017,6 +1370,7 @@ class 模型管理器:
             "内存占用MB": 槽位.获取内存占用MB(),
             "加载耗时": 槽位.加载时间,
             "最后使用时间": 槽位.最后使用时间,
+            "已驱逐": 槽位.已驱逐,
             "是活动模型": 名称 == self._活动模型
         }
     
@@ -1090,26 +1444,36 @@ class 模型管理器:
             日志.warning("没有加载配置，无法初始化")
             return False
         
-        成功数 = 0
-        失败数 = 0
-        
-        for 模型配置 in self._配置.模型列表:
-            结果 = self.加载模型(
+        # 所有模型在预加载线程池中并行加载
+        任务列表 = [
+            (模型配置.名称, self._预加载线程池.submit(
+                self.加载模型,
                 名称=模型配置.名称,
                 路径=模型配置.路径,
                 描述=模型配置.描述,
                 适用状态=模型配置.适用状态,
                 快捷键=模型配置.快捷键
-            )
-            
-            if 结果:
-                成功数 += 1
-            else:
-                失败数 += 1
+            ))
+            for 模型配置 in self._配置.模型列表
+        ]
+        
+        成功列表 = []
+        for 名称, 任务 in 任务列表:
+            try:
+                if 任务.result():
+                    成功列表.append(名称)
+            except Exception as e:
+                日志.error(f"模型加载异常: {名称}, {e}")
+        成功数 = len(成功列表)
+        失败数 = len(任务列表) - 成功数
         
         # 设置默认模型
         if self._配置.默认模型 and self._配置.默认模型 in self._槽位:
             self.切换模型(self._配置.默认模型, "auto", "设置默认模型")
+        elif 成功列表:
+            # 没有默认模型时与逐个加载相同，以配置中第一个加载成功的模型为活动模型
+            with self._锁:
+                self._活动模型 = 成功列表[0]
         
         日志.info(f"模型初始化完成: 成功 {成功数}, 失败 {失败数}")
         return 失败数 == 0
@@ -1120,8 +1484,11 @@ class 模型管理器:
         """获取模型管理器状态"""
         return {
             "活动模型": self._活动模型,
-            "已加载模型数": len(self._槽位),
+            "已加载模型数": sum(1 for 槽位 in self._槽位.values() if 槽位.已加载),
             "总内存使用MB": self.获取总内存使用(),
+            "内存预算MB": self._内存预算MB,
+            "已驱逐模型": [名称 for 名称, 槽位 in self._槽位.items() if 槽位.已驱逐],
+            "驱逐次数": self._驱逐次数,
             "模型列表": self.获取模型列表(),
             "配置路径": self._配置路径,
             "自动切换启用": self._配置.自动切换启用 if self._配置 else False,
@@ -1156,12 +1523,13 @@ class 模型管理器:
 
     # ==================== 预加载优化方法 ====================
     
-    def 预加载模型(self, 名称: str) -> bool:
+    def 预加载模型(self, 名称: str, 预热: bool = False) -> bool:
         """
         预加载指定模型到内存（异步）
         
         参数:
             名称: 模型名称
+            预热: 加载完成后是否在同一后台任务中预热
             
         返回:
             是否成功启动预加载
@@ -1208,6 +1576,9 @@ class 模型管理器:
                         else:
                             self._槽位[名称].预加载状态 = "预加载失败"
                 
+                if 结果 and 预热:
+                    self.预热模型(名称)
+                
                 return 结果
             except Exception as e:
                 日志.error(f"预加载失败: {名称}, 错误: {e}")
@@ -1222,10 +1593,16 @@ class 模型管理器:
         日志.info(f"已启动模型预加载: {名称}")
         return True
     
-    def 预加载所有模型(self) -> int:
+    def 预加载所有模型(self, 预热: bool = True) -> int:
         """
         预加载所有配置的模型
         
+        在后台线程池中并行加载并预热，立即返回，可在界面启动期间调用；
+        需要等待时使用 等待预加载完成。
+        
+        参数:
+            预热: 加载完成后是否预热
+            
         返回:
             启动预加载的模型数量
             
@@ -1247,7 +1624,7 @@ class 模型管理器:
                     快捷键=模型配置.快捷键
                 )
             
-            if self.预加载模型(模型配置.名称):
+            if self.预加载模型(模型配置.名称, 预热=预热):
                 启动数 += 1
         
         日志.info(f"已启动 {启动数} 个模型的预加载")
@@ -1412,6 +1789,7 @@ class 自动切换器:
     - 优先级处理
     - 冷却时间机制
     - 可配置启用/禁用
+    - 根据切换历史预测下一个模型并在后台预加载
     
     需求: 3.1, 3.2, 3.3, 3.4
     """
@@ -1438,6 +1816,10 @@ class 自动切换器:
         # 需求: 3.4 - 支持通过配置禁用自动切换
         self._启用: bool = True
         
+        # 自动切换历史 {原模型: {新模型: 次数}}，用于预测并预加载下一个模型
+        self._转移计数: Dict[str, Dict[str, int]] = {}
+        self._启用预取: bool = True
+        
         # 线程安全锁
         self._锁 = threading.Lock()
         
@@ -1776,6 +2158,7 @@ class 自动切换器:
                     break
         
         # 执行切换
+        原模型 = self._模型管理器.获取活动模型()
         结果 = self._模型管理器.切换模型(
             目标模型,
             触发方式="auto",
@@ -1787,8 +2170,56 @@ class 自动切换器:
                 self._更新切换时间(匹配规则)
             日志.info(f"自动切换成功: {当前状态} -> {目标模型}")
         
+        if 结果:
+            self._记录转移(原模型, 目标模型)
+            self._预取下一个模型(目标模型)
+        
         return 结果
     
+    # ==================== 预测预取方法 ====================
+    
+    def _记录转移(self, 原模型: str, 新模型: str) -> None:
+        """记录一次自动切换，供 预测下一个模型 使用"""
+        if not 原模型 or 原模型 == 新模型:
+            return
+        with self._锁:
+            后继 = self._转移计数.setdefault(原模型, {})
+            后继[新模型] = 后继.get(新模型, 0) + 1
+    
+    def 预测下一个模型(self, 当前模型: str) -> Optional[str]:
+        """
+        根据自动切换历史预测当前模型之后最可能切换到的模型
+        
+        参数:
+            当前模型: 当前活动模型名称
+            
+        返回:
+            历史上从当前模型切出次数最多的目标模型，没有历史时返回 None
+        """
+        with self._锁:
+            后继 = self._转移计数.get(当前模型)
+            if not 后继:
+                return None
+            return max(后继.items(), key=lambda 项: 项[1])[0]
+    
+    def _预取下一个模型(self, 当前模型: str) -> None:
+        """预测的下一个模型不在内存中时在后台预加载"""
+        if not self._启用预取:
+            return
+        
+        下一个模型 = self.预测下一个模型(当前模型)
+        if 下一个模型 is None:
+            return
+        
+        信息 = self._模型管理器.获取模型信息(下一个模型)
+        if 信息 and not 信息["已加载"]:
+            日志.debug(f"预取预测的下一个模型: {下一个模型}")
+            self._模型管理器.预加载模型(下一个模型)
+    
+    def 设置预取启用(self, 启用: bool) -> None:
+        """启用或禁用下一个模型的后台预取"""
+        self._启用预取 = 启用
+    
     # ==================== 配置加载方法 ====================
     
     def 从配置加载规则(self, 配置数据: dict) -> int:
@@ -1867,7 +2298,8 @@ class 自动切换器:
                 "规则数量": len(self._规则列表),
                 "全局冷却时间": self._全局冷却时间,
                 "冷却剩余时间": self.获取冷却剩余时间(),
-                "上次切换时间": self._上次切换时间
+                "上次切换时间": self._上次切换时间,
+                "启用预取": self._启用预取
             }
     
     def 获取统计信息(self) -> Dict:
@@ -2349,17 +2781,18 @@ class 快捷键处理器:
 
 # ==================== 便捷函数 ====================
 
-def 创建模型管理器(配置路径: str = None) -> 模型管理器:
+def 创建模型管理器(配置路径: str = None, 会话池大小: int = 1) -> 模型管理器:
     """
     创建模型管理器实例
     
     参数:
         配置路径: 配置文件路径
+        会话池大小: 每个 ONNX 模型的推理会话数
         
     返回:
         模型管理器实例
     """
-    管理器 = 模型管理器(配置路径)
+    管理器 = 模型管理器(配置路径, 会话池大小=会话池大小)
     
     if 配置路径:
         管理器.从配置初始化()
@@ -0,0 +1,481 @@
+"""
+帧流水线模块
+将截取、预处理、推理、执行动作拆分为独立线程阶段
+
+功能:
+- 单槽覆盖队列（丢弃旧帧，始终处理最新帧）
+- 多阶段并行执行，吞吐量接近最慢阶段
+- 每阶段延迟与队列深度统计
+- 暂停/继续与优雅关闭
+"""
+
+import time
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
+from collections import deque
+import numpy as np
+import logging
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+日志 = logging.getLogger(__name__)
+
+
+@dataclass
+class 流水线帧:
+    """在流水线各阶段之间传递的帧数据"""
+    帧编号: int
+    采集时间: float
+    数据: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class 阶段统计:
+    """单个流水线阶段的统计"""
+    名称: str
+    平均延迟: float = 0.0  # 毫秒
+    最大延迟: float = 0.0
+    处理次数: int = 0
+    队列深度: int = 0
+    丢弃次数: int = 0
+    错误次数: int = 0
+
+    def to_dict(self) -> dict:
+        return {
+            '名称': self.名称,
+            '平均延迟': round(self.平均延迟, 2),
+            '最大延迟': round(self.最大延迟, 2),
+            '处理次数': self.处理次数,
+            '队列深度': self.队列深度,
+            '丢弃次数': self.丢弃次数,
+            '错误次数': self.错误次数
+        }
+
+
+class 覆盖队列:
+    """
+    有界覆盖队列
+
+    队列满时放入新数据会丢弃最旧的数据，而不是阻塞生产者，
+    容量为 1 时即为"最新帧"槽位。
+    """
+
+    def __init__(self, 容量: int = 1, 丢弃回调: Optional[Callable[[Any], None]] = None):
+        """
+        初始化覆盖队列
+
+        参数:
+            容量: 队列最大容量
+            丢弃回调: 数据被覆盖或清空时以该数据调用（如释放帧环槽位）
+        """
+        self._队列: deque = deque(maxlen=max(1, 容量))
+        self._丢弃回调 = 丢弃回调
+        self._条件 = threading.Condition()
+        self._丢弃计数: int = 0
+        self._已关闭 = False
+
+    def 放入(self, 数据: Any) -> bool:
+        """
+        放入数据，队列满时丢弃最旧的数据
+
+        参数:
+            数据: 待放入的数据
+
+        返回:
+            是否丢弃了旧数据
+        """
+        被丢弃 = None
+        with self._条件:
+            已丢弃 = len(self._队列) == self._队列.maxlen
+            if 已丢弃:
+                self._丢弃计数 += 1
+                被丢弃 = self._队列.popleft()
+            self._队列.append(数据)
+            self._条件.notify()
+        if 已丢弃 and self._丢弃回调 is not None:
+            self._丢弃回调(被丢弃)
+        return 已丢弃
+
+    def 取出(self, 超时: float = 0.5) -> Optional[Any]:
+        """
+        取出最旧的数据
+
+        参数:
+            超时: 超时时间（秒）
+
+        返回:
+            数据，超时或队列关闭时返回 None
+        """
+        with self._条件:
+            if not self._队列 and not self._已关闭:
+                self._条件.wait(超时)
+            if not self._队列:
+                return None
+            return self._队列.popleft()
+
+    def 清空(self):
+        """清空队列"""
+        with self._条件:
+            已清空 = list(self._队列)
+            self._队列.clear()
+        if self._丢弃回调 is not None:
+            for 数据 in 已清空:
+                self._丢弃回调(数据)
+
+    def 关闭(self):
+        """关闭队列，唤醒所有等待的消费者"""
+        with self._条件:
+            self._已关闭 = True
+            self._条件.notify_all()
+
+    def 获取深度(self) -> int:
+        """获取当前队列深度"""
+        with self._条件:
+            return len(self._队列)
+
+    def 获取丢弃计数(self) -> int:
+        """获取被覆盖丢弃的数据数量"""
+        with self._条件:
+            return self._丢弃计数
+
+
+class _流水线阶段:
+    """流水线中的单个阶段（一个工作线程）"""
+
+    def __init__(self, 名称: str, 处理函数: Callable,
+                 输入队列: Optional[覆盖队列],
+                 输出队列: Optional[覆盖队列],
+                 窗口大小: int = 100):
+        self.名称 = 名称
+        self.处理函数 = 处理函数
+        self.输入队列 = 输入队列
+        self.输出队列 = 输出队列
+        self._延迟记录: deque = deque(maxlen=窗口大小)
+        self._处理次数 = 0
+        self._错误次数 = 0
+        self._锁 = threading.Lock()
+        self._线程: Optional[threading.Thread] = None
+
+    def 记录延迟(self, 延迟: float):
+        with self._锁:
+            self._延迟记录.append(延迟)
+            self._处理次数 += 1
+
+    def 记录错误(self):
+        with self._锁:
+            self._错误次数 += 1
+
+    def 获取统计(self) -> 阶段统计:
+        with self._锁:
+            延迟列表 = list(self._延迟记录)
+            处理次数 = self._处理次数
+            错误次数 = self._错误次数
+
+        输出队列 = self.输出队列
+        return 阶段统计(
+            名称=self.名称,
+            平均延迟=float(np.mean(延迟列表)) if 延迟列表 else 0.0,
+            最大延迟=float(np.max(延迟列表)) if 延迟列表 else 0.0,
+            处理次数=处理次数,
+            队列深度=self.输入队列.获取深度() if self.输入队列 else 0,
+            丢弃次数=输出队列.获取丢弃计数() if 输出队列 else 0,
+            错误次数=错误次数
+        )
+
+
+class 帧流水线:
+    """
+    多阶段帧流水线
+
+    第一个阶段是数据源，处理函数不接收参数，返回新的数据；
+    其余阶段接收上一阶段的输出并返回交给下一阶段的数据。
+    处理函数返回 None 表示丢弃该帧（不再向后传递）。
+    相邻阶段之间以覆盖队列连接，下游总是拿到最新的一帧。
+
+    提供 帧结束回调 时，每一帧离开流水线（最后阶段完成、被覆盖丢弃、
+    阶段返回 None 或出错、停止时仍在队列中）都会以该帧调用一次，
+    可用于释放帧占用的资源（如帧环槽位）。
+    """
+
+    def __init__(self, 阶段列表: List[Tuple[str, Callable]],
+                 队列容量: int = 1,
+                 最大连续错误: int = 20,
+                 帧结束回调: Optional[Callable[[Any], None]] = None):
+        """
+        初始化帧流水线
+
+        参数:
+            阶段列表: [(阶段名称, 处理函数), ...]，按执行顺序排列
+            队列容量: 阶段间队列容量
+            最大连续错误: 单阶段连续错误达到该值时停止流水线
+            帧结束回调: 帧离开流水线时调用
+        """
+        if not 阶段列表:
+            raise ValueError("流水线至少需要一个阶段")
+
+        self.最大连续错误 = 最大连续错误
+        self._帧结束回调 = 帧结束回调
+        self._阶段: List[_流水线阶段] = []
+
+        上游队列: Optional[覆盖队列] = None
+        for 序号, (名称, 处理函数) in enumerate(阶段列表):
+            是最后阶段 = 序号 == len(阶段列表) - 1
+            下游队列 = None if 是最后阶段 else 覆盖队列(队列容量, self._结束帧)
+            self._阶段.append(_流水线阶段(名称, 处理函数, 上游队列, 下游队列))
+            上游队列 = 下游队列
+
+        self._停止事件 = threading.Event()
+        self._继续事件 = threading.Event()
+        self._继续事件.set()
+        self._运行中 = False
+        self._错误消息: Optional[str] = None
+
+        # 端到端延迟（从采集到最后阶段完成）
+        self._端到端延迟: deque = deque(maxlen=100)
+        self._锁 = threading.Lock()
+
+    def 启动(self) -> bool:
+        """
+        启动所有阶段线程
+
+        返回:
+            是否成功启动
+        """
+        if self._运行中:
+            日志.warning("流水线已在运行")
+            return True
+
+        self._停止事件.clear()
+        self._错误消息 = None
+        self._运行中 = True
+
+        try:
+            for 阶段 in self._阶段:
+                阶段._线程 = threading.Thread(
+                    target=self._阶段循环, args=(阶段,),
+                    name=f"流水线-{阶段.名称}", daemon=True
+                )
+                阶段._线程.start()
+            日志.info(f"帧流水线已启动: {' → '.join(阶段.名称 for 阶段 in self._阶段)}")
+            return True
+        except Exception as e:
+            日志.error(f"启动流水线失败: {e}")
+            self.停止()
+            return False
+
+    def 停止(self, 超时: float = 2.0) -> bool:
+        """
+        停止所有阶段线程
+
+        参数:
+            超时: 等待每个线程结束的超时时间（秒）
+
+        返回:
+            是否全部成功停止
+        """
+        self._停止事件.set()
+        self._继续事件.set()
+        self._运行中 = False
+
+        for 阶段 in self._阶段:
+            if 阶段.输入队列:
+                阶段.输入队列.关闭()
+
+        全部停止 = True
+        for 阶段 in self._阶段:
+            线程 = 阶段._线程
+            if 线程 and 线程.is_alive() and 线程 is not threading.current_thread():
+                线程.join(timeout=超时)
+                if 线程.is_alive():
+                    日志.warning(f"流水线阶段 {阶段.名称} 未能在超时时间内停止")
+                    全部停止 = False
+
+        # 仍在队列中的帧视为丢弃
+        for 阶段 in self._阶段:
+            if 阶段.输入队列:
+                阶段.输入队列.清空()
+
+        return 全部停止
+
+    def 暂停(self):
+        """暂停数据源阶段，已在途的帧会继续处理完"""
+        self._继续事件.clear()
+        for 阶段 in self._阶段:
+            if 阶段.输入队列:
+                阶段.输入队列.清空()
+
+    def 继续(self):
+        """恢复数据源阶段"""
+        self._继续事件.set()
+
+    def 是否暂停(self) -> bool:
+        """检查是否处于暂停状态"""
+        return not self._继续事件.is_set()
+
+    def 是否运行中(self) -> bool:
+        """检查是否正在运行（任一阶段因错误退出时为 False）"""
+        return self._运行中 and not self._停止事件.is_set()
+
+    def 获取错误消息(self) -> Optional[str]:
+        """获取导致流水线停止的错误消息"""
+        return self._错误消息
+
+    def _结束帧(self, 帧: Any):
+        """帧离开流水线时调用帧结束回调"""
+        if self._帧结束回调 is None or 帧 is None:
+            return
+        try:
+            self._帧结束回调(帧)
+        except Exception as e:
+            日志.warning(f"帧结束回调失败: {e}")
+
+    def _阶段循环(self, 阶段: _流水线阶段):
+        """阶段工作线程主循环"""
+        连续错误数 = 0
+        是数据源 = 阶段.输入队列 is None
+
+        while not self._停止事件.is_set():
+            if 是数据源:
+                if not self._继续事件.wait(0.1):
+                    continue
+                输入 = None
+            else:
+                输入 = 阶段.输入队列.取出(超时=0.5)
+                if 输入 is None:
+                    continue
+
+            开始时间 = time.perf_counter()
+            try:
+                输出 = 阶段.处理函数() if 是数据源 else 阶段.处理函数(输入)
+                连续错误数 = 0
+            except Exception as e:
+                阶段.记录错误()
+                self._结束帧(输入)
+                连续错误数 += 1
+                日志.error(f"流水线阶段 {阶段.名称} 处理失败: {e}")
+                if 连续错误数 >= self.最大连续错误:
+                    self._错误消息 = f"阶段 {阶段.名称} 连续错误 {连续错误数} 次: {e}"
+                    日志.error(f"{self._错误消息}，停止流水线")
+                    self._停止事件.set()
+                    break
+                time.sleep(0.01)
+                continue
+
+            阶段.记录延迟((time.perf_counter() - 开始时间) * 1000)
+
+            if 输出 is None:
+                self._结束帧(输入)
+                continue
+
+            if 阶段.输出队列 is not None:
+                阶段.输出队列.放入(输出)
+                continue
+
+            if isinstance(输出, 流水线帧):
+                with self._锁:
+                    self._端到端延迟.append((time.time() - 输出.采集时间) * 1000)
+            self._结束帧(输出)
+
+    def 获取统计(self) -> Dict[str, 阶段统计]:
+        """
+        获取各阶段统计
+
+        返回:
+            {阶段名称: 阶段统计}
+        """
+        return {阶段.名称: 阶段.获取统计() for 阶段 in self._阶段}
+
+    def 获取端到端延迟(self) -> float:
+        """
+        获取平均端到端延迟
+
+        返回:
+            延迟（毫秒），尚无数据时为 0
+        """
+        with self._锁:
+            if not self._端到端延迟:
+                return 0.0
+            return float(np.mean(self._端到端延迟))
+
+    def 打印统计(self):
+        """打印各阶段统计"""
+        print("\n流水线统计:")
+        for 统计 in self.获取统计().values():
+            print(f"  {统计.名称:6s} 平均 {统计.平均延迟:7.2f} ms | 最大 {统计.最大延迟:7.2f} ms"
+                  f" | 处理 {统计.处理次数:6d} | 队列 {统计.队列深度} | 丢弃 {统计.丢弃次数}")
+        print(f"  端到端延迟: {self.获取端到端延迟():.2f} ms")
+
+    def __enter__(self):
+        """上下文管理器入口"""
+        self.启动()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """上下文管理器出口"""
+        self.停止()
+        return False
+
+
+def 创建机器人流水线(截取: Callable[[], Dict[str, Any]],
+                    预处理: Callable[[Dict[str, Any]], None],
+                    推理: Callable[[Dict[str, Any]], None],
+                    执行: Callable[[Dict[str, Any], float, 帧流水线], None],
+                    队列容量: int = 1,
+                    最大连续错误: int = 20,
+                    帧结束回调: Optional[Callable[[Any], None]] = None) -> 帧流水线:
+    """
+    创建 截取 → 预处理 → 推理 → 执行 四阶段机器人流水线
+
+    命令行机器人和界面运行线程共用：各阶段函数只读写帧的数据字典，
+    帧编号、采集时间和执行阶段的帧间隔由这里统一维护。
+
+    参数:
+        截取: 返回本帧初始数据字典
+        预处理: 向数据字典写入预处理结果
+        推理: 向数据字典写入决策
+        执行: (数据, 帧间隔, 流水线)，执行决策并上报；帧间隔（秒）为相邻两帧执行完成的间隔，
+              即流水线的实际吞吐
+        队列容量: 阶段间队列容量
+        最大连续错误: 单阶段连续错误达到该值时停止流水线
+        帧结束回调: 帧离开流水线时调用
+
+    返回:
+        未启动的帧流水线
+    """
+    帧计数 = [0]
+    上次完成时间 = [time.time()]
+
+    def 截取阶段() -> 流水线帧:
+        帧计数[0] += 1
+        return 流水线帧(帧编号=帧计数[0], 采集时间=time.time(), 数据=截取())
+
+    def 预处理阶段(帧: 流水线帧) -> 流水线帧:
+        预处理(帧.数据)
+        return 帧
+
+    def 推理阶段(帧: 流水线帧) -> 流水线帧:
+        推理(帧.数据)
+        return 帧
+
+    def 执行阶段(帧: 流水线帧) -> 流水线帧:
+        执行(帧.数据, time.time() - 上次完成时间[0], 流水线)
+        上次完成时间[0] = time.time()
+        return 帧
+
+    流水线 = 帧流水线(
+        [("截取", 截取阶段), ("预处理", 预处理阶段),
+         ("推理", 推理阶段), ("执行", 执行阶段)],
+        队列容量=队列容量,
+        最大连续错误=最大连续错误,
+        帧结束回调=帧结束回调
+    )
+    return 流水线
+
+
+# 默认配置
+默认流水线配置 = {
+    "启用": False,
+    "队列容量": 1,
+    "最大连续错误": 20
+}
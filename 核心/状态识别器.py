@@ -6,17 +6,22 @@
 import logging
 import os
 from collections import deque
-from typing import List, Optional, Callable, Tuple
+from typing import Any, Dict, List, Optional, Callable, Tuple
 
 import cv2
 import numpy as np
 
-from 核心.数据类型 import 游戏状态, 检测结果, 状态识别结果, 实体类型
-from 配置.增强设置 import 状态识别配置, UI模板路径, 状态判定阈值
+from 核心.数据类型 import 游戏状态, 检测结果, 状态识别结果, 实体类型, 检测特征
+from 配置.增强设置 import (
+    状态识别配置, UI模板路径, UI模板区域, UI模板优先级, UI短路模板, 状态判定阈值
+)
 
 # 配置日志
 logger = logging.getLogger(__name__)
 
+# 搜索区域 (x, y, 宽度, 高度)
+区域类型 = Tuple[int, int, int, int]
+
 
 class 状态识别器:
     """
@@ -28,7 +33,8 @@ class 状态识别器:
     def __init__(
         self,
         历史长度: Optional[int] = None,
-        置信度累积系数: Optional[float] = None
+        置信度累积系数: Optional[float] = None,
+        UI区域: Any = None
     ):
         """
         初始化状态识别器
@@ -36,6 +42,8 @@ class 状态识别器:
         Args:
             历史长度: 状态历史记录的最大长度
             置信度累积系数: 连续相同状态时置信度的累积系数
+            UI区域: 配置档案中的 UIRegions，或 {模板名称: (x, y, w, h)}，
+                    用于限定各UI模板的搜索范围；None 时搜索整个画面
         """
         self.历史长度 = 历史长度 if 历史长度 is not None else 状态识别配置["历史长度"]
         self.置信度累积系数 = 置信度累积系数 if 置信度累积系数 is not None else 状态识别配置["置信度累积系数"]
@@ -49,11 +57,26 @@ class 状态识别器:
         # 上一次识别的状态
         self._上次状态: Optional[游戏状态] = None
         
+        # UI模板匹配参数
+        self._UI匹配阈值 = 状态识别配置.get("UI匹配阈值", 0.7)
+        self._UI金字塔层数 = 状态识别配置.get("UI金字塔层数", 2)
+        self._UI金字塔最小模板边长 = 状态识别配置.get("UI金字塔最小模板边长", 16)
+        self._UI粗匹配容差 = 状态识别配置.get("UI粗匹配容差", 0.15)
+        self._UI区域边距 = 状态识别配置.get("UI区域边距", 16)
+        
         # UI模板缓存
         self._UI模板缓存: dict = {}
         
+        # 各模板的金字塔（第 0 层为原模板）和匹配顺序
+        self._UI模板金字塔: Dict[str, List[np.ndarray]] = {}
+        self._UI匹配顺序: List[str] = []
+        
+        # 各模板的搜索区域
+        self._UI搜索区域: Dict[str, 区域类型] = {}
+        
         # 加载UI模板
         self._加载UI模板()
+        self.设置UI区域(UI区域)
     
     def _加载UI模板(self):
         """加载UI元素模板图像"""
@@ -61,17 +84,70 @@ class 状态识别器:
             if os.path.exists(路径):
                 模板 = cv2.imread(路径, cv2.IMREAD_GRAYSCALE)
                 if 模板 is not None:
-                    self._UI模板缓存[名称] = 模板
+                    self.添加UI模板(名称, 模板)
                     logger.info(f"UI模板加载成功: {名称}")
                 else:
                     logger.warning(f"UI模板加载失败: {路径}")
             else:
                 logger.debug(f"UI模板文件不存在: {路径}")
     
+    def 添加UI模板(self, 名称: str, 模板: np.ndarray):
+        """
+        添加或替换UI模板，并预先构建模板金字塔
+        
+        Args:
+            名称: UI元素名称
+            模板: 模板图像（灰度或BGR格式）
+        """
+        if 模板.ndim == 3:
+            模板 = cv2.cvtColor(模板, cv2.COLOR_BGR2GRAY)
+        
+        金字塔 = [模板]
+        for _ in range(self._UI金字塔层数):
+            if min(金字塔[-1].shape[:2]) // 2 < self._UI金字塔最小模板边长:
+                break
+            金字塔.append(cv2.pyrDown(金字塔[-1]))
+        
+        self._UI模板缓存[名称] = 模板
+        self._UI模板金字塔[名称] = 金字塔
+        
+        # 按状态判定优先级排序，未列出的模板排在最后
+        self._UI匹配顺序 = sorted(
+            self._UI模板缓存,
+            key=lambda 键: UI模板优先级.index(键) if 键 in UI模板优先级 else len(UI模板优先级)
+        )
+    
+    def 设置UI区域(self, UI区域: Any):
+        """
+        设置各UI模板的搜索区域
+        
+        Args:
+            UI区域: 配置档案中的 UIRegions（按 UI模板区域 映射字段），
+                    或 {模板名称: (x, y, w, h)}；None 表示全部搜索整个画面
+        """
+        self._UI搜索区域 = {}
+        if UI区域 is None:
+            return
+        
+        if isinstance(UI区域, dict):
+            区域表 = UI区域
+        else:
+            区域表 = {
+                名称: getattr(UI区域, 字段)
+                for 名称, 字段 in UI模板区域.items()
+                if 字段 and hasattr(UI区域, 字段)
+            }
+        
+        for 名称, 区域 in 区域表.items():
+            if 区域 is not None:
+                self._UI搜索区域[名称] = tuple(int(值) for 值 in 区域)
+    
     def 识别状态(
         self, 
         图像: np.ndarray, 
-        检测结果列表: List[检测结果]
+        检测结果列表: List[检测结果],
+        灰度图: Optional[np.ndarray] = None,
+        特征: Optional[检测特征] = None
     ) -> 状态识别结果:
         """
         识别当前游戏状态
@@ -79,20 +155,22 @@ class 状态识别器:
         Args:
             图像: 当前游戏画面 (BGR格式)
             检测结果列表: YOLO检测器返回的检测结果
+            灰度图: 上游已计算的同一帧灰度图，提供时不再重复转换
+            特征: 上游已构建的同一帧检测特征，提供时不再重复构建
             
         Returns:
             状态识别结果
         """
         # 检测UI元素
-        检测到的UI = self._检测UI元素(图像)
+        检测到的UI = self._检测UI元素(图像, 灰度图)
         
         # 统计附近实体
-        附近实体数量 = len(检测结果列表)
-        附近敌人 = [r for r in 检测结果列表 if r.类型 == 实体类型.怪物]
-        附近物品 = [r for r in 检测结果列表 if r.类型 == 实体类型.物品]
+        if 特征 is None:
+            特征 = 检测特征(检测结果列表)
+        附近实体数量 = 特征.总数
         
         # 判定状态（按优先级）
-        状态, 基础置信度 = self._判定状态(检测到的UI, 附近敌人, 附近物品, 检测结果列表)
+        状态, 基础置信度 = self._判定状态(检测到的UI, 特征)
         
         # 计算累积置信度
         最终置信度 = self._计算累积置信度(状态, 基础置信度)
@@ -119,9 +197,7 @@ class 状态识别器:
     def _判定状态(
         self,
         检测到的UI: List[str],
-        附近敌人: List[检测结果],
-        附近物品: List[检测结果],
-        所有检测结果: List[检测结果]
+        特征: 检测特征
     ) -> Tuple[游戏状态, float]:
         """
         根据检测信息判定游戏状态
@@ -137,6 +213,10 @@ class 状态识别器:
         8. 移动状态
         9. 空闲状态 (最低)
         
+        Args:
+            检测到的UI: 检测到的UI元素名称列表
+            特征: 本帧检测特征
+        
         Returns:
             (游戏状态, 基础置信度)
         """
@@ -157,38 +237,39 @@ class 状态识别器:
             return 游戏状态.对话, 0.9
         
         # 5. 检查战斗状态（有近距离敌人）
-        战斗距离阈值 = 状态判定阈值["战斗_敌人距离"]
-        近距离敌人 = [e for e in 附近敌人 if e.距离 < 战斗距离阈值]
-        if len(近距离敌人) >= 状态判定阈值["战斗_敌人数量"]:
-            置信度 = min(0.9, 0.6 + len(近距离敌人) * 0.1)
+        近距离敌人数 = 特征.数量(实体类型.怪物, 状态判定阈值["战斗_敌人距离"])
+        if 近距离敌人数 >= 状态判定阈值["战斗_敌人数量"]:
+            置信度 = min(0.9, 0.6 + 近距离敌人数 * 0.1)
             return 游戏状态.战斗, 置信度
         
         # 6. 检查拾取状态（有近距离物品）
-        拾取距离阈值 = 状态判定阈值["拾取_物品距离"]
-        近距离物品 = [i for i in 附近物品 if i.距离 < 拾取距离阈值]
-        if near_items := 近距离物品:
-            置信度 = min(0.8, 0.5 + len(near_items) * 0.1)
+        近距离物品数 = 特征.数量(实体类型.物品, 状态判定阈值["拾取_物品距离"])
+        if 近距离物品数:
+            置信度 = min(0.8, 0.5 + 近距离物品数 * 0.1)
             return 游戏状态.拾取, 置信度
         
         # 7. 如果有敌人但距离较远，可能是移动状态
-        if 附近敌人:
+        if 特征.存在(实体类型.怪物):
             return 游戏状态.移动, 0.6
         
         # 8. 如果有其他实体，可能是移动或空闲
-        if 所有检测结果:
+        if 特征.总数:
             return 游戏状态.移动, 0.5
         
         # 9. 默认空闲状态
         return 游戏状态.空闲, 0.4
     
-    def _检测UI元素(self, 图像: np.ndarray) -> List[str]:
+    def _检测UI元素(self, 图像: np.ndarray, 灰度图: Optional[np.ndarray] = None) -> List[str]:
         """
         检测屏幕上的UI元素
         
-        使用模板匹配检测预定义的UI元素
+        按状态判定优先级依次匹配各模板，每个模板只在自己的搜索区域内
+        先在金字塔缩小图上粗匹配，再在原分辨率的小窗口内精匹配。
+        匹配到加载界面、死亡界面后其余模板不再影响判定，直接返回。
         
         Args:
             图像: 当前游戏画面 (BGR格式)
+            灰度图: 上游已计算的灰度图，None 时由图像转换
             
         Returns:
             检测到的UI元素名称列表
@@ -196,33 +277,122 @@ class 状态识别器:
         if not 状态识别配置.get("UI检测启用", True):
             return []
         
-        if 图像 is None or 图像.size == 0:
+        if not self._UI模板缓存:
+            return []
+        
+        if 灰度图 is None:
+            if 图像 is None or 图像.size == 0:
+                return []
+            
+            # 转换为灰度图
+            try:
+                灰度图 = cv2.cvtColor(图像, cv2.COLOR_BGR2GRAY) if 图像.ndim == 3 else 图像
+            except Exception as e:
+                logger.warning(f"图像转换失败: {e}")
+                return []
+        elif 灰度图.size == 0:
             return []
         
         检测到的UI = []
         
-        # 转换为灰度图
-        try:
-            灰度图 = cv2.cvtColor(图像, cv2.COLOR_BGR2GRAY)
-        except Exception as e:
-            logger.warning(f"图像转换失败: {e}")
-            return []
+        # 同一搜索区域的金字塔在各模板间共用
+        区域金字塔: Dict[区域类型, List[np.ndarray]] = {}
         
-        # 对每个模板进行匹配
-        for 名称, 模板 in self._UI模板缓存.items():
+        for 名称 in self._UI匹配顺序:
             try:
-                匹配结果 = cv2.matchTemplate(灰度图, 模板, cv2.TM_CCOEFF_NORMED)
-                _, 最大值, _, _ = cv2.minMaxLoc(匹配结果)
-                
-                # 如果匹配度超过阈值，认为检测到该UI元素
-                if 最大值 > 0.7:
-                    检测到的UI.append(名称)
-                    logger.debug(f"检测到UI元素: {名称}, 匹配度: {最大值:.2f}")
+                最大值 = self._匹配UI模板(灰度图, 名称, 区域金字塔)
             except Exception as e:
                 logger.warning(f"UI模板匹配失败 ({名称}): {e}")
+                continue
+            
+            # 如果匹配度超过阈值，认为检测到该UI元素
+            if 最大值 > self._UI匹配阈值:
+                检测到的UI.append(名称)
+                logger.debug(f"检测到UI元素: {名称}, 匹配度: {最大值:.2f}")
+                if 名称 in UI短路模板:
+                    break
         
         return 检测到的UI
     
+    def _计算搜索区域(self, 名称: str, 画面形状: Tuple[int, ...], 模板形状: Tuple[int, ...]) -> 区域类型:
+        """
+        计算模板的搜索区域（扩展边距并裁剪到画面内）
+        
+        区域容不下模板时退回整个画面。
+        
+        Returns:
+            (x, y, 宽度, 高度)
+        """
+        画面高度, 画面宽度 = 画面形状[:2]
+        区域 = self._UI搜索区域.get(名称)
+        if 区域 is not None:
+            x, y, 宽度, 高度 = 区域
+            边距 = self._UI区域边距
+            左, 上 = max(0, x - 边距), max(0, y - 边距)
+            右, 下 = min(画面宽度, x + 宽度 + 边距), min(画面高度, y + 高度 + 边距)
+            if 右 - 左 >= 模板形状[1] and 下 - 上 >= 模板形状[0]:
+                return (左, 上, 右 - 左, 下 - 上)
+        return (0, 0, 画面宽度, 画面高度)
+    
+    @staticmethod
+    def _最大匹配(图像: np.ndarray, 模板: np.ndarray) -> Tuple[float, Tuple[int, int]]:
+        """返回 (最大匹配度, 最大位置)"""
+        匹配结果 = cv2.matchTemplate(图像, 模板, cv2.TM_CCOEFF_NORMED)
+        _, 最大值, _, 最大位置 = cv2.minMaxLoc(匹配结果)
+        return 最大值, 最大位置
+    
+    def _匹配UI模板(
+        self,
+        灰度图: np.ndarray,
+        名称: str,
+        区域金字塔: Dict[区域类型, List[np.ndarray]]
+    ) -> float:
+        """
+        在模板的搜索区域内由粗到精匹配
+        
+        Args:
+            灰度图: 整个画面的灰度图
+            名称: UI元素名称
+            区域金字塔: 本帧各搜索区域的金字塔缓存
+            
+        Returns:
+            最大匹配度，区域容不下模板时为 -1
+        """
+        模板金字塔 = self._UI模板金字塔[名称]
+        模板 = 模板金字塔[0]
+        模板高度, 模板宽度 = 模板.shape[:2]
+        
+        区域 = self._计算搜索区域(名称, 灰度图.shape, 模板.shape)
+        x, y, 宽度, 高度 = 区域
+        if 宽度 < 模板宽度 or 高度 < 模板高度:
+            return -1.0
+        
+        层数 = len(模板金字塔) - 1
+        if 层数 == 0:
+            return self._最大匹配(灰度图[y:y + 高度, x:x + 宽度], 模板)[0]
+        
+        区域层 = 区域金字塔.setdefault(区域, [灰度图[y:y + 高度, x:x + 宽度]])
+        while len(区域层) <= 层数:
+            区域层.append(cv2.pyrDown(区域层[-1]))
+        
+        粗区域, 粗模板 = 区域层[层数], 模板金字塔[层数]
+        if 粗区域.shape[0] < 粗模板.shape[0] or 粗区域.shape[1] < 粗模板.shape[1]:
+            return self._最大匹配(区域层[0], 模板)[0]
+        
+        # 粗匹配: 缩小后的匹配度略低于原分辨率，低于 阈值 - 容差 时认为不存在
+        粗匹配度, (粗x, 粗y) = self._最大匹配(粗区域, 粗模板)
+        if 粗匹配度 <= self._UI匹配阈值 - self._UI粗匹配容差:
+            return 粗匹配度
+        
+        # 精匹配: 只在粗匹配位置附近（允许两个粗像素的误差）用原分辨率匹配
+        倍数 = 1 << 层数
+        误差 = 2 * 倍数
+        左 = max(0, 粗x * 倍数 - 误差)
+        上 = max(0, 粗y * 倍数 - 误差)
+        右 = min(宽度, 粗x * 倍数 + 误差 + 模板宽度)
+        下 = min(高度, 粗y * 倍数 + 误差 + 模板高度)
+        return self._最大匹配(区域层[0][上:下, 左:右], 模板)[0]
+    
     def _计算累积置信度(self, 当前状态: 游戏状态, 基础置信度: float) -> float:
         """
         根据历史状态计算累积置信度
@@ -9,6 +9,7 @@ YOLO目标检测器模块
 
 import logging
 import math
+import time
 from typing import List, Optional, Tuple, Dict, Any
 
 import numpy as np
@@ -41,6 +42,14 @@ except ImportError:
 logger = logging.getLogger(__name__)
 
 
+# 方向查找表，下标为 垂直索引 * 3 + 水平索引 (0 负方向, 1 中心, 2 正方向)
+_方向表 = (
+    方向.左上, 方向.上, 方向.右上,
+    方向.左, 方向.中心, 方向.右,
+    方向.左下, 方向.下, 方向.右下,
+)
+
+
 # ==================== 缓存配置 ====================
 # 默认缓存配置，可通过配置文件覆盖
 # 需求: 2.1, 2.2, 2.3, 3.4
@@ -51,6 +60,9 @@ logger = logging.getLogger(__name__)
     "启用时间过期": True,  # 是否启用基于时间的过期
     "比较方法": "histogram",  # 帧比较方法: "histogram", "ssim", "mse", "hash"
     "预热帧数": 1,  # 预热帧数
+    "最大条目数": 8,  # 最多缓存的场景数（LRU 淘汰）
+    "签名距离阈值": 10,  # 签名汉明距离阈值
+    "最大比较数": 2,  # 每次查询最多完整比较的场景数
     "优先区域": [
         # 示例优先区域配置（屏幕中心区域，更严格的阈值）
         # {
@@ -84,7 +96,8 @@ class YOLO检测器:
         输入尺寸: Optional[Tuple[int, int]] = None,
         启用缓存: bool = True,
         启用异步: bool = False,
-        缓存配置项: Optional[Dict[str, Any]] = None
+        缓存配置项: Optional[Dict[str, Any]] = None,
+        后端: Optional[str] = None
     ):
         """
         初始化YOLO检测器
@@ -97,6 +110,8 @@ class YOLO检测器:
             启用缓存: 是否启用智能缓存
             启用异步: 是否启用异步检测
             缓存配置项: 缓存配置字典，覆盖默认配置
+            后端: 推理后端 "ultralytics" / "onnx" / "auto"，默认使用配置文件中的设置，
+                  "auto" 在模型路径为 .onnx 时使用 ONNX Runtime
             
         需求: 2.1, 2.2
         """
@@ -104,6 +119,7 @@ class YOLO检测器:
         self.置信度阈值 = 置信度阈值 if 置信度阈值 is not None else YOLO配置["置信度阈值"]
         self.NMS阈值 = NMS阈值 if NMS阈值 is not None else YOLO配置["NMS阈值"]
         self.输入尺寸 = 输入尺寸 or YOLO配置["输入尺寸"]
+        self.后端 = self._解析后端(后端 or YOLO配置.get("后端", "auto"))
         
         self._模型 = None
         self._已加载 = False
@@ -121,6 +137,7 @@ class YOLO检测器:
             self._初始化缓存()
         
         # 异步检测集成
+        self._帧环 = None
         self._异步检测器: Optional['异步检测器'] = None
         self._启用异步 = 启用异步 and 异步检测可用
         if self._启用异步:
@@ -129,7 +146,25 @@ class YOLO检测器:
         # 尝试加载模型
         self._加载模型()
         
-        logger.info(f"YOLO检测器初始化完成，缓存: {self._启用缓存}, 异步: {self._启用异步}")
+        logger.info(f"YOLO检测器初始化完成，后端: {self.后端}, "
+                    f"缓存: {self._启用缓存}, 异步: {self._启用异步}")
+    
+    def _解析后端(self, 后端: str) -> str:
+        """
+        确定实际使用的推理后端
+        
+        Args:
+            后端: 配置的后端名称
+            
+        Returns:
+            "ultralytics" 或 "onnx"
+        """
+        if 后端 == "auto":
+            return "onnx" if str(self.模型路径).lower().endswith(".onnx") else "ultralytics"
+        if 后端 not in ("ultralytics", "onnx"):
+            logger.warning(f"未知的检测后端: {后端}，使用 ultralytics")
+            return "ultralytics"
+        return 后端
     
     def _加载模型(self) -> bool:
         """
@@ -138,6 +173,9 @@ class YOLO检测器:
         Returns:
             是否加载成功
         """
+        if self.后端 == "onnx":
+            return self._加载ONNX模型()
+        
         try:
             # 尝试导入ultralytics库
             from ultralytics import YOLO
@@ -154,6 +192,27 @@ class YOLO检测器:
             self._已加载 = False
             return False
     
+    def _加载ONNX模型(self) -> bool:
+        """
+        使用 ONNX Runtime 加载导出的 YOLO 模型，不导入 torch / ultralytics
+        
+        Returns:
+            是否加载成功
+        """
+        try:
+            from 核心.ONNX检测后端 import ONNX检测后端
+            self._模型 = ONNX检测后端(self.模型路径, 输入尺寸=tuple(self.输入尺寸))
+            self._已加载 = True
+            return True
+        except ImportError:
+            logger.warning("未安装onnxruntime库，YOLO检测器将返回空结果")
+            self._已加载 = False
+            return False
+        except Exception as e:
+            logger.warning(f"ONNX模型加载失败: {e}，检测器将返回空结果")
+            self._已加载 = False
+            return False
+    
     def 是否已加载(self) -> bool:
         """
         检查模型是否已加载
@@ -163,13 +222,14 @@ class YOLO检测器:
         """
         return self._已加载
     
-    def 检测(self, 图像: np.ndarray, 使用缓存: bool = True) -> List[检测结果]:
+    def 检测(self, 图像: np.ndarray, 使用缓存: bool = True, 帧引用=None) -> List[检测结果]:
         """
         执行目标检测
         
         Args:
             图像: 输入图像 (BGR格式的numpy数组)
             使用缓存: 是否使用缓存（如果启用）
+            帧引用: 图像来自帧环时的槽位引用，缓存据此保存参考帧而不复制
             
         Returns:
             检测结果列表，按置信度降序排列
@@ -196,21 +256,26 @@ class YOLO检测器:
             屏幕高度, 屏幕宽度 = 图像.shape[:2]
             屏幕尺寸 = (屏幕宽度, 屏幕高度)
             
-            # 执行检测
-            结果 = self._模型(图像, conf=self.置信度阈值, iou=self.NMS阈值, verbose=False)
-            
-            # 解析检测结果
-            检测列表 = self._解析检测结果(结果, 屏幕尺寸)
-            
-            # 后处理：过滤和排序
-            检测列表 = self.后处理(检测列表, self.置信度阈值)
+            if self.后端 == "onnx":
+                # ONNX 后端已完成阈值过滤和按置信度排序
+                框, 置信度, 类别 = self._模型.检测(图像, self.置信度阈值, self.NMS阈值)
+                检测列表 = self._数组转检测结果(框, 置信度, 类别, 屏幕尺寸)
+            else:
+                # 执行检测
+                结果 = self._模型(图像, conf=self.置信度阈值, iou=self.NMS阈值, verbose=False)
+                
+                # 解析检测结果
+                检测列表 = self._解析检测结果(结果, 屏幕尺寸)
+                
+                # 后处理：过滤和排序
+                检测列表 = self.后处理(检测列表, self.置信度阈值)
             
             # 缓存结果
             self._上次检测结果 = 检测列表
             
             # 更新智能缓存
             if self._启用缓存 and self._智能缓存:
-                self._智能缓存.存储(图像, 检测列表)
+                self._智能缓存.存储(图像, 检测列表, 帧引用=帧引用)
             
             return 检测列表
             
@@ -237,46 +302,83 @@ class YOLO检测器:
         
         for result in 原始结果:
             boxes = result.boxes
-            if boxes is None:
+            if boxes is None or len(boxes) == 0:
                 continue
-                
-            for i in range(len(boxes)):
-                # 获取边界框坐标 (x1, y1, x2, y2)
-                box = boxes.xyxy[i].cpu().numpy()
-                x1, y1, x2, y2 = map(int, box)
-                
-                # 计算边界框 (x, y, width, height)
-                宽度 = x2 - x1
-                高度 = y2 - y1
-                边界框 = (x1, y1, 宽度, 高度)
-                
-                # 计算中心点
-                中心x = x1 + 宽度 // 2
-                中心y = y1 + 高度 // 2
-                中心点 = (中心x, 中心y)
-                
-                # 获取置信度
-                置信度 = float(boxes.conf[i].cpu().numpy())
-                
-                # 获取类别
-                类别id = int(boxes.cls[i].cpu().numpy())
-                实体 = self._映射实体类型(类别id)
-                
-                # 计算方向和距离
-                方向值 = self.计算方向(中心点, 屏幕尺寸)
-                距离值 = self._计算距离(中心点, 屏幕尺寸)
-                
-                检测列表.append(检测结果(
-                    类型=实体,
-                    置信度=置信度,
-                    边界框=边界框,
-                    中心点=中心点,
-                    方向=方向值,
-                    距离=距离值
-                ))
+            
+            # 每个结果只做一次设备到主机的拷贝
+            检测列表.extend(self._数组转检测结果(
+                boxes.xyxy.cpu().numpy(),
+                boxes.conf.cpu().numpy(),
+                boxes.cls.cpu().numpy(),
+                屏幕尺寸
+            ))
         
         return 检测列表
     
+    def _数组转检测结果(
+        self,
+        框: np.ndarray,
+        置信度: np.ndarray,
+        类别: np.ndarray,
+        屏幕尺寸: Tuple[int, int]
+    ) -> List[检测结果]:
+        """
+        将整批检测数组一次性转换为检测结果列表
+        
+        中心点、方向和距离的计算与 计算方向 / _计算距离 逐个计算的结果一致。
+        
+        Args:
+            框: 形状 (N, 4) 的 (x1, y1, x2, y2) 数组
+            置信度: 形状 (N,) 的置信度数组
+            类别: 形状 (N,) 的类别ID数组
+            屏幕尺寸: 屏幕尺寸 (宽度, 高度)
+            
+        Returns:
+            检测结果列表，顺序与输入一致
+        """
+        if len(置信度) == 0:
+            return []
+        
+        屏幕宽度, 屏幕高度 = 屏幕尺寸
+        整数框 = np.asarray(框).astype(np.int64)
+        宽高 = 整数框[:, 2:4] - 整数框[:, 0:2]
+        中心 = 整数框[:, 0:2] + 宽高 // 2
+        偏移 = 中心 - np.array([屏幕宽度 // 2, 屏幕高度 // 2])
+        
+        # 方向索引: 0 表示负方向，1 表示中心区域，2 表示正方向
+        在中心 = np.abs(偏移) < np.array([屏幕宽度 * 0.1, 屏幕高度 * 0.1])
+        方向索引 = np.where(在中心, 1, np.where(偏移 < 0, 0, 2))
+        方向编号 = 方向索引[:, 1] * 3 + 方向索引[:, 0]
+        距离 = np.sqrt((偏移 * 偏移).sum(axis=1))
+        
+        类型缓存 = {}
+        类型列表 = []
+        for 类别id in np.asarray(类别).astype(np.int64).tolist():
+            实体 = 类型缓存.get(类别id)
+            if 实体 is None:
+                实体 = 类型缓存[类别id] = self._映射实体类型(类别id)
+            类型列表.append(实体)
+        
+        return [
+            检测结果(
+                类型=实体,
+                置信度=c,
+                边界框=(x1, y1, w, h),
+                中心点=(cx, cy),
+                方向=_方向表[d],
+                距离=r
+            )
+            for 实体, c, (x1, y1), (w, h), (cx, cy), d, r in zip(
+                类型列表,
+                np.asarray(置信度, dtype=np.float64).tolist(),
+                整数框[:, 0:2].tolist(),
+                宽高.tolist(),
+                中心.tolist(),
+                方向编号.tolist(),
+                距离.tolist()
+            )
+        ]
+    
     def _映射实体类型(self, 类别id: int) -> 实体类型:
         """
         将YOLO类别ID映射为实体类型
@@ -421,6 +523,21 @@ class YOLO检测器:
         """
         return self._上次检测结果.copy()
     
+    def 获取灰度图(self, 图像: np.ndarray) -> Optional[np.ndarray]:
+        """
+        获取缓存查询时为该图像计算的灰度图，供状态识别等下游复用
+        
+        Args:
+            图像: 传给 检测() 的同一图像对象
+            
+        Returns:
+            灰度图，该图像未经过缓存查询时返回 None
+        """
+        if not self._智能缓存:
+            return None
+        帧 = self._智能缓存.获取预处理帧(图像)
+        return 帧.灰度 if 帧 is not None else None
+    
     def 按类型过滤(self, 检测列表: List[检测结果], 类型: 实体类型) -> List[检测结果]:
         """
         按实体类型过滤检测结果
@@ -481,7 +598,10 @@ class YOLO检测器:
                 过期时间=self._缓存配置.get("过期时间", 0.5),
                 启用时间过期=self._缓存配置.get("启用时间过期", True),
                 比较方法=self._缓存配置.get("比较方法", "histogram"),
-                预热帧数=self._缓存配置.get("预热帧数", 1)
+                预热帧数=self._缓存配置.get("预热帧数", 1),
+                最大条目数=self._缓存配置.get("最大条目数", 8),
+                签名距离阈值=self._缓存配置.get("签名距离阈值", 10),
+                最大比较数=self._缓存配置.get("最大比较数", 2)
             )
             
             # 添加优先区域
@@ -525,6 +645,18 @@ class YOLO检测器:
         
         logger.info(f"智能缓存已{'启用' if 启用 else '禁用'}")
     
+    def 设置帧环(self, 帧环) -> None:
+        """设置帧环，缓存和异步检测按槽位引用使用帧而不复制
+        
+        Args:
+            帧环: 核心.帧环.帧环 实例，None 表示不使用
+        """
+        self._帧环 = 帧环
+        if self._智能缓存:
+            self._智能缓存.设置帧环(帧环)
+        if self._异步检测器 is not None:
+            self._异步检测器.帧环 = 帧环
+    
     def 清空缓存(self) -> None:
         """清空检测缓存"""
         if self._智能缓存:
@@ -743,7 +875,10 @@ class YOLO检测器:
             return
         
         try:
-            self._异步检测器 = 异步检测器(self)
+            # 检测间隔由调用方控制，每次提交都检测
+            self._异步检测器 = 异步检测器(self, 检测间隔=1, 帧环=self._帧环)
+            if not self._异步检测器.启动():
+                raise RuntimeError("检测线程启动失败")
             logger.info("异步检测器初始化成功")
         except Exception as e:
             logger.error(f"异步检测器初始化失败: {e}")
@@ -767,35 +902,53 @@ class YOLO检测器:
         
         logger.info(f"异步检测已{'启用' if 启用 else '禁用'}")
     
-    def 异步检测(self, 图像: np.ndarray) -> None:
+    def 异步检测(self, 图像: Optional[np.ndarray] = None, 帧引用=None) -> bool:
         """提交异步检测任务
         
+        设置了帧环且给出帧引用时按槽位提交：槽位在检测完成前保持固定，不复制图像。
+        
         Args:
             图像: 输入图像
+            帧引用: 图像所在的帧环槽位引用
+            
+        Returns:
+            是否成功提交
         """
         if not self._异步检测器 or not self._启用异步:
             logger.warning("异步检测未启用")
-            return
+            return False
         
         try:
-            self._异步检测器.提交(图像)
+            if 帧引用 is not None and self._异步检测器.帧环 is not None:
+                return self._异步检测器.提交帧引用(帧引用)
+            if 图像 is None:
+                return False
+            return self._异步检测器.提交帧(图像)
         except Exception as e:
             logger.error(f"提交异步检测任务失败: {e}")
+            return False
     
     def 获取异步结果(self, 超时: float = 0.0) -> Optional[List[检测结果]]:
-        """获取异步检测结果
+        """获取最新的异步检测结果
         
         Args:
-            超时: 等待超时时间（秒），0表示不等待
+            超时: 还没有任何结果时最多等待的时间（秒），0表示不等待
             
         Returns:
-            检测结果列表，如果没有结果返回None
+            检测结果列表，如果还没有结果返回None
         """
         if not self._异步检测器 or not self._启用异步:
             return None
         
         try:
-            return self._异步检测器.获取结果(超时)
+            截止时间 = time.time() + 超时
+            while True:
+                结果, 时间戳, _ = self._异步检测器.获取结果带时间戳()
+                if 时间戳 > 0:
+                    return 结果
+                if time.time() >= 截止时间:
+                    return None
+                time.sleep(0.005)
         except Exception as e:
             logger.warning(f"获取异步检测结果失败: {e}")
             return None
@@ -838,6 +991,7 @@ class YOLO检测器:
             "模型": {
                 "已加载": self._已加载,
                 "模型路径": self.模型路径,
+                "后端": self.后端,
                 "置信度阈值": self.置信度阈值,
                 "NMS阈值": self.NMS阈值
             },
@@ -94,6 +94,9 @@ class 缓存策略:
     比较方法: str = "histogram"  # 帧比较方法
     优先区域列表: List[优先区域] = field(default_factory=list)  # 优先区域列表
     预热帧数: int = 1  # 预热帧数
+    最大条目数: int = 8  # 最多缓存的场景数（LRU 淘汰）
+    签名距离阈值: int = 10  # 签名汉明距离超过该值的条目不做完整相似度比较
+    最大比较数: int = 2  # 每次查询最多做完整相似度比较的条目数
     
     def __post_init__(self):
         """验证数据有效性"""
@@ -108,6 +111,18 @@ class 缓存策略:
         if self.比较方法 not in ["histogram", "ssim", "mse", "hash"]:
             日志.warning(f"不支持的比较方法 {self.比较方法}，使用默认方法 histogram")
             self.比较方法 = "histogram"
+        
+        if self.最大条目数 < 1:
+            日志.warning(f"最大条目数 {self.最大条目数} 无效，使用默认值 8")
+            self.最大条目数 = 8
+        
+        if not (0 <= self.签名距离阈值 <= 64):
+            日志.warning(f"签名距离阈值 {self.签名距离阈值} 超出范围，使用默认值 10")
+            self.签名距离阈值 = 10
+        
+        if self.最大比较数 < 1:
+            日志.warning(f"最大比较数 {self.最大比较数} 无效，使用默认值 2")
+            self.最大比较数 = 2
     
     def 应该使用缓存(self, 全局相似度: float, 
                      区域相似度列表: List[float] = None,
@@ -230,7 +245,10 @@ class 缓存策略:
             "启用时间过期": self.启用时间过期,
             "比较方法": self.比较方法,
             "优先区域": [区域.to_dict() for 区域 in self.优先区域列表],
-            "预热帧数": self.预热帧数
+            "预热帧数": self.预热帧数,
+            "最大条目数": self.最大条目数,
+            "签名距离阈值": self.签名距离阈值,
+            "最大比较数": self.最大比较数
         }
     
     @classmethod
@@ -245,7 +263,10 @@ class 缓存策略:
             启用时间过期=data.get("启用时间过期", True),
             比较方法=data.get("比较方法", "histogram"),
             优先区域列表=优先区域列表,
-            预热帧数=data.get("预热帧数", 1)
+            预热帧数=data.get("预热帧数", 1),
+            最大条目数=data.get("最大条目数", 8),
+            签名距离阈值=data.get("签名距离阈值", 10),
+            最大比较数=data.get("最大比较数", 2)
         )
 
 
@@ -288,6 +309,15 @@ class 缓存策略:
             if "预热帧数" in 缓存配置:
                 self.预热帧数 = int(缓存配置["预热帧数"])
             
+            if "最大条目数" in 缓存配置:
+                self.最大条目数 = int(缓存配置["最大条目数"])
+            
+            if "签名距离阈值" in 缓存配置:
+                self.签名距离阈值 = int(缓存配置["签名距离阈值"])
+            
+            if "最大比较数" in 缓存配置:
+                self.最大比较数 = int(缓存配置["最大比较数"])
+            
             # 加载优先区域
             if "优先区域" in 缓存配置:
                 self.优先区域列表.clear()
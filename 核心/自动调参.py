@@ -8,6 +8,7 @@ from dataclasses import dataclass, field
 from typing import Dict, Optional, List, Any, Tuple
 from datetime import datetime, timedelta
 from enum import Enum
+from bisect import bisect_left, bisect_right
 import json
 import os
 import logging
@@ -272,6 +273,106 @@ def get_default_parameter_spaces() -> Dict[str, ParameterSpace]:
     }
 
 
+# ==================== 指标时间序列 ====================
+class MetricSeries:
+    """按时间戳排序、容量有限的性能指标序列
+
+    同时维护各指标的前缀和，时间窗口汇总只需一次二分查找和一次减法，
+    与历史长度无关。超出容量时淘汰最旧的指标。
+    """
+
+    def __init__(self, max_size: int = 10000):
+        """
+        Args:
+            max_size: 最多保留的指标数量
+        """
+        self.max_size = max(1, max_size)
+        self.clear()
+
+    def clear(self) -> None:
+        """清空序列"""
+        self._items: List[PerformanceMetric] = []
+        self._times: List[datetime] = []
+        # _prefix[i] 为 _items[:i] 的累计值 (成功率, 准确率, 卡住次数, 效率)
+        self._prefix: List[Tuple[float, float, int, float]] = []
+        self._total: Tuple[float, float, int, float] = (0.0, 0.0, 0, 0.0)
+        self._start = 0  # 第一个未淘汰元素的下标
+
+    def __len__(self) -> int:
+        return len(self._items) - self._start
+
+    def append(self, metric: PerformanceMetric) -> None:
+        """添加指标，时间戳早于末尾的指标会插入到对应位置"""
+        if self._times and metric.timestamp < self._times[-1]:
+            self._insert_sorted(metric)
+        else:
+            self._items.append(metric)
+            self._times.append(metric.timestamp)
+            self._prefix.append(self._total)
+            self._total = self._add(self._total, metric)
+
+        if len(self) > self.max_size:
+            self._start += 1
+            # 淘汰只移动起点，积累到一倍容量后再整体压缩，摊还 O(1)
+            if self._start >= self.max_size:
+                self._compact()
+
+    def items(self) -> List[PerformanceMetric]:
+        """按时间顺序返回所有保留的指标"""
+        return self._items[self._start:]
+
+    def since(self, cutoff: datetime) -> List[PerformanceMetric]:
+        """返回时间戳不早于 cutoff 的指标"""
+        return self._items[self._index_of(cutoff):]
+
+    def aggregate_since(self, cutoff: datetime) -> Tuple[int, Tuple[float, float, int, float]]:
+        """汇总时间戳不早于 cutoff 的指标
+
+        Returns:
+            (数量, (成功率之和, 准确率之和, 卡住次数之和, 效率之和))
+        """
+        index = self._index_of(cutoff)
+        count = len(self._items) - index
+        if count <= 0:
+            return 0, (0.0, 0.0, 0, 0.0)
+        base = self._prefix[index]
+        return count, tuple(t - b for t, b in zip(self._total, base))
+
+    def _index_of(self, cutoff: datetime) -> int:
+        return bisect_left(self._times, cutoff, lo=self._start)
+
+    @staticmethod
+    def _add(total: Tuple[float, float, int, float], metric: PerformanceMetric) -> Tuple[float, float, int, float]:
+        return (
+            total[0] + metric.action_success_rate,
+            total[1] + metric.state_accuracy,
+            total[2] + metric.stuck_count,
+            total[3] + metric.task_efficiency,
+        )
+
+    def _insert_sorted(self, metric: PerformanceMetric) -> None:
+        """乱序到达的指标: 插入并重算其后的前缀和（少见情况，O(n)）"""
+        index = max(bisect_right(self._times, metric.timestamp, lo=self._start), self._start)
+        self._items.insert(index, metric)
+        self._times.insert(index, metric.timestamp)
+        self._prefix.insert(index, self._prefix[index] if index < len(self._prefix) else self._total)
+        running = self._prefix[index]
+        for i in range(index, len(self._items)):
+            self._prefix[i] = running
+            running = self._add(running, self._items[i])
+        self._total = running
+
+    def _compact(self) -> None:
+        """丢弃已淘汰的元素，并以第一个保留元素为零点重置累计值"""
+        items = self._items[self._start:]
+        self.clear()
+        for metric in items:
+            self._items.append(metric)
+            self._times.append(metric.timestamp)
+            self._prefix.append(self._total)
+            self._total = self._add(self._total, metric)
+
+
 # ==================== 自动调参器类 ====================
 class AutoTuner:
     """自动调参器
@@ -281,15 +382,18 @@ class AutoTuner:
     
     # 默认存储目录
     DEFAULT_TUNING_DIR = "配置/tuning"
-    METRICS_FILE = "metrics.json"
+    METRICS_FILE = "metrics.jsonl"  # 追加写入的 JSON Lines 日志
+    LEGACY_METRICS_FILE = "metrics.json"  # 旧版整体写入的指标文件
     RECORDS_FILE = "records.json"
     PARAMETERS_FILE = "parameters.json"
+    DEFAULT_MAX_METRICS = 10000
     
     def __init__(
         self, 
         enabled: bool = False, 
         aggressiveness: AggressivenessLevel = AggressivenessLevel.BALANCED,
-        tuning_dir: Optional[str] = None
+        tuning_dir: Optional[str] = None,
+        max_metrics: int = DEFAULT_MAX_METRICS
     ):
         """初始化自动调参器
         
@@ -297,13 +401,16 @@ class AutoTuner:
             enabled: 是否启用自动调参
             aggressiveness: 调参激进程度
             tuning_dir: 调参数据存储目录，默认为 配置/tuning
+            max_metrics: 内存和日志中保留的最大指标数量，超出后淘汰最旧的指标
         """
         self.enabled = enabled
         self.aggressiveness = aggressiveness
         self.tuning_dir = tuning_dir or self.DEFAULT_TUNING_DIR
         
-        # 内存中的指标列表
-        self._metrics: List[PerformanceMetric] = []
+        # 内存中的指标序列（按时间排序、容量有限）
+        self._metrics = MetricSeries(max_metrics)
+        # 指标日志中的行数，超过保留数量的两倍时压缩
+        self._metrics_log_lines = 0
         # 调参记录列表
         self._records: List[TuningRecord] = []
         # 参数空间
@@ -323,6 +430,10 @@ class AutoTuner:
         """获取指标文件路径"""
         return os.path.join(self.tuning_dir, self.METRICS_FILE)
     
+    def _get_legacy_metrics_path(self) -> str:
+        """获取旧版指标文件路径"""
+        return os.path.join(self.tuning_dir, self.LEGACY_METRICS_FILE)
+    
     def _get_records_path(self) -> str:
         """获取记录文件路径"""
         return os.path.join(self.tuning_dir, self.RECORDS_FILE)
@@ -334,15 +445,7 @@ class AutoTuner:
     def _load_persisted_data(self) -> None:
         """加载持久化的数据"""
         # 加载指标数据
-        metrics_path = self._get_metrics_path()
-        if os.path.exists(metrics_path):
-            try:
-                with open(metrics_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self._metrics = [PerformanceMetric.from_dict(m) for m in data]
-            except (json.JSONDecodeError, KeyError, ValueError) as e:
-                logger.warning(f"加载指标数据失败: {e}")
-                self._metrics = []
+        self._load_metrics()
         
         # 加载调参记录
         records_path = self._get_records_path()
@@ -371,8 +474,63 @@ class AutoTuner:
             except (json.JSONDecodeError, KeyError, ValueError) as e:
                 logger.warning(f"加载参数数据失败: {e}")
     
+    def _load_metrics(self) -> None:
+        """从指标日志加载指标，没有日志时迁移旧版 metrics.json"""
+        self._metrics.clear()
+        self._metrics_log_lines = 0
+        
+        metrics_path = self._get_metrics_path()
+        if os.path.exists(metrics_path):
+            try:
+                with open(metrics_path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        self._metrics_log_lines += 1
+                        try:
+                            self._metrics.append(PerformanceMetric.from_dict(json.loads(line)))
+                        except (json.JSONDecodeError, KeyError, ValueError) as e:
+                            # 进程中断可能留下写了一半的最后一行
+                            logger.warning(f"跳过无效的指标记录: {e}")
+            except (IOError, OSError) as e:
+                logger.warning(f"加载指标数据失败: {e}")
+                self._metrics.clear()
+            return
+        
+        legacy_path = self._get_legacy_metrics_path()
+        if os.path.exists(legacy_path):
+            try:
+                with open(legacy_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                for m in data:
+                    self._metrics.append(PerformanceMetric.from_dict(m))
+            except (json.JSONDecodeError, KeyError, ValueError) as e:
+                logger.warning(f"加载指标数据失败: {e}")
+                self._metrics.clear()
+                return
+            if self._save_metrics():
+                os.remove(legacy_path)
+    
+    def _append_metric(self, metric: PerformanceMetric) -> bool:
+        """向指标日志追加一条指标
+        
+        Returns:
+            是否写入成功
+        """
+        try:
+            self._ensure_dir_exists()
+            with open(self._get_metrics_path(), 'a', encoding='utf-8') as f:
+                f.write(json.dumps(metric.to_dict(), ensure_ascii=False) + "\n")
+            self._metrics_log_lines += 1
+            return True
+        except (IOError, OSError) as e:
+            logger.error(f"保存指标数据失败: {e}")
+            return False
+    
     def _save_metrics(self) -> bool:
-        """保存指标数据到文件
+        """压缩指标日志: 只写入内存中保留的指标
+        
+        先写临时文件再替换，中断时不会丢失原日志。
         
         Returns:
             是否保存成功
@@ -380,9 +538,13 @@ class AutoTuner:
         try:
             self._ensure_dir_exists()
             metrics_path = self._get_metrics_path()
-            with open(metrics_path, 'w', encoding='utf-8') as f:
-                data = [m.to_dict() for m in self._metrics]
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            temp_path = metrics_path + ".tmp"
+            metrics = self._metrics.items()
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                for m in metrics:
+                    f.write(json.dumps(m.to_dict(), ensure_ascii=False) + "\n")
+            os.replace(temp_path, metrics_path)
+            self._metrics_log_lines = len(metrics)
             return True
         except (IOError, OSError) as e:
             logger.error(f"保存指标数据失败: {e}")
@@ -427,14 +589,17 @@ class AutoTuner:
     def collect_metric(self, metric: PerformanceMetric) -> None:
         """收集性能指标
         
-        将指标添加到内存列表并持久化存储
+        将指标添加到内存序列并追加到指标日志；日志行数超过保留数量的两倍时
+        压缩一次，因此每次收集的持久化开销是摊还 O(1) 的
         
         Args:
             metric: 性能指标对象
         """
         self._metrics.append(metric)
         # 立即持久化
-        self._save_metrics()
+        self._append_metric(metric)
+        if self._metrics_log_lines > 2 * self._metrics.max_size:
+            self._save_metrics()
     
     def get_metrics(self) -> List[PerformanceMetric]:
         """获取所有收集的指标
@@ -442,7 +607,7 @@ class AutoTuner:
         Returns:
             指标列表
         """
-        return self._metrics.copy()
+        return self._metrics.items()
     
     def get_metrics_in_window(self, window_minutes: int = 5) -> List[PerformanceMetric]:
         """获取指定时间窗口内的指标
@@ -457,7 +622,7 @@ class AutoTuner:
             return []
         
         cutoff_time = datetime.now() - timedelta(minutes=window_minutes)
-        return [m for m in self._metrics if m.timestamp >= cutoff_time]
+        return self._metrics.since(cutoff_time)
     
     def get_aggregated_metrics(self, window_minutes: int = 5) -> PerformanceMetric:
         """获取时间窗口内的汇总指标
@@ -474,31 +639,31 @@ class AutoTuner:
         Returns:
             汇总后的性能指标，如果窗口内无数据则返回默认值
         """
-        metrics_in_window = self.get_metrics_in_window(window_minutes)
+        if window_minutes <= 0:
+            return PerformanceMetric()
         
-        if not metrics_in_window:
+        # 由前缀和直接得到窗口内的累加值，不遍历窗口内的指标
+        cutoff_time = datetime.now() - timedelta(minutes=window_minutes)
+        count, totals = self._metrics.aggregate_since(cutoff_time)
+        
+        if count == 0:
             # 无数据时返回默认指标
             return PerformanceMetric()
         
-        # 计算平均值和累加值
-        total_action_success = sum(m.action_success_rate for m in metrics_in_window)
-        total_state_accuracy = sum(m.state_accuracy for m in metrics_in_window)
-        total_stuck_count = sum(m.stuck_count for m in metrics_in_window)
-        total_task_efficiency = sum(m.task_efficiency for m in metrics_in_window)
-        
-        count = len(metrics_in_window)
+        total_action_success, total_state_accuracy, total_stuck_count, total_task_efficiency = totals
         
+        # 前缀和相减可能带来微小的浮点误差，平均值限制在有效范围内
         return PerformanceMetric(
             timestamp=datetime.now(),
-            action_success_rate=total_action_success / count,
-            state_accuracy=total_state_accuracy / count,
+            action_success_rate=min(1.0, max(0.0, total_action_success / count)),
+            state_accuracy=min(1.0, max(0.0, total_state_accuracy / count)),
             stuck_count=total_stuck_count,  # 累加值
-            task_efficiency=total_task_efficiency / count
+            task_efficiency=min(1.0, max(0.0, total_task_efficiency / count))
         )
     
     def clear_metrics(self) -> None:
         """清空所有指标数据"""
-        self._metrics = []
+        self._metrics.clear()
         self._save_metrics()
     
     def get_metrics_count(self) -> int:
@@ -0,0 +1,77 @@
+"""
+测试用 ONNX 小模型
+
+各 ONNX 相关测试共用的模型构造函数：Flatten -> [MatMul + Add -> Relu] -> MatMul -> Softmax，
+权重由随机种子决定，输入形状、动作数和批次维度可配置。
+"""
+
+from typing import Tuple, Union
+
+import numpy as np
+import onnx
+from onnx import helper, TensorProto
+
+
+def 创建ONNX模型(路径: str, 输入形状: Tuple[int, ...], 动作数: int = 5,
+              批次: Union[str, int, None] = "N", 种子: int = 0,
+              隐藏单元数: int = 0, 权重缩放: float = 1.0,
+              可折叠权重: bool = False, 固定Reshape: bool = False) -> str:
+    """
+    创建 Flatten -> MatMul -> Softmax 的小模型并保存
+
+    参数:
+        路径: 保存路径
+        输入形状: 单样本输入形状
+        动作数: 输出维度
+        批次: 批次维度，字符串或 None 表示动态批次，整数表示固定批次
+        种子: 权重随机种子
+        隐藏单元数: 大于 0 时在输出层前加一层 MatMul + Add -> Relu
+        权重缩放: 随机权重的缩放系数
+        可折叠权重: 输出层权重写成 W_a + W_b（可被常量折叠的 Add）
+        固定Reshape: 用常量形状 [1, 特征数] 的 Reshape 代替 Flatten（无法改为动态批次）
+
+    返回:
+        模型路径
+    """
+    随机源 = np.random.RandomState(种子)
+    特征数 = int(np.prod(输入形状))
+    批次 = "N" if 批次 is None else 批次
+
+    def 张量(名称, 形状):
+        return helper.make_tensor(名称, TensorProto.FLOAT, 形状,
+                                  (随机源.randn(*形状) * 权重缩放).astype(np.float32).ravel())
+
+    节点 = []
+    初始化器 = []
+    if 固定Reshape:
+        初始化器.append(helper.make_tensor("shape", TensorProto.INT64, [2], [1, 特征数]))
+        节点.append(helper.make_node("Reshape", ["input", "shape"], ["flat"]))
+    else:
+        节点.append(helper.make_node("Flatten", ["input"], ["flat"], axis=1))
+
+    输出层输入, 输出层维度 = "flat", 特征数
+    if 隐藏单元数 > 0:
+        初始化器 += [张量("W1", [特征数, 隐藏单元数]), 张量("B1", [隐藏单元数])]
+        节点 += [helper.make_node("MatMul", ["flat", "W1"], ["h"]),
+               helper.make_node("Add", ["h", "B1"], ["hb"]),
+               helper.make_node("Relu", ["hb"], ["act"])]
+        输出层输入, 输出层维度 = "act", 隐藏单元数
+
+    if 可折叠权重:
+        初始化器 += [张量("W_a", [输出层维度, 动作数]), 张量("W_b", [输出层维度, 动作数])]
+        节点.append(helper.make_node("Add", ["W_a", "W_b"], ["W"]))
+    else:
+        初始化器.append(张量("W", [输出层维度, 动作数]))
+    节点 += [helper.make_node("MatMul", [输出层输入, "W"], ["logits"]),
+           helper.make_node("Softmax", ["logits"], ["output"], axis=1)]
+
+    图 = helper.make_graph(
+        节点, "test",
+        [helper.make_tensor_value_info("input", TensorProto.FLOAT, [批次, *输入形状])],
+        [helper.make_tensor_value_info("output", TensorProto.FLOAT, [批次, 动作数])],
+        初始化器
+    )
+    模型 = helper.make_model(图, opset_imports=[helper.make_opsetid("", 13)])
+    模型.ir_version = 8
+    onnx.save(模型, 路径)
+    return 路径
@@ -0,0 +1,198 @@
+"""
+ONNX 优化缓存与并行预加载属性测试
+
+属性 1: 缓存命中结果一致
+*对于任意* 输入，从优化缓存加载的会话与首次优化生成的会话输出相同
+
+属性 2: 缓存键随模型、选项和主机变化
+模型内容、图优化级别或主机 CPU 标识不同时缓存键不同，相同时缓存键相同
+
+属性 3: 配置中的模型并行加载
+从配置初始化 的总耗时接近单个模型的加载耗时，而不是各模型耗时之和
+
+Feature: onnx-optimized-cache
+"""
+
+import os
+import json
+import time
+import numpy as np
+import pytest
+from hypothesis import given, strategies as st, settings
+
+onnx = pytest.importorskip("onnx")
+ort = pytest.importorskip("onnxruntime")
+
+import 核心.ONNX推理 as ONNX推理模块
+from 核心.ONNX推理 import ONNX推理引擎, 计算优化缓存键, 优化缓存子目录
+from 核心.模型管理 import 模型管理器
+from 测试.onnx测试模型 import 创建ONNX模型 as 共用创建ONNX模型
+
+
+动作数 = 5
+
+
+def 创建ONNX模型(路径: str, 种子: int = 0) -> str:
+    """输出层权重为 W_a + W_b，可被常量折叠"""
+    return 共用创建ONNX模型(路径, (3, 2, 2), 动作数, 种子=种子, 可折叠权重=True)
+
+
+def 缓存文件(模型路径: str):
+    目录 = os.path.join(os.path.dirname(模型路径), 优化缓存子目录)
+    return sorted(os.listdir(目录)) if os.path.isdir(目录) else []
+
+
+@pytest.fixture
+def 模型路径(tmp_path):
+    return 创建ONNX模型(str(tmp_path / "模型.onnx"))
+
+
+class Test优化缓存属性:
+    """属性 1-2"""
+
+    @given(种子=st.integers(min_value=0, max_value=2 ** 16))
+    @settings(max_examples=10, deadline=None)
+    def test_缓存命中结果一致(self, tmp_path_factory, 种子):
+        路径 = 创建ONNX模型(str(tmp_path_factory.mktemp("缓存") / "模型.onnx"))
+        首次 = ONNX推理引擎(路径, 使用GPU=False, 预热=False)
+        再次 = ONNX推理引擎(路径, 使用GPU=False, 预热=False)
+
+        assert not 首次.命中优化缓存
+        assert 再次.命中优化缓存
+        帧 = np.random.RandomState(种子).randint(0, 256, size=(4, 3, 2, 2)).astype(np.uint8)
+        np.testing.assert_allclose(再次.批量预测(帧), 首次.批量预测(帧), rtol=1e-5, atol=1e-6)
+
+    def test_缓存键随模型和选项变化(self, tmp_path):
+        路径甲 = 创建ONNX模型(str(tmp_path / "甲.onnx"), 种子=0)
+        路径乙 = 创建ONNX模型(str(tmp_path / "乙.onnx"), 种子=1)
+        路径丙 = 创建ONNX模型(str(tmp_path / "丙.onnx"), 种子=0)
+        选项 = ort.SessionOptions()
+        提供者 = ["CPUExecutionProvider"]
+
+        键甲 = 计算优化缓存键(路径甲, 提供者, 选项)
+        assert 计算优化缓存键(路径丙, 提供者, 选项) == 键甲
+        assert 计算优化缓存键(路径乙, 提供者, 选项) != 键甲
+
+        选项.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_BASIC
+        assert 计算优化缓存键(路径甲, 提供者, 选项) != 键甲
+
+    def test_缓存键随主机变化(self, 模型路径, monkeypatch):
+        选项 = ort.SessionOptions()
+        提供者 = ["CPUExecutionProvider"]
+        本机键 = 计算优化缓存键(模型路径, 提供者, 选项)
+
+        monkeypatch.setattr(ONNX推理模块, "获取主机标识", lambda: "其他主机|avx512")
+        assert 计算优化缓存键(模型路径, 提供者, 选项) != 本机键
+
+
+class Test优化缓存单元测试:
+    """优化缓存单元测试"""
+
+    def test_首次启动写入缓存(self, 模型路径):
+        ONNX推理引擎(模型路径, 使用GPU=False, 预热=False)
+
+        文件 = 缓存文件(模型路径)
+        assert len(文件) == 1 and 文件[0].startswith("模型.") and 文件[0].endswith(".onnx")
+
+    def test_损坏的缓存重新生成(self, 模型路径):
+        ONNX推理引擎(模型路径, 使用GPU=False, 预热=False)
+        缓存路径 = os.path.join(os.path.dirname(模型路径), 优化缓存子目录, 缓存文件(模型路径)[0])
+        with open(缓存路径, "wb") as f:
+            f.write(b"not a model")
+
+        重建 = ONNX推理引擎(模型路径, 使用GPU=False, 预热=False)
+        复用 = ONNX推理引擎(模型路径, 使用GPU=False, 预热=False)
+
+        assert not 重建.命中优化缓存
+        assert 复用.命中优化缓存
+        assert 重建.预测(np.zeros((3, 2, 2), np.uint8))
+
+    def test_禁用缓存不写文件(self, 模型路径):
+        引擎 = ONNX推理引擎(模型路径, 使用GPU=False, 预热=False, 启用优化缓存=False)
+
+        assert not 引擎.命中优化缓存
+        assert 缓存文件(模型路径) == []
+
+    def test_指定缓存目录(self, 模型路径, tmp_path):
+        缓存目录 = str(tmp_path / "自定义缓存")
+        ONNX推理引擎(模型路径, 使用GPU=False, 预热=False, 缓存目录=缓存目录)
+        引擎 = ONNX推理引擎(模型路径, 使用GPU=False, 预热=False, 缓存目录=缓存目录)
+
+        assert 引擎.命中优化缓存
+        assert len(os.listdir(缓存目录)) == 1
+
+    def test_模型管理器使用缓存(self, 模型路径):
+        管理器 = 模型管理器()
+        try:
+            assert 管理器.加载模型("甲", 模型路径)
+            assert len(缓存文件(模型路径)) == 1
+            assert len(管理器.预测(np.zeros((3, 2, 2), np.uint8))) == 动作数
+        finally:
+            管理器.关闭()
+
+
+class 慢速加载管理器(模型管理器):
+    """每个模型加载耗时固定，用于验证并行加载"""
+
+    加载耗时 = 0.3
+
+    def _加载模型实例(self, 路径: str):
+        time.sleep(self.加载耗时)
+        return super()._加载模型实例(路径)
+
+
+class Test并行预加载:
+    """属性 3: 配置中的模型并行加载"""
+
+    def 写入配置(self, 目录, 数量: int, 默认模型: str = "") -> str:
+        配置 = {"模型列表": [], "默认模型": 默认模型}
+        for i in range(数量):
+            路径 = 创建ONNX模型(str(目录 / f"模型{i}.onnx"), 种子=i)
+            配置["模型列表"].append({"名称": f"模型{i}", "路径": 路径})
+        配置路径 = str(目录 / "models.json")
+        with open(配置路径, "w", encoding="utf-8") as f:
+            json.dump(配置, f, ensure_ascii=False)
+        return 配置路径
+
+    def test_从配置初始化并行加载(self, tmp_path):
+        配置路径 = self.写入配置(tmp_path, 4)
+        管理器 = 慢速加载管理器(配置路径, 预加载并发数=4)
+        try:
+            开始 = time.perf_counter()
+            assert 管理器.从配置初始化()
+            耗时 = time.perf_counter() - 开始
+
+            assert 耗时 < 4 * 慢速加载管理器.加载耗时
+            assert sorted(管理器.获取模型列表()) == ["模型0", "模型1", "模型2", "模型3"]
+            # 没有默认模型时以配置中第一个模型为活动模型
+            assert 管理器.获取活动模型() == "模型0"
+        finally:
+            管理器.关闭()
+
+    def test_从配置初始化切换到默认模型(self, tmp_path):
+        配置路径 = self.写入配置(tmp_path, 3, 默认模型="模型2")
+        管理器 = 模型管理器(配置路径)
+        try:
+            assert 管理器.从配置初始化()
+            assert 管理器.获取活动模型() == "模型2"
+        finally:
+            管理器.关闭()
+
+    def test_预加载所有模型并预热(self, tmp_path):
+        配置路径 = self.写入配置(tmp_path, 3)
+        管理器 = 模型管理器(配置路径, 预加载并发数=3)
+        try:
+            assert 管理器.预加载所有模型(预热=True) == 3
+            assert 管理器.等待预加载完成(超时=30)
+            for 名称 in ("模型0", "模型1", "模型2"):
+                信息 = 管理器.获取模型信息(名称)
+                assert 信息["已加载"]
+            # 预热在同一后台任务中完成
+            time.sleep(0.1)
+            assert all(槽位.预热完成 for 槽位 in 管理器._槽位.values())
+        finally:
+            管理器.关闭()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--hypothesis-show-statistics"])
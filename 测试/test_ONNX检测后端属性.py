@@ -0,0 +1,199 @@
+"""
+ONNX 检测后端属性测试
+
+属性 1: 整批转换与逐框计算一致
+*对于任意* 检测框数组和屏幕尺寸，_数组转检测结果 得到的边界框、中心点、方向和距离
+与逐框调用 计算方向 / _计算距离 的结果相同
+
+属性 2: letterbox 坐标还原
+*对于任意* 画面尺寸，模型输入坐标系中的候选框经 ONNX检测后端 还原到原图坐标后，
+与按缩放比例和填充偏移手工换算的结果一致
+
+Feature: onnx-detection-backend
+"""
+
+import numpy as np
+import pytest
+from hypothesis import given, strategies as st, settings
+
+onnx = pytest.importorskip("onnx")
+pytest.importorskip("onnxruntime")
+from onnx import helper, TensorProto
+
+from 核心.目标检测器 import YOLO检测器
+from 核心.ONNX检测后端 import ONNX检测后端
+
+
+输入边长 = 64
+
+
+def 创建检测模型(路径: str, 预测: np.ndarray, 类别名称=None) -> str:
+    """
+    创建输出固定预测值的检测模型
+
+    参数:
+        预测: 不含批次维度的原始输出，如 YOLOv8 的 (4 + 类别数, 候选数)
+        类别名称: 写入元数据 names 的类别字典，None 表示不写入
+    """
+    预测 = 预测.astype(np.float32)
+    常量 = helper.make_tensor("pred", TensorProto.FLOAT, [1, *预测.shape], 预测.ravel())
+    图 = helper.make_graph(
+        [helper.make_node("ReduceMean", ["images"], ["mean"], keepdims=0),
+         helper.make_node("Mul", ["mean", "zero"], ["zeroed"]),
+         helper.make_node("Add", ["pred", "zeroed"], ["output0"])],
+        "detector",
+        [helper.make_tensor_value_info("images", TensorProto.FLOAT,
+                                       [1, 3, 输入边长, 输入边长])],
+        [helper.make_tensor_value_info("output0", TensorProto.FLOAT, [1, *预测.shape])],
+        [常量, helper.make_tensor("zero", TensorProto.FLOAT, [], [0.0])],
+    )
+    模型 = helper.make_model(图, opset_imports=[helper.make_opsetid("", 13)])
+    模型.ir_version = 8
+    if 类别名称 is not None:
+        helper.set_model_props(模型, {"names": str(类别名称)})
+    onnx.save(模型, 路径)
+    return 路径
+
+
+def v8预测(候选列表, 类别数: int = 2, 候选数: int = 16) -> np.ndarray:
+    """把 (cx, cy, w, h, 类别, 分数) 列表排成 YOLOv8 输出布局，其余候选分数为 0"""
+    预测 = np.zeros((4 + 类别数, max(候选数, len(候选列表))), dtype=np.float32)
+    for i, (cx, cy, w, h, 类别, 分数) in enumerate(候选列表):
+        预测[:4, i] = (cx, cy, w, h)
+        预测[4 + 类别, i] = 分数
+    return 预测
+
+
+class Test整批转换一致性属性:
+    """属性 1: 整批转换与逐框计算一致"""
+
+    def setup_method(self):
+        self.检测器 = YOLO检测器(模型路径="不存在的模型.pt", 启用缓存=False)
+
+    @given(
+        屏幕尺寸=st.tuples(st.integers(100, 2000), st.integers(100, 1200)),
+        数据=st.data(),
+    )
+    @settings(max_examples=50, deadline=None)
+    def test_与逐框计算一致(self, 屏幕尺寸, 数据):
+        检测器 = self.检测器
+        宽度, 高度 = 屏幕尺寸
+        数量 = 数据.draw(st.integers(0, 20))
+        随机源 = np.random.RandomState(数据.draw(st.integers(0, 2 ** 31 - 1)))
+        左上 = 随机源.uniform(0, [宽度, 高度], size=(数量, 2))
+        右下 = 左上 + 随机源.uniform(1, 300, size=(数量, 2))
+        框 = np.concatenate([左上, 右下], axis=1).astype(np.float32)
+        置信度 = 随机源.uniform(0, 1, size=数量).astype(np.float32)
+        类别 = 随机源.randint(0, 8, size=数量).astype(np.float32)
+
+        结果 = 检测器._数组转检测结果(框, 置信度, 类别, 屏幕尺寸)
+
+        assert len(结果) == 数量
+        for i, 检测 in enumerate(结果):
+            x1, y1, x2, y2 = map(int, 框[i])
+            中心点 = (x1 + (x2 - x1) // 2, y1 + (y2 - y1) // 2)
+            assert 检测.边界框 == (x1, y1, x2 - x1, y2 - y1)
+            assert 检测.中心点 == 中心点
+            assert 检测.方向 == 检测器.计算方向(中心点, 屏幕尺寸)
+            assert 检测.距离 == 检测器._计算距离(中心点, 屏幕尺寸)
+            assert 检测.置信度 == float(置信度[i])
+            assert 检测.类型 == 检测器._映射实体类型(int(类别[i]))
+
+
+class Testletterbox坐标还原属性:
+    """属性 2: letterbox 坐标还原"""
+
+    @given(图像尺寸=st.tuples(st.integers(16, 300), st.integers(16, 300)))
+    @settings(max_examples=30, deadline=None)
+    def test_坐标还原(self, tmp_path_factory, 图像尺寸):
+        图像宽度, 图像高度 = 图像尺寸
+        路径 = 创建检测模型(
+            str(tmp_path_factory.mktemp("det") / "model.onnx"),
+            v8预测([(32, 32, 10, 8, 0, 0.9)]),
+            {0: "monster", 1: "npc"},
+        )
+        后端 = ONNX检测后端(路径)
+
+        框, 置信度, 类别 = 后端.检测(np.zeros((图像高度, 图像宽度, 3), np.uint8), 0.5, 0.4)
+
+        比例 = min(输入边长 / 图像宽度, 输入边长 / 图像高度)
+        左 = (输入边长 - max(1, int(round(图像宽度 * 比例)))) // 2
+        上 = (输入边长 - max(1, int(round(图像高度 * 比例)))) // 2
+        期望 = (np.array([27, 28, 37, 36], np.float32) - [左, 上, 左, 上]) / 比例
+        期望[0::2] = np.clip(期望[0::2], 0, 图像宽度)
+        期望[1::2] = np.clip(期望[1::2], 0, 图像高度)
+        np.testing.assert_allclose(框[0], 期望, rtol=1e-5, atol=1e-3)
+        assert 类别.tolist() == [0]
+
+
+class TestONNX检测后端单元测试:
+    """ONNX 检测后端单元测试"""
+
+    def test_阈值过滤与按类别抑制(self, tmp_path):
+        路径 = 创建检测模型(str(tmp_path / "model.onnx"), v8预测([
+            (20, 20, 10, 10, 0, 0.6),
+            (21, 20, 10, 10, 0, 0.9),   # 与上一个同类重叠，保留分数高者
+            (21, 20, 10, 10, 1, 0.7),   # 不同类别不互相抑制
+            (50, 50, 10, 10, 1, 0.3),   # 低于阈值
+        ]), {0: "monster", 1: "npc"})
+        后端 = ONNX检测后端(路径)
+
+        框, 置信度, 类别 = 后端.检测(np.zeros((64, 64, 3), np.uint8), 0.5, 0.4)
+
+        np.testing.assert_allclose(置信度, [0.9, 0.7])
+        assert 类别.tolist() == [0, 1]
+        np.testing.assert_allclose(框[0], [16, 15, 26, 25])
+
+    def test_YOLOv5布局(self, tmp_path):
+        # (候选数, 5 + 类别数)，无类别元数据时按形状判断布局
+        预测 = np.zeros((8, 7), np.float32)
+        预测[3] = (30, 30, 10, 10, 0.9, 0.1, 0.8)
+        路径 = 创建检测模型(str(tmp_path / "model.onnx"), 预测)
+        后端 = ONNX检测后端(路径)
+
+        框, 置信度, 类别 = 后端.检测(np.zeros((64, 64, 3), np.uint8), 0.5, 0.4)
+
+        np.testing.assert_allclose(置信度, [0.72], rtol=1e-5)
+        assert 类别.tolist() == [1]
+        np.testing.assert_allclose(框[0], [25, 25, 35, 35])
+
+    def test_输入缓冲跨帧复用(self, tmp_path):
+        路径 = 创建检测模型(str(tmp_path / "model.onnx"), v8预测([(32, 32, 4, 4, 0, 0.9)]))
+        后端 = ONNX检测后端(路径)
+        缓冲 = 后端._输入缓冲
+
+        后端.检测(np.full((32, 64, 3), 255, np.uint8), 0.5, 0.4)
+        后端.检测(np.zeros((64, 32, 3), np.uint8), 0.5, 0.4)
+
+        assert 后端._输入缓冲 is 缓冲
+        # 布局改变后上一帧的图像区域被重新填充
+        np.testing.assert_allclose(缓冲[0, :, 0, 0], 114 / 255, rtol=1e-6)
+
+    def test_自动选择后端(self, tmp_path):
+        路径 = 创建检测模型(str(tmp_path / "model.onnx"), v8预测([(32, 32, 10, 10, 1, 0.9)]))
+
+        检测器 = YOLO检测器(模型路径=路径, 启用缓存=False)
+
+        assert 检测器.后端 == "onnx"
+        assert 检测器.是否已加载()
+        结果 = 检测器.检测(np.zeros((64, 64, 3), np.uint8))
+        assert len(结果) == 1
+        assert 结果[0].类型 == 检测器._映射实体类型(1)
+        assert 结果[0].边界框 == (27, 27, 10, 10)
+        assert 检测器.获取检测器完整状态()["模型"]["后端"] == "onnx"
+
+    def test_显式指定后端(self, tmp_path):
+        assert YOLO检测器(模型路径="模型.pt", 启用缓存=False).后端 == "ultralytics"
+        assert YOLO检测器(模型路径="模型.pt", 启用缓存=False, 后端="onnx").后端 == "onnx"
+        assert YOLO检测器(模型路径="模型.onnx", 启用缓存=False,
+                          后端="ultralytics").后端 == "ultralytics"
+
+    def test_ONNX模型不存在时未加载(self):
+        检测器 = YOLO检测器(模型路径="不存在的模型.onnx", 启用缓存=False)
+        assert 检测器.后端 == "onnx"
+        assert not 检测器.是否已加载()
+        assert 检测器.检测(np.zeros((64, 64, 3), np.uint8)) == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--hypothesis-show-statistics"])
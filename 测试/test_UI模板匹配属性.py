@@ -0,0 +1,218 @@
+"""
+UI模板匹配属性测试
+
+属性 1: 由粗到精匹配与全画面匹配一致
+*对于任意* 背景和放置的模板，金字塔加搜索区域的检测结果包含所有放置的模板，且不多于全画面逐一匹配的结果
+
+属性 2: 高优先级模板短路
+*对于任意* 同时出现的UI元素，匹配到加载界面或死亡界面后不再匹配其余模板
+
+属性 3: 搜索区域限定范围
+*对于任意* 搜索区域，区域外的模板不被检测，区域容不下模板时退回整个画面
+
+属性 4: 复用上游灰度图
+*对于任意* 经过检测缓存查询的帧，状态识别可直接使用缓存计算的灰度图，结果与自行转换相同
+
+Feature: roi-pyramid-ui-matching
+"""
+
+import cv2
+import numpy as np
+import pytest
+from hypothesis import given, strategies as st, settings
+
+from 核心.状态识别器 import 状态识别器
+from 核心.配置管理 import UIRegions
+from 核心.智能缓存 import 智能缓存
+from 核心.缓存策略 import 缓存策略
+from 核心.数据类型 import 游戏状态
+
+
+画面形状 = (270, 480)
+
+
+def 生成背景(种子: int) -> np.ndarray:
+    """生成平滑的随机背景（BGR）"""
+    噪声 = np.random.RandomState(种子).randint(0, 256, 画面形状, dtype=np.uint8)
+    灰度 = cv2.GaussianBlur(噪声, (0, 0), 3)
+    return cv2.cvtColor(灰度, cv2.COLOR_GRAY2BGR)
+
+
+def 生成模板(高度: int, 宽度: int, 种子: int) -> np.ndarray:
+    """生成由 4x4 色块组成的灰度模板，近似界面元素的块状外观"""
+    色块 = np.random.RandomState(种子).randint(0, 256, (高度 // 4, 宽度 // 4), dtype=np.uint8)
+    return np.kron(色块, np.ones((4, 4), dtype=np.uint8))
+
+
+def 放置(画面: np.ndarray, 模板: np.ndarray, x: int, y: int) -> None:
+    """把灰度模板画到 BGR 画面上"""
+    高度, 宽度 = 模板.shape
+    画面[y:y + 高度, x:x + 宽度] = 模板[:, :, np.newaxis]
+
+
+def 全画面匹配(画面: np.ndarray, 模板表: dict, 阈值: float = 0.7) -> set:
+    """原来的做法: 每个模板在整个画面上匹配"""
+    灰度 = cv2.cvtColor(画面, cv2.COLOR_BGR2GRAY)
+    return {
+        名称 for 名称, 模板 in 模板表.items()
+        if cv2.minMaxLoc(cv2.matchTemplate(灰度, 模板, cv2.TM_CCOEFF_NORMED))[1] > 阈值
+    }
+
+
+def 创建识别器(模板表: dict, UI区域=None) -> 状态识别器:
+    识别器 = 状态识别器(UI区域=UI区域)
+    for 名称, 模板 in 模板表.items():
+        识别器.添加UI模板(名称, 模板)
+    return 识别器
+
+
+class Test由粗到精匹配:
+    """
+    属性测试: 金字塔与搜索区域
+    
+    Feature: roi-pyramid-ui-matching, Property 1, 3
+    """
+    
+    @settings(max_examples=40, deadline=None)
+    @given(
+        种子=st.integers(min_value=0, max_value=10000),
+        模板边长=st.lists(st.sampled_from([24, 32, 48, 64]), min_size=3, max_size=3),
+        放置位置=st.lists(
+            st.one_of(st.none(), st.tuples(st.integers(0, 400), st.integers(0, 190))),
+            min_size=3, max_size=3
+        )
+    )
+    def test_与全画面匹配一致(self, 种子, 模板边长, 放置位置):
+        """放置的模板都能检测到，且检测结果是全画面匹配结果的子集"""
+        名称列表 = ["菜单", "对话框", "血条"]
+        模板表 = {
+            名称: 生成模板(边长, 边长 + 8, 种子 + i + 1)
+            for i, (名称, 边长) in enumerate(zip(名称列表, 模板边长))
+        }
+        画面 = 生成背景(种子)
+        区域表 = {}
+        已放置 = set()
+        for 名称, 位置 in zip(名称列表, 放置位置):
+            if 位置 is None:
+                continue
+            x, y = min(位置[0], 480 - 72), min(位置[1], 270 - 64)
+            放置(画面, 模板表[名称], x, y)
+            区域表[名称] = (x, y, 模板表[名称].shape[1], 模板表[名称].shape[0])
+            已放置.add(名称)
+        
+        检测 = set(创建识别器(模板表, 区域表)._检测UI元素(画面))
+        期望 = 全画面匹配(画面, 模板表)
+        
+        # 后放置的模板可能遮挡先放置的，只要求完整可见的模板被检测到
+        可见 = {名称 for 名称 in 已放置 if 名称 in 期望}
+        assert 可见 <= 检测 <= 期望 | 已放置
+    
+    def test_模板金字塔层数(self):
+        """模板缩小到最小边长以下时不再增加层数"""
+        识别器 = 创建识别器({"菜单": 生成模板(64, 96, 0), "血条": 生成模板(24, 200, 1)})
+        assert len(识别器._UI模板金字塔["菜单"]) == 3
+        assert len(识别器._UI模板金字塔["血条"]) == 1
+    
+    def test_搜索区域外不检测(self):
+        """模板只在自己的搜索区域（含边距）内匹配"""
+        模板 = 生成模板(32, 48, 5)
+        画面 = 生成背景(5)
+        放置(画面, 模板, 300, 200)
+        
+        识别器 = 创建识别器({"对话框": 模板}, {"对话框": (0, 0, 200, 100)})
+        assert 识别器._检测UI元素(画面) == []
+        
+        识别器.设置UI区域({"对话框": (290, 190, 80, 60)})
+        assert 识别器._检测UI元素(画面) == ["对话框"]
+    
+    def test_区域容不下模板时搜索整个画面(self):
+        """配置的区域比模板小时退回全画面匹配"""
+        模板 = 生成模板(64, 64, 6)
+        画面 = 生成背景(6)
+        放置(画面, 模板, 400, 150)
+        
+        识别器 = 创建识别器({"血条": 模板}, {"血条": (0, 0, 10, 10)})
+        assert 识别器._计算搜索区域("血条", 画面.shape, 模板.shape) == (0, 0, 480, 270)
+        assert 识别器._检测UI元素(画面) == ["血条"]
+    
+    def test_从配置档案读取区域(self):
+        """UIRegions 按 UI模板区域 映射到对应模板"""
+        区域 = UIRegions(health_bar=(10, 20, 200, 30), dialog_area=(100, 400, 800, 200))
+        识别器 = 状态识别器(UI区域=区域)
+        assert 识别器._UI搜索区域 == {"血条": (10, 20, 200, 30), "对话框": (100, 400, 800, 200)}
+        
+        识别器.设置UI区域(None)
+        assert 识别器._UI搜索区域 == {}
+
+
+class Test短路与灰度复用:
+    """
+    属性测试: 高优先级模板短路、复用上游灰度图
+    
+    Feature: roi-pyramid-ui-matching, Property 2, 4
+    """
+    
+    @settings(max_examples=20, deadline=None)
+    @given(
+        种子=st.integers(min_value=0, max_value=10000),
+        短路模板=st.sampled_from(["加载界面", "死亡界面"])
+    )
+    def test_高优先级模板短路(self, 种子, 短路模板):
+        """出现加载界面或死亡界面时只匹配到它为止，状态判定不变"""
+        模板表 = {
+            "菜单": 生成模板(32, 32, 种子 + 1),
+            "对话框": 生成模板(32, 48, 种子 + 2),
+            短路模板: 生成模板(48, 64, 种子 + 3),
+        }
+        画面 = 生成背景(种子)
+        放置(画面, 模板表["菜单"], 10, 10)
+        放置(画面, 模板表["对话框"], 100, 10)
+        放置(画面, 模板表[短路模板], 200, 100)
+        
+        识别器 = 创建识别器(模板表)
+        已匹配 = []
+        原匹配 = 识别器._匹配UI模板
+        
+        def 记录匹配(灰度图, 名称, 区域金字塔):
+            已匹配.append(名称)
+            return 原匹配(灰度图, 名称, 区域金字塔)
+        
+        识别器._匹配UI模板 = 记录匹配
+        结果 = 识别器.识别状态(画面, [])
+        
+        assert 已匹配 == [短路模板]
+        assert 结果.检测到的UI元素 == [短路模板]
+        assert 结果.状态 == (游戏状态.加载 if 短路模板 == "加载界面" else 游戏状态.死亡)
+    
+    def test_没有模板时不转换灰度图(self):
+        """未加载任何模板时直接返回，不做颜色转换"""
+        识别器 = 状态识别器()
+        识别器._UI模板缓存.clear()
+        assert 识别器._检测UI元素(np.zeros((4, 4, 7), dtype=np.uint8)) == []
+    
+    @settings(max_examples=20, deadline=None)
+    @given(种子=st.integers(min_value=0, max_value=10000))
+    def test_复用缓存灰度图(self, 种子):
+        """检测缓存查询过的帧可取回灰度图，状态识别结果与自行转换相同"""
+        模板表 = {"菜单": 生成模板(32, 48, 种子 + 1), "血条": 生成模板(24, 24, 种子 + 2)}
+        画面 = 生成背景(种子)
+        放置(画面, 模板表["菜单"], 50, 60)
+        
+        缓存 = 智能缓存(策略=缓存策略(比较方法="mse", 预热帧数=0))
+        缓存.存储(生成背景(种子 + 1), [])
+        缓存.获取(画面)
+        灰度图 = 缓存.获取预处理帧(画面).灰度
+        
+        assert 缓存.获取预处理帧(画面.copy()) is None
+        assert np.array_equal(灰度图, cv2.cvtColor(画面, cv2.COLOR_BGR2GRAY))
+        
+        识别器 = 创建识别器(模板表)
+        assert 识别器.识别状态(None, [], 灰度图=灰度图).检测到的UI元素 == \
+            识别器.识别状态(画面, []).检测到的UI元素 == ["菜单"]
+        
+        缓存.清空()
+        assert 缓存.获取预处理帧(画面) is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
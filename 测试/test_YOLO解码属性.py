@@ -0,0 +1,152 @@
+"""
+YOLO网络输出解码属性测试
+
+**Property 1: 非极大值抑制正确性**
+*For any* 边界框和分数，保留的同类别框之间 IoU 都小于阈值，
+每个被抑制的框都与一个分数不低于它的同类别保留框 IoU >= 阈值
+
+**Property 2: 向量化解码与逐格解码一致**
+*For any* 网络输出张量，结构化数组解码结果应与逐网格、逐锚框解码的结果一致
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+from hypothesis import given, strategies as st, settings
+from hypothesis.extra.numpy import arrays
+
+from 工具.目标检测 import (
+    边界框, 计算IoU, 计算重叠矩阵, 非极大值抑制, 解码网络输出, 解码网络输出数组,
+    检测数组转边界框, _sigmoid, _softmax
+)
+
+
+锚框 = [0.57, 0.67, 1.87, 2.06, 3.33, 5.47]
+
+
+# ==================== 策略定义 ====================
+
+@st.composite
+def 框与分数(draw, 最大数量=40):
+    """生成 (框数组, 分数数组, 类别数组)"""
+    数量 = draw(st.integers(min_value=0, max_value=最大数量))
+    坐标 = draw(arrays(np.float64, (数量, 4),
+                      elements=st.floats(min_value=0.0, max_value=1.0, width=32)))
+    框 = np.concatenate([坐标[:, :2], 坐标[:, :2] + 坐标[:, 2:] * 0.5], axis=1)
+    分数 = draw(arrays(np.float64, (数量,),
+                      elements=st.floats(min_value=0.0, max_value=1.0, width=32)))
+    类别 = draw(arrays(np.int64, (数量,), elements=st.integers(0, 2)))
+    return 框, 分数, 类别
+
+
+def 逐格解码(网络输出, 锚框, 类别数, 目标阈值, NMS阈值):
+    """逐网格、逐锚框解码并逐对计算 IoU 的参考实现"""
+    网络输出 = 网络输出.copy()
+    网格高度, 网格宽度, 框数量 = 网络输出.shape[:3]
+    网络输出[..., 4] = _sigmoid(网络输出[..., 4])
+    网络输出[..., 5:] = 网络输出[..., 4][..., np.newaxis] * _softmax(网络输出[..., 5:])
+    网络输出[..., 5:] *= 网络输出[..., 5:] > 目标阈值
+    
+    边界框列表 = []
+    for 行 in range(网格高度):
+        for 列 in range(网格宽度):
+            for b in range(框数量):
+                类别概率 = 网络输出[行, 列, b, 5:]
+                if np.sum(类别概率) > 0:
+                    x, y, w, h = 网络输出[行, 列, b, :4]
+                    x = (列 + _sigmoid(x)) / 网格宽度
+                    y = (行 + _sigmoid(y)) / 网格高度
+                    w = 锚框[2 * b] * np.exp(w) / 网格宽度
+                    h = 锚框[2 * b + 1] * np.exp(h) / 网格高度
+                    边界框列表.append(边界框(x - w / 2, y - h / 2, x + w / 2, y + h / 2,
+                                           网络输出[行, 列, b, 4], 类别概率))
+    
+    for c in range(类别数):
+        排序索引 = np.argsort([-框.类别概率[c] for 框 in 边界框列表], kind='stable')
+        for i, 索引i in enumerate(排序索引):
+            if 边界框列表[索引i].类别概率[c] == 0:
+                continue
+            for 索引j in 排序索引[i + 1:]:
+                if 计算IoU(边界框列表[索引i], 边界框列表[索引j]) >= NMS阈值:
+                    边界框列表[索引j].类别概率[c] = 0
+    
+    return [框 for 框 in 边界框列表 if 框.获取分数() > 目标阈值]
+
+
+# ==================== Property 1: 非极大值抑制正确性 ====================
+
+class Test非极大值抑制属性:
+    """Property 1: 非极大值抑制正确性"""
+    
+    @given(数据=框与分数(), 阈值=st.floats(min_value=0.1, max_value=0.9), 分类别=st.booleans())
+    @settings(max_examples=100, deadline=None)
+    def test_保留框互不重叠且抑制有据(self, 数据, 阈值, 分类别):
+        框, 分数, 类别 = 数据
+        if not 分类别:
+            类别 = np.zeros(len(分数), dtype=np.int64)
+        保留 = 非极大值抑制(框, 分数, 阈值, 类别数组=类别 if 分类别 else None)
+        
+        assert np.all(np.diff(分数[保留]) <= 0), "保留框应按分数降序"
+        
+        重叠 = 计算重叠矩阵(框.astype(np.float32), 框.astype(np.float32))
+        同类 = 类别[:, np.newaxis] == 类别[np.newaxis, :]
+        for 位置, i in enumerate(保留):
+            for j in 保留[位置 + 1:]:
+                assert not (同类[i, j] and 重叠[i, j] >= 阈值)
+        
+        被抑制 = np.setdiff1d(np.arange(len(分数)), 保留)
+        for j in 被抑制:
+            assert np.any(同类[保留, j] & (重叠[保留, j] >= 阈值) & (分数[保留] >= 分数[j]))
+    
+    def test_空输入(self):
+        assert len(非极大值抑制(np.zeros((0, 4)), np.zeros(0))) == 0
+
+
+# ==================== Property 2: 向量化解码与逐格解码一致 ====================
+
+class Test向量化解码属性:
+    """Property 2: 向量化解码与逐格解码一致"""
+    
+    @given(
+        网络输出=arrays(np.float64, (4, 4, 3, 8),
+                     elements=st.floats(min_value=-4.0, max_value=4.0, width=32)),
+        目标阈值=st.floats(min_value=0.1, max_value=0.6),
+        NMS阈值=st.floats(min_value=0.2, max_value=0.8)
+    )
+    @settings(max_examples=50, deadline=None)
+    def test_与逐格解码一致(self, 网络输出, 目标阈值, NMS阈值):
+        原始 = 网络输出.copy()
+        期望 = 逐格解码(网络输出, 锚框, 3, 目标阈值, NMS阈值)
+        结果 = 解码网络输出数组(网络输出, 锚框, 3, 目标阈值, NMS阈值)
+        
+        assert np.array_equal(网络输出, 原始), "解码不应修改网络输出"
+        assert len(结果) == len(期望)
+        
+        期望框 = np.array([[框.x最小, 框.y最小, 框.x最大, 框.y最大] for 框 in 期望]).reshape(-1, 4)
+        np.testing.assert_allclose(结果['框'], 期望框, rtol=1e-6, atol=1e-9)
+        np.testing.assert_allclose(结果['分数'], [框.获取分数() for 框 in 期望], rtol=1e-6)
+        assert 结果['标签'].tolist() == [int(框.获取标签()) for 框 in 期望]
+        assert np.all(结果['分数'] > 目标阈值)
+    
+    def test_转换为边界框(self):
+        rng = np.random.default_rng(0)
+        网络输出 = rng.normal(0, 2, (5, 5, 3, 8))
+        结果 = 解码网络输出数组(网络输出, 锚框, 3)
+        边界框列表 = 解码网络输出(网络输出, 锚框, 3)
+        
+        assert 边界框列表 and len(边界框列表) == len(结果)
+        for 框, 记录 in zip(边界框列表, 结果):
+            assert isinstance(框, 边界框)
+            assert (框.x最小, 框.y最小, 框.x最大, 框.y最大) == tuple(记录['框'].tolist())
+            assert 框.获取标签() == 记录['标签']
+            assert 框.获取分数() == 记录['分数']
+        
+        assert 检测数组转边界框(结果[:0]) == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
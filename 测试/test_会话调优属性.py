@@ -0,0 +1,196 @@
+"""
+会话选项调优属性测试
+
+属性 1: 会话参数往返
+*对于任意* 合法会话参数，to_dict / from_dict 往返后相等，应用到 SessionOptions 后各选项一致
+
+属性 2: 调优选出 P95 最低的候选
+调优结果的最佳参数是所有已测量候选中 P95 延迟最低的一个，默认参数总被测量
+
+属性 3: 调优结果持久化并自动应用
+保存到推理配置后其他字段保留，统一推理引擎 加载同一模型时使用调优参数，
+CPU 核心数或模型不同时使用默认参数
+
+Feature: session-autotune
+"""
+
+import os
+import json
+import time
+import numpy as np
+import pytest
+from hypothesis import given, strategies as st, settings
+
+onnx = pytest.importorskip("onnx")
+ort = pytest.importorskip("onnxruntime")
+
+from 核心.ONNX推理 import (
+    ONNX推理引擎, 统一推理引擎, 会话调优参数, 读取会话调优参数, 执行模式映射, 图优化级别映射
+)
+from 工具.性能基准测试 import 会话参数调优器, 并发负载模拟器, 调优结果, 延迟统计
+from 测试.onnx测试模型 import 创建ONNX模型
+
+
+@pytest.fixture
+def 模型路径(tmp_path):
+    return 创建ONNX模型(str(tmp_path / "模型.onnx"), (3, 8, 8))
+
+
+会话参数策略 = st.builds(
+    会话调优参数,
+    intra线程数=st.integers(min_value=0, max_value=16),
+    inter线程数=st.integers(min_value=0, max_value=16),
+    执行模式=st.sampled_from(sorted(执行模式映射)),
+    图优化级别=st.sampled_from(sorted(图优化级别映射)),
+    启用内存池=st.booleans(),
+    启用内存模式=st.booleans(),
+)
+
+
+class Test会话参数属性:
+    """属性 1: 会话参数往返"""
+
+    @given(参数=会话参数策略)
+    @settings(max_examples=50, deadline=None)
+    def test_字典往返与应用(self, 参数):
+        assert 会话调优参数.from_dict(json.loads(json.dumps(参数.to_dict()))) == 参数
+
+        选项 = 参数.应用到(ort.SessionOptions())
+        assert 选项.intra_op_num_threads == 参数.intra线程数
+        assert 选项.inter_op_num_threads == 参数.inter线程数
+        assert 选项.execution_mode == getattr(ort.ExecutionMode, 执行模式映射[参数.执行模式])
+        assert 选项.graph_optimization_level == getattr(
+            ort.GraphOptimizationLevel, 图优化级别映射[参数.图优化级别])
+        assert 选项.enable_cpu_mem_arena == 参数.启用内存池
+        assert 选项.enable_mem_pattern == 参数.启用内存模式
+
+    def test_无效参数(self):
+        with pytest.raises(ValueError):
+            会话调优参数(执行模式="async")
+        with pytest.raises(ValueError):
+            会话调优参数(图优化级别="max")
+        with pytest.raises(ValueError):
+            会话调优参数(intra线程数=-1)
+
+    def test_引擎使用会话参数(self, 模型路径):
+        参数 = 会话调优参数(intra线程数=1, 执行模式="parallel", inter线程数=2, 图优化级别="basic")
+        引擎 = ONNX推理引擎(模型路径, 使用GPU=False, 预热=False, 会话参数=参数)
+        默认 = ONNX推理引擎(模型路径, 使用GPU=False, 预热=False)
+
+        assert 引擎.会话参数 == 参数
+        assert 默认.会话参数 == 会话调优参数()
+        帧 = np.random.RandomState(0).rand(3, 8, 8).astype(np.float32)
+        assert np.allclose(引擎.预测(帧), 默认.预测(帧), atol=1e-6)
+
+
+class Test调优属性:
+    """属性 2: 调优选出 P95 最低的候选"""
+
+    def test_指定候选时选出P95最低(self, 模型路径):
+        候选列表 = [
+            会话调优参数(intra线程数=1),
+            会话调优参数(intra线程数=1, 图优化级别="basic", 启用内存池=False, 启用内存模式=False),
+        ]
+        结果 = 会话参数调优器(测试次数=20, 预热次数=2, 并发负载=False).调优(模型路径, 候选列表=候选列表)
+
+        assert len(结果.候选结果) == 3
+        assert 结果.候选结果[0]['参数'] == 会话调优参数().to_dict()
+        最低 = min(结果.候选结果, key=lambda r: (r['延迟统计'].P95延迟, r['延迟统计'].平均延迟))
+        assert 结果.最佳参数 == 最低['参数']
+        assert 结果.最佳延迟统计.P95延迟 > 0
+        assert 结果.CPU核心数 == os.cpu_count()
+
+    def test_逐项搜索不重复测量(self, 模型路径, monkeypatch):
+        测量记录 = []
+        延迟表 = {1: 5.0, "parallel": 4.0, "basic": 3.0}
+
+        def 假测量(self, 路径, 参数):
+            测量记录.append(参数)
+            P95 = 10.0
+            for 键 in (参数.intra线程数, 参数.执行模式, 参数.图优化级别):
+                P95 = min(P95, 延迟表.get(键, P95))
+            return 延迟统计(P95延迟=P95, 平均延迟=P95)
+
+        monkeypatch.setattr(会话参数调优器, "测量", 假测量)
+        结果 = 会话参数调优器(并发负载=False).调优(模型路径)
+
+        assert len({tuple(p.to_dict().values()) for p in 测量记录}) == len(测量记录)
+        assert 结果.最佳参数["图优化级别"] == "basic"
+        assert 结果.最佳延迟统计.P95延迟 == 3.0
+        assert 结果.默认延迟统计.P95延迟 == 10.0
+        assert 结果.P95改善比例 == pytest.approx(0.7)
+
+    def test_完整网格候选(self):
+        候选 = 会话参数调优器().生成网格候选(核心数=8)
+        assert len({tuple(p.to_dict().values()) for p in 候选}) == len(候选)
+        assert {p.intra线程数 for p in 候选} == {1, 2, 4, 8}
+        assert {p.执行模式 for p in 候选} == {"sequential", "parallel"}
+        assert {p.图优化级别 for p in 候选} == {"basic", "extended", "all"}
+
+    def test_负载线程运行并停止(self):
+        负载 = 并发负载模拟器(截图尺寸=(320, 180), 目标帧率=200, 检测输入尺寸=(64, 64))
+        with 负载:
+            time.sleep(0.2)
+            线程列表 = list(负载._线程列表)
+            assert all(线程.is_alive() for 线程 in 线程列表)
+        assert not any(线程.is_alive() for 线程 in 线程列表)
+        assert 负载.处理帧数["截图"] > 0 and 负载.处理帧数["检测"] > 0
+
+
+class Test调优持久化:
+    """属性 3: 调优结果持久化并自动应用"""
+
+    def 调优结果(self, 模型路径) -> 调优结果:
+        return 调优结果(
+            模型路径=模型路径,
+            最佳参数=会话调优参数(intra线程数=1, 图优化级别="extended").to_dict(),
+            最佳延迟统计=延迟统计(P95延迟=1.0),
+            默认延迟统计=延迟统计(P95延迟=2.0),
+            CPU核心数=os.cpu_count(),
+        )
+
+    def test_保存保留其他字段(self, 模型路径, tmp_path):
+        配置路径 = str(tmp_path / "推理配置.json")
+        with open(配置路径, "w", encoding="utf-8") as f:
+            json.dump({"首选后端": "onnx", "说明": {"首选后端": "..."}}, f, ensure_ascii=False)
+
+        assert 会话参数调优器.保存到配置(self.调优结果(模型路径), 配置路径)
+
+        with open(配置路径, encoding="utf-8") as f:
+            配置 = json.load(f)
+        assert 配置["首选后端"] == "onnx"
+        assert 配置["会话调优"]["参数"]["图优化级别"] == "extended"
+        assert 配置["会话调优"]["CPU核心数"] == os.cpu_count()
+        assert "会话调优" in 配置["说明"]
+
+    def test_统一推理引擎自动应用(self, 模型路径, tmp_path):
+        配置路径 = str(tmp_path / "推理配置.json")
+        会话参数调优器.保存到配置(self.调优结果(模型路径), 配置路径)
+        with open(配置路径, encoding="utf-8") as f:
+            配置 = json.load(f)
+        # 输入尺寸以模型为准（预热按模型形状构造输入）
+        配置.update(输入宽度=None, 输入高度=None)
+
+        引擎 = 统一推理引擎(模型路径, 首选后端="onnx", 使用GPU=False, 配置=配置)
+
+        assert 引擎._引擎.会话参数 == 会话调优参数(intra线程数=1, 图优化级别="extended")
+        assert 引擎.获取状态信息()["会话参数"]["intra线程数"] == 1
+
+        # 保存配置时保留调优结果
+        另存路径 = str(tmp_path / "另存.json")
+        assert 引擎.保存配置(另存路径)
+        with open(另存路径, encoding="utf-8") as f:
+            assert json.load(f)["会话调优"] == 配置["会话调优"]
+
+    def test_CPU或模型不同时不应用(self, 模型路径, tmp_path):
+        调优 = {"模型路径": 模型路径, "参数": {"intra线程数": 1}, "CPU核心数": os.cpu_count()}
+
+        assert 读取会话调优参数({"会话调优": 调优}, 模型路径) == 会话调优参数(intra线程数=1)
+        assert 读取会话调优参数({"会话调优": {**调优, "CPU核心数": os.cpu_count() + 1}}, 模型路径) is None
+        assert 读取会话调优参数({"会话调优": 调优}, str(tmp_path / "其他.onnx")) is None
+        assert 读取会话调优参数({"会话调优": {**调优, "参数": {"执行模式": "async"}}}) is None
+        assert 读取会话调优参数({}) is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--hypothesis-show-statistics"])
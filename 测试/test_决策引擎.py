@@ -294,6 +294,83 @@ class Test决策执行:
         assert "紧急" in 结果.原因
 
 
+class Test规则编译:
+    """测试按状态分桶的规则分派"""
+    
+    def test_仅评估当前状态可触发的规则(self):
+        """其他状态的规则不应调用条件函数"""
+        引擎 = 决策引擎()
+        调用记录 = []
+        
+        def 对话条件(ctx):
+            调用记录.append("对话")
+            return True
+        
+        引擎.添加规则(决策规则(名称="对话规则", 优先级=80, 条件=对话条件,
+                             动作=21, 适用状态=(游戏状态.对话,)))
+        引擎.添加规则(决策规则(名称="通用规则", 优先级=10,
+                             条件=lambda ctx: True, 动作=0))
+        
+        结果 = 引擎._应用规则(决策上下文(游戏状态=游戏状态.战斗))
+        assert 结果.动作索引 == 0
+        assert 调用记录 == []
+        
+        结果 = 引擎._应用规则(决策上下文(游戏状态=游戏状态.对话))
+        assert 结果.动作索引 == 21
+        assert 调用记录 == ["对话"]
+    
+    def test_紧急规则按元数据排除(self):
+        """排除紧急规则依据 紧急 字段而非名称"""
+        引擎 = 决策引擎()
+        引擎.添加规则(决策规则(名称="闪避", 优先级=100,
+                             条件=lambda ctx: True, 动作=19, 紧急=True))
+        引擎.添加规则(决策规则(名称="紧急_名称但非紧急", 优先级=50,
+                             条件=lambda ctx: True, 动作=0))
+        
+        上下文 = 决策上下文(游戏状态=游戏状态.空闲)
+        assert 引擎._应用规则(上下文).动作索引 == 19
+        assert 引擎._应用规则(上下文, 排除紧急=True).动作索引 == 0
+    
+    def test_动作冷却跳过规则(self):
+        """动作冷却中的规则被跳过，重置后恢复"""
+        引擎 = 决策引擎()
+        引擎.添加规则(决策规则(名称="技能", 优先级=50,
+                             条件=lambda ctx: True, 动作=9))
+        引擎.添加规则(决策规则(名称="前进", 优先级=10,
+                             条件=lambda ctx: True, 动作=0))
+        上下文 = 决策上下文(游戏状态=游戏状态.战斗)
+        
+        assert 引擎._应用规则(上下文).动作索引 == 9
+        
+        引擎.记录动作执行(9)
+        assert 引擎._应用规则(上下文).动作索引 == 0
+        
+        引擎.重置冷却()
+        assert 引擎._应用规则(上下文).动作索引 == 9
+    
+    def test_移除规则后重新编译(self):
+        """移除规则后分派结果随之更新"""
+        引擎 = 决策引擎()
+        引擎.添加规则(决策规则(名称="高", 优先级=50, 条件=lambda ctx: True, 动作=1))
+        引擎.添加规则(决策规则(名称="低", 优先级=10, 条件=lambda ctx: True, 动作=2))
+        上下文 = 决策上下文(游戏状态=游戏状态.空闲)
+        
+        assert 引擎._应用规则(上下文).动作索引 == 1
+        引擎.移除规则("高")
+        assert 引擎._应用规则(上下文).动作索引 == 2
+        引擎.清空规则()
+        assert 引擎._应用规则(上下文) is None
+    
+    def test_预定义规则带有分派元数据(self):
+        """预定义规则声明了适用状态或紧急标记"""
+        for 规则 in 获取所有规则():
+            if 规则.名称.startswith("紧急"):
+                assert 规则.紧急
+            else:
+                assert not 规则.紧急
+                assert 规则.适用状态
+
+
 class Test预定义规则:
     """测试预定义规则集"""
     
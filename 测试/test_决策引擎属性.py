@@ -619,5 +619,55 @@ class Test决策日志完整性属性:
             f"决策来源'{日志.最终决策.来源}'应该是{有效来源}之一"
 
 
+# ==================== 检测特征与逐条扫描一致 ====================
+
+检测结果策略 = st.builds(
+    检测结果,
+    类型=st.sampled_from(list(实体类型)),
+    置信度=st.floats(min_value=0.0, max_value=1.0),
+    边界框=st.just((0, 0, 10, 10)),
+    中心点=st.just((5, 5)),
+    方向=st.sampled_from(list(方向)),
+    距离=st.floats(min_value=0.0, max_value=500.0)
+)
+
+
+class Test检测特征一致性属性:
+    """
+    规则条件改为查询 决策上下文.特征 后，结果应与直接遍历检测列表一致
+    """
+    
+    @given(
+        检测列表=st.lists(检测结果策略, max_size=20),
+        类型=st.sampled_from(list(实体类型)),
+        阈值=st.one_of(st.none(), st.floats(min_value=0.0, max_value=500.0)),
+        方向集合=st.sets(st.sampled_from(list(方向)))
+    )
+    @settings(max_examples=100)
+    def test_特征查询与遍历一致(self, 检测列表, 类型, 阈值, 方向集合):
+        上下文 = 决策上下文(游戏状态=游戏状态.战斗, 检测结果=检测列表)
+        特征 = 上下文.特征
+        
+        同类 = [r for r in 检测列表 if r.类型 == 类型]
+        期望数量 = len(同类) if 阈值 is None else len([r for r in 同类 if r.距离 < 阈值])
+        assert 特征.数量(类型, 阈值) == 期望数量
+        assert 特征.存在(类型, 阈值) == (期望数量 > 0)
+        assert 特征.最近距离(类型) == min((r.距离 for r in 同类), default=float("inf"))
+        assert 特征.方向数量(类型, 方向集合) == len([r for r in 同类 if r.方向 in 方向集合])
+    
+    def test_替换等长检测列表后重建特征(self):
+        """检测结果 换成另一个等长列表时，特征 按新列表重新构建"""
+        def 检测(类型):
+            return 检测结果(类型=类型, 置信度=0.9, 边界框=(0, 0, 10, 10),
+                        中心点=(5, 5), 方向=方向.中心, 距离=50.0)
+        
+        上下文 = 决策上下文(游戏状态=游戏状态.战斗, 检测结果=[检测(实体类型.怪物)])
+        assert 上下文.特征.数量(实体类型.怪物) == 1
+        
+        上下文.检测结果 = [检测(实体类型.NPC)]
+        assert 上下文.特征.数量(实体类型.怪物) == 0
+        assert 上下文.特征.数量(实体类型.NPC) == 1
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -347,6 +347,116 @@ class Test切换原子性属性:
         管理器.关闭()
 
 
+class 慢速模型:
+    """推理耗时固定的虚拟 ONNX 会话，记录同时进行的推理数"""
+    
+    def __init__(self, 耗时: float = 0.02):
+        self.耗时 = 耗时
+        self._计数锁 = threading.Lock()
+        self.当前并发 = 0
+        self.最大并发 = 0
+    
+    def run(self, output_names, input_dict):
+        with self._计数锁:
+            self.当前并发 += 1
+            self.最大并发 = max(self.最大并发, self.当前并发)
+        time.sleep(self.耗时)
+        with self._计数锁:
+            self.当前并发 -= 1
+        return [np.array([[0.1, 0.2, 0.3, 0.4]])]
+    
+    def get_inputs(self):
+        return 虚拟模型A().get_inputs()
+    
+    def get_outputs(self):
+        return 虚拟模型A().get_outputs()
+
+
+def 并发执行(函数, 线程数: int) -> None:
+    """在多个线程中同时执行函数并等待结束"""
+    线程列表 = [threading.Thread(target=函数) for _ in range(线程数)]
+    for t in 线程列表:
+        t.start()
+    for t in 线程列表:
+        t.join(timeout=10)
+
+
+class Test无锁读路径:
+    """预测只读取活动模型快照，不与管理器的其他操作互斥"""
+    
+    def test_管理器锁被占用时仍可预测(self):
+        管理器 = 创建测试管理器()
+        测试图像 = np.zeros((4, 4, 3), dtype=np.float32)
+        结果 = []
+        
+        with 管理器._锁:
+            线程 = threading.Thread(target=lambda: 结果.append(管理器.预测(测试图像)))
+            线程.start()
+            线程.join(timeout=2)
+            assert not 线程.is_alive(), "预测不应等待管理器锁"
+        
+        assert 验证预测结果有效(结果[0])
+        管理器.关闭()
+    
+    def test_多线程预测并发执行(self):
+        from 核心.模型管理 import 模型槽位
+        
+        管理器 = 创建测试管理器()
+        模型 = 慢速模型()
+        管理器._槽位['慢速'] = 模型槽位(名称='慢速', 路径='虚拟路径', 模型实例=模型, 已加载=True)
+        管理器.切换模型('慢速')
+        
+        并发执行(lambda: 管理器.预测(np.zeros((4, 4, 3), dtype=np.float32)), 4)
+        
+        assert 模型.最大并发 > 1, "多个线程的预测应能同时进行"
+        管理器.关闭()
+    
+    def test_会话池每个会话同时只被一个预测使用(self):
+        from 核心.模型管理 import 模型槽位, 会话池
+        
+        管理器 = 创建测试管理器()
+        会话列表 = [慢速模型(0.01), 慢速模型(0.01)]
+        管理器._槽位['池化'] = 模型槽位(
+            名称='池化', 路径='虚拟路径', 模型实例=会话列表[0],
+            已加载=True, 会话池=会话池(会话列表)
+        )
+        管理器.切换模型('池化')
+        结果 = []
+        
+        def 连续预测():
+            for _ in range(5):
+                结果.append(管理器.预测(np.zeros((4, 4, 3), dtype=np.float32)))
+        
+        并发执行(连续预测, 4)
+        
+        assert len(结果) == 20 and all(验证预测结果有效(r) for r in 结果)
+        assert all(会话.最大并发 == 1 for 会话 in 会话列表)
+        管理器.关闭()
+    
+    def test_进行中的预测使用切换前的模型(self):
+        from 核心.模型管理 import 模型槽位
+        
+        管理器 = 创建测试管理器()
+        模型 = 慢速模型(0.1)
+        管理器._槽位['慢速'] = 模型槽位(名称='慢速', 路径='虚拟路径', 模型实例=模型, 已加载=True)
+        管理器.切换模型('慢速')
+        结果 = []
+        
+        线程 = threading.Thread(target=lambda: 结果.append(
+            管理器.预测(np.zeros((4, 4, 3), dtype=np.float32))))
+        线程.start()
+        time.sleep(0.02)
+        开始 = time.perf_counter()
+        assert 管理器.切换模型('模型B')
+        切换耗时 = (time.perf_counter() - 开始) * 1000
+        线程.join(timeout=2)
+        
+        assert 切换耗时 < 管理器._切换性能目标, "切换不应等待进行中的预测"
+        assert 结果[0] == [0.1, 0.2, 0.3, 0.4]
+        assert 管理器.预测(np.zeros((4, 4, 3), dtype=np.float32)) == [0.5, 0.6, 0.7, 0.8]
+        管理器.关闭()
+
+
 # ==================== 运行测试 ====================
 
 if __name__ == "__main__":
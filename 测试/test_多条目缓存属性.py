@@ -0,0 +1,158 @@
+"""
+多条目缓存属性测试
+
+属性 1: 条目数有界
+*对于任意* 存储序列，缓存条目数不超过 最大条目数，淘汰计数等于超出部分
+
+属性 2: 场景往返命中
+*对于任意* 已存储的若干场景，在它们之间来回切换时应命中对应场景的结果
+
+属性 3: 过期条目不会被命中
+*对于任意* 超过过期时间的条目，请求应未命中并被移除
+
+Feature: multi-entry-detection-cache
+"""
+
+import time
+import numpy as np
+import pytest
+from hypothesis import given, strategies as st, settings
+from typing import List
+
+from 核心.智能缓存 import 智能缓存
+from 核心.缓存策略 import 缓存策略
+
+
+# ==================== 辅助函数 ====================
+
+def 生成场景图像(编号: int, 尺寸: int = 64) -> np.ndarray:
+    """
+    生成结构稳定、彼此差异明显的场景图像
+
+    每个场景由 8x8 明暗块组成，块的明暗以编号为随机种子生成，
+    感知哈希在不同编号之间距离较大，比随机噪声更接近真实画面。
+    """
+    随机源 = np.random.RandomState(编号)
+    块 = 随机源.randint(0, 2, (8, 8)).astype(np.uint8) * 200 + 20
+    灰度 = np.kron(块, np.ones((尺寸 // 8, 尺寸 // 8), dtype=np.uint8))
+    return np.stack([灰度, 灰度, 灰度], axis=-1)
+
+
+def 创建缓存(最大条目数: int = 4, 过期时间: float = 10.0) -> 智能缓存:
+    """
+    创建不含优先区域、关闭预热的测试缓存
+
+    场景图像只有两种灰度，直方图几乎相同，因此使用 MSE 比较以区分场景
+    """
+    策略 = 缓存策略(
+        全局阈值=0.95,
+        过期时间=过期时间,
+        比较方法="mse",
+        预热帧数=0,
+        最大条目数=最大条目数,
+    )
+    return 智能缓存(策略=策略)
+
+
+# ==================== 属性测试 ====================
+
+class Test多条目缓存属性:
+    """
+    属性测试: 多条目 LRU 缓存
+
+    Feature: multi-entry-detection-cache, Property 1-3
+    """
+
+    @settings(max_examples=50, deadline=None)
+    @given(
+        最大条目数=st.integers(min_value=1, max_value=6),
+        场景序列=st.lists(st.integers(min_value=0, max_value=11), min_size=1, max_size=30)
+    )
+    def test_条目数不超过上限(self, 最大条目数: int, 场景序列: List[int]):
+        """任意存储序列后条目数不超过上限，淘汰数等于新增条目超出上限的部分"""
+        缓存 = 创建缓存(最大条目数=最大条目数)
+
+        for 场景 in 场景序列:
+            缓存.存储(生成场景图像(场景), [场景])
+            assert 缓存.获取条目数() <= 最大条目数
+
+        统计 = 缓存.获取统计()
+        新增条目数 = 缓存.获取条目数() + 统计["淘汰数"]
+        assert 统计["淘汰数"] == max(0, 新增条目数 - 最大条目数)
+        assert 统计["条目数"] == 缓存.获取条目数()
+
+    @settings(max_examples=30, deadline=None)
+    @given(
+        场景数=st.integers(min_value=2, max_value=4),
+        访问序列=st.lists(st.integers(min_value=0, max_value=3), min_size=1, max_size=20)
+    )
+    def test_场景往返命中(self, 场景数: int, 访问序列: List[int]):
+        """存储的场景都在容量内时，来回切换应始终命中各自的结果"""
+        缓存 = 创建缓存(最大条目数=4)
+        场景图像 = [生成场景图像(编号) for 编号 in range(场景数)]
+
+        for 编号, 图像 in enumerate(场景图像):
+            缓存.存储(图像, [编号])
+
+        for 访问 in 访问序列:
+            编号 = 访问 % 场景数
+            assert 缓存.获取(场景图像[编号]) == [编号]
+
+        统计 = 缓存.获取统计()
+        assert 统计["缓存命中数"] == len(访问序列)
+        assert 统计["缓存未命中数"] == 0
+
+    def test_最近最少使用的条目被淘汰(self):
+        """容量满时淘汰最久未使用的条目，刚被命中的条目保留"""
+        缓存 = 创建缓存(最大条目数=2)
+        场景0, 场景1, 场景2 = (生成场景图像(编号) for 编号 in range(3))
+
+        缓存.存储(场景0, [0])
+        缓存.存储(场景1, [1])
+        assert 缓存.获取(场景0) == [0]  # 场景0 变为最近使用
+
+        缓存.存储(场景2, [2])  # 淘汰场景1
+
+        assert 缓存.获取(场景0) == [0]
+        assert 缓存.获取(场景2) == [2]
+        assert 缓存.获取(场景1) is None
+        assert 缓存.获取统计()["淘汰数"] == 1
+
+    def test_相同签名替换旧条目(self):
+        """同一场景重复存储不会占用多个条目"""
+        缓存 = 创建缓存(最大条目数=4)
+        图像 = 生成场景图像(7)
+
+        缓存.存储(图像, ["旧"])
+        缓存.存储(图像, ["新"])
+
+        assert 缓存.获取条目数() == 1
+        assert 缓存.获取(图像) == ["新"]
+
+    def test_过期条目未命中并被移除(self):
+        """超过过期时间后请求未命中，过期条目被移除并计入过期淘汰数"""
+        缓存 = 创建缓存(最大条目数=4, 过期时间=0.05)
+        场景0, 场景1 = 生成场景图像(0), 生成场景图像(1)
+
+        缓存.存储(场景0, [0])
+        缓存.存储(场景1, [1])
+        time.sleep(0.08)
+
+        assert 缓存.获取(场景0) is None
+        统计 = 缓存.获取统计()
+        assert 统计["过期失效数"] == 1
+        assert 统计["过期淘汰数"] == 2
+        assert 缓存.获取条目数() == 0
+
+    def test_签名预筛限制完整比较数(self):
+        """条目多于最大比较数时，多余条目通过签名预筛跳过"""
+        缓存 = 创建缓存(最大条目数=6)
+        for 编号 in range(6):
+            缓存.存储(生成场景图像(编号), [编号])
+
+        assert 缓存.获取(生成场景图像(3)) == [3]
+        assert 缓存.获取统计()["签名跳过数"] >= 6 - 缓存.策略.最大比较数
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,278 @@
+"""
+帧环属性测试
+
+属性 1: 引用按代数失效
+*对于任意* 槽数和写入次数，未固定时只有最近 槽数 次写入的引用有效，读取内容与写入一致
+
+属性 2: 固定的槽位不被覆盖
+*对于任意* 固定集合和后续写入次数，被固定帧的引用保持有效且内容不变，写入方始终有可用槽位
+
+属性 3: 消费者不复制帧
+*对于任意* 带帧引用存储的缓存条目和异步检测任务，参考帧与槽位共享内存，释放后不再固定；
+过期引用的释放不影响槽位上新帧的固定
+
+Feature: shared-frame-ring
+"""
+
+import time
+import numpy as np
+import pytest
+from hypothesis import given, strategies as st, settings
+
+from 核心.帧环 import 帧环, 帧引用, 共享内存可用
+from 核心.智能缓存 import 智能缓存
+from 核心.缓存策略 import 缓存策略
+from 核心.异步检测 import 异步检测器
+from 核心.目标检测器 import YOLO检测器
+
+
+帧形状 = (8, 6, 3)
+
+
+def 生成帧(编号: int) -> np.ndarray:
+    """生成内容由编号决定的帧"""
+    return np.random.RandomState(编号).randint(0, 256, 帧形状, dtype=np.uint8)
+
+
+class 记录检测器:
+    """记录检测时看到的图像"""
+    
+    def __init__(self, 检测延迟: float = 0.0):
+        self.检测延迟 = 检测延迟
+        self.图像列表 = []
+        self.引用列表 = []
+    
+    def 检测(self, 图像: np.ndarray, 使用缓存: bool = True, 帧引用=None):
+        time.sleep(self.检测延迟)
+        self.图像列表.append(图像)
+        self.引用列表.append(帧引用)
+        return [{'均值': float(图像.mean())}]
+
+
+class Test帧环属性:
+    """
+    属性测试: 帧环
+    
+    Feature: shared-frame-ring, Property 1-3
+    """
+    
+    @settings(max_examples=50, deadline=None)
+    @given(
+        槽数=st.integers(min_value=2, max_value=8),
+        写入数=st.integers(min_value=1, max_value=30)
+    )
+    def test_引用按代数失效(self, 槽数, 写入数):
+        """只有最近 槽数 次写入的引用有效，有效引用读取到的内容与写入相同"""
+        环 = 帧环(槽数, 帧形状)
+        引用列表 = [环.写入(生成帧(i)) for i in range(写入数)]
+        
+        for i, 引用 in enumerate(引用列表):
+            有效 = i >= 写入数 - 槽数
+            assert 环.是否有效(引用) == 有效
+            if 有效:
+                assert np.array_equal(环.读取(引用), 生成帧(i))
+                assert np.array_equal(环.复制(引用), 生成帧(i))
+            else:
+                assert 环.读取(引用) is None
+                assert 环.复制(引用) is None
+        
+        assert 环.最新() == 引用列表[-1]
+        assert [引用.帧编号 for 引用 in 引用列表] == list(range(1, 写入数 + 1))
+    
+    def test_读取视图只读且不复制(self):
+        """读取返回槽位的只读视图"""
+        环 = 帧环(3, 帧形状)
+        引用 = 环.写入(生成帧(0))
+        视图 = 环.读取(引用)
+        
+        assert np.shares_memory(视图, 环._帧)
+        with pytest.raises(ValueError):
+            视图[0, 0, 0] = 1
+    
+    def test_写入中的槽位引用无效(self):
+        """开始写入后该槽位旧引用立即失效，取消写入不会发布新帧"""
+        环 = 帧环(2, 帧形状)
+        旧引用 = 环.写入(生成帧(0))
+        环.写入(生成帧(1))
+        
+        槽号, 槽位 = 环.开始写入()
+        assert 槽号 == 旧引用.槽号
+        assert not 环.是否有效(旧引用)
+        环.取消写入(槽号)
+        
+        assert 环.最新().帧编号 == 2
+        assert not 环.是否有效(旧引用)
+    
+    @settings(max_examples=50, deadline=None)
+    @given(
+        槽数=st.integers(min_value=2, max_value=8),
+        固定位置=st.lists(st.integers(min_value=0, max_value=19), max_size=10),
+        后续写入数=st.integers(min_value=0, max_value=30)
+    )
+    def test_固定的槽位不被覆盖(self, 槽数, 固定位置, 后续写入数):
+        """固定的帧在之后任意次写入后仍然有效，且至少保留一个可写槽位"""
+        环 = 帧环(槽数, 帧形状)
+        已固定 = {}
+        for i in range(20):
+            引用 = 环.写入(生成帧(i))
+            if i in 固定位置 and 环.固定(引用):
+                已固定[i] = 引用
+        
+        assert 环.获取固定槽数() <= 槽数 - 1
+        for j in range(后续写入数):
+            环.写入(生成帧(100 + j))
+        
+        for i, 引用 in 已固定.items():
+            assert 环.是否有效(引用)
+            assert np.array_equal(环.读取(引用), 生成帧(i))
+        
+        for 引用 in 已固定.values():
+            环.释放(引用)
+        assert 环.获取固定槽数() == 0
+    
+    def test_槽位不足时固定失败(self):
+        """所有其他槽位都被固定时不能再固定新的槽位"""
+        环 = 帧环(3, 帧形状)
+        引用列表 = [环.写入(生成帧(i)) for i in range(3)]
+        
+        assert 环.固定(引用列表[1])
+        assert 环.固定(引用列表[2])
+        assert not 环.固定(引用列表[0])
+        assert 环.固定(引用列表[2])  # 已固定的槽位可以重复固定
+        
+        引用 = 环.写入(生成帧(9))
+        assert 引用.槽号 == 0
+    
+    def test_过期引用不能释放新帧(self):
+        """槽位被重新写入后，旧引用的释放不影响新帧的固定"""
+        环 = 帧环(3, 帧形状)
+        旧引用 = 环.写入(生成帧(0))
+        环.写入(生成帧(1))
+        环.写入(生成帧(2))
+        新引用 = 环.写入(生成帧(3))
+        assert 新引用.槽号 == 旧引用.槽号
+        
+        assert 环.固定(新引用)
+        环.释放(旧引用)
+        assert 环.获取固定槽数() == 1
+        环.释放(新引用)
+        assert 环.获取固定槽数() == 0
+    
+    def test_形状不一致时拒绝写入(self):
+        """写入形状不同的图像时报错且不发布"""
+        环 = 帧环(2, 帧形状)
+        with pytest.raises(ValueError):
+            环.写入(np.zeros((4, 4, 3), dtype=np.uint8))
+        assert 环.最新() is None
+    
+    def test_引用字典往返(self):
+        """帧引用可以序列化后传给其他进程"""
+        引用 = 帧环(2, 帧形状).写入(生成帧(0))
+        assert 帧引用.from_dict(引用.to_dict()) == 引用
+    
+    @pytest.mark.skipif(not 共享内存可用, reason="不支持共享内存")
+    def test_共享内存连接读取(self):
+        """连接方按名称读取创建方写入的帧，创建方关闭后共享内存被销毁"""
+        环 = 帧环(4, 帧形状, 共享内存=True)
+        名称 = 环.名称
+        try:
+            连接方 = 帧环.连接(环.名称, 4, 帧形状)
+            引用 = 环.写入(生成帧(3))
+            
+            assert 连接方.最新() == 引用
+            assert np.array_equal(连接方.复制(连接方.最新()), 生成帧(3))
+            
+            环.写入(生成帧(4))
+            环.写入(生成帧(5))
+            环.写入(生成帧(6))
+            环.写入(生成帧(7))
+            assert 连接方.复制(引用) is None
+            连接方.关闭()
+        finally:
+            环.关闭()
+        
+        with pytest.raises(FileNotFoundError):
+            帧环.连接(名称, 4, 帧形状)
+    
+    @settings(max_examples=20, deadline=None)
+    @given(存储数=st.integers(min_value=1, max_value=10))
+    def test_缓存参考帧不复制(self, 存储数):
+        """带帧引用存储时参考帧直接使用槽位，淘汰和清空后释放固定"""
+        环 = 帧环(16, 帧形状)
+        缓存 = 智能缓存(策略=缓存策略(比较方法="mse", 预热帧数=0, 最大条目数=4), 帧环=环)
+        
+        for i in range(存储数):
+            图像 = 生成帧(i)
+            引用 = 环.写入(图像)
+            缓存.存储(环.读取(引用), [i], 帧引用=引用)
+        
+        条目列表 = list(缓存._条目表.values())
+        assert 环.获取固定槽数() == len(条目列表) == min(存储数, 4)
+        assert all(np.shares_memory(条目.参考帧, 环._帧) for 条目 in 条目列表)
+        
+        # 继续写入不会覆盖缓存的参考帧
+        for j in range(32):
+            环.写入(生成帧(100 + j))
+        for 条目 in 条目列表:
+            assert 环.是否有效(条目.帧引用)
+            assert np.array_equal(条目.参考帧, 生成帧(条目.结果[0]))
+        
+        缓存.清空()
+        assert 环.获取固定槽数() == 0
+    
+    def test_缓存无法固定时复制(self):
+        """槽位不足或没有帧引用时退回复制参考帧"""
+        环 = 帧环(2, 帧形状)
+        缓存 = 智能缓存(策略=缓存策略(比较方法="mse", 预热帧数=0, 最大条目数=4), 帧环=环)
+        
+        引用 = 环.写入(生成帧(0))
+        缓存.存储(环.读取(引用), [0], 帧引用=引用)
+        引用 = 环.写入(生成帧(1))
+        缓存.存储(环.读取(引用), [1], 帧引用=引用)
+        
+        条目列表 = list(缓存._条目表.values())
+        assert 条目列表[0].帧引用 is not None
+        assert 条目列表[1].帧引用 is None
+        assert not np.shares_memory(条目列表[1].参考帧, 环._帧)
+    
+    @settings(max_examples=10, deadline=None)
+    @given(提交数=st.integers(min_value=1, max_value=12))
+    def test_异步检测按引用读取(self, 提交数):
+        """按引用提交的帧不复制，检测完成或停止后释放固定"""
+        环 = 帧环(8, 帧形状)
+        检测器 = 记录检测器(检测延迟=0.005)
+        异步 = 异步检测器(检测器, 队列大小=3, 检测间隔=1, 帧环=环)
+        异步.启动()
+        
+        已提交 = 0
+        for i in range(提交数):
+            引用 = 环.写入(生成帧(i))
+            已提交 += 异步.提交帧引用(引用)
+            assert 环.获取固定槽数() <= 3 + 1
+        
+        截止 = time.time() + 2.0
+        while len(检测器.图像列表) < 已提交 and time.time() < 截止:
+            time.sleep(0.005)
+        异步.停止()
+        
+        assert len(检测器.图像列表) == 已提交
+        assert all(np.shares_memory(图像, 环._帧) for 图像 in 检测器.图像列表)
+        assert all(引用 is not None for 引用 in 检测器.引用列表)
+        assert 环.获取固定槽数() == 0
+    
+    def test_检测器按引用异步检测(self):
+        """YOLO检测器.异步检测 给出帧引用时按槽位提交，检测完成后释放固定"""
+        环 = 帧环(4, 帧形状)
+        检测器 = YOLO检测器(模型路径="不存在的模型.pt", 启用缓存=False, 启用异步=True)
+        检测器.设置帧环(环)
+        try:
+            引用 = 环.写入(生成帧(0))
+            assert 检测器.异步检测(帧引用=引用)
+            assert 检测器.获取异步结果(超时=2.0) == []
+            assert 环.获取固定槽数() == 0
+        finally:
+            检测器.停止异步检测()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
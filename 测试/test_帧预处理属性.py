@@ -0,0 +1,191 @@
+"""
+帧预处理属性测试
+
+属性 1: 融合预处理与逐步处理一致
+*对于任意* 截取尺寸、目标尺寸和布局，先缩放后转换颜色的结果与原来 cvtColor → resize → 归一化 的结果相同
+
+属性 2: 缓冲轮流复用
+*对于任意* 缓冲数，连续 缓冲数 次调用的结果互不共享内存，之后的调用复用最早的缓冲
+
+属性 3: 归一化在模型加载时确定
+*对于任意* uint8 帧，引擎对原始帧的预测与对预处理器张量的预测相同，float32 张量不再被复制
+
+Feature: fused-frame-preprocessing
+"""
+
+import cv2
+import numpy as np
+import pytest
+from hypothesis import given, strategies as st, settings
+
+from 核心.帧预处理 import 帧预处理器, 预处理规格
+
+
+def 生成截图(高度: int, 宽度: int, 通道数: int, 种子: int) -> np.ndarray:
+    """生成随机截图"""
+    return np.random.RandomState(种子).randint(0, 256, (高度, 宽度, 通道数), dtype=np.uint8)
+
+
+def 逐步处理(图像: np.ndarray, 规格: 预处理规格) -> np.ndarray:
+    """原来各入口的处理方式: 先转换颜色，再缩放，再整体归一化"""
+    图像 = cv2.cvtColor(图像, 规格.颜色转换) if 规格.颜色转换 is not None else 图像
+    图像 = cv2.resize(图像, (规格.宽度, 规格.高度))
+    if 规格.布局 == "NCHW":
+        张量 = 图像.transpose(2, 0, 1)
+    else:
+        张量 = 图像.reshape(规格.宽度, 规格.高度, 规格.通道数)
+    if 规格.缩放 is not None:
+        张量 = 张量.astype(np.float32) * 规格.缩放
+    return 图像, 张量[np.newaxis]
+
+
+class Test帧预处理属性:
+    """
+    属性测试: 帧预处理
+    
+    Feature: fused-frame-preprocessing, Property 1-3
+    """
+    
+    @settings(max_examples=50, deadline=None)
+    @given(
+        截图高度=st.integers(min_value=8, max_value=96),
+        截图宽度=st.integers(min_value=8, max_value=96),
+        宽度=st.integers(min_value=4, max_value=48),
+        高度=st.integers(min_value=4, max_value=48),
+        布局=st.sampled_from(["NHWC", "NCHW"]),
+        缩放=st.sampled_from([None, 1.0 / 255.0, 1.0]),
+        带透明通道=st.booleans(),
+        种子=st.integers(min_value=0, max_value=1000)
+    )
+    def test_融合预处理与逐步处理一致(self, 截图高度, 截图宽度, 宽度, 高度, 布局, 缩放, 带透明通道, 种子):
+        """颜色通道变换与逐通道缩放可交换，融合后的结果与原处理顺序相同"""
+        颜色转换 = cv2.COLOR_BGRA2RGB if 带透明通道 else cv2.COLOR_BGR2RGB
+        规格 = 预处理规格(宽度, 高度, 布局=布局, 缩放=缩放, 颜色转换=颜色转换)
+        截图 = 生成截图(截图高度, 截图宽度, 4 if 带透明通道 else 3, 种子)
+        
+        图像, 张量 = 帧预处理器(规格).处理(截图)
+        期望图像, 期望张量 = 逐步处理(截图, 规格)
+        
+        assert np.array_equal(图像, 期望图像)
+        assert 张量.shape == (1,) + 规格.张量形状
+        assert 张量.dtype == (np.uint8 if 缩放 is None else np.float32)
+        assert np.allclose(张量, 期望张量, rtol=1e-6)
+    
+    @settings(max_examples=30, deadline=None)
+    @given(缓冲数=st.integers(min_value=1, max_value=4), 调用数=st.integers(min_value=1, max_value=10))
+    def test_缓冲轮流复用(self, 缓冲数, 调用数):
+        """第 i 次调用与第 i - 缓冲数 次调用使用同一组缓冲，其余调用互不共享内存"""
+        预处理器 = 帧预处理器(预处理规格(16, 12), 缓冲数=缓冲数)
+        结果 = [预处理器.处理(生成截图(40, 30, 3, i)) for i in range(调用数)]
+        
+        for i in range(调用数):
+            for j in range(i):
+                共享 = np.shares_memory(结果[i][1], 结果[j][1])
+                assert 共享 == ((i - j) % 缓冲数 == 0)
+    
+    def test_不复用缓冲时结果独立(self):
+        """复用缓冲=False 时每次结果都是新数组，可以长期保存"""
+        预处理器 = 帧预处理器(预处理规格(16, 12, 缩放=None))
+        第一帧 = 预处理器.缩放(生成截图(40, 30, 3, 0), 复用缓冲=False)
+        保存 = 第一帧.copy()
+        第二帧 = 预处理器.缩放(生成截图(40, 30, 3, 1), 复用缓冲=False)
+        
+        assert not np.shares_memory(第一帧, 第二帧)
+        assert np.array_equal(第一帧, 保存)
+    
+    @settings(max_examples=20, deadline=None)
+    @given(颜色转换=st.sampled_from([None, cv2.COLOR_BGR2RGB]), 截图尺寸=st.sampled_from([(30, 40), (12, 16)]))
+    def test_缩放写入输出数组(self, 颜色转换, 截图尺寸):
+        """给出 输出 时结果直接写入其中（如帧环槽位），与不给出时相同"""
+        规格 = 预处理规格(16, 12, 缩放=None, 颜色转换=颜色转换)
+        截图 = 生成截图(*截图尺寸, 3, 0)
+        输出 = np.empty((12, 16, 3), dtype=np.uint8)
+        
+        结果 = 帧预处理器(规格).缩放(截图, 输出=输出)
+        assert 结果 is 输出
+        assert np.array_equal(输出, 帧预处理器(规格).缩放(截图))
+    
+    def test_无需归一化时张量不复制(self):
+        """模型直接接收像素时 NHWC 张量只是缩放图像的另一种形状"""
+        图像, 张量 = 帧预处理器(预处理规格(16, 12, 缩放=None)).处理(生成截图(40, 30, 3, 0))
+        assert np.shares_memory(图像, 张量)
+        assert 张量.shape == (1, 16, 12, 3)
+    
+    def test_规格字典往返(self):
+        """预处理规格可以序列化"""
+        规格 = 预处理规格(32, 18, 布局="NCHW", 缩放=0.5, 颜色转换=None)
+        assert 预处理规格.from_dict(规格.to_dict()) == 规格
+        with pytest.raises(ValueError):
+            预处理规格(32, 18, 布局="HWC")
+
+
+class Test引擎预处理规格:
+    """
+    属性测试: 推理引擎在加载时确定预处理规格
+    
+    Feature: fused-frame-preprocessing, Property 3
+    """
+    
+    @staticmethod
+    def 创建模型(路径: str, 样本形状: tuple, 输入缩放: str = None) -> str:
+        """创建 Flatten + MatMul 的小模型"""
+        onnx = pytest.importorskip("onnx")
+        pytest.importorskip("onnxruntime")
+        from onnx import helper, TensorProto
+        
+        特征数 = int(np.prod(样本形状))
+        权重 = helper.make_tensor("W", TensorProto.FLOAT, [特征数, 4],
+                                np.random.RandomState(0).randn(特征数, 4).astype(np.float32).ravel())
+        图 = helper.make_graph(
+            [helper.make_node("Flatten", ["input"], ["flat"], axis=1),
+             helper.make_node("MatMul", ["flat", "W"], ["output"])],
+            "test",
+            [helper.make_tensor_value_info("input", TensorProto.FLOAT, ["N", *样本形状])],
+            [helper.make_tensor_value_info("output", TensorProto.FLOAT, ["N", 4])],
+            [权重]
+        )
+        模型 = helper.make_model(图, opset_imports=[helper.make_opsetid("", 13)])
+        模型.ir_version = 8
+        if 输入缩放 is not None:
+            helper.set_model_props(模型, {"输入缩放": 输入缩放})
+        onnx.save(模型, 路径)
+        return 路径
+    
+    @settings(max_examples=15, deadline=None)
+    @given(种子=st.integers(min_value=0, max_value=1000), 布局=st.sampled_from(["NHWC", "NCHW"]))
+    def test_原始帧与预处理张量预测相同(self, tmp_path_factory, 种子, 布局):
+        """引擎对 uint8 画面的预测与对 帧预处理器 张量的预测相同"""
+        from 核心.ONNX推理 import ONNX推理引擎
+        
+        样本形状 = (3, 6, 10) if 布局 == "NCHW" else (10, 6, 3)
+        路径 = self.创建模型(str(tmp_path_factory.mktemp("模型") / "model.onnx"), 样本形状)
+        引擎 = ONNX推理引擎(路径, 使用GPU=False, 预热=False)
+        规格 = 引擎.获取预处理规格()
+        
+        assert (规格.布局, 规格.宽度, 规格.高度) == (布局, 10, 6)
+        assert 规格.缩放 == pytest.approx(1.0 / 255.0)
+        
+        截图 = 生成截图(30, 50, 3, 种子)
+        图像, 张量 = 帧预处理器(规格).处理(截图)
+        原始输入 = 图像.transpose(2, 0, 1) if 布局 == "NCHW" else 图像.reshape(样本形状)
+        
+        assert np.allclose(引擎.预测(张量), 引擎.预测(原始输入), atol=1e-5)
+        assert np.shares_memory(引擎._预处理(张量), 张量)
+    
+    def test_模型元数据指定缩放(self, tmp_path):
+        """模型元数据中的 输入缩放 在加载时读取，构造参数优先"""
+        from 核心.ONNX推理 import ONNX推理引擎
+        
+        路径 = self.创建模型(str(tmp_path / "model.onnx"), (10, 6, 3), 输入缩放="1.0")
+        截图 = 生成截图(6, 10, 3, 0).reshape(10, 6, 3)
+        
+        引擎 = ONNX推理引擎(路径, 使用GPU=False, 预热=False)
+        assert 引擎.输入缩放 == 1.0
+        assert np.allclose(引擎.预测(截图), 引擎.预测(截图.astype(np.float32)), atol=1e-4)
+        
+        引擎 = ONNX推理引擎(路径, 使用GPU=False, 预热=False, 输入缩放=0.5)
+        assert 引擎.获取预处理规格().缩放 == 0.5
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,113 @@
+"""
+录制预览属性测试
+
+属性 1: 预览不阻塞录制
+*对于任意* 窗口刷新耗时，更新() 立即返回，预览线程只显示最新帧，显示次数受预览帧率限制
+
+属性 2: 无界面模式
+*对于任意* 帧率为 0 或 无界面=True 的预览，不创建线程、不调用任何窗口函数
+
+Feature: decoupled-recording-preview
+"""
+
+import time
+import threading
+import numpy as np
+import pytest
+from hypothesis import given, strategies as st, settings
+
+import 核心.录制预览 as 录制预览模块
+from 核心.录制预览 import 录制预览
+
+
+class 假窗口:
+    """记录 imshow/waitKey 调用，imshow 按指定耗时阻塞"""
+    
+    def __init__(self, 显示耗时: float = 0.0, 按键: int = -1):
+        self.显示耗时 = 显示耗时
+        self.按键 = 按键
+        self.显示记录 = []
+        self.线程 = set()
+    
+    def imshow(self, 窗口名, 图像):
+        self.线程.add(threading.current_thread().name)
+        self.显示记录.append(图像.copy())
+        time.sleep(self.显示耗时)
+    
+    def waitKey(self, 延迟):
+        self.线程.add(threading.current_thread().name)
+        return self.按键
+    
+    def destroyWindow(self, 窗口名):
+        pass
+
+
+@pytest.fixture
+def 窗口(monkeypatch):
+    假 = 假窗口()
+    for 名称 in ("imshow", "waitKey", "destroyWindow"):
+        monkeypatch.setattr(录制预览模块.cv2, 名称, getattr(假, 名称))
+    return 假
+
+
+class Test录制预览:
+    """
+    属性测试: 独立线程的录制预览
+    
+    Feature: decoupled-recording-preview, Property 1-2
+    """
+    
+    def test_更新不等待窗口刷新(self, 窗口):
+        """窗口刷新很慢时录制循环仍按自己的速度提交帧，显示的是最新帧"""
+        窗口.显示耗时 = 0.05
+        with 录制预览(帧率=20, 尺寸=(8, 6), 颜色转换=None) as 预览:
+            开始 = time.perf_counter()
+            for i in range(200):
+                预览.更新(np.full((6, 8, 3), i % 256, dtype=np.uint8))
+            耗时 = time.perf_counter() - 开始
+            time.sleep(0.2)
+        
+        assert 耗时 < 0.05
+        assert 0 < 预览.已显示帧数 == len(窗口.显示记录) <= 5
+        assert 窗口.显示记录[-1][0, 0, 0] == 199
+        assert 窗口.线程 == {"录制预览"}
+    
+    def test_显示次数受帧率限制(self, 窗口):
+        """同一帧不重复显示，显示次数不超过 帧率 x 时间"""
+        with 录制预览(帧率=10, 尺寸=(8, 6)) as 预览:
+            结束 = time.perf_counter() + 0.5
+            while time.perf_counter() < 结束:
+                预览.更新(np.zeros((12, 16, 3), dtype=np.uint8))
+                time.sleep(0.001)
+        
+        assert 1 <= 预览.已显示帧数 <= 6
+        assert 窗口.显示记录[0].shape == (6, 8, 3)
+    
+    def test_预览窗口ESC请求退出(self, 窗口):
+        """预览窗口中按 ESC 设置 已请求退出"""
+        窗口.按键 = 27
+        with 录制预览(帧率=50) as 预览:
+            预览.更新(np.zeros((4, 4, 3), dtype=np.uint8))
+            for _ in range(100):
+                if 预览.已请求退出:
+                    break
+                time.sleep(0.01)
+        assert 预览.已请求退出
+    
+    @settings(max_examples=20, deadline=None)
+    @given(帧率=st.integers(min_value=-5, max_value=30), 无界面=st.booleans())
+    def test_无界面模式(self, 帧率, 无界面):
+        """帧率不大于 0 或指定无界面时不启动线程"""
+        预览 = 录制预览(帧率=帧率, 无界面=无界面)
+        预览.启动()
+        try:
+            预览.更新(np.zeros((4, 4, 3), dtype=np.uint8))
+            assert (预览._线程 is None) == (无界面 or 帧率 <= 0)
+            assert not 预览.已请求退出
+        finally:
+            预览.停止()
+        assert 预览._线程 is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
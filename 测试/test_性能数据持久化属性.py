@@ -6,10 +6,12 @@ Property 12: 对于任意 PerformanceMetric，存储后再读取必须得到等
 **验证: 需求 7.4**
 """
 
+import os
+import json
 import pytest
 import tempfile
 import shutil
-from datetime import datetime
+from datetime import datetime, timedelta
 from hypothesis import given, strategies as st, settings
 
 from 核心.自动调参 import (
@@ -174,5 +176,88 @@ class TestPerformanceMetricPersistenceRoundTrip:
             shutil.rmtree(temp_dir, ignore_errors=True)
 
 
+
+class TestMetricLog:
+    """指标日志: 追加写入、定期压缩与有界保留"""
+    
+    def _make_metric(self, seconds_ago: float, rate: float = 0.5) -> PerformanceMetric:
+        return PerformanceMetric(
+            timestamp=datetime.now() - timedelta(seconds=seconds_ago),
+            action_success_rate=rate,
+            state_accuracy=rate,
+            stuck_count=1,
+            task_efficiency=rate
+        )
+    
+    def test_log_is_appended_and_compacted(self):
+        """收集指标只追加一行，行数超过保留数量两倍时压缩到保留数量"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            tuner = AutoTuner(tuning_dir=temp_dir, max_metrics=10)
+            log_path = os.path.join(temp_dir, AutoTuner.METRICS_FILE)
+            
+            for i in range(20):
+                tuner.collect_metric(self._make_metric(100 - i))
+            with open(log_path, 'r', encoding='utf-8') as f:
+                assert len(f.readlines()) == 20
+            
+            tuner.collect_metric(self._make_metric(0))
+            with open(log_path, 'r', encoding='utf-8') as f:
+                assert len(f.readlines()) == 10
+            assert tuner.get_metrics_count() == 10
+            
+            reloaded = AutoTuner(tuning_dir=temp_dir, max_metrics=10)
+            assert [m.timestamp for m in reloaded.get_metrics()] == \
+                [m.timestamp for m in tuner.get_metrics()]
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    
+    def test_truncated_last_line_is_skipped(self):
+        """中断时写了一半的最后一行应被跳过"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            tuner = AutoTuner(tuning_dir=temp_dir)
+            tuner.collect_metric(self._make_metric(1))
+            with open(os.path.join(temp_dir, AutoTuner.METRICS_FILE), 'a', encoding='utf-8') as f:
+                f.write('{"timestamp": "2024-')
+            
+            assert AutoTuner(tuning_dir=temp_dir).get_metrics_count() == 1
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    
+    def test_legacy_json_is_migrated(self):
+        """旧版 metrics.json 应被读取并迁移为指标日志"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            metrics = [self._make_metric(10 - i) for i in range(3)]
+            with open(os.path.join(temp_dir, AutoTuner.LEGACY_METRICS_FILE), 'w', encoding='utf-8') as f:
+                json.dump([m.to_dict() for m in metrics], f)
+            
+            tuner = AutoTuner(tuning_dir=temp_dir)
+            assert tuner.get_metrics_count() == 3
+            assert os.path.exists(os.path.join(temp_dir, AutoTuner.METRICS_FILE))
+            assert not os.path.exists(os.path.join(temp_dir, AutoTuner.LEGACY_METRICS_FILE))
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    
+    def test_window_aggregation_with_out_of_order_metric(self):
+        """乱序到达的指标按时间戳归入窗口，汇总与逐个计算一致"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            tuner = AutoTuner(tuning_dir=temp_dir)
+            tuner.collect_metric(self._make_metric(30, 0.2))
+            tuner.collect_metric(self._make_metric(20, 0.4))
+            tuner.collect_metric(self._make_metric(600, 1.0))  # 10 分钟前，晚到
+            tuner.collect_metric(self._make_metric(10, 0.6))
+            
+            aggregated = tuner.get_aggregated_metrics(window_minutes=5)
+            assert aggregated.action_success_rate == pytest.approx(0.4)
+            assert aggregated.stuck_count == 3
+            assert len(tuner.get_metrics_in_window(window_minutes=5)) == 3
+            assert tuner.get_metrics()[0].action_success_rate == 1.0
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
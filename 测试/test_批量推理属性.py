@@ -0,0 +1,243 @@
+"""
+批量推理属性测试
+
+属性 1: 批量预测与逐帧预测一致
+*对于任意* 帧数、最大批次和输入类型，批量预测第 i 行与单帧预测结果相同
+
+属性 2: 固定批次模型可批量预测
+*对于任意* 帧数，批次维度固定的模型按固定批次分块执行，结果与逐帧预测相同
+
+属性 3: 评估按块调用模型
+*对于任意* 样本数和批次大小，评估器调用模型的次数等于块数，指标与逐个预测相同
+
+Feature: batched-inference
+"""
+
+import os
+import numpy as np
+import pytest
+from hypothesis import given, strategies as st, settings
+
+onnx = pytest.importorskip("onnx")
+pytest.importorskip("onnxruntime")
+
+from 核心.ONNX推理 import ONNX推理引擎, 准备批次输入
+from 核心.模型管理 import 模型管理器
+from 工具.模型评估 import 模型评估器
+from 工具.模型转换 import 模型转换器, 输出一致性验证器
+from 测试.onnx测试模型 import 创建ONNX模型
+
+
+帧形状 = (6, 4, 3)
+动作数 = 5
+
+
+def 生成帧(数量: int, 种子: int, 类型: str) -> np.ndarray:
+    """生成 uint8 (0-255) 或 float32 (0-1) 帧"""
+    随机源 = np.random.RandomState(种子)
+    if 类型 == "uint8":
+        return 随机源.randint(0, 256, (数量,) + 帧形状, dtype=np.uint8)
+    return 随机源.rand(数量, *帧形状).astype(np.float32)
+
+
+@pytest.fixture(scope="module")
+def 模型目录(tmp_path_factory):
+    return tmp_path_factory.mktemp("onnx模型")
+
+
+@pytest.fixture(scope="module")
+def 动态模型(模型目录):
+    return 创建ONNX模型(str(模型目录 / "动态.onnx"), 帧形状, 动作数)
+
+
+@pytest.fixture(scope="module")
+def 固定模型(模型目录):
+    return 创建ONNX模型(str(模型目录 / "固定.onnx"), 帧形状, 动作数, 批次=1)
+
+
+class 计数模型:
+    """记录 predict 调用次数的模型，输出由图像均值决定"""
+    
+    def __init__(self):
+        self.调用次数 = 0
+    
+    def predict(self, 输入: np.ndarray) -> np.ndarray:
+        self.调用次数 += 1
+        均值 = 输入.reshape(len(输入), -1).mean(axis=1)
+        return np.eye(动作数)[(均值 * 7).astype(int) % 动作数]
+
+
+class Test批量推理属性:
+    """
+    属性测试: 批量推理
+    
+    Feature: batched-inference, Property 1-3
+    """
+    
+    @settings(max_examples=30, deadline=None)
+    @given(
+        帧数=st.integers(min_value=1, max_value=40),
+        最大批次=st.integers(min_value=1, max_value=16),
+        类型=st.sampled_from(["uint8", "float32"]),
+        作为列表=st.booleans()
+    )
+    def test_批量预测与逐帧预测一致(self, 动态模型, 帧数, 最大批次, 类型, 作为列表):
+        """任意分块方式下批量预测的每一行都与单帧预测相同"""
+        引擎 = ONNX推理引擎(动态模型, 使用GPU=False, 预热=False, 最大批次=最大批次)
+        帧 = 生成帧(帧数, 帧数, 类型)
+        
+        结果 = 引擎.批量预测(list(帧) if 作为列表 else 帧)
+        
+        assert 引擎.支持动态批次
+        assert 结果.shape == (帧数, 动作数)
+        逐帧 = np.array([引擎.预测(图像) for 图像 in 帧])
+        assert np.allclose(结果, 逐帧, atol=1e-6)
+    
+    @settings(max_examples=15, deadline=None)
+    @given(帧数=st.integers(min_value=1, max_value=12))
+    def test_固定批次模型可批量预测(self, 固定模型, 帧数):
+        """批次维度固定为 1 的模型逐块运行，结果与逐帧预测相同"""
+        引擎 = ONNX推理引擎(固定模型, 使用GPU=False, 预热=False, 最大批次=8)
+        帧 = 生成帧(帧数, 帧数, "uint8")
+        
+        assert not 引擎.支持动态批次
+        assert np.allclose(引擎.批量预测(帧), [引擎.预测(图像) for 图像 in 帧], atol=1e-6)
+    
+    def test_空批次返回空数组(self, 动态模型):
+        """空输入不运行会话"""
+        引擎 = ONNX推理引擎(动态模型, 使用GPU=False, 预热=False)
+        assert 引擎.批量预测([]).shape[0] == 0
+    
+    def test_批次缓冲复用(self, 动态模型):
+        """相同帧形状的多次批量预测复用同一个输入缓冲"""
+        引擎 = ONNX推理引擎(动态模型, 使用GPU=False, 预热=False, 最大批次=4)
+        引擎.批量预测(生成帧(10, 0, "uint8"))
+        缓冲 = 引擎._批次缓冲
+        引擎.批量预测(生成帧(3, 1, "float32"))
+        assert 引擎._批次缓冲 is 缓冲
+    
+    @settings(max_examples=30, deadline=None)
+    @given(帧数=st.integers(min_value=1, max_value=10), 种子=st.integers(min_value=0, max_value=1000))
+    def test_逐帧归一化规则(self, 帧数, 种子):
+        """批量预处理按每帧的类型归一化：整数像素乘以缩放系数，浮点输入原样写入"""
+        帧 = [生成帧(1, 种子 + i, "uint8" if (种子 + i) % 2 else "float32")[0] for i in range(帧数)]
+        批量输入 = 准备批次输入(帧)
+        for i, 图像 in enumerate(帧):
+            if 图像.dtype == np.uint8:
+                assert np.allclose(批量输入[i], 图像.astype(np.float32) / 255.0, atol=1e-6)
+            else:
+                assert np.array_equal(批量输入[i], 图像)
+    
+    def test_模型管理器批量预测(self, 动态模型, 固定模型):
+        """模型管理器对 ONNX 会话的批量预测与单帧预测相同，固定批次模型同样可用"""
+        管理器 = 模型管理器()
+        try:
+            帧 = 生成帧(11, 3, "uint8")
+            for 名称, 路径 in (("动态", 动态模型), ("固定", 固定模型)):
+                assert 管理器.加载模型(名称, 路径)
+                assert 管理器.切换模型(名称)
+                结果 = 管理器.批量预测(帧, 最大批次=4)
+                assert np.allclose(结果, [管理器.预测(图像) for 图像 in 帧], atol=1e-6)
+        finally:
+            管理器.关闭()
+    
+    def test_模型管理器固定批次等于最大批次(self, 动态模型, 模型目录):
+        """固定批次等于最大批次且帧数不是其整数倍时，最后一块补齐后执行"""
+        固定4模型 = 创建ONNX模型(str(模型目录 / "固定4.onnx"), 帧形状, 动作数, 批次=4)
+        管理器 = 模型管理器()
+        try:
+            帧 = 生成帧(6, 5, "uint8")
+            assert 管理器.加载模型("动态", 动态模型)
+            期望 = 管理器.批量预测(帧, 最大批次=4)
+            assert 管理器.加载模型("固定4", 固定4模型)
+            assert 管理器.切换模型("固定4")
+            for 最大批次 in (4, 8):
+                结果 = 管理器.批量预测(帧, 最大批次=最大批次)
+                assert 结果.shape == (6, 动作数)
+                assert np.allclose(结果, 期望, atol=1e-6)
+        finally:
+            管理器.关闭()
+    
+    def test_模型管理器会话池并发预测(self, 动态模型):
+        """会话池大小 > 1 时每个 ONNX 模型创建多个会话，多线程并发预测结果与单线程相同"""
+        import threading
+
+        管理器 = 模型管理器(会话池大小=3)
+        try:
+            assert 管理器.加载模型("动态", 动态模型)
+            assert 管理器._槽位["动态"].会话池.大小 == 3
+            帧 = 生成帧(8, 4, "uint8")
+            期望 = [管理器.预测(图像) for 图像 in 帧]
+            结果 = [None] * len(帧)
+
+            def 预测(i):
+                结果[i] = 管理器.预测(帧[i])
+
+            线程列表 = [threading.Thread(target=预测, args=(i,)) for i in range(len(帧))]
+            for t in 线程列表:
+                t.start()
+            for t in 线程列表:
+                t.join()
+            assert np.allclose(结果, 期望, atol=1e-6)
+        finally:
+            管理器.关闭()
+
+    def test_模型管理器无活动模型返回空数组(self):
+        """没有活动模型时批量预测返回空数组"""
+        管理器 = 模型管理器()
+        try:
+            assert 管理器.批量预测(生成帧(2, 0, "uint8")).shape[0] == 0
+        finally:
+            管理器.关闭()
+    
+    @settings(max_examples=30, deadline=None)
+    @given(
+        样本数=st.integers(min_value=1, max_value=60),
+        批次大小=st.integers(min_value=1, max_value=25)
+    )
+    def test_评估按块调用模型(self, 样本数, 批次大小):
+        """评估器每块只调用一次 predict，结果与批次大小为 1 时相同"""
+        帧 = 生成帧(样本数, 样本数, "float32")
+        测试数据 = [(帧[i], i % 动作数) for i in range(样本数)]
+        动作定义 = {i: f"动作{i}" for i in range(动作数)}
+        
+        模型 = 计数模型()
+        批量结果 = 模型评估器(模型, 动作定义).评估(测试数据, 批次大小=批次大小)
+        assert 模型.调用次数 == -(-样本数 // 批次大小)
+        
+        逐个结果 = 模型评估器(计数模型(), 动作定义).评估(测试数据, 批次大小=1)
+        assert np.array_equal(批量结果.混淆矩阵, 逐个结果.混淆矩阵)
+        assert 批量结果.样本数量 == 样本数
+    
+    def test_一致性验证使用批量预测(self, 动态模型):
+        """两个后端都支持批量预测时按块比较，同一模型的差异为 0"""
+        引擎A = ONNX推理引擎(动态模型, 使用GPU=False, 预热=False)
+        引擎B = ONNX推理引擎(动态模型, 使用GPU=False, 预热=False)
+        验证器 = 输出一致性验证器(容差=1e-4, 输入形状=帧形状, 批次大小=8)
+        
+        结果 = 验证器.批量比较输出(引擎A, 引擎B, 测试样本数=20, 随机种子=0)
+        
+        assert 结果.一致
+        assert 结果.测试样本数 == 20
+        assert len(结果.详细差异) == 20
+        assert 引擎A.获取延迟统计().推理次数 == 0  # 未走单帧路径
+    
+    def test_导出检查动态批次(self, 模型目录):
+        """固定批次模型可改为动态批次；含固定 Reshape 的模型保持不变"""
+        转换器 = 模型转换器()
+        可修改 = 创建ONNX模型(str(模型目录 / "可修改.onnx"), 帧形状, 动作数, 批次=1)
+        不可修改 = 创建ONNX模型(str(模型目录 / "不可修改.onnx"), 帧形状, 动作数, 批次=1, 固定Reshape=True)
+        
+        assert not 转换器.检查动态批次(可修改)
+        assert 转换器.设置动态批次(可修改)
+        assert 转换器.检查动态批次(可修改)
+        assert ONNX推理引擎(可修改, 使用GPU=False, 预热=False).支持动态批次
+        
+        原始内容 = open(不可修改, "rb").read()
+        assert not 转换器.设置动态批次(不可修改)
+        assert open(不可修改, "rb").read() == 原始内容
+        assert not os.path.exists(不可修改 + ".tmp")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,359 @@
+"""
+推理服务属性测试
+
+属性 1: 并发请求结果对应
+*对于任意* 并发机器人数和每个机器人的请求数，每个请求取回的都是自己那一帧的输出
+
+属性 2: 批次大小有界
+*对于任意* 最大批次和请求数，每个批次的请求数不超过最大批次，所有请求都被执行一次
+
+属性 3: 共享会话引用计数
+*对于任意* 客户端数，同一模型路径只创建一个引擎，最后一个客户端关闭时服务停止
+
+属性 4: 跨进程客户端共享批次
+*对于任意* 客户端数，连接同一推理服务器的客户端经共享内存帧环提交帧，
+各自取回自己帧的输出，并发请求合并为同一批次
+
+Feature: micro-batching-inference-service
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pytest
+from hypothesis import given, strategies as st, settings
+
+import 核心.推理服务 as 推理服务模块
+from 核心.帧环 import 共享内存可用
+from 核心.推理服务 import (
+    推理服务, 推理服务器, 远程推理客户端, 获取共享客户端, 获取共享服务列表,
+    服务器地址, 连接推理服务器
+)
+
+
+动作数 = 4
+
+
+def 生成帧(编号: int) -> np.ndarray:
+    """生成像素值由编号决定的小图像"""
+    return np.full((3, 2, 3), 编号, dtype=np.float32)
+
+
+class 记录引擎:
+    """记录每次批量预测的批次大小，输出行由帧的像素值决定"""
+    
+    def __init__(self, 延迟: float = 0.0, 失败: bool = False):
+        self.批次大小: list = []
+        self.延迟 = 延迟
+        self.失败 = 失败
+        self.模型路径 = ""
+    
+    def 单帧输出(self, 图像: np.ndarray) -> np.ndarray:
+        return float(图像.flat[0]) + np.arange(动作数, dtype=np.float32)
+    
+    def 批量预测(self, 图像批次) -> np.ndarray:
+        self.批次大小.append(len(图像批次))
+        if self.延迟:
+            time.sleep(self.延迟)
+        if self.失败:
+            raise ValueError("模拟推理失败")
+        return np.array([self.单帧输出(图像) for 图像 in 图像批次])
+    
+    def 获取当前后端(self) -> str:
+        return "测试"
+
+
+class Test推理服务属性:
+    """
+    属性测试: 微批处理推理服务
+    
+    Feature: micro-batching-inference-service, Property 1-3
+    """
+    
+    @settings(max_examples=20, deadline=None)
+    @given(
+        机器人数=st.integers(min_value=1, max_value=6),
+        请求数=st.integers(min_value=1, max_value=15),
+        最大批次=st.integers(min_value=1, max_value=8)
+    )
+    def test_并发请求结果对应(self, 机器人数, 请求数, 最大批次):
+        """多个线程同时提交帧，每个请求得到自己帧的输出"""
+        引擎 = 记录引擎()
+        
+        def 机器人循环(机器人编号: int) -> bool:
+            for i in range(请求数):
+                编号 = 机器人编号 * 1000 + i
+                结果 = 服务.预测(生成帧(编号), 超时=5.0)
+                if not np.allclose(结果, 引擎.单帧输出(生成帧(编号))):
+                    return False
+            return True
+        
+        with 推理服务(引擎, 最大批次=最大批次, 等待窗口=0.001) as 服务:
+            with ThreadPoolExecutor(max_workers=机器人数) as 线程池:
+                结果 = list(线程池.map(机器人循环, range(机器人数)))
+        
+        assert all(结果)
+        assert sum(引擎.批次大小) == 机器人数 * 请求数
+        assert 服务.获取统计().请求数 == 机器人数 * 请求数
+    
+    @settings(max_examples=20, deadline=None)
+    @given(
+        最大批次=st.integers(min_value=1, max_value=8),
+        请求数=st.integers(min_value=1, max_value=40)
+    )
+    def test_批次大小不超过最大批次(self, 最大批次, 请求数):
+        """一次性提交大量请求，每批不超过最大批次且每个请求只执行一次"""
+        引擎 = 记录引擎()
+        with 推理服务(引擎, 最大批次=最大批次, 等待窗口=0.005, 队列容量=请求数) as 服务:
+            结果列表 = [服务.提交(生成帧(i)) for i in range(请求数)]
+            输出 = [结果.result(timeout=5.0) for 结果 in 结果列表]
+        
+        assert max(引擎.批次大小) <= 最大批次
+        assert sum(引擎.批次大小) == 请求数
+        assert all(np.allclose(输出[i], 引擎.单帧输出(生成帧(i))) for i in range(请求数))
+        统计 = 服务.获取统计()
+        assert 统计.批次数 == len(引擎.批次大小)
+        assert 统计.最大延迟 >= 统计.平均延迟 >= 统计.平均排队时间 >= 0
+    
+    def test_等待窗口内的请求合并(self):
+        """窗口内同时到达的请求合并为一个批次"""
+        引擎 = 记录引擎()
+        屏障 = threading.Barrier(4)
+        
+        def 提交():
+            屏障.wait()
+            return 服务.预测(生成帧(1), 超时=5.0)
+        
+        with 推理服务(引擎, 最大批次=4, 等待窗口=0.2) as 服务:
+            with ThreadPoolExecutor(max_workers=4) as 线程池:
+                list(线程池.map(lambda _: 提交(), range(4)))
+        
+        assert 引擎.批次大小 == [4]
+        assert 服务.获取统计().平均批次大小 == 4
+    
+    def test_推理失败传播到每个请求(self):
+        """批次失败时该批所有请求都收到异常，服务继续运行"""
+        引擎 = 记录引擎(失败=True)
+        with 推理服务(引擎, 最大批次=4) as 服务:
+            结果列表 = [服务.提交(生成帧(i)) for i in range(3)]
+            for 结果 in 结果列表:
+                with pytest.raises(ValueError):
+                    结果.result(timeout=5.0)
+            assert 服务.是否运行()
+        assert 服务.获取统计().失败数 == 3
+    
+    def test_队列满时拒绝请求(self):
+        """推理阻塞且队列已满时立即拒绝，不阻塞调用方"""
+        引擎 = 记录引擎(延迟=0.3)
+        with 推理服务(引擎, 最大批次=1, 等待窗口=0, 队列容量=1) as 服务:
+            服务.提交(生成帧(0))
+            time.sleep(0.05)  # 工作线程取走首个请求并阻塞在推理中
+            服务.提交(生成帧(1))
+            with pytest.raises(RuntimeError):
+                服务.提交(生成帧(2))
+        assert 服务.获取统计().拒绝数 == 1
+    
+    def test_停止后未完成请求以异常结束(self):
+        """停止服务时队列中的请求收到异常，之后不再接受提交"""
+        引擎 = 记录引擎(延迟=0.2)
+        服务 = 推理服务(引擎, 最大批次=1, 等待窗口=0)
+        服务.启动()
+        结果列表 = [服务.提交(生成帧(i)) for i in range(3)]
+        服务.停止()
+        
+        with pytest.raises(RuntimeError):
+            结果列表[-1].result(timeout=1.0)
+        with pytest.raises(RuntimeError):
+            服务.提交(生成帧(0))
+    
+    @settings(max_examples=10, deadline=None)
+    @given(客户端数=st.integers(min_value=1, max_value=5))
+    def test_共享会话引用计数(self, tmp_path_factory, 客户端数):
+        """同一路径的客户端共享一个引擎，全部关闭后服务停止"""
+        路径 = str(tmp_path_factory.mktemp("模型") / "model.onnx")
+        引擎列表 = []
+        
+        def 工厂(模型路径, 配置):
+            引擎列表.append(记录引擎())
+            return 引擎列表[-1]
+        
+        服务配置 = {"最大批次": 4, "等待窗口毫秒": 1.0, "队列容量": 16, "请求超时": 5.0}
+        客户端列表 = [获取共享客户端(路径, 服务配置=服务配置, 引擎工厂=工厂) for _ in range(客户端数)]
+        服务 = 客户端列表[0].服务
+        
+        assert len(引擎列表) == 1
+        assert all(客户端.服务 is 服务 for 客户端 in 客户端列表)
+        assert all(客户端.是否已初始化() for 客户端 in 客户端列表)
+        assert np.allclose(客户端列表[-1].预测(生成帧(7)), 引擎列表[0].单帧输出(生成帧(7)))
+        assert 客户端列表[0].获取当前后端() == "测试"
+        
+        for 客户端 in 客户端列表[:-1]:
+            客户端.关闭()
+            客户端.关闭()  # 重复关闭不影响计数
+        assert 服务.是否运行()
+        
+        客户端列表[-1].关闭()
+        assert not 服务.是否运行()
+        assert not any(键.endswith("model.onnx") for 键 in 获取共享服务列表())
+    
+    def test_ONNX引擎批量结果与单帧一致(self, tmp_path):
+        """以真实 ONNX 会话运行时，服务返回的结果与引擎单帧预测相同"""
+        pytest.importorskip("onnxruntime")
+        onnx = pytest.importorskip("onnx")
+        from onnx import helper, TensorProto
+        from 核心.ONNX推理 import ONNX推理引擎
+        
+        帧形状 = (4, 3, 3)
+        特征数 = int(np.prod(帧形状))
+        权重 = helper.make_tensor("W", TensorProto.FLOAT, [特征数, 动作数],
+                                np.random.RandomState(0).randn(特征数, 动作数).astype(np.float32).ravel())
+        图 = helper.make_graph(
+            [helper.make_node("Flatten", ["input"], ["flat"], axis=1),
+             helper.make_node("MatMul", ["flat", "W"], ["output"])],
+            "test",
+            [helper.make_tensor_value_info("input", TensorProto.FLOAT, ["N", *帧形状])],
+            [helper.make_tensor_value_info("output", TensorProto.FLOAT, ["N", 动作数])],
+            [权重]
+        )
+        模型 = helper.make_model(图, opset_imports=[helper.make_opsetid("", 13)])
+        模型.ir_version = 8
+        路径 = str(tmp_path / "model.onnx")
+        onnx.save(模型, 路径)
+        
+        引擎 = ONNX推理引擎(路径, 使用GPU=False, 预热=False)
+        帧 = np.random.RandomState(1).randint(0, 256, (12,) + 帧形状, dtype=np.uint8)
+        with 推理服务(引擎, 最大批次=4, 等待窗口=0.01) as 服务:
+            with ThreadPoolExecutor(max_workers=4) as 线程池:
+                结果 = list(线程池.map(lambda 图像: 服务.预测(图像, 超时=5.0), 帧))
+        
+        assert np.allclose(结果, [引擎.预测(图像) for 图像 in 帧], atol=1e-5)
+
+
+@pytest.mark.skipif(not 共享内存可用, reason="不支持共享内存")
+class Test推理服务器属性:
+    """
+    属性测试: 跨进程推理服务器
+    
+    Feature: micro-batching-inference-service, Property 4
+    """
+    
+    密钥 = b"test-key"
+    
+    @staticmethod
+    def 创建服务器(路径: str, 引擎: 记录引擎, 等待窗口: float = 0.2, 空闲退出=None) -> 推理服务器:
+        """在本进程的线程中运行服务器，地址按模型路径生成"""
+        服务 = 推理服务(引擎, 最大批次=8, 等待窗口=等待窗口)
+        return 推理服务器(服务, 服务器地址(路径), Test推理服务器属性.密钥, 请求超时=5.0, 空闲退出=空闲退出)
+    
+    @settings(max_examples=5, deadline=None)
+    @given(客户端数=st.integers(min_value=2, max_value=4))
+    def test_跨进程客户端共享批次(self, tmp_path_factory, 客户端数):
+        """多个客户端同时提交，结果与各自的帧对应且合并为一个批次"""
+        路径 = str(tmp_path_factory.mktemp("模型") / "model.onnx")
+        引擎 = 记录引擎()
+        服务器 = self.创建服务器(路径, 引擎)
+        服务器.启动()
+        try:
+            客户端列表 = [远程推理客户端(服务器.地址, self.密钥, 超时=5.0) for _ in range(客户端数)]
+            屏障 = threading.Barrier(客户端数)
+            
+            def 提交(编号: int):
+                屏障.wait()
+                return 客户端列表[编号].预测(生成帧(编号 + 1))
+            
+            with ThreadPoolExecutor(max_workers=客户端数) as 线程池:
+                结果 = list(线程池.map(提交, range(客户端数)))
+            
+            assert all(np.allclose(结果[i], 引擎.单帧输出(生成帧(i + 1))) for i in range(客户端数))
+            assert 引擎.批次大小 == [客户端数]
+            assert 客户端列表[0].获取服务统计().请求数 == 客户端数
+            assert 客户端列表[0].获取当前后端() == "测试"
+            assert 服务器.连接数 == 客户端数
+            
+            for 客户端 in 客户端列表:
+                客户端.关闭()
+            截止 = time.time() + 2.0
+            while 服务器.连接数 and time.time() < 截止:
+                time.sleep(0.01)
+            assert 服务器.连接数 == 0
+        finally:
+            服务器.停止()
+    
+    def test_批量预测超过槽数时分块提交(self, tmp_path):
+        """一次提交的帧数超过帧环槽数时分块发送，输出顺序不变"""
+        引擎 = 记录引擎()
+        服务器 = self.创建服务器(str(tmp_path / "model.onnx"), 引擎, 等待窗口=0.001)
+        服务器.启动()
+        try:
+            客户端 = 远程推理客户端(服务器.地址, self.密钥, 超时=5.0, 槽数=3)
+            输出 = 客户端.批量预测([生成帧(i) for i in range(7)])
+            assert np.allclose(输出, [引擎.单帧输出(生成帧(i)) for i in range(7)])
+            
+            # 输入形状变化时重建帧环
+            输出 = 客户端.批量预测([np.full((2, 2, 3), 9, dtype=np.uint8)])
+            assert np.allclose(输出[0], 引擎.单帧输出(生成帧(9)))
+            assert 客户端.获取预处理规格(16, 12).缩放 is None
+            客户端.关闭()
+            
+            with pytest.raises(RuntimeError):
+                客户端.预测(生成帧(0))
+        finally:
+            服务器.停止()
+    
+    def test_客户端全部断开后服务器退出(self, tmp_path):
+        """设置空闲退出时，最后一个客户端断开后 运行() 返回"""
+        服务器 = self.创建服务器(str(tmp_path / "model.onnx"), 记录引擎(), 空闲退出=0.3)
+        线程 = threading.Thread(target=服务器.运行, daemon=True)
+        线程.start()
+        
+        截止 = time.time() + 2.0
+        while 服务器._监听器 is None and time.time() < 截止:
+            time.sleep(0.01)
+        客户端 = 远程推理客户端(服务器.地址, self.密钥, 超时=5.0)
+        time.sleep(0.5)
+        assert 线程.is_alive()
+        
+        客户端.关闭()
+        线程.join(timeout=3.0)
+        assert not 线程.is_alive()
+        assert not 服务器.服务.是否运行()
+    
+    def test_服务器未运行时自动启动(self, tmp_path, monkeypatch):
+        """连接失败时按配置启动服务器进程，关闭自动启动时直接报错"""
+        路径 = str(tmp_path / "model.onnx")
+        服务配置 = {"认证密钥": self.密钥.decode(), "请求超时": 5.0, "启动超时": 5.0}
+        
+        with pytest.raises(OSError):
+            连接推理服务器(路径, 服务配置=dict(服务配置, 自动启动=False))
+        
+        服务器列表 = []
+        
+        class 运行中进程:
+            returncode = None
+            
+            def poll(self):
+                return None
+        
+        def 启动服务器(模型路径, 配置, 服务配置):
+            服务器列表.append(self.创建服务器(模型路径, 记录引擎()))
+            服务器列表[-1].启动()
+            return 运行中进程()
+        
+        monkeypatch.setattr(推理服务模块, "_启动服务器进程", 启动服务器)
+        try:
+            客户端 = 获取共享客户端(路径, 服务配置=dict(服务配置, 跨进程=True))
+            assert isinstance(客户端, 远程推理客户端)
+            assert np.allclose(客户端.预测(生成帧(3)), 记录引擎().单帧输出(生成帧(3)))
+            
+            # 服务器已运行时不再启动
+            连接推理服务器(路径, 服务配置=服务配置).关闭()
+            assert len(服务器列表) == 1
+            客户端.关闭()
+        finally:
+            for 服务器 in 服务器列表:
+                服务器.停止()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,167 @@
+"""
+数据清洗属性测试
+
+属性 1: 按组限量
+*对于任意* 组号和上限，每组保留 min(组内样本数, 上限) 个样本，保留索引升序且不重复
+
+属性 2: 分箱与直方图一致
+*对于任意* 数值，计算分箱 的箱号计数与 np.histogram 相同，清洗后每箱不超过每箱样本数
+
+属性 3: 文件清洗只保留所选样本
+*对于任意* 分片目录或旧格式文件，清洗输出中的每个样本都来自原数据且图像与标签对应，各类别不超过中位数
+
+Feature: vectorized-data-cleaning
+"""
+
+import os
+import numpy as np
+import pytest
+from hypothesis import given, strategies as st, settings
+
+from 工具.数据清洗 import (
+    按组限量, 计算分箱, 清洗索引, 平衡索引, 清洗数据, 按动作类别平衡, 清洗数据文件
+)
+from 工具.数据集格式 import 分片写入器, 加载分片, 读取分片信息, 样本视图
+
+
+图像形状 = (4, 5, 3)
+动作数 = 6
+
+
+def 生成样本(数量: int, 种子: int, 类别权重=None):
+    """生成图像编码了样本序号的数据，便于核对图像和标签是否对应"""
+    随机源 = np.random.RandomState(种子)
+    类别 = 随机源.choice(动作数, 数量, p=类别权重)
+    标签 = np.eye(动作数, dtype=np.uint8)[类别]
+    图像 = np.zeros((数量,) + 图像形状, dtype=np.uint8)
+    图像[:, 0, 0, 0] = np.arange(数量) % 256
+    图像[:, 0, 0, 1] = np.arange(数量) // 256
+    图像[:, 0, 0, 2] = 类别
+    return 图像, 标签
+
+
+def 样本序号(图像: np.ndarray) -> np.ndarray:
+    return 图像[:, 0, 0, 0].astype(np.int64) + 图像[:, 0, 0, 1].astype(np.int64) * 256
+
+
+class Test数据清洗属性:
+    """
+    属性测试: 向量化数据清洗
+
+    Feature: vectorized-data-cleaning, Property 1-3
+    """
+
+    @settings(max_examples=60, deadline=None)
+    @given(
+        组号=st.lists(st.integers(min_value=0, max_value=7), max_size=200),
+        上限=st.integers(min_value=0, max_value=30),
+        种子=st.integers(min_value=0, max_value=1000)
+    )
+    def test_按组限量(self, 组号, 上限, 种子):
+        """每组保留数量正确，索引升序不重复，相同种子结果相同"""
+        组号 = np.array(组号, dtype=np.int64)
+        保留 = 按组限量(组号, 上限, 随机种子=种子)
+
+        assert np.all(np.diff(保留) > 0)
+        期望 = np.minimum(np.bincount(组号, minlength=8), 上限)
+        assert np.array_equal(np.bincount(组号[保留], minlength=8), 期望)
+        assert np.array_equal(保留, 按组限量(组号, 上限, 随机种子=种子))
+
+    def test_按组上限数组(self):
+        """上限可以按组分别指定"""
+        组号 = np.array([0, 0, 0, 1, 1, 1, 2])
+        保留 = 按组限量(组号, np.array([1, 3, 0]), 随机种子=0)
+        assert np.array_equal(np.bincount(组号[保留], minlength=3), [1, 3, 0])
+
+    @settings(max_examples=60, deadline=None)
+    @given(
+        值=st.lists(st.floats(min_value=-5, max_value=5, allow_nan=False), min_size=1, max_size=300),
+        分箱数=st.integers(min_value=1, max_value=30),
+        每箱样本数=st.integers(min_value=1, max_value=20)
+    )
+    def test_分箱与直方图一致(self, 值, 分箱数, 每箱样本数):
+        """箱号计数与 np.histogram 相同，清洗后每箱样本数为 min(原数量, 每箱样本数)"""
+        值 = np.array(值)
+        箱号, 边界 = 计算分箱(值, 分箱数)
+        直方图, 期望边界 = np.histogram(值, 分箱数)
+
+        assert np.allclose(边界, 期望边界)
+        assert np.array_equal(np.bincount(箱号, minlength=分箱数), 直方图)
+
+        保留 = 清洗索引(值, 分箱数=分箱数, 每箱样本数=每箱样本数, 随机种子=0)
+        assert np.array_equal(np.histogram(值[保留], 边界)[0], np.minimum(直方图, 每箱样本数))
+
+    @settings(max_examples=30, deadline=None)
+    @given(样本数=st.integers(min_value=1, max_value=400), 种子=st.integers(min_value=0, max_value=1000))
+    def test_清洗数据按索引收集图像(self, 样本数, 种子):
+        """列表和样本视图输入得到相同结果，图像与标签一一对应"""
+        图像, 标签 = 生成样本(样本数, 种子)
+        列表数据 = [(图像[i], 标签[i]) for i in range(样本数)]
+
+        视图图像, 视图标签 = 清洗数据(样本视图(图像, 标签), 随机种子=种子)
+        列表图像, 列表标签 = 清洗数据(列表数据, 随机种子=种子)
+
+        assert np.array_equal(视图图像, 列表图像)
+        assert np.array_equal(视图标签, 列表标签)
+        assert np.array_equal(视图标签, 标签[样本序号(视图图像)])
+
+    def test_按动作类别平衡(self):
+        """动作为索引或 one-hot 时每类都不超过中位数"""
+        图像, 标签 = 生成样本(300, 0, [0.5, 0.2, 0.1, 0.1, 0.05, 0.05])
+        类别 = np.argmax(标签, axis=1)
+        中位数 = int(np.median(np.bincount(类别)))
+
+        for 动作 in (标签, 类别):
+            结果 = 按动作类别平衡([(图像[i], 动作[i]) for i in range(300)], 随机种子=1)
+            结果类别 = np.array([样本[0][0, 0, 2] for 样本 in 结果])
+            assert np.array_equal(np.bincount(结果类别, minlength=动作数),
+                                  np.minimum(np.bincount(类别, minlength=动作数), 中位数))
+
+    @settings(max_examples=15, deadline=None)
+    @given(样本数=st.integers(min_value=1, max_value=1500), 种子=st.integers(min_value=0, max_value=1000))
+    def test_清洗分片目录(self, tmp_path_factory, 样本数, 种子):
+        """分片目录清洗为新分片，样本来自原数据，类别计数与标签一致"""
+        图像, 标签 = 生成样本(样本数, 种子, [0.4, 0.3, 0.1, 0.1, 0.05, 0.05])
+        分片目录 = str(tmp_path_factory.mktemp("数据") / "训练数据-1")
+        with 分片写入器(分片目录, 图像形状, 动作数) as 写入器:
+            写入器.批量写入(图像, 标签)
+
+        清洗数据文件(分片目录, 随机种子=种子)
+        输出 = 加载分片(分片目录 + "_cleaned")
+        序号 = 样本序号(输出.图像)
+
+        assert np.array_equal(序号, 平衡索引(标签, 随机种子=种子))
+        assert np.array_equal(输出.图像, 图像[序号])
+        assert np.array_equal(输出.标签, 标签[序号])
+        assert 读取分片信息(分片目录 + "_cleaned").类别计数 == np.bincount(
+            np.argmax(输出.标签, axis=1), minlength=动作数).tolist()
+
+    def test_清洗旧格式文件(self, tmp_path):
+        """旧的 pickle .npy 文件输出为同格式文件"""
+        图像, 标签 = 生成样本(200, 3, [0.6, 0.2, 0.1, 0.05, 0.03, 0.02])
+        路径 = str(tmp_path / "训练数据-1.npy")
+        np.save(路径, np.array([[图像[i], list(标签[i])] for i in range(200)], dtype=object))
+
+        清洗数据文件(路径, 随机种子=0)
+        输出 = np.load(str(tmp_path / "训练数据-1_cleaned.npy"), allow_pickle=True)
+        序号 = [int(样本[0][0, 0, 0]) for 样本 in 输出]
+
+        assert 序号 == 平衡索引(标签, 随机种子=0).tolist()
+        assert all(list(样本[1]) == list(标签[i]) for 样本, i in zip(输出, 序号))
+
+    def test_批量写入刷新(self, tmp_path):
+        """批量写入跨过刷新间隔时样本可被读取"""
+        图像, 标签 = 生成样本(25, 0)
+        写入器 = 分片写入器(str(tmp_path / "分片"), 图像形状, 动作数, 刷新间隔=10)
+        写入器.批量写入(图像[:12], 标签[:12])
+        assert len(加载分片(str(tmp_path / "分片"))) == 12
+
+        写入器.批量写入(图像[12:], 标签[12:])
+        写入器.关闭()
+        assert np.array_equal(加载分片(str(tmp_path / "分片")).图像, 图像)
+        with pytest.raises(ValueError):
+            分片写入器(str(tmp_path / "其他"), 图像形状, 动作数).批量写入(图像, 标签[:, :3])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
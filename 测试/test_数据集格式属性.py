@@ -0,0 +1,285 @@
+"""
+列式数据集格式属性测试
+
+属性 1: 写入读取往返一致
+*对于任意* 样本序列，经数据集写入器写入后读取，图像和标签与写入时完全相同
+
+属性 2: 旧格式转换无损
+*对于任意* 旧的 [图像, 动作] pickle 文件，转换后的分片内容与原文件一致
+
+属性 3: 未关闭的分片可读取
+*对于任意* 写入中断的分片，已刷新的样本仍可通过 mmap 读取
+
+属性 4: 后台写入与同步写入一致
+*对于任意* 提交批次，后台写入器关闭后的分片内容与同步写入相同，写满的分片都被报告；
+按帧环引用提交时写入的是槽位内容，写入后释放槽位的固定
+
+Feature: columnar-dataset-format
+"""
+
+import os
+import time
+import threading
+import numpy as np
+import pytest
+from hypothesis import given, strategies as st, settings
+
+from 核心.帧环 import 帧环
+from 工具.数据集格式 import (
+    数据集写入器, 后台数据集写入器, 分片写入器, 样本视图,
+    加载分片, 加载样本, 读取标签, 读取类别计数, 读取分片信息,
+    列出数据集, 获取下一个编号, 是否分片目录, 转换旧格式文件, 批量转换
+)
+
+
+图像形状 = (6, 8, 3)
+动作数 = 5
+
+
+def 生成样本(数量: int, 种子: int = 0):
+    """生成随机图像和 one-hot 标签"""
+    随机源 = np.random.RandomState(种子)
+    图像 = 随机源.randint(0, 256, (数量,) + 图像形状, dtype=np.uint8)
+    类别 = 随机源.randint(0, 动作数, 数量)
+    标签 = np.eye(动作数, dtype=np.uint8)[类别]
+    return 图像, 标签
+
+
+def 保存旧格式(路径: str, 图像: np.ndarray, 标签: np.ndarray) -> None:
+    """按旧录制脚本的方式保存 [图像, 动作列表] 对象数组"""
+    数据 = [[图像[i], list(int(v) for v in 标签[i])] for i in range(len(图像))]
+    np.save(路径, np.array(数据, dtype=object), allow_pickle=True)
+
+
+class Test数据集格式属性:
+    """
+    属性测试: 列式数据集格式
+
+    Feature: columnar-dataset-format, Property 1-3
+    """
+
+    @settings(max_examples=30, deadline=None)
+    @given(
+        样本数=st.integers(min_value=1, max_value=40),
+        每分片样本数=st.integers(min_value=1, max_value=15)
+    )
+    def test_写入读取往返一致(self, tmp_path_factory, 样本数: int, 每分片样本数: int):
+        """按分片写入后依次读取，拼接结果与写入数据一致，分片数正确"""
+        数据目录 = str(tmp_path_factory.mktemp("数据"))
+        图像, 标签 = 生成样本(样本数)
+
+        with 数据集写入器(数据目录, 图像形状, 动作数, 每分片样本数=每分片样本数) as 写入器:
+            for i in range(样本数):
+                写入器.写入(图像[i], 标签[i])
+
+        分片列表 = 列出数据集(数据目录)
+        assert len(分片列表) == -(-样本数 // 每分片样本数)
+        assert all(是否分片目录(路径) for 路径 in 分片列表)
+
+        读取图像 = np.concatenate([加载分片(路径).图像 for 路径 in 分片列表])
+        读取标签结果 = np.concatenate([读取标签(路径) for 路径 in 分片列表])
+        assert np.array_equal(读取图像, 图像)
+        assert np.array_equal(读取标签结果, 标签)
+
+        for 路径 in 分片列表:
+            信息 = 读取分片信息(路径)
+            assert 信息.已完成
+            assert sum(信息.类别计数) == 信息.样本数
+
+    def test_分片以mmap方式读取(self, tmp_path):
+        """加载分片返回 memmap，标签文件大小只与标签维度有关"""
+        图像, 标签 = 生成样本(20)
+        分片目录 = str(tmp_path / "训练数据-1")
+        with 分片写入器(分片目录, 图像形状, 动作数) as 写入器:
+            for i in range(20):
+                写入器.写入(图像[i], 标签[i])
+
+        数据 = 加载分片(分片目录)
+        assert isinstance(数据.图像, np.memmap)
+        assert isinstance(数据.标签, np.memmap)
+        assert os.path.getsize(os.path.join(分片目录, "标签.npy")) < 200 + 20 * 动作数
+
+    def test_动作索引作为标签(self, tmp_path):
+        """写入动作索引时自动转换为 one-hot"""
+        分片目录 = str(tmp_path / "训练数据-1")
+        with 分片写入器(分片目录, 图像形状, 动作数) as 写入器:
+            写入器.写入(np.zeros(图像形状, dtype=np.uint8), 3)
+
+        assert 读取标签(分片目录).tolist() == [[0, 0, 0, 1, 0]]
+        assert 读取类别计数(分片目录) == {3: 1}
+
+    def test_形状不匹配时报错(self, tmp_path):
+        """图像形状与分片不一致时拒绝写入"""
+        with 分片写入器(str(tmp_path / "分片"), 图像形状, 动作数) as 写入器:
+            with pytest.raises(ValueError):
+                写入器.写入(np.zeros((4, 4, 3), dtype=np.uint8), 0)
+
+    @settings(max_examples=20, deadline=None)
+    @given(
+        写入数=st.integers(min_value=0, max_value=30),
+        刷新间隔=st.integers(min_value=1, max_value=10)
+    )
+    def test_未关闭的分片可读取已刷新样本(self, tmp_path_factory, 写入数: int, 刷新间隔: int):
+        """写入器未关闭（模拟崩溃）时，最近一次刷新前的样本可以读取"""
+        分片目录 = str(tmp_path_factory.mktemp("分片"))
+        图像, 标签 = 生成样本(写入数)
+
+        写入器 = 分片写入器(分片目录, 图像形状, 动作数, 刷新间隔=刷新间隔)
+        for i in range(写入数):
+            写入器.写入(图像[i], 标签[i])
+        写入器._图像文件.flush()
+        写入器._标签文件.flush()
+
+        已刷新 = 写入数 // 刷新间隔 * 刷新间隔
+        数据 = 加载分片(分片目录)
+        assert len(数据) == 已刷新
+        assert np.array_equal(数据.图像, 图像[:已刷新])
+        assert not 读取分片信息(分片目录).已完成
+        写入器.关闭()
+
+    @settings(max_examples=20, deadline=None)
+    @given(样本数=st.integers(min_value=1, max_value=30))
+    def test_旧格式转换无损(self, tmp_path_factory, 样本数: int):
+        """转换后的分片与旧文件内容一致，列表中同编号只保留分片"""
+        数据目录 = str(tmp_path_factory.mktemp("数据"))
+        图像, 标签 = 生成样本(样本数, 种子=样本数)
+        旧文件 = os.path.join(数据目录, "训练数据-1.npy")
+        保存旧格式(旧文件, 图像, 标签)
+
+        旧数据 = 加载样本(旧文件)
+        assert np.array_equal(旧数据.图像, 图像)
+
+        分片目录 = 转换旧格式文件(旧文件)
+        新数据 = 加载样本(分片目录)
+        assert np.array_equal(新数据.图像, 图像)
+        assert np.array_equal(新数据.标签, 标签)
+        assert 读取类别计数(分片目录) == 读取类别计数(旧文件)
+        assert 列出数据集(数据目录) == [分片目录]
+
+    def test_批量转换并删除原文件(self, tmp_path):
+        """批量转换只处理旧文件，删除原文件后编号继续递增"""
+        数据目录 = str(tmp_path)
+        for 编号 in (1, 2):
+            保存旧格式(os.path.join(数据目录, f"训练数据-{编号}.npy"), *生成样本(5, 种子=编号))
+
+        结果 = 批量转换(数据目录, 删除原文件=True)
+
+        assert len(结果) == 2
+        assert not any(名称.endswith(".npy") for 名称 in os.listdir(数据目录))
+        assert 获取下一个编号(数据目录) == 3
+
+    def test_列出数据集按数字排序(self, tmp_path):
+        """编号按数值而不是字符串排序"""
+        数据目录 = str(tmp_path)
+        for 编号 in (10, 2, 1):
+            with 分片写入器(os.path.join(数据目录, f"训练数据-{编号}"), 图像形状, 动作数) as 写入器:
+                写入器.写入(np.zeros(图像形状, dtype=np.uint8), 0)
+
+        名称列表 = [os.path.basename(路径) for 路径 in 列出数据集(数据目录)]
+        assert 名称列表 == ["训练数据-1", "训练数据-2", "训练数据-10"]
+
+    def test_样本视图兼容旧用法(self):
+        """样本视图支持索引、切片和 (图像, 动作) 解包"""
+        图像, 标签 = 生成样本(10)
+        视图 = 样本视图(图像, 标签)
+
+        assert len(视图[:-3]) == 7
+        assert np.array_equal(视图[2][0], 图像[2])
+        assert [int(np.argmax(动作)) for _, 动作 in 视图] == list(np.argmax(标签, axis=1))
+
+
+
+class Test后台数据集写入器:
+    """
+    属性测试: 后台写入
+
+    Feature: columnar-dataset-format, Property 4
+    """
+
+    @settings(max_examples=30, deadline=None)
+    @given(
+        批次大小=st.lists(st.integers(min_value=0, max_value=12), max_size=8),
+        每分片样本数=st.integers(min_value=1, max_value=15),
+        队列长度=st.integers(min_value=1, max_value=3)
+    )
+    def test_与同步写入一致(self, tmp_path_factory, 批次大小, 每分片样本数, 队列长度):
+        """按批提交后关闭，读取结果与写入数据一致，写满的分片都被报告"""
+        数据目录 = str(tmp_path_factory.mktemp("数据"))
+        样本数 = sum(批次大小)
+        图像, 标签 = 生成样本(样本数)
+
+        写入器 = 后台数据集写入器(
+            数据集写入器(数据目录, 图像形状, 动作数, 每分片样本数=每分片样本数), 队列长度=队列长度
+        )
+        起点 = 0
+        for 大小 in 批次大小:
+            写入器.提交([(图像[i], 标签[i]) for i in range(起点, 起点 + 大小)])
+            起点 += 大小
+        assert 写入器.已提交样本数 == 样本数
+        assert 写入器.当前分片样本数 == 样本数 % 每分片样本数
+
+        最后分片 = 写入器.关闭()
+        已报告 = 写入器.取完成分片() + ([最后分片] if 最后分片 else [])
+        分片列表 = 列出数据集(数据目录)
+
+        assert 已报告 == 分片列表
+        assert len(分片列表) == -(-样本数 // 每分片样本数)
+        if 分片列表:
+            assert np.array_equal(np.concatenate([加载分片(路径).图像 for 路径 in 分片列表]), 图像)
+            assert np.array_equal(np.concatenate([读取标签(路径) for 路径 in 分片列表]), 标签)
+
+    def test_队列满时阻塞并计数(self, tmp_path):
+        """写入线程未取走批次时提交阻塞，阻塞次数被记录"""
+        内部写入器 = 数据集写入器(str(tmp_path), 图像形状, 动作数, 每分片样本数=100)
+        放行 = threading.Event()
+        原写入 = 内部写入器.写入
+
+        def 慢写入(图像, 标签):
+            放行.wait()
+            return 原写入(图像, 标签)
+
+        内部写入器.写入 = 慢写入
+        写入器 = 后台数据集写入器(内部写入器, 队列长度=1)
+        图像, 标签 = 生成样本(3)
+
+        写入器.写入(图像[0], 标签[0])  # 被写入线程取走后卡住
+        while 写入器.队列深度:
+            time.sleep(0.001)
+        写入器.写入(图像[1], 标签[1])  # 占满队列
+        threading.Timer(0.2, 放行.set).start()
+        写入器.写入(图像[2], 标签[2])  # 等待放行
+
+        assert 写入器.阻塞次数 == 1
+        assert 写入器.阻塞时间 > 0
+        写入器.关闭()
+        assert np.array_equal(加载分片(列出数据集(str(tmp_path))[0]).图像, 图像)
+
+    def test_按帧环引用写入(self, tmp_path):
+        """提交固定的帧引用，写入槽位内容后释放固定"""
+        图像, 标签 = 生成样本(10)
+        环 = 帧环(12, 图像形状)
+        引用列表 = [环.写入(帧) for 帧 in 图像]
+        assert all(环.固定(引用) for 引用 in 引用列表)
+
+        写入器 = 后台数据集写入器(数据集写入器(str(tmp_path), 图像形状, 动作数), 帧环=环)
+        写入器.提交(list(zip(引用列表[:6], 标签[:6])))
+        写入器.提交(list(zip(引用列表[6:], 标签[6:])))
+        写入器.关闭()
+
+        assert 环.获取固定槽数() == 0
+        assert np.array_equal(加载分片(列出数据集(str(tmp_path))[0]).图像, 图像)
+        assert np.array_equal(读取标签(列出数据集(str(tmp_path))[0]), 标签)
+
+    def test_写入错误在调用线程抛出(self, tmp_path):
+        """写入线程出错后，提交和关闭都抛出该错误"""
+        写入器 = 后台数据集写入器(数据集写入器(str(tmp_path), 图像形状, 动作数))
+        写入器.写入(np.zeros((2, 2, 3), dtype=np.uint8), 0)
+
+        with pytest.raises(ValueError):
+            写入器.关闭()
+        with pytest.raises(RuntimeError):
+            写入器.写入(np.zeros(图像形状, dtype=np.uint8), 0)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
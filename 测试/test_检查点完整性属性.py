@@ -465,6 +465,66 @@ class Test检查点完整性单元测试:
         # 使用无效的时间戳格式
         数据 = 管理器.加载检查点(时间戳="invalid-timestamp")
         assert 数据 is None, "无效时间戳应返回 None"
+    
+    def test_数组权重保存为npz并可内存映射(self):
+        """测试: 数组权重保存为 npz 容器，校验和与文件一致，可内存映射加载"""
+        import numpy as np
+        import zipfile
+        
+        管理器 = 检查点管理器(self.临时目录)
+        权重 = {
+            'w': np.arange(12, dtype=np.float32).reshape(3, 4),
+            'b': np.asfortranarray(np.ones((2, 3))),
+        }
+        优化器状态 = {'state': {0: {'step': 3, 'buf': np.zeros(3)}}}
+        
+        路径 = 管理器.保存检查点(
+            模型=模拟模型(权重),
+            优化器状态=优化器状态,
+            当前epoch=1,
+            当前batch=2,
+            loss值=0.5
+        )
+        
+        assert 路径.endswith('.npz')
+        assert zipfile.is_zipfile(路径)
+        元数据 = 管理器._查找元数据(路径)
+        assert 元数据.校验和 == 管理器._计算校验和(路径), "写入时计算的校验和应与文件一致"
+        assert 元数据.文件大小 == os.path.getsize(路径)
+        assert not any(名称.endswith('.tmp') for 名称 in os.listdir(self.临时目录))
+        
+        数据 = 管理器.加载检查点(路径, 内存映射=True)
+        加载的权重 = 数据['模型权重']['权重']
+        assert isinstance(加载的权重['w'], np.memmap)
+        np.testing.assert_array_equal(加载的权重['w'], 权重['w'])
+        np.testing.assert_array_equal(加载的权重['b'], 权重['b'])
+        assert 数据['优化器状态']['state'][0]['step'] == 3
+        np.testing.assert_array_equal(数据['优化器状态']['state'][0]['buf'], np.zeros(3))
+    
+    def test_异步写入使用保存时的快照(self):
+        """测试: 异步写入时保存的是调用时的权重，读取前等待写入完成"""
+        import numpy as np
+        
+        管理器 = 检查点管理器(self.临时目录, 最大检查点数=2, 异步写入=True)
+        权重 = {'w': np.zeros(4)}
+        
+        for epoch in range(4):
+            管理器.保存检查点(
+                模型=模拟模型(权重),
+                优化器状态={},
+                当前epoch=epoch,
+                当前batch=0,
+                loss值=1.0
+            )
+            权重['w'] += 1  # 保存后立即修改，不应影响已提交的快照
+        
+        管理器.等待写入完成()
+        检查点列表 = 管理器.列出检查点()
+        assert [项['epoch'] for 项 in 检查点列表] == [3, 2]
+        
+        数据 = 管理器.加载检查点()
+        np.testing.assert_array_equal(数据['模型权重']['权重']['w'], np.full(4, 3.0))
+        管理器.关闭()
 
 
 if __name__ == "__main__":
@@ -13,7 +13,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import numpy as np
 import pytest
 
-from 核心.数据类型 import 实体类型, 方向, 游戏状态, 检测结果, 状态识别结果
+from 核心.数据类型 import 实体类型, 方向, 游戏状态, 检测结果, 状态识别结果, 检测特征, 决策上下文
 from 核心.状态识别器 import 状态识别器
 
 
@@ -167,6 +167,43 @@ class Test数据类型:
         assert 结果.状态 == 游戏状态.战斗
         assert 结果.置信度 == 0.9
         assert "血条" in 结果.检测到的UI元素
+    
+    def test_检测特征查询(self):
+        """测试检测特征按类型、距离、方向统计"""
+        def 创建(类型, 距离, 方位):
+            return 检测结果(类型=类型, 置信度=0.9, 边界框=(0, 0, 10, 10),
+                           中心点=(5, 5), 方向=方位, 距离=距离)
+        
+        特征 = 检测特征([
+            创建(实体类型.怪物, 50.0, 方向.左),
+            创建(实体类型.怪物, 300.0, 方向.右上),
+            创建(实体类型.物品, 80.0, 方向.中心),
+            创建(实体类型.NPC, 120.0, 方向.左下),
+        ])
+        
+        assert 特征.总数 == 4
+        assert 特征.数量(实体类型.怪物) == 2
+        assert 特征.数量(实体类型.怪物, 100) == 1
+        assert 特征.存在(实体类型.物品, 100)
+        assert not 特征.存在(实体类型.物品, 80)
+        assert not 特征.存在(实体类型.玩家)
+        assert 特征.最近距离(实体类型.怪物) == 50.0
+        assert 特征.最近距离(实体类型.玩家) == float("inf")
+        assert 特征.方向数量(实体类型.怪物, (方向.左, 方向.左上, 方向.左下)) == 1
+        assert 特征.方向数量(实体类型.怪物, (方向.右, 方向.右上, 方向.右下)) == 1
+    
+    def test_决策上下文特征复用(self):
+        """测试决策上下文的特征视图只构建一次，检测列表变化后重建"""
+        上下文 = 决策上下文(游戏状态=游戏状态.战斗)
+        特征 = 上下文.特征
+        assert 特征.总数 == 0
+        assert 上下文.特征 is 特征
+        
+        上下文.检测结果.append(检测结果(
+            类型=实体类型.怪物, 置信度=0.9, 边界框=(0, 0, 10, 10),
+            中心点=(5, 5), 方向=方向.左, 距离=10.0))
+        assert 上下文.特征 is not 特征
+        assert 上下文.特征.数量(实体类型.怪物) == 1
 
 
 class TestYOLO检测器:
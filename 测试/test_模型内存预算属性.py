@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+"""
+属性测试：模型内存预算
+
+Property 1: 常驻内存不超过预算
+*对于任意* 模型大小、预算和切换序列，每次切换后常驻模型总内存不超过预算
+（只剩活动模型时除外），活动模型始终常驻
+
+Property 2: 被驱逐的模型按需重新加载
+*对于任意* 切换序列，切换到被驱逐的模型总能成功，切换事件记录重新加载耗时
+
+Property 3: 驱逐顺序为最久未使用优先
+
+Property 4: 非 ONNX 模型按权重或磁盘大小计入预算
+
+**Feature: model-memory-budget**
+"""
+
+import os
+import time
+
+import numpy as np
+import pytest
+from hypothesis import given, settings, strategies as st
+
+from 核心.模型管理 import 模型管理器, 自动切换器, 自动切换规则
+
+
+MB = 1024 * 1024
+
+
+class 虚拟会话:
+    """模拟 ONNX Runtime 会话，输出带模型标识"""
+
+    def __init__(self, 标识: float):
+        self.标识 = 标识
+
+    def run(self, output_names, input_dict):
+        return [np.array([[self.标识]])]
+
+    def get_inputs(self):
+        class 输入信息:
+            name = "input"
+            shape = [1, 4]
+        return [输入信息()]
+
+    def get_outputs(self):
+        class 输出信息:
+            name = "output"
+        return [输出信息()]
+
+
+class 计数管理器(模型管理器):
+    """从磁盘加载时返回虚拟会话并记录加载次数，内存按模型文件大小测量"""
+
+    def __init__(self, **参数):
+        super().__init__(**参数)
+        self.加载次数 = {}
+
+    def _加载模型实例(self, 路径: str):
+        名称 = os.path.splitext(os.path.basename(路径))[0]
+        self.加载次数[名称] = self.加载次数.get(名称, 0) + 1
+        return 虚拟会话(float(len(self.加载次数)))
+
+
+def 创建模型文件(目录, 大小MB列表):
+    """按大小创建模型文件，返回 {名称: 路径}"""
+    路径表 = {}
+    for i, 大小 in enumerate(大小MB列表):
+        路径 = os.path.join(str(目录), f"模型{i}.onnx")
+        with open(路径, "wb") as f:
+            f.truncate(大小 * MB)
+        路径表[f"模型{i}"] = 路径
+    return 路径表
+
+
+def 常驻内存(管理器) -> int:
+    return sum(槽位.内存占用 for 槽位 in 管理器._槽位.values() if 槽位.已加载)
+
+
+class Test内存预算属性:
+    """Property 1-2: 常驻内存不超过预算，被驱逐的模型按需重新加载"""
+
+    @given(
+        大小MB列表=st.lists(st.integers(min_value=1, max_value=4), min_size=2, max_size=5),
+        预算MB=st.integers(min_value=1, max_value=10),
+        数据=st.data(),
+    )
+    @settings(max_examples=40, deadline=None)
+    def test_切换序列下预算始终满足(self, tmp_path_factory, 大小MB列表, 预算MB, 数据):
+        目录 = tmp_path_factory.mktemp("模型")
+        路径表 = 创建模型文件(目录, 大小MB列表)
+        切换序列 = 数据.draw(st.lists(st.sampled_from(sorted(路径表)), min_size=1, max_size=15))
+
+        管理器 = 计数管理器(内存预算MB=预算MB)
+        try:
+            for 名称, 路径 in 路径表.items():
+                assert 管理器.加载模型(名称, 路径)
+
+            for 目标 in 切换序列:
+                assert 管理器.切换模型(目标)
+                活动槽位 = 管理器._槽位[目标]
+                assert 活动槽位.已加载
+                assert 管理器.预测(np.zeros((1, 4), np.float32))
+
+                常驻槽位 = [槽位 for 槽位 in 管理器._槽位.values() if 槽位.已加载]
+                assert 常驻内存(管理器) <= 预算MB * MB or 常驻槽位 == [活动槽位]
+
+            # 每个模型文件大小即为测量的内存占用
+            for 名称, 槽位 in 管理器._槽位.items():
+                if 槽位.已加载:
+                    assert 槽位.内存占用 == 大小MB列表[int(名称[2:])] * MB
+        finally:
+            管理器.关闭()
+
+    def test_切换到被驱逐模型时重新加载(self, tmp_path):
+        路径表 = 创建模型文件(tmp_path, [3, 3, 3])
+        管理器 = 计数管理器(内存预算MB=6)
+        try:
+            for 名称, 路径 in 路径表.items():
+                管理器.加载模型(名称, 路径)
+                time.sleep(0.001)
+
+            # 加载第三个模型时驱逐最久未用的非活动模型
+            assert 管理器._槽位["模型1"].已驱逐
+            assert 管理器._槽位["模型1"].模型实例 is None
+            assert "模型1" in 管理器.获取状态()["已驱逐模型"]
+
+            assert 管理器.切换模型("模型1")
+
+            assert 管理器.加载次数["模型1"] == 2
+            assert not 管理器._槽位["模型1"].已驱逐
+            事件 = 管理器._切换日志[-1]
+            assert 事件.额外信息["重新加载"] is True
+            assert 0 < 事件.额外信息["加载耗时"] <= 事件.切换耗时
+            # 重新加载后再次超出预算，驱逐最久未用的 模型2
+            assert 管理器._槽位["模型2"].已驱逐
+            assert 常驻内存(管理器) <= 6 * MB
+        finally:
+            管理器.关闭()
+
+    def test_未驱逐时切换不重新加载(self, tmp_path):
+        路径表 = 创建模型文件(tmp_path, [1, 1])
+        管理器 = 计数管理器(内存预算MB=10)
+        try:
+            for 名称, 路径 in 路径表.items():
+                管理器.加载模型(名称, 路径)
+            assert 管理器.切换模型("模型1")
+            assert 管理器.加载次数 == {"模型0": 1, "模型1": 1}
+            assert 管理器._切换日志[-1].额外信息 == {}
+        finally:
+            管理器.关闭()
+
+
+class Test驱逐顺序:
+    """Property 3: 驱逐顺序为最久未使用优先"""
+
+    def test_按最后使用时间驱逐(self, tmp_path):
+        路径表 = 创建模型文件(tmp_path, [2, 2, 2, 2])
+        管理器 = 计数管理器()
+        try:
+            for 名称, 路径 in 路径表.items():
+                管理器.加载模型(名称, 路径)
+            for 名称, 使用时间 in (("模型0", 4.0), ("模型1", 1.0), ("模型2", 3.0), ("模型3", 2.0)):
+                管理器._槽位[名称].最后使用时间 = 使用时间
+
+            驱逐列表 = 管理器.设置内存预算(4)
+
+            # 模型0 是活动模型，不驱逐
+            assert 驱逐列表 == ["模型1", "模型3"]
+            assert 常驻内存(管理器) == 4 * MB
+        finally:
+            管理器.关闭()
+
+    def test_不限预算时不驱逐(self, tmp_path):
+        路径表 = 创建模型文件(tmp_path, [4, 4, 4])
+        管理器 = 计数管理器()
+        try:
+            for 名称, 路径 in 路径表.items():
+                管理器.加载模型(名称, 路径)
+            assert not any(槽位.已驱逐 for 槽位 in 管理器._槽位.values())
+            assert 管理器.设置内存预算(0) == []
+        finally:
+            管理器.关闭()
+
+
+class 虚拟变量:
+    """模拟 TensorFlow 变量，只有 shape 和 dtype.size"""
+
+    class 类型:
+        size = 4
+
+    def __init__(self, *形状):
+        self.shape = 形状
+        self.dtype = self.类型()
+
+
+class 虚拟SavedModel:
+    """tf.saved_model.load 返回的对象只有 variables，没有 weights"""
+
+    def __init__(self):
+        self.variables = [虚拟变量(512, 1024), 虚拟变量(1024)]
+
+
+class 虚拟TFLearn模型:
+    """TFLearn DNN：变量保存在 session.graph 的 variables 集合中"""
+
+    class 会话:
+        class graph:
+            @staticmethod
+            def get_collection(名称):
+                assert 名称 == "variables"
+                return [虚拟变量(1024, 1024), 虚拟变量(1024, 1024)]
+
+    session = 会话()
+
+
+class 实例管理器(模型管理器):
+    """按路径返回预先指定的模型实例"""
+
+    def __init__(self, 实例表, **参数):
+        super().__init__(**参数)
+        self.实例表 = 实例表
+
+    def _加载模型实例(self, 路径: str):
+        return self.实例表[路径]
+
+
+class Test非ONNX内存测量:
+    """Property 4: 非 ONNX 模型按权重或磁盘大小计入预算"""
+
+    def 写入检查点(self, 目录, 名称, 大小MB列表):
+        """写入 TFLearn 检查点文件，返回 .index 路径"""
+        前缀 = os.path.join(str(目录), 名称)
+        for 后缀, 大小 in zip((".index", ".data-00000-of-00001", ".meta"), 大小MB列表):
+            with open(前缀 + 后缀, "wb") as f:
+                f.truncate(int(大小 * MB))
+        return 前缀 + ".index"
+
+    def test_按变量测量(self, tmp_path):
+        管理器 = 模型管理器()
+        try:
+            assert 管理器._测量内存占用(虚拟SavedModel(), str(tmp_path)) == (512 * 1024 + 1024) * 4
+            assert 管理器._测量内存占用(虚拟TFLearn模型(), "") == 8 * MB
+        finally:
+            管理器.关闭()
+
+    def test_无法测量时按检查点大小(self, tmp_path):
+        路径 = self.写入检查点(tmp_path, "模型.tfl", [0.5, 3, 0.5])
+        管理器 = 模型管理器()
+        try:
+            assert 管理器._测量内存占用(object(), 路径) == 4 * MB
+            assert 管理器._测量内存占用(object(), 路径[:-len(".index")]) == 4 * MB
+            # 没有文件时至少计 1MB
+            assert 管理器._测量内存占用(object(), str(tmp_path / "无.tfl")) == MB
+        finally:
+            管理器.关闭()
+
+    def test_非ONNX槽位被驱逐(self, tmp_path):
+        路径表 = {f"模型{i}": self.写入检查点(tmp_path, f"模型{i}.tfl", [0.5, 3, 0.5]) for i in range(3)}
+        管理器 = 实例管理器({路径: object() for 路径 in 路径表.values()}, 内存预算MB=8)
+        try:
+            for 名称, 路径 in 路径表.items():
+                assert 管理器.加载模型(名称, 路径)
+            assert 管理器._槽位["模型0"].内存占用 == 4 * MB
+            assert 常驻内存(管理器) <= 8 * MB
+            assert sum(槽位.已驱逐 for 槽位 in 管理器._槽位.values()) == 1
+        finally:
+            管理器.关闭()
+
+
+class Test预测预取:
+    """自动切换器根据切换历史在后台预加载下一个模型"""
+
+    def test_预取历史上的下一个模型(self, tmp_path):
+        路径表 = 创建模型文件(tmp_path, [2, 2, 2])
+        管理器 = 计数管理器(内存预算MB=4)
+        切换器 = 自动切换器(管理器)
+        切换器.设置全局冷却时间(0)
+        for 名称, 状态 in (("模型0", "移动"), ("模型1", "战斗"), ("模型2", "采集")):
+            切换器.添加规则(自动切换规则(名称=名称, 触发状态=[状态], 目标模型=名称, 冷却时间=0))
+        try:
+            for 名称, 路径 in 路径表.items():
+                管理器.加载模型(名称, 路径)
+
+            # 历史：移动 -> 战斗 -> 移动 -> 战斗
+            for 状态 in ("战斗", "移动", "战斗", "移动"):
+                assert 切换器.执行自动切换(状态)
+            assert 切换器.预测下一个模型("模型0") == "模型1"
+
+            # 切回 模型0 后预取 模型1（即使它已被驱逐）
+            管理器.等待预加载完成(超时=5)
+            assert 管理器._槽位["模型1"].已加载
+            assert 管理器.获取活动模型() == "模型0"
+        finally:
+            管理器.关闭()
+
+    def test_没有历史时不预取(self):
+        切换器 = 自动切换器(模型管理器())
+        assert 切换器.预测下一个模型("模型0") is None
+
+
+class Test内存预算配置:
+    """内存预算从配置文件读取并验证"""
+
+    def test_从配置读取内存预算(self, tmp_path):
+        import json
+
+        配置路径 = tmp_path / "models.json"
+        配置路径.write_text(json.dumps({
+            "模型列表": [{"名称": "甲", "路径": "甲.onnx"}],
+            "内存预算MB": 256
+        }), encoding="utf-8")
+
+        管理器 = 模型管理器(str(配置路径))
+        try:
+            assert 管理器.获取内存预算() == 256
+        finally:
+            管理器.关闭()
+
+    def test_负数预算验证失败(self):
+        管理器 = 模型管理器()
+        try:
+            assert not 管理器._验证配置({
+                "模型列表": [{"名称": "甲", "路径": "甲.onnx"}],
+                "内存预算MB": -1
+            })
+        finally:
+            管理器.关闭()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
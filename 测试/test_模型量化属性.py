@@ -0,0 +1,184 @@
+"""
+模型量化属性测试
+
+属性 1: 校准读取器覆盖抽样帧
+*对于任意* 样本数和批次大小，校准读取器提供的帧数为 min(样本数, 数据总数)，
+每批不超过批次大小（固定批次模型补齐到模型批次），rewind 后重新提供相同的数据
+
+属性 2: 量化模型与 FP32 输出接近
+INT8 动态/静态量化后的模型可以加载，输出与 FP32 模型的 top-1 动作基本一致
+
+属性 3: 量化流水线生成报告
+流水线为每个变体记录延迟、动作一致率和 top-1 准确率，FP32 一致率为 1，
+报告保存为 JSON，生成失败的变体记录错误而不中断流水线
+
+Feature: model-quantization
+"""
+
+import os
+import json
+import numpy as np
+import pytest
+from hypothesis import given, strategies as st, settings
+
+onnx = pytest.importorskip("onnx")
+ort = pytest.importorskip("onnxruntime")
+pytest.importorskip("onnxruntime.quantization")
+
+from 核心.ONNX推理 import ONNX推理引擎
+from 工具.数据集格式 import 数据集写入器
+from 工具.模型转换 import (
+    模型转换器, 训练数据校准读取器, 量化报告, 帧转模型输入, 转换错误类型
+)
+from 测试.onnx测试模型 import 创建ONNX模型 as 共用创建ONNX模型
+
+
+帧形状 = (6, 8, 3)        # 录制帧 (高, 宽, 通道)
+输入形状 = (8, 6, 3)      # 模型输入 (宽, 高, 通道)
+动作数 = 5
+样本总数 = 120
+
+
+def 创建ONNX模型(路径: str, 批次="N") -> str:
+    """带一层 32 单元隐藏层的小模型，权重较小使量化误差不改变多数动作"""
+    return 共用创建ONNX模型(路径, 输入形状, 动作数, 批次=批次, 隐藏单元数=32, 权重缩放=0.2)
+
+
+@pytest.fixture(scope="module")
+def 环境(tmp_path_factory):
+    """FP32 模型和以 FP32 动作为标签的录制数据（分为多个分片）"""
+    目录 = tmp_path_factory.mktemp("量化")
+    模型路径 = 创建ONNX模型(str(目录 / "模型.onnx"))
+    帧 = np.random.RandomState(1).randint(0, 256, size=(样本总数,) + 帧形状).astype(np.uint8)
+    引擎 = ONNX推理引擎(模型路径, 使用GPU=False, 预热=False, 启用优化缓存=False)
+    动作 = 引擎.批量预测(帧.reshape((-1,) + 输入形状)).argmax(axis=1)
+
+    数据目录 = str(目录 / "数据")
+    with 数据集写入器(数据目录, 帧形状, 动作数, 每分片样本数=50) as 写入器:
+        for 图像, 标签 in zip(帧, 动作):
+            写入器.写入(图像, int(标签))
+    return 模型路径, 数据目录
+
+
+class Test校准读取器属性:
+    """属性 1: 校准读取器覆盖抽样帧"""
+
+    @given(样本数=st.integers(min_value=1, max_value=150), 批次大小=st.integers(min_value=1, max_value=16))
+    @settings(max_examples=20, deadline=None)
+    def test_帧数与批次(self, 环境, 样本数, 批次大小):
+        模型路径, 数据目录 = 环境
+        读取器 = 训练数据校准读取器(模型路径, 数据目录, 样本数=样本数, 批次大小=批次大小)
+
+        批次列表 = list(iter(读取器.get_next, None))
+        assert 读取器.样本数 == min(样本数, 样本总数)
+        assert sum(len(批["input"]) for 批 in 批次列表) == 读取器.样本数
+        assert all(len(批["input"]) <= 批次大小 for 批 in 批次列表)
+        assert all(批["input"].dtype == np.float32 and 批["input"].shape[1:] == 输入形状 for 批 in 批次列表)
+        assert all(0.0 <= 批["input"].min() and 批["input"].max() <= 1.0 for 批 in 批次列表)
+
+        读取器.rewind()
+        重读 = list(iter(读取器.get_next, None))
+        assert all(np.array_equal(甲["input"], 乙["input"]) for 甲, 乙 in zip(批次列表, 重读))
+
+    def test_固定批次补齐(self, 环境, tmp_path):
+        _, 数据目录 = 环境
+        模型路径 = 创建ONNX模型(str(tmp_path / "固定.onnx"), 批次=4)
+        读取器 = 训练数据校准读取器(模型路径, 数据目录, 样本数=10, 批次大小=1)
+
+        批次列表 = list(iter(读取器.get_next, None))
+        assert 读取器.批次大小 == 4
+        assert all(批["input"].shape == (4,) + 输入形状 for 批 in 批次列表)
+
+    def test_帧形状不匹配(self):
+        with pytest.raises(ValueError):
+            帧转模型输入(np.zeros((2, 4, 4, 3), np.uint8), 输入形状)
+        assert 帧转模型输入(np.zeros((2,) + 帧形状, np.uint8), 输入形状).shape == (2,) + 输入形状
+        assert 帧转模型输入(np.zeros((2, 4, 4, 3), np.uint8), (None, None, 3)).shape == (2, 4, 4, 3)
+
+
+class Test量化模型属性:
+    """属性 2: 量化模型与 FP32 输出接近"""
+
+    def 动作一致率(self, 模型路径, 量化路径, 数据目录):
+        帧 = np.random.RandomState(2).randint(0, 256, size=(64,) + 输入形状).astype(np.uint8)
+        基准 = ONNX推理引擎(模型路径, 使用GPU=False, 预热=False, 启用优化缓存=False)
+        量化 = ONNX推理引擎(量化路径, 使用GPU=False, 预热=False, 启用优化缓存=False)
+        return np.mean(基准.批量预测(帧).argmax(axis=1) == 量化.批量预测(帧).argmax(axis=1))
+
+    def test_动态量化(self, 环境, tmp_path):
+        模型路径, 数据目录 = 环境
+        输出路径 = str(tmp_path / "模型.int8_dynamic.onnx")
+        结果 = 模型转换器().量化动态(模型路径, 输出路径)
+
+        assert 结果.成功, 结果.错误
+        onnx.checker.check_model(onnx.load(输出路径))
+        assert self.动作一致率(模型路径, 输出路径, 数据目录) >= 0.8
+
+    def test_静态量化(self, 环境, tmp_path):
+        模型路径, 数据目录 = 环境
+        输出路径 = str(tmp_path / "模型.int8_static.onnx")
+        读取器 = 训练数据校准读取器(模型路径, 数据目录, 样本数=64, 批次大小=8)
+        结果 = 模型转换器().量化静态(模型路径, 输出路径, 读取器)
+
+        assert 结果.成功, 结果.错误
+        assert any(节点.op_type == "QuantizeLinear" for 节点 in onnx.load(输出路径).graph.node)
+        assert not os.path.exists(输出路径 + ".pre.onnx")
+        assert self.动作一致率(模型路径, 输出路径, 数据目录) >= 0.8
+
+    def test_文件不存在(self, tmp_path):
+        结果 = 模型转换器().量化动态(str(tmp_path / "无.onnx"), str(tmp_path / "输出.onnx"))
+        assert not 结果.成功
+        assert 结果.错误.类型 == 转换错误类型.文件不存在
+
+    def test_FP16缺少依赖(self, 环境, tmp_path):
+        try:
+            import onnxconverter_common  # noqa: F401
+            pytest.skip("onnxconverter-common 已安装")
+        except ImportError:
+            pass
+        结果 = 模型转换器().转换FP16(环境[0], str(tmp_path / "模型.fp16.onnx"))
+        assert not 结果.成功
+        assert 结果.错误.类型 == 转换错误类型.依赖缺失
+
+
+class Test量化流水线:
+    """属性 3: 量化流水线生成报告"""
+
+    def test_生成报告(self, 环境, tmp_path):
+        模型路径, 数据目录 = 环境
+        输出目录 = str(tmp_path / "输出")
+        报告 = 模型转换器().量化流水线(
+            模型路径, 数据目录, 输出目录,
+            方式=("dynamic", "static", "fp16"),
+            校准样本数=32, 评估样本数=80, 测试次数=20, 一致率阈值=0.5
+        )
+
+        assert isinstance(报告, 量化报告)
+        assert 报告.评估样本数 == 80
+        基准 = 报告.获取结果("fp32")
+        assert 基准.动作一致率 == 1.0 and 基准.top1准确率 == 1.0
+        assert 基准.加速比 == pytest.approx(1.0) and not 基准.推荐部署
+        for 名称 in ("int8_dynamic", "int8_static"):
+            结果 = 报告.获取结果(名称)
+            assert 结果.错误 is None
+            assert os.path.exists(os.path.join(输出目录, f"模型.{名称}.onnx"))
+            assert 结果.平均延迟 > 0 and 结果.P95延迟 > 0
+            assert 0.5 <= 结果.动作一致率 <= 1.0
+            assert 结果.推荐部署 == (结果.动作一致率 >= 0.5 and 结果.加速比 > 1.0)
+        # FP16 成功或记录错误，都不影响其他变体
+        assert 报告.获取结果("fp16") is not None
+        assert 报告.推荐模型 in {结果.名称 for 结果 in 报告.结果列表 if 结果.推荐部署} | {"fp32"}
+
+        with open(os.path.join(输出目录, "模型.量化报告.json"), encoding="utf-8") as f:
+            保存内容 = json.load(f)
+        assert 保存内容["推荐模型"] == 报告.推荐模型
+        assert {结果["名称"] for 结果 in 保存内容["结果列表"]} == {"fp32", "int8_dynamic", "int8_static", "fp16"}
+        assert "推荐部署" in 报告.生成文本()
+
+    def test_无效方式(self, 环境):
+        with pytest.raises(ValueError):
+            模型转换器().量化流水线(环境[0], 环境[1], 方式=("int4",))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--hypothesis-show-statistics"])
@@ -0,0 +1,305 @@
+"""
+帧流水线属性测试
+
+属性 1: 覆盖队列有界且保留最新数据
+*对于任意* 放入序列，队列深度不超过容量，取出的是最后放入的若干项
+
+属性 2: 流水线顺序与新鲜度
+*对于任意* 阶段耗时组合，到达最后阶段的帧编号严格递增
+
+属性 3: 优雅关闭
+*对于任意* 停止请求，所有阶段线程应在超时时间内退出
+
+属性 4: 帧结束回调恰好一次
+*对于任意* 阶段耗时和丢弃规则，每个产生的帧在停止后都恰好触发一次帧结束回调
+
+Feature: pipelined-bot-loop
+"""
+
+import time
+import threading
+import pytest
+from hypothesis import given, strategies as st, settings
+from typing import List
+
+from 核心.流水线 import 覆盖队列, 帧流水线, 流水线帧, 创建机器人流水线
+
+
+# ==================== 覆盖队列属性 ====================
+
+class Test覆盖队列属性:
+    """
+    属性测试: 覆盖队列有界且保留最新数据
+
+    Feature: pipelined-bot-loop, Property 1: 覆盖队列
+    """
+
+    @settings(max_examples=100, deadline=None)
+    @given(
+        容量=st.integers(min_value=1, max_value=5),
+        数据=st.lists(st.integers(), min_size=1, max_size=50)
+    )
+    def test_深度不超过容量且保留最新(self, 容量: int, 数据: List[int]):
+        """队列满时丢弃最旧数据，取出结果为最后放入的 容量 项"""
+        队列 = 覆盖队列(容量)
+
+        for 值 in 数据:
+            队列.放入(值)
+            assert 队列.获取深度() <= 容量
+
+        取出结果 = []
+        while True:
+            值 = 队列.取出(超时=0.0)
+            if 值 is None:
+                break
+            取出结果.append(值)
+
+        assert 取出结果 == 数据[-容量:]
+        assert 队列.获取丢弃计数() == max(0, len(数据) - 容量)
+
+    @settings(max_examples=50, deadline=None)
+    @given(
+        容量=st.integers(min_value=1, max_value=5),
+        数据=st.lists(st.integers(), min_size=0, max_size=30)
+    )
+    def test_丢弃回调覆盖被丢弃的数据(self, 容量: int, 数据: List[int]):
+        """被覆盖和被清空的数据都交给丢弃回调，且不与取出的数据重复"""
+        丢弃 = []
+        队列 = 覆盖队列(容量, 丢弃回调=丢弃.append)
+
+        for 值 in 数据:
+            队列.放入(值)
+        取出 = 队列.取出(超时=0.0)
+        队列.清空()
+
+        保留 = 数据[-容量:]
+        assert 取出 == (保留[0] if 保留 else None)
+        assert 丢弃 == 数据[:len(数据) - len(保留)] + 保留[1:]
+
+    def test_关闭后取出立即返回(self):
+        """关闭队列应唤醒等待中的消费者"""
+        队列 = 覆盖队列(1)
+        结果 = []
+
+        def 消费者():
+            开始 = time.time()
+            结果.append((队列.取出(超时=5.0), time.time() - 开始))
+
+        线程 = threading.Thread(target=消费者)
+        线程.start()
+        time.sleep(0.05)
+        队列.关闭()
+        线程.join(timeout=1.0)
+
+        assert not 线程.is_alive()
+        assert 结果[0][0] is None
+        assert 结果[0][1] < 1.0
+
+
+# ==================== 流水线属性 ====================
+
+def _创建测试流水线(阶段耗时: List[float], 完成帧: List[int]) -> 帧流水线:
+    """创建 数据源 + N 个处理阶段 的测试流水线"""
+    计数 = [0]
+
+    def 数据源() -> 流水线帧:
+        time.sleep(阶段耗时[0])
+        计数[0] += 1
+        return 流水线帧(帧编号=计数[0], 采集时间=time.time())
+
+    def 创建处理阶段(耗时: float):
+        def 处理(帧: 流水线帧) -> 流水线帧:
+            time.sleep(耗时)
+            return 帧
+        return 处理
+
+    阶段列表 = [("源", 数据源)]
+    for 序号, 耗时 in enumerate(阶段耗时[1:]):
+        阶段列表.append((f"阶段{序号}", 创建处理阶段(耗时)))
+
+    def 收集(帧: 流水线帧) -> 流水线帧:
+        完成帧.append(帧.帧编号)
+        return 帧
+
+    阶段列表.append(("收集", 收集))
+    return 帧流水线(阶段列表)
+
+
+class Test帧流水线属性:
+    """
+    属性测试: 流水线顺序、新鲜度与优雅关闭
+
+    Feature: pipelined-bot-loop, Property 2-3
+    """
+
+    @settings(max_examples=20, deadline=None)
+    @given(阶段耗时=st.lists(
+        st.floats(min_value=0.0, max_value=0.01), min_size=1, max_size=4
+    ))
+    def test_帧编号严格递增(self, 阶段耗时: List[float]):
+        """下游只会看到比之前更新的帧，不会出现乱序或重复"""
+        完成帧: List[int] = []
+        流水线 = _创建测试流水线(阶段耗时, 完成帧)
+
+        流水线.启动()
+        time.sleep(0.15)
+        assert 流水线.停止(超时=1.0)
+
+        assert 完成帧, "停止前至少应完成一帧"
+        assert all(a < b for a, b in zip(完成帧, 完成帧[1:]))
+
+    def test_慢阶段丢弃旧帧(self):
+        """下游阶段较慢时上游的旧帧被覆盖，统计中应有丢弃次数"""
+        完成帧: List[int] = []
+        流水线 = _创建测试流水线([0.001, 0.0, 0.02], 完成帧)
+
+        流水线.启动()
+        time.sleep(0.3)
+        流水线.停止(超时=1.0)
+
+        统计 = 流水线.获取统计()
+        assert sum(阶段.丢弃次数 for 阶段 in 统计.values()) > 0
+        assert 统计["源"].处理次数 > 统计["收集"].处理次数
+        assert 流水线.获取端到端延迟() > 0
+
+    def test_统计包含每个阶段(self):
+        """获取统计应返回每个阶段的延迟与队列深度"""
+        完成帧: List[int] = []
+        流水线 = _创建测试流水线([0.001, 0.001], 完成帧)
+
+        with 流水线:
+            time.sleep(0.1)
+
+        统计 = 流水线.获取统计()
+        assert list(统计.keys()) == ["源", "阶段0", "收集"]
+        for 阶段 in 统计.values():
+            字典 = 阶段.to_dict()
+            assert 字典["平均延迟"] >= 0
+            assert 0 <= 字典["队列深度"] <= 1
+
+    @settings(max_examples=20, deadline=None)
+    @given(阶段耗时=st.lists(
+        st.floats(min_value=0.0, max_value=0.05), min_size=1, max_size=4
+    ))
+    def test_停止应在1秒内完成(self, 阶段耗时: List[float]):
+        """停止请求应在 1 秒内结束所有阶段线程"""
+        流水线 = _创建测试流水线(阶段耗时, [])
+        流水线.启动()
+        time.sleep(0.05)
+
+        开始 = time.time()
+        assert 流水线.停止(超时=1.0)
+        assert time.time() - 开始 < 1.0
+        assert not 流水线.是否运行中()
+
+    def test_暂停时不再产生新帧(self):
+        """暂停后数据源停止产出，继续后恢复"""
+        完成帧: List[int] = []
+        流水线 = _创建测试流水线([0.001], 完成帧)
+
+        流水线.启动()
+        time.sleep(0.05)
+        流水线.暂停()
+        time.sleep(0.05)
+        暂停时数量 = len(完成帧)
+        time.sleep(0.1)
+        assert len(完成帧) <= 暂停时数量 + 2
+
+        流水线.继续()
+        time.sleep(0.05)
+        流水线.停止()
+        assert len(完成帧) > 暂停时数量
+
+    def test_连续错误停止流水线(self):
+        """某阶段连续出错达到上限时流水线自动停止并给出错误消息"""
+        def 数据源():
+            return 流水线帧(帧编号=0, 采集时间=time.time())
+
+        def 失败阶段(帧):
+            raise RuntimeError("模拟失败")
+
+        流水线 = 帧流水线([("源", 数据源), ("失败", 失败阶段)], 最大连续错误=3)
+        流水线.启动()
+
+        截止 = time.time() + 2.0
+        while 流水线.是否运行中() and time.time() < 截止:
+            time.sleep(0.01)
+
+        assert not 流水线.是否运行中()
+        assert "失败" in 流水线.获取错误消息()
+        流水线.停止()
+
+    @settings(max_examples=15, deadline=None)
+    @given(
+        阶段耗时=st.lists(st.floats(min_value=0.0, max_value=0.005), min_size=2, max_size=4),
+        丢弃模数=st.integers(min_value=2, max_value=5)
+    )
+    def test_每帧恰好结束一次(self, 阶段耗时: List[float], 丢弃模数: int):
+        """完成、被覆盖、被阶段丢弃、出错和停止时仍在队列中的帧都恰好回调一次"""
+        产生: List[int] = []
+        结束: List[int] = []
+        锁 = threading.Lock()
+
+        def 数据源() -> 流水线帧:
+            time.sleep(阶段耗时[0])
+            帧 = 流水线帧(帧编号=len(产生) + 1, 采集时间=time.time())
+            产生.append(帧.帧编号)
+            return 帧
+
+        def 筛选(帧: 流水线帧):
+            time.sleep(阶段耗时[1])
+            if 帧.帧编号 % 丢弃模数 == 0:
+                return None
+            if 帧.帧编号 % 7 == 0:
+                raise RuntimeError("模拟失败")
+            return 帧
+
+        def 记录结束(帧: 流水线帧):
+            with 锁:
+                结束.append(帧.帧编号)
+
+        阶段列表 = [("源", 数据源), ("筛选", 筛选)]
+        for 序号, 耗时 in enumerate(阶段耗时[2:]):
+            阶段列表.append((f"阶段{序号}", lambda 帧, 耗时=耗时: time.sleep(耗时) or 帧))
+        流水线 = 帧流水线(阶段列表, 最大连续错误=1000, 帧结束回调=记录结束)
+
+        流水线.启动()
+        time.sleep(0.1)
+        assert 流水线.停止(超时=1.0)
+
+        assert sorted(结束) == 产生
+
+
+class Test机器人流水线:
+    """创建机器人流水线：四个阶段依次读写同一数据字典，队列容量取自参数"""
+
+    def test_四阶段共享数据字典(self):
+        执行记录 = []
+        结束帧 = []
+
+        def 执行(数据, 帧间隔, 流水线):
+            assert 帧间隔 >= 0 and isinstance(流水线, 帧流水线)
+            执行记录.append(数据)
+
+        流水线 = 创建机器人流水线(
+            lambda: {"屏幕": time.time()},
+            lambda 数据: 数据.update(缩放=True),
+            lambda 数据: 数据.update(决策=(0, "前进", "model")),
+            执行,
+            队列容量=3,
+            帧结束回调=lambda 帧: 结束帧.append(帧.帧编号)
+        )
+
+        assert list(流水线.获取统计()) == ["截取", "预处理", "推理", "执行"]
+        assert all(阶段.输出队列._队列.maxlen == 3 for 阶段 in 流水线._阶段[:-1])
+
+        with 流水线:
+            time.sleep(0.1)
+
+        assert 执行记录
+        assert all(数据["缩放"] and 数据["决策"][1] == "前进" for 数据 in 执行记录)
+        assert len(结束帧) >= len(执行记录)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
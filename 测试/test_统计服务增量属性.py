@@ -0,0 +1,116 @@
+"""
+统计服务增量计算属性测试
+
+属性 1: 增量统计与全量重算一致
+*对于任意* 片段序列，逐个添加后的统计与对全部片段调用 update_from_segments 的结果相同
+
+属性 2: 滑动窗口统计
+*对于任意* 窗口大小，近期统计与只对最近 N 个片段重算的结果相同
+
+属性 3: 不保留画面帧
+*对于任意* 片段，统计服务保存的摘要不引用画面帧，摘要数量不超过上限
+
+Feature: incremental-recording-statistics
+"""
+
+import pytest
+from hypothesis import given, strategies as st, settings
+
+from 核心.智能录制 import RecordingSegment, RecordingStatistics, StatisticsService, SegmentSummary
+
+
+@st.composite
+def 片段策略(draw):
+    片段 = RecordingSegment(
+        start_time=draw(st.floats(min_value=0.0, max_value=1000.0)),
+        end_time=draw(st.floats(min_value=0.0, max_value=1000.0)),
+        actions=draw(st.lists(st.integers(min_value=0, max_value=20), max_size=30))
+    )
+    片段.value_score = draw(st.floats(min_value=0.0, max_value=100.0))
+    return 片段
+
+
+def 断言统计相同(实际: RecordingStatistics, 期望: RecordingStatistics):
+    assert 实际.total_segments == 期望.total_segments
+    assert 实际.high_value_count == 期望.high_value_count
+    assert 实际.medium_value_count == 期望.medium_value_count
+    assert 实际.low_value_count == 期望.low_value_count
+    assert 实际.action_distribution == 期望.action_distribution
+    assert 实际.total_duration == pytest.approx(期望.total_duration, abs=1e-6)
+    assert 实际.average_value_score == pytest.approx(期望.average_value_score, abs=1e-6)
+
+
+class Test统计服务增量计算:
+    """
+    属性测试: 增量统计、滑动窗口、有界内存
+    
+    Feature: incremental-recording-statistics, Property 1-3
+    """
+    
+    @settings(max_examples=100, deadline=None)
+    @given(片段列表=st.lists(片段策略(), max_size=40))
+    def test_增量统计与全量重算一致(self, 片段列表):
+        """逐个添加与一次性重算得到相同统计"""
+        服务 = StatisticsService()
+        for 片段 in 片段列表:
+            服务.add_segment(片段)
+        
+        期望 = RecordingStatistics()
+        期望.update_from_segments(片段列表)
+        断言统计相同(服务.get_statistics(), 期望)
+        
+        期望分数 = 片段列表[-1].value_score if 片段列表 else 0.0
+        assert 服务.get_current_value_score() == 期望分数
+    
+    @settings(max_examples=100, deadline=None)
+    @given(
+        片段列表=st.lists(片段策略(), max_size=40),
+        窗口=st.integers(min_value=1, max_value=10)
+    )
+    def test_滑动窗口统计(self, 片段列表, 窗口):
+        """近期统计等于最近 N 个片段的重算结果，报告包含近期质量"""
+        服务 = StatisticsService(recent_window=窗口)
+        服务.add_segments(片段列表)
+        
+        期望 = RecordingStatistics()
+        期望.update_from_segments(片段列表[-窗口:])
+        断言统计相同(服务.get_recent_statistics(), 期望)
+        
+        报告 = 服务.generate_quality_report()
+        assert 报告["recent"]["segments"] == min(窗口, len(片段列表))
+        assert "近期质量" in 服务.format_report_as_text(报告)
+    
+    @settings(max_examples=50, deadline=None)
+    @given(
+        片段列表=st.lists(片段策略(), min_size=1, max_size=30),
+        上限=st.integers(min_value=1, max_value=10)
+    )
+    def test_不保留画面帧(self, 片段列表, 上限):
+        """摘要不含画面帧，数量受上限约束，累计统计不受上限影响"""
+        服务 = StatisticsService(max_summaries=上限)
+        for 片段 in 片段列表:
+            片段.frames = [object()]
+            服务.add_segment(片段)
+        
+        摘要 = 服务.get_segment_summaries()
+        assert len(摘要) == min(上限, len(片段列表))
+        assert all(isinstance(条目, SegmentSummary) and not hasattr(条目, "frames") for 条目 in 摘要)
+        assert [条目.id for 条目 in 摘要] == [片段.id for 片段 in 片段列表[-上限:]]
+        assert 服务.get_statistics().total_segments == len(片段列表)
+    
+    def test_未启用窗口与重置(self):
+        """未设置窗口时没有近期统计，重置后统计归零"""
+        服务 = StatisticsService()
+        assert 服务.get_recent_statistics() is None
+        assert "recent" not in 服务.generate_quality_report()
+        
+        服务 = StatisticsService(recent_window=3)
+        服务.add_segment(RecordingSegment(actions=[1, 1, 2]))
+        服务.reset()
+        assert 服务.get_statistics().total_segments == 0
+        assert 服务.get_recent_statistics().action_distribution == {}
+        assert 服务.get_current_value_score() == 0.0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
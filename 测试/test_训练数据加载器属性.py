@@ -0,0 +1,180 @@
+"""
+训练数据加载器属性测试
+
+属性 1: 每轮覆盖全部训练样本
+*对于任意* 文件划分、块大小和预取数，一轮产出的训练块恰好包含每个训练样本一次
+
+属性 2: 顺序可复现
+*对于任意* 轮次和起始块，从起始块恢复时产出的训练块与完整迭代的对应部分相同
+
+属性 3: 验证样本不参与训练
+*对于任意* 数据，每个文件末尾的留出样本只出现在验证集中
+
+Feature: prefetching-training-loader
+"""
+
+import os
+import numpy as np
+import pytest
+from hypothesis import given, strategies as st, settings
+
+from 工具.数据集格式 import 分片写入器
+from 训练.数据加载器 import 数据加载器
+
+
+图像形状 = (2, 2, 3)
+动作数 = 4
+
+
+def 编码图像(编号: int) -> np.ndarray:
+    """把样本编号写入图像像素，便于从训练块中还原样本身份"""
+    图像 = np.zeros(图像形状, dtype=np.uint8)
+    图像[0, 0, 0] = 编号 % 256
+    图像[0, 0, 1] = 编号 // 256
+    return 图像
+
+
+def 解码编号(图像: np.ndarray) -> np.ndarray:
+    """从一批图像中还原样本编号"""
+    return 图像[:, 0, 0, 0].astype(np.int64) + 图像[:, 0, 0, 1].astype(np.int64) * 256
+
+
+def 写入数据(数据目录: str, 文件样本数: list) -> list:
+    """写入若干分片，样本编号全局递增，返回分片路径列表"""
+    路径列表 = []
+    编号 = 0
+    for 序号, 数量 in enumerate(文件样本数, start=1):
+        路径 = os.path.join(数据目录, f"训练数据-{序号}")
+        with 分片写入器(路径, 图像形状, 动作数) as 写入器:
+            for _ in range(数量):
+                写入器.写入(编码图像(编号), 编号 % 动作数)
+                编号 += 1
+        路径列表.append(路径)
+    return 路径列表
+
+
+def 期望训练编号(文件样本数: list, 每文件验证样本数: int) -> set:
+    """每个文件去掉末尾验证样本后的编号集合"""
+    编号集合 = set()
+    起点 = 0
+    for 数量 in 文件样本数:
+        编号集合.update(range(起点, 起点 + max(0, 数量 - 每文件验证样本数)))
+        起点 += 数量
+    return 编号集合
+
+
+class 反转增强器:
+    """测试用增强器：像素取反"""
+    
+    def 增强(self, 图像: np.ndarray) -> np.ndarray:
+        return 255 - 图像
+
+
+class Test训练数据加载器属性:
+    """
+    属性测试: 训练数据加载器
+    
+    Feature: prefetching-training-loader, Property 1-3
+    """
+    
+    @settings(max_examples=30, deadline=None)
+    @given(
+        文件样本数=st.lists(st.integers(min_value=1, max_value=30), min_size=1, max_size=4),
+        块大小=st.integers(min_value=1, max_value=20),
+        预取块数=st.integers(min_value=1, max_value=4),
+        每文件验证样本数=st.integers(min_value=0, max_value=5)
+    )
+    def test_每轮覆盖全部训练样本(self, tmp_path_factory, 文件样本数, 块大小, 预取块数, 每文件验证样本数):
+        """训练块拼接后恰好是全部训练样本，标签与图像对应"""
+        路径列表 = 写入数据(str(tmp_path_factory.mktemp("数据")), 文件样本数)
+        
+        with 数据加载器(路径列表, 块大小=块大小, 预取块数=预取块数,
+                     每文件验证样本数=每文件验证样本数) as 加载器:
+            产出 = list(加载器.迭代轮次(0))
+        
+        assert [序号 for 序号, _ in 产出] == list(range(加载器.每轮块数))
+        assert all(0 < len(块) <= 块大小 for _, 块 in 产出)
+        
+        if 产出:
+            编号 = np.concatenate([解码编号(块.图像) for _, 块 in 产出])
+            类别 = np.concatenate([np.argmax(块.标签, axis=1) for _, 块 in 产出])
+            assert np.array_equal(类别, 编号 % 动作数)
+        else:
+            编号 = np.zeros(0, dtype=np.int64)
+        assert len(编号) == len(set(编号.tolist()))
+        assert set(编号.tolist()) == 期望训练编号(文件样本数, 每文件验证样本数)
+    
+    @settings(max_examples=30, deadline=None)
+    @given(
+        轮次=st.integers(min_value=0, max_value=5),
+        起始块=st.integers(min_value=0, max_value=8)
+    )
+    def test_从起始块恢复与完整迭代一致(self, tmp_path_factory, 轮次, 起始块):
+        """同一轮次的顺序固定，从任意块恢复得到相同的后续训练块"""
+        路径列表 = 写入数据(str(tmp_path_factory.mktemp("数据")), [20, 15, 25])
+        
+        with 数据加载器(路径列表, 块大小=7, 每文件验证样本数=3) as 加载器:
+            完整 = [解码编号(块.图像).tolist() for _, 块 in 加载器.迭代轮次(轮次)]
+            恢复 = [解码编号(块.图像).tolist() for _, 块 in 加载器.迭代轮次(轮次, 起始块)]
+            下一轮 = [解码编号(块.图像).tolist() for _, 块 in 加载器.迭代轮次(轮次 + 1)]
+        
+        assert 恢复 == 完整[起始块:]
+        assert sorted(sum(下一轮, [])) == sorted(sum(完整, []))
+    
+    @settings(max_examples=20, deadline=None)
+    @given(
+        文件样本数=st.lists(st.integers(min_value=1, max_value=30), min_size=1, max_size=4),
+        验证样本数=st.integers(min_value=1, max_value=20)
+    )
+    def test_验证样本不参与训练(self, tmp_path_factory, 文件样本数, 验证样本数):
+        """验证集取自各文件末尾的留出样本，且不超过设定数量"""
+        路径列表 = 写入数据(str(tmp_path_factory.mktemp("数据")), 文件样本数)
+        
+        with 数据加载器(路径列表, 块大小=8, 每文件验证样本数=4, 验证样本数=验证样本数) as 加载器:
+            训练编号 = set()
+            for _, 块 in 加载器.迭代轮次(0):
+                训练编号.update(解码编号(块.图像).tolist())
+            验证编号 = set(解码编号(加载器.获取验证集().图像).tolist())
+        
+        留出总数 = sum(min(4, 数量) for 数量 in 文件样本数)
+        assert len(验证编号) == min(验证样本数, 留出总数)
+        assert not (验证编号 & 训练编号)
+    
+    def test_增强在训练块上应用(self, tmp_path):
+        """增强器作用于训练块，不影响验证集和原始数据"""
+        路径列表 = 写入数据(str(tmp_path), [12])
+        
+        with 数据加载器(路径列表, 块大小=5, 每文件验证样本数=2, 增强器=反转增强器()) as 加载器:
+            for _, 块 in 加载器.迭代轮次(0):
+                assert np.all(块.图像[:, 1, 1] == 255)
+            assert np.all(加载器.获取验证集().图像[:, 1, 1] == 0)
+            assert np.all(加载器._数据[0].图像[:, 1, 1] == 0)
+    
+    def test_提前退出不阻塞(self, tmp_path):
+        """训练中断时丢弃预取任务，加载器可以正常关闭"""
+        路径列表 = 写入数据(str(tmp_path), [40])
+        加载器 = 数据加载器(路径列表, 块大小=2, 预取块数=4, 每文件验证样本数=0)
+        
+        迭代器 = 加载器.迭代轮次(0)
+        序号, _ = next(迭代器)
+        迭代器.close()
+        加载器.关闭()
+        
+        assert 序号 == 0
+    
+    def test_跳过形状不一致的文件(self, tmp_path):
+        """形状与第一个文件不同的数据被跳过，没有可用数据时报错"""
+        路径列表 = 写入数据(str(tmp_path), [5])
+        其他路径 = str(tmp_path / "训练数据-9")
+        with 分片写入器(其他路径, (3, 3, 3), 动作数) as 写入器:
+            写入器.写入(np.zeros((3, 3, 3), dtype=np.uint8), 0)
+        
+        with 数据加载器(路径列表 + [其他路径], 每文件验证样本数=0) as 加载器:
+            assert 加载器.文件数 == 1
+        
+        with pytest.raises(ValueError):
+            数据加载器([str(tmp_path / "不存在")])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
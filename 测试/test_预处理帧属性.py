@@ -0,0 +1,131 @@
+"""
+预处理帧属性测试
+
+属性 1: 预处理结果与直接比较一致
+*对于任意* 两帧图像和比较方法，使用预处理帧与直接传入图像的比较结果相同
+
+属性 2: 打包哈希与逐位哈希一致
+*对于任意* 图像，按位打包计算的感知哈希与逐位拼接的结果相同
+
+属性 3: 比较耗时
+在 480x270 分辨率下，参考帧预处理后每次比较耗时低于 1 毫秒
+
+Feature: prepared-frame-comparison
+"""
+
+import time
+import cv2
+import numpy as np
+import pytest
+from hypothesis import given, strategies as st, settings
+
+from 核心.帧比较 import 帧比较器, 预处理帧, 计算感知哈希
+
+
+# ==================== 策略定义 ====================
+
+@st.composite
+def 相同尺寸图像对(draw, 最小尺寸=32, 最大尺寸=200):
+    """生成相同尺寸的图像对（第二帧为第一帧加局部扰动）"""
+    宽度 = draw(st.integers(min_value=最小尺寸, max_value=最大尺寸))
+    高度 = draw(st.integers(min_value=最小尺寸, max_value=最大尺寸))
+    通道数 = draw(st.sampled_from([1, 3]))
+    种子 = draw(st.integers(min_value=0, max_value=2 ** 31 - 1))
+
+    随机源 = np.random.RandomState(种子)
+    形状 = (高度, 宽度) if 通道数 == 1 else (高度, 宽度, 通道数)
+    图像1 = 随机源.randint(0, 256, 形状, dtype=np.uint8)
+    图像2 = 图像1.copy()
+    图像2[: 高度 // 2, : 宽度 // 3] = 随机源.randint(0, 256, 图像2[: 高度 // 2, : 宽度 // 3].shape)
+    return 图像1, 图像2
+
+
+def 逐位感知哈希(图像: np.ndarray) -> int:
+    """原逐位拼接实现，用于对照"""
+    缩小图 = cv2.resize(图像, (8, 8))
+    灰度图 = cv2.cvtColor(缩小图, cv2.COLOR_BGR2GRAY) if len(缩小图.shape) == 3 else 缩小图
+    均值 = np.mean(灰度图)
+    哈希值 = 0
+    for i in range(8):
+        for j in range(8):
+            if 灰度图[i, j] > 均值:
+                哈希值 |= 1 << (i * 8 + j)
+    return 哈希值
+
+
+# ==================== 属性测试 ====================
+
+class Test预处理帧属性:
+    """
+    属性测试: 预处理帧
+
+    Feature: prepared-frame-comparison, Property 1-3
+    """
+
+    @settings(max_examples=50, deadline=None)
+    @given(
+        图像对=相同尺寸图像对(),
+        方法=st.sampled_from(["histogram", "ssim", "mse", "hash"])
+    )
+    def test_预处理比较与直接比较一致(self, 图像对, 方法: str):
+        """预处理帧可以在任意一侧替换原图，结果不变"""
+        图像1, 图像2 = 图像对
+        比较器 = 帧比较器(方法=方法)
+
+        直接结果 = 比较器.比较(图像1, 图像2)
+        预处理1 = 比较器.预处理(图像1)
+        预处理2 = 比较器.预处理(图像2)
+
+        assert 比较器.比较(预处理1, 图像2) == pytest.approx(直接结果)
+        assert 比较器.比较(图像1, 预处理2) == pytest.approx(直接结果)
+        # 重复使用同一预处理帧结果不变
+        assert 比较器.比较(预处理1, 预处理2) == pytest.approx(直接结果)
+        assert 比较器.比较(预处理1, 预处理2) == pytest.approx(直接结果)
+
+    @settings(max_examples=50, deadline=None)
+    @given(
+        图像对=相同尺寸图像对(最小尺寸=64),
+        方法=st.sampled_from(["histogram", "ssim", "mse", "hash"])
+    )
+    def test_区域比较复用预处理帧(self, 图像对, 方法: str):
+        """多区域比较使用预处理帧时与逐个传入原图结果相同"""
+        图像1, 图像2 = 图像对
+        比较器 = 帧比较器(方法=方法)
+        区域列表 = [(0, 0, 20, 20), (10, 15, 30, 25)]
+
+        直接结果 = [比较器.比较区域(图像1, 图像2, 区域) for 区域 in 区域列表]
+        预处理结果 = 比较器.比较多区域(比较器.预处理(图像1), 比较器.预处理(图像2), 区域列表)
+
+        assert 预处理结果 == pytest.approx(直接结果)
+
+    @settings(max_examples=100, deadline=None)
+    @given(图像对=相同尺寸图像对())
+    def test_打包哈希与逐位哈希一致(self, 图像对):
+        """按位打包的哈希与逐位拼接的哈希完全相同"""
+        图像, _ = 图像对
+        assert 计算感知哈希(图像) == 逐位感知哈希(图像)
+        assert 预处理帧(图像).签名 == 逐位感知哈希(图像)
+
+    @pytest.mark.parametrize("方法", ["histogram", "ssim", "mse", "hash"])
+    def test_480x270比较耗时低于1毫秒(self, 方法: str):
+        """参考帧预处理后，每帧的预处理加比较耗时低于 1 毫秒（取中位数）"""
+        随机源 = np.random.RandomState(0)
+        参考图像 = 随机源.randint(0, 256, (270, 480, 3), dtype=np.uint8)
+        当前图像 = 参考图像.copy()
+        当前图像[100:150, 200:260] = 0
+
+        比较器 = 帧比较器(方法=方法)
+        参考帧 = 比较器.预处理(参考图像)
+        比较器.比较(比较器.预处理(当前图像), 参考帧)  # 预热
+
+        耗时列表 = []
+        for _ in range(50):
+            开始 = time.perf_counter()
+            比较器.比较(比较器.预处理(当前图像), 参考帧)
+            耗时列表.append(time.perf_counter() - 开始)
+
+        assert float(np.median(耗时列表)) < 0.001
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
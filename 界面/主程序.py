@@ -547,6 +547,7 @@ class MainWindow(QMainWindow):
         self._运行线程 = 运行线程()
         self._运行线程.设置子模式(子模式)
         self._运行线程.设置增强模式(是否增强)
+        self._运行线程.设置流水线模式(self._读取流水线配置())
         
         # 连接信号
         self._运行线程.状态更新.connect(self._运行页.更新状态)
@@ -558,6 +559,14 @@ class MainWindow(QMainWindow):
         self._运行线程.start()
         self._状态栏.showMessage(f"机器人运行已开始 - 模式: {运行模式} ({子模式})")
     
+    def _读取流水线配置(self) -> bool:
+        """读取是否以流水线方式运行机器人"""
+        try:
+            from 配置.增强设置 import 流水线配置
+            return bool(流水线配置.get("启用", False))
+        except ImportError:
+            return False
+    
     def _暂停运行(self) -> None:
         """暂停/继续机器人运行"""
         if self._运行线程 is not None and self._运行线程.isRunning():
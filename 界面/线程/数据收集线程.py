@@ -99,15 +99,19 @@ class 数据收集线程(QThread):
         if self._错误处理器:
             self._错误处理器.记录错误消息(消息, "数据收集", 严重级别, 显示通知=False)
     
-    def _安全截取屏幕(self, 截取屏幕, 游戏窗口区域):
+    def _安全截取屏幕(self, 截取函数, *参数):
         """
         安全地截取屏幕，包含错误处理
         
+        参数:
+            截取函数: 截取函数，如 截取缩放到帧环
+            参数: 传给截取函数的参数
+        
         返回:
-            屏幕图像或None（如果失败）
+            截取结果或None（如果失败）
         """
         try:
-            return 截取屏幕(region=游戏窗口区域)
+            return 截取函数(*参数)
         except Exception as e:
             self._连续错误计数 += 1
             self._记录错误(f"截取屏幕失败: {str(e)}", "警告")
@@ -117,12 +121,15 @@ class 数据收集线程(QThread):
         """执行数据收集主逻辑"""
         # 导入必要模块
         try:
-            from 核心.屏幕截取 import 截取屏幕
+            from 核心.屏幕截取 import 截取缩放到帧环
+            from 核心.帧环 import 帧环
+            from 核心.帧预处理 import 帧预处理器, 预处理规格
             from 核心.按键检测 import 检测按键
             from 配置.设置 import (
                 游戏窗口区域, 模型输入宽度, 模型输入高度,
                 每文件样本数, 数据保存路径, 总动作数
             )
+            from 工具.数据集格式 import 数据集写入器, 后台数据集写入器
         except ImportError as e:
             self.错误发生.emit(f"导入模块失败: {str(e)}")
             self.任务完成.emit(False, f"导入模块失败: {str(e)}")
@@ -134,10 +141,25 @@ class 数据收集线程(QThread):
         
         # 获取起始文件编号
         self._文件编号 = self._获取起始文件编号(数据目录)
-        文件名 = 数据目录 / f'训练数据-{self._文件编号}.npy'
+        
+        # 缩放后的帧直接写入预分配的帧环槽位，写入队列只保存槽位引用
+        # 槽位需覆盖排队的帧、写入线程正在写的帧和当前帧
+        写入队列长度 = 128
+        采集帧环 = 帧环(槽数=写入队列长度 + 3, 帧形状=(模型输入高度, 模型输入宽度, 3))
+        
+        # 列式数据集写入器：样本逐条追加到分片目录，写满后自动开始下一个分片
+        # 磁盘写入在后台线程中进行，采集循环不等待写入完成，写入后释放槽位
+        写入器 = 后台数据集写入器(数据集写入器(
+            str(数据目录),
+            图像形状=(模型输入高度, 模型输入宽度, 3),
+            标签维度=总动作数,
+            每分片样本数=每文件样本数,
+            起始编号=self._文件编号
+        ), 队列长度=写入队列长度, 帧环=采集帧环)
+        
+        预处理器 = 帧预处理器(预处理规格(模型输入宽度, 模型输入高度, 缩放=None))
         
         # 初始化
-        训练数据 = []
         self._样本数量 = 0
         上次时间 = time.time()
         帧计数 = 0
@@ -158,14 +180,13 @@ class 数据收集线程(QThread):
                 break
             
             try:
-                # 安全截取屏幕
-                屏幕 = self._安全截取屏幕(截取屏幕, 游戏窗口区域)
-                if 屏幕 is None:
+                # 安全截取屏幕，缩放结果直接写入帧环槽位
+                引用 = self._安全截取屏幕(截取缩放到帧环, 采集帧环, 预处理器, 游戏窗口区域)
+                if 引用 is None:
                     time.sleep(0.1)
                     continue
                 
-                屏幕 = cv2.resize(屏幕, (模型输入宽度, 模型输入高度))
-                屏幕_RGB = cv2.cvtColor(屏幕, cv2.COLOR_BGR2RGB)
+                屏幕_RGB = 采集帧环.读取(引用)
                 
                 # 获取输入状态
                 按键 = 检测按键()
@@ -175,8 +196,11 @@ class 数据收集线程(QThread):
                 # 转换为动作编码
                 动作 = self._按键转动作(按键, 鼠标状态, 修饰键状态, 总动作数)
                 
-                # 添加到训练数据
-                训练数据.append([屏幕_RGB, 动作])
+                # 提交到后台写入线程（只传递槽位引用）
+                # 帧在写入队列中等待落盘，固定槽位直到写入线程写完
+                采集帧环.固定(引用)
+                写入器.写入(引用, 动作)
+                self._文件编号 = 写入器.分片编号
                 self._样本数量 += 1
                 帧计数 += 1
                 
@@ -201,6 +225,8 @@ class 数据收集线程(QThread):
                     "帧率": self._帧率,
                     "当前动作": 动作名称,
                     "帧图像": 屏幕_RGB,
+                    "写入队列": 写入器.队列深度,
+                    "写入阻塞次数": 写入器.阻塞次数,
                 }
                 self.状态更新.emit(状态数据)
                 self.样本收集.emit(self._样本数量, self._文件编号)
@@ -209,20 +235,10 @@ class 数据收集线程(QThread):
                 if 帧计数 % 10 == 0:
                     self.帧更新.emit(屏幕_RGB)
                 
-                # 自动保存
-                if len(训练数据) >= 每文件样本数:
-                    try:
-                        np.save(str(文件名), 训练数据)
-                        self.文件保存.emit(str(文件名), len(训练数据))
-                        self.进度更新.emit(100, f"已保存: {文件名}")
-                        
-                        # 重置
-                        训练数据 = []
-                        self._文件编号 += 1
-                        文件名 = 数据目录 / f'训练数据-{self._文件编号}.npy'
-                    except Exception as e:
-                        self._记录错误(f"保存数据文件失败: {str(e)}", "错误")
-                        self.错误发生.emit(f"保存数据文件失败: {str(e)}")
+                # 分片写满时通知界面
+                for 完成分片 in 写入器.取完成分片():
+                    self.文件保存.emit(完成分片, 每文件样本数)
+                    self.进度更新.emit(100, f"已保存: {完成分片}")
                 
                 # 短暂休眠以控制帧率
                 time.sleep(0.01)
@@ -233,23 +249,27 @@ class 数据收集线程(QThread):
                 self.错误发生.emit(f"采集帧错误: {str(e)}")
                 time.sleep(0.1)
         
-        # 保存剩余数据
-        if 训练数据:
-            np.save(str(文件名), 训练数据)
-            self.文件保存.emit(str(文件名), len(训练数据))
+        # 等待写入队列清空并完成未写满的分片
+        if 写入器.队列深度:
+            self.进度更新.emit(100, f"正在写入剩余 {写入器.队列深度} 帧...")
+        剩余样本数 = 写入器.当前分片样本数
+        try:
+            完成分片 = 写入器.关闭()
+            采集帧环.关闭()
+            for 已完成 in 写入器.取完成分片():
+                self.文件保存.emit(已完成, 每文件样本数)
+            if 完成分片:
+                self.文件保存.emit(完成分片, 剩余样本数)
+        except Exception as e:
+            self._记录错误(f"保存数据文件失败: {str(e)}", "错误")
+            self.错误发生.emit(f"保存数据文件失败: {str(e)}")
         
         self.任务完成.emit(True, f"数据收集完成，共收集 {self._样本数量} 个样本")
     
     def _获取起始文件编号(self, 数据目录: Path) -> int:
-        """获取下一个可用的文件编号"""
-        编号 = 1
-        while True:
-            文件名 = 数据目录 / f'训练数据-{编号}.npy'
-            if 文件名.exists():
-                编号 += 1
-            else:
-                break
-        return 编号
+        """获取下一个可用的文件编号（同时检查分片目录和旧格式文件）"""
+        from 工具.数据集格式 import 获取下一个编号
+        return 获取下一个编号(str(数据目录))
     
     def _检测鼠标按键(self) -> tuple:
         """检测鼠标按键状态"""
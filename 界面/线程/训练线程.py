@@ -246,18 +246,9 @@ class 训练线程(QThread):
             self.任务完成.emit(True, f"训练完成，共完成 {self._当前轮次} 轮训练")
     
     def _获取数据文件列表(self, 数据目录: str) -> List[str]:
-        """获取所有训练数据文件"""
-        文件列表 = []
-        
-        if not os.path.exists(数据目录):
-            return 文件列表
-        
-        for 文件名 in os.listdir(数据目录):
-            if 文件名.endswith('.npy') and '训练数据' in 文件名:
-                文件列表.append(os.path.join(数据目录, 文件名))
-        
-        文件列表.sort()
-        return 文件列表
+        """获取所有训练数据文件（分片目录和旧格式 .npy 文件）"""
+        from 工具.数据集格式 import 列出数据集
+        return 列出数据集(数据目录)
     
     def _加载训练数据(self, 文件路径: str) -> tuple:
         """
@@ -267,7 +258,8 @@ class 训练线程(QThread):
             (训练数据, 测试数据) 或 (None, None) 如果加载失败
         """
         try:
-            数据 = np.load(文件路径, allow_pickle=True)
+            from 工具.数据集格式 import 加载样本
+            数据 = 加载样本(文件路径)
             
             if len(数据) < 50:
                 # 数据太少，全部用于训练
@@ -290,6 +282,13 @@ class 训练线程(QThread):
         返回:
             (X, Y) 训练数据
         """
+        from 工具.数据集格式 import 样本视图
+        
+        # 列式数据直接使用数组，不逐个样本拼接
+        if isinstance(数据, 样本视图):
+            X = np.asarray(数据.图像).reshape(-1, 宽度, 高度, 3)
+            return X, np.asarray(数据.标签)
+        
         # 提取图像
         X图像 = np.array([样本[0] for 样本 in 数据])
         X = X图像.reshape(-1, 宽度, 高度, 3)
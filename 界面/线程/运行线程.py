@@ -57,10 +57,12 @@ class 运行线程(QThread):
         # 配置
         self._子模式 = "主线任务"
         self._启用增强 = False
+        self._流水线模式 = False
         
         # 基础模型
         self._模型 = None
         self._动作权重 = None
+        self._预处理器 = None
         
         # 增强模块
         self._YOLO检测器 = None
@@ -81,6 +83,11 @@ class 运行线程(QThread):
         self._当前帧率 = 30.0
         self._检测计数器 = 0
         self._当前检测间隔 = 3
+        self._阶段统计: Dict[str, dict] = {}
+        self._端到端延迟 = 0.0
+        
+        # 运动检测帧缓存 (前帧, 当前帧, 后帧)
+        self._帧缓存: tuple = ()
         
         # 缓存
         self._上次检测结果 = []
@@ -101,6 +108,10 @@ class 运行线程(QThread):
         """设置是否启用增强模式"""
         self._启用增强 = 启用
     
+    def 设置流水线模式(self, 启用: bool) -> None:
+        """设置是否以流水线方式运行（截取/预处理/推理/执行 并行）"""
+        self._流水线模式 = 启用
+    
     def run(self) -> None:
         """线程执行入口"""
         try:
@@ -172,23 +183,34 @@ class 运行线程(QThread):
         
         self.进度更新.emit(50, "准备运行...")
         
-        # 初始化帧缓存
+        # 初始化帧缓存（预处理器按本次的运行方式重新创建）
+        self._预处理器 = None
         try:
-            屏幕 = 截取屏幕(region=游戏窗口区域)
-            屏幕 = cv2.cvtColor(屏幕, cv2.COLOR_BGR2RGB)
-            屏幕 = cv2.resize(屏幕, (模型输入宽度, 模型输入高度))
+            屏幕缩放 = self._预处理(截取屏幕(region=游戏窗口区域), 模型输入宽度, 模型输入高度)
         except Exception as e:
             self.错误发生.emit(f"截取屏幕失败: {str(e)}")
             self.任务完成.emit(False, f"截取屏幕失败: {str(e)}")
             return
         
-        前帧 = 屏幕.copy()
-        当前帧 = 屏幕.copy()
-        后帧 = 屏幕.copy()
+        self._帧缓存 = (屏幕缩放.copy(), 屏幕缩放.copy(), 屏幕缩放.copy())
         
         self.进度更新.emit(100, "运行中")
         
-        # 主循环
+        if self._流水线模式:
+            self._执行流水线循环(截取屏幕, 游戏窗口区域, 模型输入宽度, 模型输入高度,
+                              动作定义, 运动检测阈值, 运动日志长度)
+        else:
+            self._执行顺序循环(截取屏幕, 游戏窗口区域, 模型输入宽度, 模型输入高度,
+                            动作定义, 运动检测阈值, 运动日志长度)
+        
+        # 释放所有按键
+        self._释放所有按键()
+        
+        self.任务完成.emit(True, "机器人已停止")
+    
+    def _执行顺序循环(self, 截取屏幕, 游戏窗口区域, 模型输入宽度: int, 模型输入高度: int,
+                   动作定义: dict, 运动检测阈值: float, 运动日志长度: int) -> None:
+        """在本线程中依次执行 截取 → 预处理 → 推理 → 执行"""
         while not self._停止标志:
             # 检查暂停
             if self._暂停标志:
@@ -207,65 +229,27 @@ class 运行线程(QThread):
             try:
                 # 截取屏幕
                 屏幕 = 截取屏幕(region=游戏窗口区域)
-                屏幕RGB = cv2.cvtColor(屏幕, cv2.COLOR_BGR2RGB)
-                屏幕缩放 = cv2.resize(屏幕RGB, (模型输入宽度, 模型输入高度))
+                屏幕缩放 = self._预处理(屏幕, 模型输入宽度, 模型输入高度)
                 
                 # 运动检测
-                动作量 = 检测动作变化(前帧, 当前帧, 后帧, 屏幕缩放)
-                
-                # 更新帧缓存
-                前帧 = 当前帧
-                当前帧 = 后帧
-                后帧 = 屏幕缩放.copy()
-                后帧 = cv2.blur(后帧, (4, 4))
+                动作量 = self._更新运动检测(屏幕缩放)
                 
-                # 预测动作
-                基础动作索引, 模型预测 = self._预测动作(屏幕缩放, 模型输入宽度, 模型输入高度)
-                
-                # 决策
-                增强可用 = self._YOLO可用 or self._状态识别可用 or self._决策引擎可用
-                
-                if 增强可用 and self._启用增强:
-                    动作索引, 动作名称, 来源 = self._增强决策(屏幕, 模型预测, 动作定义)
-                else:
-                    动作索引 = 基础动作索引
-                    动作名称 = 动作定义.get(动作索引, {}).get("名称", f"动作{动作索引}")
-                    来源 = "model"
+                # 预测动作并决策
+                决策 = self._推理决策(屏幕, 屏幕缩放, 模型输入宽度, 模型输入高度, 动作定义)
                 
                 # 执行动作
-                self._执行动作(动作索引)
-                
-                # 记录运动量
-                self._运动日志.append(动作量)
-                平均运动量 = round(mean(self._运动日志), 3) if self._运动日志 else 0
+                平均运动量 = self._执行并记录(决策, 动作量)
                 
                 # 更新性能监控
                 循环时间 = time.time() - 循环开始时间
                 self._更新性能监控(循环时间)
                 
-                # 发送状态更新
-                状态数据 = {
-                    "当前动作": 动作名称,
-                    "动作来源": 来源,
-                    "游戏状态": self._上次状态,
-                    "帧率": self._当前帧率,
-                    "运动量": 平均运动量,
-                    "增强模块": {
-                        "YOLO": self._YOLO可用,
-                        "状态识别": self._状态识别可用,
-                        "决策引擎": self._决策引擎可用,
-                        "低性能": self._已降级,
-                    }
-                }
-                self.状态更新.emit(状态数据)
+                # 发送状态更新并检测是否卡住
+                self._上报并检测卡住(决策, 平均运动量, 运动检测阈值, 运动日志长度)
                 
                 # 重置连续错误计数（成功处理一帧）
                 self._连续错误计数 = 0
                 
-                # 检测是否卡住
-                if 平均运动量 < 运动检测阈值 and len(self._运动日志) >= 运动日志长度:
-                    self._处理卡住()
-                
                 # 短暂休眠
                 time.sleep(0.01)
                 
@@ -274,11 +258,138 @@ class 运行线程(QThread):
                 self._记录错误(f"运行循环错误: {str(e)}", "警告")
                 self.错误发生.emit(f"运行循环错误: {str(e)}")
                 time.sleep(0.1)
+    
+    def _执行流水线循环(self, 截取屏幕, 游戏窗口区域, 模型输入宽度: int, 模型输入高度: int,
+                    动作定义: dict, 运动检测阈值: float, 运动日志长度: int) -> None:
+        """
+        以流水线方式运行：截取、预处理、推理、执行 各占一个线程，
+        阶段间用单槽覆盖队列连接，本线程只负责暂停/停止控制
+        """
+        from 核心.流水线 import 帧流水线, 创建机器人流水线
+        from 配置.增强设置 import 流水线配置
         
-        # 释放所有按键
-        self._释放所有按键()
+        def 截取() -> dict:
+            return {"屏幕": 截取屏幕(region=游戏窗口区域)}
         
-        self.任务完成.emit(True, "机器人已停止")
+        def 预处理(数据: dict) -> None:
+            数据["屏幕缩放"] = self._预处理(数据["屏幕"], 模型输入宽度, 模型输入高度)
+            数据["动作量"] = self._更新运动检测(数据["屏幕缩放"])
+        
+        def 推理(数据: dict) -> None:
+            数据["决策"] = self._推理决策(
+                数据["屏幕"], 数据["屏幕缩放"], 模型输入宽度, 模型输入高度, 动作定义
+            )
+        
+        def 执行(数据: dict, 帧间隔: float, 流水线: 帧流水线) -> None:
+            平均运动量 = self._执行并记录(数据["决策"], 数据["动作量"])
+            self._更新性能监控(
+                帧间隔,
+                阶段统计=流水线.获取统计(),
+                端到端延迟=流水线.获取端到端延迟()
+            )
+            self._上报并检测卡住(数据["决策"], 平均运动量, 运动检测阈值, 运动日志长度)
+        
+        流水线 = 创建机器人流水线(
+            截取, 预处理, 推理, 执行,
+            队列容量=流水线配置.get("队列容量", 1),
+            最大连续错误=self._最大连续错误数
+        )
+        
+        if not 流水线.启动():
+            self.错误发生.emit("流水线启动失败，改用顺序模式")
+            self._执行顺序循环(截取屏幕, 游戏窗口区域, 模型输入宽度, 模型输入高度,
+                            动作定义, 运动检测阈值, 运动日志长度)
+            return
+        
+        try:
+            while not self._停止标志:
+                # 同步暂停状态
+                if self._暂停标志 != 流水线.是否暂停():
+                    if self._暂停标志:
+                        流水线.暂停()
+                    else:
+                        流水线.继续()
+                
+                if not 流水线.是否运行中():
+                    错误消息 = f"流水线已停止: {流水线.获取错误消息()}"
+                    self._记录错误(错误消息, "错误")
+                    self.错误发生.emit(错误消息)
+                    break
+                
+                time.sleep(0.05)
+        finally:
+            流水线.停止()
+    
+    def _预处理(self, 屏幕: np.ndarray, 宽度: int, 高度: int) -> np.ndarray:
+        """
+        先缩放再转换颜色，结果写入预处理器的缓冲
+        
+        流水线模式下预处理阶段、队列和推理阶段可能同时持有不同帧，使用三组缓冲轮流写入。
+        """
+        if self._预处理器 is None or self._预处理器.规格.宽度 != 宽度 or self._预处理器.规格.高度 != 高度:
+            from 核心.帧预处理 import 帧预处理器, 预处理规格
+            
+            # TFLearn 模型直接接收 uint8 像素
+            self._预处理器 = 帧预处理器(
+                预处理规格(宽度, 高度, 缩放=None),
+                缓冲数=3 if self._流水线模式 else 1
+            )
+        return self._预处理器.缩放(屏幕)
+    
+    def _更新运动检测(self, 屏幕缩放: np.ndarray) -> int:
+        """计算运动量并推进三帧缓存"""
+        from 核心.动作检测 import 检测动作变化
+        
+        前帧, 当前帧, 后帧 = self._帧缓存
+        动作量 = 检测动作变化(前帧, 当前帧, 后帧, 屏幕缩放)
+        self._帧缓存 = (当前帧, 后帧, cv2.blur(屏幕缩放, (4, 4)))
+        return 动作量
+    
+    def _推理决策(self, 屏幕: np.ndarray, 屏幕缩放: np.ndarray,
+                 宽度: int, 高度: int, 动作定义: dict) -> tuple:
+        """预测动作并（可选）经过增强决策，返回 (动作索引, 动作名称, 来源)"""
+        基础动作索引, 模型预测 = self._预测动作(屏幕缩放, 宽度, 高度)
+        
+        增强可用 = self._YOLO可用 or self._状态识别可用 or self._决策引擎可用
+        if 增强可用 and self._启用增强:
+            return self._增强决策(屏幕, 模型预测, 动作定义)
+        
+        动作名称 = 动作定义.get(基础动作索引, {}).get("名称", f"动作{基础动作索引}")
+        return 基础动作索引, 动作名称, "model"
+    
+    def _执行并记录(self, 决策: tuple, 动作量: int) -> float:
+        """执行动作并记录运动量，返回平均运动量"""
+        self._执行动作(决策[0])
+        self._运动日志.append(动作量)
+        return round(mean(self._运动日志), 3) if self._运动日志 else 0
+    
+    def _上报并检测卡住(self, 决策: tuple, 平均运动量: float,
+                    运动检测阈值: float, 运动日志长度: int) -> None:
+        """发送状态更新，运动量过低时执行脱困"""
+        _, 动作名称, 来源 = 决策
+        状态数据 = {
+            "当前动作": 动作名称,
+            "动作来源": 来源,
+            "游戏状态": self._上次状态,
+            "帧率": self._当前帧率,
+            "运动量": 平均运动量,
+            "增强模块": {
+                "YOLO": self._YOLO可用,
+                "状态识别": self._状态识别可用,
+                "决策引擎": self._决策引擎可用,
+                "低性能": self._已降级,
+            }
+        }
+        if self._流水线模式:
+            状态数据["流水线"] = {
+                "端到端延迟": round(self._端到端延迟, 2),
+                "阶段": self._阶段统计,
+            }
+        self.状态更新.emit(状态数据)
+        
+        # 检测是否卡住
+        if 平均运动量 < 运动检测阈值 and len(self._运动日志) >= 运动日志长度:
+            self._处理卡住()
     
     def _加载模型(self, 宽度: int, 高度: int, 学习率: float,
                  总动作数: int, 模型路径: str, 预训练路径: str) -> bool:
@@ -322,7 +433,8 @@ class 运行线程(QThread):
         # 初始化状态识别器
         try:
             from 核心.状态识别器 import 状态识别器
-            self._状态识别器 = 状态识别器()
+            from 配置.设置 import 获取当前UI区域
+            self._状态识别器 = 状态识别器(UI区域=获取当前UI区域())
             self._状态识别可用 = True
         except Exception as e:
             self._状态识别可用 = False
@@ -374,7 +486,8 @@ class 运行线程(QThread):
         # 执行状态识别
         if self._状态识别可用:
             try:
-                状态结果 = self._状态识别器.识别状态(屏幕, 检测结果列表)
+                灰度图 = self._YOLO检测器.获取灰度图(屏幕) if self._YOLO可用 else None
+                状态结果 = self._状态识别器.识别状态(屏幕, 检测结果列表, 灰度图=灰度图)
                 当前状态 = 状态结果.状态.value if hasattr(状态结果.状态, 'value') else str(状态结果.状态)
                 self._上次状态 = 当前状态
             except Exception:
@@ -504,9 +617,20 @@ class 运行线程(QThread):
         except Exception as e:
             self.错误发生.emit(f"脱困动作执行失败: {str(e)}")
     
-    def _更新性能监控(self, 帧时间: float) -> None:
-        """更新性能监控并自适应调整"""
+    def _更新性能监控(self, 帧时间: float, 阶段统计: Optional[dict] = None,
+                    端到端延迟: float = 0.0) -> None:
+        """
+        更新性能监控并自适应调整
+        
+        参数:
+            帧时间: 当前帧耗时（秒），流水线模式下为相邻两帧完成的间隔
+            阶段统计: 流水线各阶段统计 {阶段名称: 阶段统计}
+            端到端延迟: 流水线从截取到执行完成的平均延迟（毫秒）
+        """
         self._帧时间日志.append(帧时间)
+        if 阶段统计 is not None:
+            self._阶段统计 = {名称: 统计.to_dict() for 名称, 统计 in 阶段统计.items()}
+            self._端到端延迟 = 端到端延迟
         
         if len(self._帧时间日志) >= 10:
             平均帧时间 = mean(self._帧时间日志)
@@ -567,6 +691,14 @@ class 运行线程(QThread):
         """返回是否启用增强模式"""
         return self._启用增强
     
+    def 是否流水线模式(self) -> bool:
+        """返回是否以流水线方式运行"""
+        return self._流水线模式
+    
+    def 获取阶段统计(self) -> Dict[str, dict]:
+        """获取流水线各阶段统计（仅流水线模式下有数据）"""
+        return dict(self._阶段统计)
+    
     def 获取增强模块状态(self) -> Dict[str, bool]:
         """获取增强模块状态"""
         return {
@@ -279,6 +279,9 @@ class 状态监控(QFrame):
         # 当前动作
         self._当前动作标签 = self._创建状态项("当前动作:", "无", 状态网格, 2, 0, colspan=2)
         
+        # 后台写入队列
+        self._写入队列标签 = self._创建状态项("写入队列:", "0", 状态网格, 3, 0, colspan=2)
+        
         布局.addLayout(状态网格)
     
     def _创建状态项(self, 标题: str, 初始值: str, 网格: QGridLayout, 
@@ -339,6 +342,13 @@ class 状态监控(QFrame):
     def 更新当前动作(self, 动作: str) -> None:
         """更新当前动作显示"""
         self._当前动作标签.setText(动作)
+    
+    def 更新写入队列(self, 深度: int, 阻塞次数: int = 0) -> None:
+        """更新后台写入队列显示，阻塞次数大于 0 表示磁盘写入跟不上采集"""
+        文本 = str(深度)
+        if 阻塞次数:
+            文本 += f" (等待磁盘 {阻塞次数} 次)"
+        self._写入队列标签.setText(文本)
 
 
 class 画面预览(QFrame):
@@ -1071,6 +1081,8 @@ class 数据收集页(QWidget):
                 - 帧率: float
                 - 当前动作: str
                 - 帧图像: np.ndarray (可选)
+                - 写入队列: int (可选) - 后台写入队列中的帧数
+                - 写入阻塞次数: int (可选) - 写入队列满时采集等待的次数
                 - 价值评分: float (可选) - 智能录制价值评分
                 - 高价值片段: int (可选) - 高价值片段数量
                 - 中价值片段: int (可选) - 中价值片段数量
@@ -1101,6 +1113,9 @@ class 数据收集页(QWidget):
         if "帧图像" in 状态数据 and 状态数据["帧图像"] is not None:
             self._画面预览.更新预览(状态数据["帧图像"])
         
+        if "写入队列" in 状态数据:
+            self._状态监控.更新写入队列(状态数据["写入队列"], 状态数据.get("写入阻塞次数", 0))
+        
         # 智能录制相关状态更新
         if "价值评分" in 状态数据:
             self._智能录制面板.更新价值评分(状态数据["价值评分"])
@@ -33,6 +33,9 @@ from PySide6.QtGui import QColor
 from 界面.样式.主题 import 颜色
 from 界面.样式.布局常量 import 布局常量
 from 界面.组件.通用组件 import Card, 确认对话框, 提示对话框
+from 工具.数据集格式 import (
+    是否分片目录, 读取分片信息, 读取类别计数, 获取数据大小, 删除数据
+)
 
 
 class 数据文件信息:
@@ -53,7 +56,7 @@ class 数据文件信息:
             路径 = Path(self.文件路径)
             if 路径.exists():
                 统计信息 = 路径.stat()
-                self.文件大小 = 统计信息.st_size
+                self.文件大小 = 获取数据大小(self.文件路径)
                 self.创建时间 = datetime.fromtimestamp(统计信息.st_mtime)
                 
                 # 加载样本数量和动作分布
@@ -64,7 +67,12 @@ class 数据文件信息:
     def _加载样本信息(self) -> None:
         """加载样本数量和动作分布"""
         try:
-            if self.文件路径.endswith('.npy'):
+            if 是否分片目录(self.文件路径):
+                # 列式数据分片：样本数和动作分布都在索引中，不需要读取图像
+                self.样本数量 = 读取分片信息(self.文件路径).样本数
+                self.动作分布 = 读取类别计数(self.文件路径)
+                
+            elif self.文件路径.endswith('.npy'):
                 数据 = np.load(self.文件路径, allow_pickle=True)
                 self.样本数量 = len(数据)
                 
@@ -136,7 +144,8 @@ class 数据扫描线程(QThread):
                 return
             
             # 获取所有数据文件
-            数据文件 = list(目录.glob("*.npy")) + list(目录.glob("*.npz"))
+            数据文件 = (list(目录.glob("*.npy")) + list(目录.glob("*.npz"))
+                        + [路径 for 路径 in 目录.iterdir() if 是否分片目录(str(路径))])
             总数 = len(数据文件)
             
             for 索引, 文件路径 in enumerate(数据文件):
@@ -209,7 +218,7 @@ class 数据处理线程(QThread):
             进度 = int((索引 + 1) / 总数 * 100)
             self.处理进度.emit(进度, f"删除: {os.path.basename(文件路径)}")
             try:
-                os.remove(文件路径)
+                删除数据(文件路径)
                 删除成功 += 1
             except Exception as e:
                 print(f"删除文件失败: {e}")
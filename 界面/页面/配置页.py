@@ -642,6 +642,15 @@ class 配置页(QWidget):
         self._配置控件["每文件样本数"] = 样本数
         表单布局.addRow("每文件样本数:", self._创建带说明的控件(样本数, "每个数据文件保存的样本数量"))
         
+        # 录制预览帧率
+        预览帧率 = QSpinBox()
+        预览帧率.setRange(0, 30)
+        预览帧率.setSuffix(" FPS")
+        预览帧率.setFixedWidth(布局常量.表单控件最小宽度 + 40)
+        预览帧率.setFixedHeight(布局常量.表单控件高度)
+        self._配置控件["录制预览帧率"] = 预览帧率
+        表单布局.addRow("预览帧率:", self._创建带说明的控件(预览帧率, "命令行录制的预览刷新率，0 为无界面模式"))
+        
         # 数据保存路径
         数据路径 = QLineEdit()
         数据路径.setPlaceholderText("数据/")
@@ -1101,6 +1110,7 @@ class 配置页(QWidget):
             
             self._配置控件["训练轮数"].setValue(getattr(设置, '训练轮数', 10))
             self._配置控件["每文件样本数"].setValue(getattr(设置, '每文件样本数', 500))
+            self._配置控件["录制预览帧率"].setValue(getattr(设置, '录制预览帧率', 10))
             self._配置控件["数据保存路径"].setText(getattr(设置, '数据保存路径', '数据/'))
             self._配置控件["运动检测阈值"].setValue(getattr(设置, '运动检测阈值', 800))
             
@@ -1160,6 +1170,7 @@ class 配置页(QWidget):
         self._配置控件["学习率_滑块"].setValue(10)
         self._配置控件["训练轮数"].setValue(10)
         self._配置控件["每文件样本数"].setValue(500)
+        self._配置控件["录制预览帧率"].setValue(10)
         self._配置控件["数据保存路径"].setText("数据/")
         self._配置控件["运动检测阈值"].setValue(800)
         
@@ -1199,6 +1210,7 @@ class 配置页(QWidget):
             "学习率": self._配置控件["学习率"].value(),
             "训练轮数": self._配置控件["训练轮数"].value(),
             "每文件样本数": self._配置控件["每文件样本数"].value(),
+            "录制预览帧率": self._配置控件["录制预览帧率"].value(),
             "数据保存路径": self._配置控件["数据保存路径"].text(),
             "运动检测阈值": self._配置控件["运动检测阈值"].value(),
             # 增强模块
@@ -1354,6 +1366,7 @@ class 配置页(QWidget):
         self._配置控件["学习率_滑块"].setValue(int(学习率 * 10000))
         self._配置控件["训练轮数"].setValue(配置.get("训练轮数", 10))
         self._配置控件["每文件样本数"].setValue(配置.get("每文件样本数", 500))
+        self._配置控件["录制预览帧率"].setValue(配置.get("录制预览帧率", 10))
         self._配置控件["数据保存路径"].setText(配置.get("数据保存路径", "数据/"))
         self._配置控件["运动检测阈值"].setValue(配置.get("运动检测阈值", 800))
         
@@ -1422,6 +1435,10 @@ class 配置页(QWidget):
 # 数据保存路径
 数据保存路径 = "{配置["数据保存路径"]}"
 
+# 录制预览窗口的刷新帧率 (0 表示无界面模式，不显示预览)
+# 预览在独立线程中刷新，不影响录制帧率
+录制预览帧率 = {配置.get("录制预览帧率", 10)}
+
 # ==================== 运动检测设置 ====================
 # 运动检测阈值 (低于此值认为卡住)
 运动检测阈值 = {配置["运动检测阈值"]}
@@ -1606,6 +1623,11 @@ YOLO配置 = {{
     "置信度累积系数": 0.1,
     "UI检测启用": True,
     "启用": {配置["状态识别启用"]},
+    "UI匹配阈值": 0.7,           # 模板匹配度超过该值认为检测到UI元素
+    "UI金字塔层数": 2,           # 粗匹配最多缩小的层数（每层边长减半），0 表示不使用金字塔
+    "UI金字塔最小模板边长": 16,   # 缩小后模板最短边不低于该值
+    "UI粗匹配容差": 0.15,        # 粗匹配阈值 = UI匹配阈值 - 容差，低于则不再精匹配
+    "UI区域边距": 16,            # 搜索区域向外扩展的像素，容忍界面位置的轻微偏移
 }}
 
 # UI元素模板路径
@@ -1617,6 +1639,19 @@ UI模板路径 = {{
     "加载界面": "资源/ui/loading.png",
 }}
 
+# UI模板的搜索区域，对应配置档案 UIRegions 的字段名，None 表示搜索整个画面
+UI模板区域 = {{
+    "对话框": "dialog_area",
+    "血条": "health_bar",
+    "菜单": None,
+    "死亡界面": None,
+    "加载界面": None,
+}}
+
+# UI模板匹配顺序（与状态判定优先级一致），匹配到短路模板后不再匹配其余模板
+UI模板优先级 = ["加载界面", "死亡界面", "菜单", "对话框", "血条"]
+UI短路模板 = ("加载界面", "死亡界面")
+
 # 状态判定阈值
 状态判定阈值 = {{
     "战斗_敌人距离": 200,
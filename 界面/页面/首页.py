@@ -560,21 +560,28 @@ def _统计数据文件() -> tuple:
     """
     try:
         from 配置.设置 import 数据保存路径, 每文件样本数
+        from 工具.数据集格式 import 是否分片目录, 读取分片信息
         import numpy as np
         
         数据目录 = Path(数据保存路径)
         if not 数据目录.exists():
             return 0, 0
         
-        # 查找所有npz文件
+        # 查找所有npz文件和列式数据分片
         数据文件列表 = list(数据目录.glob("*.npz"))
-        文件数 = len(数据文件列表)
+        分片列表 = [路径 for 路径 in 数据目录.iterdir() if 是否分片目录(str(路径))]
+        文件数 = len(数据文件列表) + len(分片列表)
         
         if 文件数 == 0:
             return 0, 0
         
-        # 统计样本数
+        # 统计样本数（分片只读取索引）
         样本总数 = 0
+        for 分片路径 in 分片列表:
+            try:
+                样本总数 += 读取分片信息(str(分片路径)).样本数
+            except Exception:
+                样本总数 += 每文件样本数
         for 文件路径 in 数据文件列表:
             try:
                 数据 = np.load(str(文件路径), allow_pickle=True)
@@ -9,6 +9,10 @@
 4. 按 T 暂停/继续录制
 5. 按 ESC 退出并保存
 
+无界面模式:
+    python 训练/收集数据.py --无界面
+    不显示预览窗口（也可以在配置中把 录制预览帧率 设为 0）
+
 支持录制:
 - 键盘移动 (WASD)
 - 技能按键 (1-6, Q, E, R, G, C)
@@ -25,7 +29,6 @@
 """
 
 import numpy as np
-import cv2
 import time
 import os
 import sys
@@ -34,12 +37,16 @@ import win32api
 # 添加项目根目录到路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from 核心.屏幕截取 import 截取屏幕
+from 核心.屏幕截取 import 截取缩放到帧环
+from 核心.帧环 import 帧环
+from 核心.帧预处理 import 帧预处理器, 预处理规格
+from 核心.录制预览 import 录制预览
 from 核心.按键检测 import 检测按键
 from 配置.设置 import (
     游戏窗口区域, 模型输入宽度, 模型输入高度,
-    每文件样本数, 数据保存路径, 总动作数
+    每文件样本数, 数据保存路径, 总动作数, 录制预览帧率
 )
+from 工具.数据集格式 import 数据集写入器, 后台数据集写入器, 获取下一个编号
 
 # 导入智能录制模块
 try:
@@ -101,6 +108,8 @@ class SmartRecorder:
     def add_frame(self, frame: np.ndarray, action: int) -> None:
         """添加帧和动作到当前片段
         
+        帧不会被复制，调用方需保证它在片段结束前不被修改（如已固定的帧环槽位）。
+        
         Args:
             frame: 画面帧
             action: 动作编码
@@ -108,7 +117,7 @@ class SmartRecorder:
         if not self.enabled:
             return
         
-        self.segment_frames.append(frame.copy())
+        self.segment_frames.append(frame)
         self.segment_actions.append(action)
     
     def end_segment(self) -> tuple:
@@ -135,9 +144,13 @@ class SmartRecorder:
         # 检查是否应该过滤
         should_filter, reasons = self.data_filter.filter_segment(self.current_segment)
         
-        # 添加到统计
+        # 添加到统计（统计服务只保留摘要）
         self.statistics_service.add_segment(self.current_segment)
         
+        # 评估完成后释放片段画面，录制循环自己保留待写入的帧
+        self.current_segment.frames = []
+        self.segment_frames = []
+        
         return (score, level, should_filter, reasons)
 
     def _detect_events(self) -> None:
@@ -391,15 +404,9 @@ def 获取动作索引(动作):
 
 
 def 获取起始文件编号(数据目录):
-    """获取下一个可用的文件编号"""
-    编号 = 1
-    while True:
-        文件名 = os.path.join(数据目录, f'训练数据-{编号}.npy')
-        if os.path.isfile(文件名):
-            编号 += 1
-        else:
-            print(f'将从编号 {编号} 开始保存')
-            break
+    """获取下一个可用的文件编号（同时检查分片目录和旧格式文件）"""
+    编号 = 获取下一个编号(数据目录)
+    print(f'将从编号 {编号} 开始保存')
     return 编号
 
 
@@ -469,25 +476,55 @@ def 主程序():
     
     # 获取起始文件编号
     文件编号 = 获取起始文件编号(数据目录)
-    文件名 = os.path.join(数据目录, f'训练数据-{文件编号}.npy')
+    
+    片段评估间隔 = 100  # 每100帧评估一次片段
+    写入队列长度 = 4  # 每批是一个片段（片段评估间隔 帧）
+    
+    # 截取画面缩放后直接写入预分配的帧环槽位，片段缓冲区和写入队列只保存槽位引用，
+    # 不再为每帧分配和复制整帧。槽位需覆盖当前片段、排队的片段和正在写入的片段
+    录制帧环 = 帧环(
+        槽数=片段评估间隔 * (写入队列长度 + 2) + 1,
+        帧形状=(模型输入高度, 模型输入宽度, 3)
+    )
+    
+    # 列式数据集写入器：样本逐条追加到分片目录，每 每文件样本数 帧换一个分片
+    # 写入在后台线程中进行，录制循环只把评估通过的片段放入队列，写入后释放槽位
+    写入器 = 后台数据集写入器(数据集写入器(
+        数据目录,
+        图像形状=(模型输入高度, 模型输入宽度, 3),
+        标签维度=总动作数,
+        每分片样本数=每文件样本数,
+        起始编号=文件编号
+    ), 队列长度=写入队列长度, 帧环=录制帧环)
+    
+    # 截取画面先缩放再转换颜色
+    预处理器 = 帧预处理器(预处理规格(模型输入宽度, 模型输入高度, 缩放=None))
+    
+    # 预览窗口在自己的线程中按低帧率刷新，录制帧率只受截取速度限制
+    预览 = 录制预览(帧率=录制预览帧率, 无界面='--无界面' in sys.argv)
     
     # 初始化
-    训练数据 = []
     已暂停 = False
     片段帧数 = 0
-    片段评估间隔 = 100  # 每100帧评估一次片段
     过滤计数 = 0
     保存计数 = 0
     总片段数 = 0
     
-    # 临时缓冲区：存储当前片段的帧数据，等待评估后决定是否保存
+    # 临时缓冲区：存储当前片段的帧引用，等待评估后决定是否保存
     片段缓冲区 = []
     
+    def 释放片段(缓冲区):
+        """丢弃片段时释放其固定的槽位"""
+        for 引用, _ in 缓冲区:
+            录制帧环.释放(引用)
+    
     print("\n" + "=" * 50)
     print("📋 操作说明:")
     print("  - 按 T 暂停/继续录制")
     print("  - 按 ESC 退出并保存")
     print(f"  - 每 {每文件样本数} 帧自动保存一次")
+    if 预览.无界面:
+        print("  - 无界面模式: 不显示预览窗口")
     if 智能录制可用:
         print("  - 🧠 智能录制已启用")
         print(f"  - 过滤模式: {过滤选项}")
@@ -514,6 +551,7 @@ def 主程序():
     
     # 开始第一个片段
     smart_recorder.start_segment()
+    预览.启动()
 
     try:
         while True:
@@ -530,16 +568,17 @@ def 主程序():
                     smart_recorder.start_segment()  # 继续时开始新片段
                 time.sleep(0.5)
             
-            # ESC退出
-            if win32api.GetAsyncKeyState(0x1B) & 0x8000:  # VK_ESCAPE
+            # ESC退出（游戏窗口或预览窗口中按下）
+            if win32api.GetAsyncKeyState(0x1B) & 0x8000 or 预览.已请求退出:  # VK_ESCAPE
                 print("\n🛑 正在退出...")
                 break
             
             if not 已暂停:
-                # 截取屏幕
-                屏幕 = 截取屏幕(region=游戏窗口区域)
-                屏幕 = cv2.resize(屏幕, (模型输入宽度, 模型输入高度))
-                屏幕 = cv2.cvtColor(屏幕, cv2.COLOR_BGR2RGB)
+                # 截取屏幕，缩放结果直接写入帧环槽位
+                # 帧在片段评估和写入完成前保持固定，不会被之后的截取覆盖
+                引用 = 截取缩放到帧环(录制帧环, 预处理器, 游戏窗口区域)
+                录制帧环.固定(引用)
+                屏幕 = 录制帧环.读取(引用)
                 
                 # 获取输入状态
                 鼠标状态 = 检测鼠标按键()
@@ -553,8 +592,8 @@ def 主程序():
                 smart_recorder.add_frame(屏幕, 动作索引)
                 片段帧数 += 1
                 
-                # 将当前帧数据添加到片段缓冲区（等待评估后决定是否保存）
-                片段缓冲区.append([屏幕, 动作])
+                # 将当前帧引用添加到片段缓冲区（等待评估后决定是否保存）
+                片段缓冲区.append([引用, 动作])
                 
                 # 每隔一定帧数评估片段
                 if 片段帧数 >= 片段评估间隔:
@@ -563,30 +602,35 @@ def 主程序():
                     
                     # 根据过滤选项决定是否保存
                     if smart_recorder.should_save_segment(score, level, should_filter):
-                        # 将缓冲区数据添加到训练数据列表
-                        训练数据.extend(片段缓冲区)
+                        # 整个片段交给后台写入线程（分片写满时自动开始下一个分片）
+                        写入器.提交(片段缓冲区)
                         保存计数 += 1
                     else:
+                        释放片段(片段缓冲区)
                         过滤计数 += 1
                     
-                    # 清空缓冲区，开始新片段
+                    for 完成分片 in 写入器.取完成分片():
+                        print(f"\n💾 已保存: {完成分片} ({每文件样本数} 帧)")
+                        print(f"   📈 过滤统计: 总片段 {总片段数}, 保存 {保存计数}, 过滤 {过滤计数}")
+                    
+                    # 开始新片段（已提交的缓冲区归写入线程所有，不能清空复用）
                     片段缓冲区 = []
                     smart_recorder.start_segment()
                     片段帧数 = 0
                 
-                # 显示预览窗口
-                预览图 = cv2.resize(屏幕, (640, 360))
-                cv2.imshow('录制预览 (ESC退出)', cv2.cvtColor(预览图, cv2.COLOR_RGB2BGR))
-                
-                if cv2.waitKey(25) & 0xFF == 27:  # ESC
-                    break
+                # 交给预览线程显示（只传递引用，不等待窗口刷新）
+                预览.更新(屏幕)
 
                 # 显示进度（包含智能录制信息）
-                if len(训练数据) % 50 == 0 or (len(片段缓冲区) + len(训练数据)) % 50 == 0:
+                已保存帧数 = 写入器.当前分片样本数
+                if 已保存帧数 % 50 == 0 or (len(片段缓冲区) + 已保存帧数) % 50 == 0:
                     当前时间 = time.time()
-                    总帧数 = len(训练数据) + len(片段缓冲区)
+                    总帧数 = 已保存帧数 + len(片段缓冲区)
                     帧率 = 50 / (当前时间 - 上次时间) if 当前时间 > 上次时间 else 0
                     当前动作 = 获取动作名称(动作)
+                    写入状态 = f"写入队列: {写入器.队列深度}/{写入器.队列长度}"
+                    if 写入器.阻塞次数:
+                        写入状态 += f" (等待磁盘 {写入器.阻塞次数} 次, {写入器.阻塞时间:.1f}s)"
                     
                     # 获取智能录制统计
                     if 智能录制可用:
@@ -595,26 +639,17 @@ def 主程序():
                         print(f"📊 帧数: {总帧数:4d} | FPS: {帧率:5.1f} | "
                               f"动作: {当前动作} | 评分: {current_score:.1f} | "
                               f"片段-保存:{保存计数} 过滤:{过滤计数} | "
-                              f"高:{stats['high']} 中:{stats['medium']} 低:{stats['low']}")
+                              f"高:{stats['high']} 中:{stats['medium']} 低:{stats['low']} | {写入状态}")
                     else:
-                        print(f"📊 帧数: {总帧数:4d} | FPS: {帧率:5.1f} | 动作: {当前动作}")
+                        print(f"📊 帧数: {总帧数:4d} | FPS: {帧率:5.1f} | 动作: {当前动作} | {写入状态}")
                     
                     上次时间 = 当前时间
-                
-                # 自动保存
-                if len(训练数据) >= 每文件样本数:
-                    np.save(文件名, 训练数据)
-                    print(f"\n💾 已保存: {文件名} ({len(训练数据)} 帧)")
-                    print(f"   📈 过滤统计: 总片段 {总片段数}, 保存 {保存计数}, 过滤 {过滤计数}")
-                    训练数据 = []
-                    文件编号 += 1
-                    文件名 = os.path.join(数据目录, f'训练数据-{文件编号}.npy')
     
     except KeyboardInterrupt:
         print("\n\n⚠️  用户中断")
     
     finally:
-        cv2.destroyAllWindows()
+        预览.停止()
         
         # 处理缓冲区中剩余的数据（最后一个未完成的片段）
         if 片段缓冲区:
@@ -622,14 +657,22 @@ def 主程序():
             score, level, should_filter, reasons = smart_recorder.end_segment()
             总片段数 += 1
             if smart_recorder.should_save_segment(score, level, should_filter):
-                训练数据.extend(片段缓冲区)
+                写入器.提交(片段缓冲区)
                 保存计数 += 1
             else:
+                释放片段(片段缓冲区)
                 过滤计数 += 1
         
-        if 训练数据:
-            np.save(文件名, 训练数据)
-            print(f"\n💾 已保存剩余数据: {文件名} ({len(训练数据)} 帧)")
+        # 等待后台写入线程写完队列中的全部片段
+        if 写入器.队列深度:
+            print(f"\n⏳ 正在写入剩余 {写入器.队列深度} 个片段...")
+        剩余帧数 = 写入器.当前分片样本数
+        完成分片 = 写入器.关闭()
+        录制帧环.关闭()
+        for 已完成 in 写入器.取完成分片():
+            print(f"\n💾 已保存: {已完成} ({每文件样本数} 帧)")
+        if 完成分片:
+            print(f"\n💾 已保存剩余数据: {完成分片} ({剩余帧数} 帧)")
         
         print("\n" + "=" * 50)
         print("✅ 数据收集完成!")
@@ -0,0 +1,237 @@
+"""
+训练数据加载器
+
+以 mmap 方式打开全部训练数据，按全局样本索引跨文件打乱，
+在后台线程中组装连续的训练块（含数据增强）并提前准备后续若干块，
+训练循环不再在文件之间等待读取和反序列化。
+
+每个文件最后的若干样本留作验证集，与原来逐文件训练时的划分一致。
+旧的 pickle .npy 文件只能整体读入内存，建议先用 工具/数据集格式.py 转换为分片目录。
+
+使用示例:
+    with 数据加载器(文件列表, 块大小=450, 增强器=增强器) as 加载器:
+        for 块序号, 训练块 in 加载器.迭代轮次(轮次):
+            模型.fit(训练块.图像, 训练块.标签)
+"""
+
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Deque, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from 工具.数据集格式 import 加载样本, 样本视图
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+日志 = logging.getLogger(__name__)
+
+
+class 数据加载器:
+    """
+    预取式训练数据加载器
+    
+    全部样本由 (文件号, 行号) 索引表示，每轮按种子打乱后切成固定大小的训练块。
+    组装训练块时按文件分组、按行号排序后整体索引 mmap 数组，
+    不逐样本复制；数据增强在工作线程中原地写回块数组。
+    """
+    
+    def __init__(self,
+                 文件列表: Sequence[str],
+                 块大小: int = 450,
+                 预取块数: int = 2,
+                 工作线程数: int = 2,
+                 增强器=None,
+                 每文件验证样本数: int = 50,
+                 验证样本数: int = 200,
+                 随机种子: int = 0):
+        """
+        参数:
+            文件列表: 分片目录或旧格式 .npy 文件路径列表
+            块大小: 每个训练块的样本数
+            预取块数: 后台提前准备的训练块数
+            工作线程数: 组装训练块的线程数
+            增强器: 可选的 数据增强器，对训练块中每张图像调用 增强()
+            每文件验证样本数: 每个文件末尾留作验证集的样本数
+            验证样本数: 从留出样本中固定抽取的验证集大小
+            随机种子: 打乱顺序的基础种子，同一轮次的顺序可复现
+        """
+        if 块大小 <= 0:
+            raise ValueError("块大小必须大于 0")
+        
+        self.块大小 = 块大小
+        self.预取块数 = max(1, 预取块数)
+        self.增强器 = 增强器
+        self.随机种子 = 随机种子
+        
+        self._数据: List[样本视图] = []
+        self.图像形状: Optional[Tuple[int, ...]] = None
+        self.标签维度: Optional[int] = None
+        
+        训练索引: List[np.ndarray] = []
+        留出索引: List[np.ndarray] = []
+        for 路径 in 文件列表:
+            try:
+                数据 = 加载样本(路径)
+            except Exception as e:
+                日志.warning(f"跳过无法加载的数据 {路径}: {e}")
+                continue
+            if len(数据) == 0:
+                continue
+            
+            图像形状 = tuple(数据.图像.shape[1:])
+            标签维度 = int(数据.标签.shape[1])
+            if self.图像形状 is None:
+                self.图像形状, self.标签维度 = 图像形状, 标签维度
+            elif (图像形状, 标签维度) != (self.图像形状, self.标签维度):
+                日志.warning(f"跳过形状不一致的数据 {路径}: {图像形状}, {标签维度}")
+                continue
+            
+            文件号 = len(self._数据)
+            self._数据.append(数据)
+            训练数 = max(0, len(数据) - 每文件验证样本数)
+            行号 = np.arange(len(数据), dtype=np.int64)
+            文件列 = np.full(len(数据), 文件号, dtype=np.int64)
+            全部 = np.stack([文件列, 行号], axis=1)
+            训练索引.append(全部[:训练数])
+            留出索引.append(全部[训练数:])
+        
+        if not self._数据:
+            raise ValueError("没有可用的训练数据")
+        
+        self._训练索引 = np.concatenate(训练索引)
+        留出 = np.concatenate(留出索引)
+        
+        # 验证集固定抽取一次，各训练块共用
+        if len(留出) > 验证样本数:
+            抽取 = np.random.default_rng(随机种子).choice(len(留出), 验证样本数, replace=False)
+            留出 = 留出[np.sort(抽取)]
+        self._验证索引 = 留出
+        self._标签类型 = np.result_type(*[数据.标签.dtype for 数据 in self._数据])
+        self._验证集: Optional[样本视图] = None
+        
+        self._线程池 = ThreadPoolExecutor(max_workers=max(1, 工作线程数), thread_name_prefix="数据加载")
+        
+        日志.info(f"数据加载器: {len(self._数据)} 个文件, 训练样本 {self.训练样本数}, "
+                 f"验证样本 {len(self._验证索引)}, 每轮 {self.每轮块数} 块")
+    
+    # ==================== 属性 ====================
+    
+    @property
+    def 文件数(self) -> int:
+        """成功加载的文件数"""
+        return len(self._数据)
+    
+    @property
+    def 训练样本数(self) -> int:
+        """参与训练的样本总数"""
+        return len(self._训练索引)
+    
+    @property
+    def 每轮块数(self) -> int:
+        """每轮的训练块数（最后一块可能不满）"""
+        return -(-self.训练样本数 // self.块大小)
+    
+    # ==================== 组装 ====================
+    
+    def 轮次顺序(self, 轮次: int) -> np.ndarray:
+        """
+        获取指定轮次的全局样本顺序
+        
+        参数:
+            轮次: 轮次编号，与随机种子共同决定顺序
+        
+        返回:
+            训练索引的排列
+        """
+        return np.random.default_rng([self.随机种子, 轮次]).permutation(self.训练样本数)
+    
+    def _组装(self, 索引: np.ndarray) -> 样本视图:
+        """
+        按 (文件号, 行号) 索引组装连续数组
+        
+        参数:
+            索引: (样本数, 2) 索引数组，顺序即输出顺序
+        
+        返回:
+            样本视图，图像和标签均为新的连续数组
+        """
+        数量 = len(索引)
+        图像 = np.empty((数量,) + self.图像形状, dtype=np.uint8)
+        标签 = np.empty((数量, self.标签维度), dtype=self._标签类型)
+        if 数量 == 0:
+            return 样本视图(图像, 标签)
+        
+        # 按文件、行号排序后分组读取，mmap 上的访问尽量顺序
+        排序 = np.lexsort((索引[:, 1], 索引[:, 0]))
+        文件号 = 索引[排序, 0]
+        边界 = np.flatnonzero(np.diff(文件号)) + 1
+        for 分组 in np.split(排序, 边界):
+            数据 = self._数据[int(索引[分组[0], 0])]
+            行号 = 索引[分组, 1]
+            图像[分组] = 数据.图像[行号]
+            标签[分组] = 数据.标签[行号]
+        
+        return 样本视图(图像, 标签)
+    
+    def _准备训练块(self, 索引: np.ndarray) -> 样本视图:
+        """组装训练块并原地应用数据增强（在工作线程中执行）"""
+        训练块 = self._组装(索引)
+        if self.增强器 is not None:
+            for i in range(len(训练块)):
+                训练块.图像[i] = self.增强器.增强(训练块.图像[i])
+        return 训练块
+    
+    def 获取验证集(self) -> 样本视图:
+        """获取固定的验证集（首次调用时组装）"""
+        if self._验证集 is None:
+            self._验证集 = self._组装(self._验证索引)
+        return self._验证集
+    
+    # ==================== 迭代 ====================
+    
+    def 迭代轮次(self, 轮次: int, 起始块: int = 0) -> Iterator[Tuple[int, 样本视图]]:
+        """
+        按顺序产出一轮的训练块，后台始终准备着后续 预取块数 块
+        
+        参数:
+            轮次: 轮次编号
+            起始块: 从第几块开始（恢复训练时跳过已完成的块）
+        
+        返回:
+            (块序号, 训练块) 迭代器
+        """
+        顺序 = self.轮次顺序(轮次)
+        块序号列表 = iter(range(max(0, 起始块), self.每轮块数))
+        待完成: Deque[Tuple[int, Future]] = deque()
+        
+        def 提交下一块() -> None:
+            块序号 = next(块序号列表, None)
+            if 块序号 is None:
+                return
+            块索引 = self._训练索引[顺序[块序号 * self.块大小:(块序号 + 1) * self.块大小]]
+            待完成.append((块序号, self._线程池.submit(self._准备训练块, 块索引)))
+        
+        for _ in range(self.预取块数):
+            提交下一块()
+        
+        try:
+            while 待完成:
+                块序号, 任务 = 待完成.popleft()
+                提交下一块()
+                yield 块序号, 任务.result()
+        finally:
+            # 提前退出（中断训练）时丢弃尚未开始的预取任务
+            for _, 任务 in 待完成:
+                任务.cancel()
+    
+    def 关闭(self) -> None:
+        """关闭工作线程"""
+        self._线程池.shutdown(wait=True, cancel_futures=True)
+    
+    def __enter__(self) -> '数据加载器':
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.关闭()
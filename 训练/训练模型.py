@@ -15,7 +15,6 @@ import numpy as np
 import cv2
 import os
 import sys
-from random import shuffle
 
 # 添加项目根目录到路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -24,6 +23,7 @@ from 核心.模型定义 import inception_v3
 from 配置.设置 import (
     模型输入宽度, 模型输入高度, 学习率,
     训练轮数, 模型保存路径, 数据保存路径, 总动作数,
+    训练块样本数, 预取训练块数, 数据加载线程数, 每文件验证样本数, 验证集样本数,
     启用类别权重平衡, 权重计算策略, 类别权重配置路径,
     启用数据采样, 采样方法, 过采样目标比率, 欠采样最大样本数,
     采样随机种子, 采样后打乱数据,
@@ -32,6 +32,8 @@ from 配置.设置 import (
     启用训练可视化, 启用实时图表, 启用终端输出, 启用健康监控,
     图表更新间隔, 健康检查间隔, 自动保存训练日志, 训练日志目录, 训练静默模式
 )
+from 工具.数据集格式 import 列出数据集, 样本视图
+from 训练.数据加载器 import 数据加载器
 from 工具.检查点管理 import (
     检查点管理器, 
     提示恢复训练, 
@@ -71,7 +73,7 @@ except ImportError:
 
 # 检查点配置
 检查点目录 = os.path.join(os.path.dirname(模型保存路径), "checkpoints")
-检查点保存间隔 = 5  # 每处理N个文件保存一次检查点
+检查点保存间隔 = 5  # 每处理N个训练块保存一次检查点
 最大检查点数量 = 5  # 保留的最大检查点数量
 
 
@@ -98,50 +100,19 @@ def 获取权重策略枚举(策略字符串):
 
 def 获取数据文件列表(数据目录):
     """
-    获取所有训练数据文件
+    获取所有训练数据文件（分片目录和旧格式 .npy 文件）
     
     参数:
         数据目录: 数据文件目录
     
     返回:
-        list: 数据文件路径列表
+        list: 数据文件路径列表（按编号排序）
     """
-    文件列表 = []
-    
     if not os.path.exists(数据目录):
         print(f"❌ 数据目录不存在: {数据目录}")
-        return 文件列表
-    
-    for 文件名 in os.listdir(数据目录):
-        if 文件名.endswith('.npy') and '训练数据' in 文件名:
-            文件列表.append(os.path.join(数据目录, 文件名))
-    
-    文件列表.sort()
-    return 文件列表
-
-
-def 加载训练数据(文件路径):
-    """
-    加载单个训练数据文件
-    
-    参数:
-        文件路径: 数据文件路径
-    
-    返回:
-        tuple: (训练数据, 测试数据)
-    """
-    try:
-        数据 = np.load(文件路径, allow_pickle=True)
-        
-        # 分割训练集和测试集 (最后50个样本作为测试)
-        训练数据 = 数据[:-50]
-        测试数据 = 数据[-50:]
-        
-        return 训练数据, 测试数据
+        return []
     
-    except Exception as e:
-        print(f"❌ 加载数据失败 {文件路径}: {e}")
-        return None, None
+    return 列出数据集(数据目录)
 
 
 def 准备批次数据(数据, 宽度, 高度):
@@ -156,6 +127,12 @@ def 准备批次数据(数据, 宽度, 高度):
     返回:
         tuple: (X, Y) 训练数据
     """
+    # 列式数据直接使用数组，不逐个样本拼接
+    if isinstance(数据, 样本视图):
+        X = np.asarray(数据.图像).reshape(-1, 宽度, 高度, 3)
+        Y = np.asarray(数据.标签)
+        return X, Y
+    
     # 提取图像
     X图像 = np.array([样本[0] for 样本 in 数据])
     X = X图像.reshape(-1, 宽度, 高度, 3)
@@ -232,8 +209,8 @@ def 主程序():
     
     print(f"📁 找到 {len(数据文件列表)} 个数据文件")
     
-    # 初始化检查点管理器
-    检查点管理 = 检查点管理器(检查点目录, 最大检查点数量)
+    # 初始化检查点管理器（后台写入，训练只等待权重快照）
+    检查点管理 = 检查点管理器(检查点目录, 最大检查点数量, 异步写入=True)
     
     # 初始化数据增强器
     增强器 = None
@@ -331,9 +308,31 @@ def 主程序():
             print(f"   - 图表更新间隔: 每 {图表更新间隔} 批次")
             print(f"   - 日志目录: {训练日志目录}")
     
+    # 打开全部数据文件（分片目录以 mmap 方式打开，不读入图像）
+    try:
+        加载器 = 数据加载器(
+            数据文件列表,
+            块大小=训练块样本数,
+            预取块数=预取训练块数,
+            工作线程数=数据加载线程数,
+            增强器=增强器 if 启用增强 else None,
+            每文件验证样本数=每文件验证样本数,
+            验证样本数=验证集样本数
+        )
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
+    
+    if 加载器.每轮块数 == 0:
+        print(f"❌ 训练样本不足 (每个文件末尾 {每文件验证样本数} 个样本用于验证)")
+        加载器.关闭()
+        return
+    
+    print(f"📦 训练样本 {加载器.训练样本数} 个，每轮 {加载器.每轮块数} 块 (每块 {训练块样本数} 个样本)")
+    
     # 初始化训练状态
     起始轮次 = 0
-    起始文件索引 = 0
+    起始块索引 = 0
     当前loss = 0.0
     已恢复 = False
     
@@ -345,18 +344,19 @@ def 主程序():
         检查点数据 = 检查点管理.加载检查点(检查点路径)
         if 检查点数据:
             # 使用 计算恢复起点 确保从中断处的下一个 batch 继续（需求 2.5）
-            恢复起点 = 计算恢复起点(检查点数据, len(数据文件列表))
+            恢复起点 = 计算恢复起点(检查点数据, 加载器.每轮块数)
             起始轮次 = 恢复起点['起始epoch']
-            起始文件索引 = 恢复起点['起始batch']
+            起始块索引 = 恢复起点['起始batch']
             当前loss = 检查点数据.get('指标', {}).get('loss', 0.0)
             已恢复 = True
-            print(f"\n✅ 将从 Epoch {起始轮次 + 1}, 文件 {起始文件索引 + 1} 继续训练")
-            print(f"   (中断于 Epoch {恢复起点['中断epoch'] + 1}, 文件 {恢复起点['中断batch'] + 1})")
+            print(f"\n✅ 将从 Epoch {起始轮次 + 1}, 训练块 {起始块索引 + 1} 继续训练")
+            print(f"   (中断于 Epoch {恢复起点['中断epoch'] + 1}, 训练块 {恢复起点['中断batch'] + 1})")
     
     # 询问是否继续
     确认 = input("\n是否开始训练? (y/n): ").strip().lower()
     if 确认 != 'y':
         print("已取消训练")
+        加载器.关闭()
         return
     
     # 确保模型目录存在
@@ -468,98 +468,91 @@ def 主程序():
     
     # 启动训练监控
     if 可视化:
-        可视化.on_train_begin(训练轮数, len(数据文件列表))
+        可视化.on_train_begin(训练轮数, 加载器.每轮块数)
+    
+    # 验证集固定抽取一次，各训练块共用
+    验证集 = 加载器.获取验证集()
+    X测试, Y测试 = 准备批次数据(验证集, 模型输入宽度, 模型输入高度)
     
     print("\n🚀 开始训练...")
     print("-" * 50)
     
-    # 训练循环
-    for 轮次 in range(起始轮次, 训练轮数):
-        print(f"\n📊 训练轮次 {轮次 + 1}/{训练轮数}")
-        
-        # 通知可视化回调轮次开始
-        if 可视化:
-            可视化.on_epoch_begin(轮次 + 1)
-        
-        # 随机打乱数据文件顺序（使用固定种子保证可重复性）
-        数据顺序 = list(range(len(数据文件列表)))
-        shuffle(数据顺序)
-        
-        # 确定起始文件索引
-        文件起始 = 起始文件索引 if 轮次 == 起始轮次 else 0
-        
-        轮次loss总和 = 0.0
-        轮次样本数 = 0
-        
-        for 计数 in range(文件起始, len(数据顺序)):
-            索引 = 数据顺序[计数]
-            文件路径 = 数据文件列表[索引]
+    try:
+        # 训练循环
+        for 轮次 in range(起始轮次, 训练轮数):
+            print(f"\n📊 训练轮次 {轮次 + 1}/{训练轮数}")
+            
+            # 通知可视化回调轮次开始
+            if 可视化:
+                可视化.on_epoch_begin(轮次 + 1)
+            
+            # 样本顺序由轮次决定，恢复训练时可以跳过已完成的训练块
+            块起始 = 起始块索引 if 轮次 == 起始轮次 else 0
+            
+            轮次loss总和 = 0.0
+            轮次样本数 = 0
+            计数 = 块起始
             
             try:
-                print(f"   处理文件 {计数 + 1}/{len(数据文件列表)}: {os.path.basename(文件路径)}")
-                
-                # 加载数据
-                训练数据, 测试数据 = 加载训练数据(文件路径)
-                
-                if 训练数据 is None:
-                    continue
-                
-                # 数据增强
-                if 启用增强 and 增强器:
-                    训练数据 = 增强器.增强批次(训练数据)
-                
-                # 准备批次数据
-                X训练, Y训练 = 准备批次数据(训练数据, 模型输入宽度, 模型输入高度)
-                X测试, Y测试 = 准备批次数据(测试数据, 模型输入宽度, 模型输入高度)
-                
-                # 训练模型
-                模型.fit(
-                    {'input': X训练},
-                    {'targets': Y训练},
-                    n_epoch=1,
-                    validation_set=({'input': X测试}, {'targets': Y测试}),
-                    snapshot_step=2500,
-                    show_metric=True,
-                    run_id=模型保存路径
-                )
-                
-                # 需求 7.1, 7.2: 从训练过程获取实际 loss 值
-                # 使用模型的 evaluate 方法计算训练集上的实际 loss
-                try:
-                    评估结果 = 模型.evaluate({'input': X训练}, {'targets': Y训练})
-                    if isinstance(评估结果, (list, tuple)) and len(评估结果) > 0:
-                        当前loss = float(评估结果[0])
-                    elif isinstance(评估结果, (int, float)):
-                        当前loss = float(评估结果)
-                    else:
+                # 后台线程已在准备后续训练块（含数据增强），这里只等待已就绪的块
+                for 计数, 训练块 in 加载器.迭代轮次(轮次, 块起始):
+                    print(f"   训练块 {计数 + 1}/{加载器.每轮块数}: {len(训练块)} 个样本")
+                    
+                    # 准备批次数据
+                    X训练, Y训练 = 准备批次数据(训练块, 模型输入宽度, 模型输入高度)
+                    
+                    try:
+                        # 训练模型
+                        模型.fit(
+                            {'input': X训练},
+                            {'targets': Y训练},
+                            n_epoch=1,
+                            validation_set=({'input': X测试}, {'targets': Y测试}),
+                            snapshot_step=2500,
+                            show_metric=True,
+                            run_id=模型保存路径
+                        )
+                    except Exception as e:
+                        print(f"   ❌ 训练块出错: {e}")
+                        continue
+                    
+                    # 需求 7.1, 7.2: 从训练过程获取实际 loss 值
+                    # 使用模型的 evaluate 方法计算训练集上的实际 loss
+                    try:
+                        评估结果 = 模型.evaluate({'input': X训练}, {'targets': Y训练})
+                        if isinstance(评估结果, (list, tuple)) and len(评估结果) > 0:
+                            当前loss = float(评估结果[0])
+                        elif isinstance(评估结果, (int, float)):
+                            当前loss = float(评估结果)
+                        else:
+                            当前loss = 0.0
+                        # 需求 7.4: 在训练进度输出中显示 loss 值
+                        print(f"      📉 当前批次 Loss: {当前loss:.4f}")
+                    except Exception as e:
+                        # 如果评估失败，使用估计值
+                        print(f"      ⚠️  获取 loss 值失败: {e}")
                         当前loss = 0.0
-                    # 需求 7.4: 在训练进度输出中显示 loss 值
-                    print(f"      📉 当前批次 Loss: {当前loss:.4f}")
-                except Exception as e:
-                    # 如果评估失败，使用估计值
-                    print(f"      ⚠️  获取 loss 值失败: {e}")
-                    当前loss = 0.0
-                
-                轮次loss总和 += 当前loss * len(训练数据)
-                轮次样本数 += len(训练数据)
-                
-                # 更新训练监控
-                if 可视化:
-                    可视化.on_batch_end(计数, 当前loss)
-                
-                # 定期保存检查点
-                if (计数 + 1) % 检查点保存间隔 == 0:
-                    # 需求 7.3: 在检查点元数据中包含实际的 loss 值
-                    print(f"\n💾 保存检查点 (Loss: {当前loss:.4f})...")
-                    检查点管理.保存检查点(
-                        模型=模型,
-                        优化器状态={},  # TFLearn 不直接暴露优化器状态
-                        当前epoch=轮次,
-                        当前batch=计数 + 1,
-                        loss值=当前loss
-                    )
-                    模型.save(模型保存路径)
-                
+                    
+                    轮次loss总和 += 当前loss * len(训练块)
+                    轮次样本数 += len(训练块)
+                    
+                    # 更新训练监控
+                    if 可视化:
+                        可视化.on_batch_end(计数, 当前loss)
+                    
+                    # 定期保存检查点
+                    if (计数 + 1) % 检查点保存间隔 == 0:
+                        # 需求 7.3: 在检查点元数据中包含实际的 loss 值
+                        print(f"\n💾 保存检查点 (Loss: {当前loss:.4f})...")
+                        检查点管理.保存检查点(
+                            模型=模型,
+                            优化器状态={},  # TFLearn 不直接暴露优化器状态
+                            当前epoch=轮次,
+                            当前batch=计数 + 1,
+                            loss值=当前loss
+                        )
+                        模型.save(模型保存路径)
+            
             except KeyboardInterrupt:
                 print("\n\n⚠️  训练被中断!")
                 print("💾 正在保存检查点...")
@@ -571,36 +564,36 @@ def 主程序():
                     loss值=当前loss
                 )
                 模型.save(模型保存路径)
+                检查点管理.等待写入完成()
                 print("✅ 检查点已保存，下次可以继续训练")
                 
                 # 停止可视化
                 if 可视化:
                     可视化.on_train_end()
                 return
-                
-            except Exception as e:
-                print(f"   ❌ 处理文件时出错: {e}")
-                continue
-        
-        # 计算轮次平均loss
-        轮次平均loss = 轮次loss总和 / 轮次样本数 if 轮次样本数 > 0 else 0.0
-        print(f"\n📈 轮次 {轮次 + 1} 平均Loss: {轮次平均loss:.4f}")
-        
-        # 通知可视化回调轮次结束
-        if 可视化:
-            可视化.on_epoch_end(轮次 + 1, 训练loss=轮次平均loss)
-        
-        # 每轮结束保存检查点
-        # 需求 7.3: 在检查点元数据中包含实际的 loss 值
-        print(f"\n💾 保存轮次 {轮次 + 1} 的检查点 (平均Loss: {轮次平均loss:.4f})...")
-        检查点管理.保存检查点(
-            模型=模型,
-            优化器状态={},
-            当前epoch=轮次 + 1,
-            当前batch=0,
-            loss值=轮次平均loss  # 使用轮次平均 loss 而不是最后一个批次的 loss
-        )
-        模型.save(模型保存路径)
+            
+            # 计算轮次平均loss
+            轮次平均loss = 轮次loss总和 / 轮次样本数 if 轮次样本数 > 0 else 0.0
+            print(f"\n📈 轮次 {轮次 + 1} 平均Loss: {轮次平均loss:.4f}")
+            
+            # 通知可视化回调轮次结束
+            if 可视化:
+                可视化.on_epoch_end(轮次 + 1, 训练loss=轮次平均loss)
+            
+            # 每轮结束保存检查点
+            # 需求 7.3: 在检查点元数据中包含实际的 loss 值
+            print(f"\n💾 保存轮次 {轮次 + 1} 的检查点 (平均Loss: {轮次平均loss:.4f})...")
+            检查点管理.保存检查点(
+                模型=模型,
+                优化器状态={},
+                当前epoch=轮次 + 1,
+                当前batch=0,
+                loss值=轮次平均loss  # 使用轮次平均 loss 而不是最后一个批次的 loss
+            )
+            模型.save(模型保存路径)
+    finally:
+        加载器.关闭()
+        检查点管理.关闭()
     
     # 停止可视化
     if 可视化:
@@ -18,12 +18,13 @@ import sys
 import logging
 from collections import deque
 from statistics import mean
-from typing import Optional, List
+from typing import Optional, List, Dict
 
 # 添加项目根目录到路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from 核心.屏幕截取 import 截取屏幕
+from 核心.屏幕截取 import 截取屏幕, 截取到帧环
+from 核心.帧预处理 import 帧预处理器, 预处理规格
 from 核心.键盘控制 import (
     前进, 后退, 左移, 右移,
     前进左移, 前进右移, 后退左移, 后退右移, 无操作, 释放所有按键,
@@ -37,7 +38,9 @@ from 核心.鼠标控制 import 左键点击, 右键点击, 中键点击
 from 核心.按键检测 import 检测按键
 from 核心.动作检测 import 检测动作变化
 from 核心.模型定义 import inception_v3
-from 核心.数据类型 import 游戏状态, 检测结果, 决策上下文, 实体类型
+from 核心.数据类型 import 游戏状态, 检测结果, 决策上下文, 实体类型, 检测特征
+from 核心.流水线 import 帧流水线, 流水线帧, 阶段统计, 创建机器人流水线
+from 核心.帧环 import 帧环, 帧引用
 
 # 尝试导入状态检测模块 - 需求: 8.1, 8.2, 8.3
 try:
@@ -54,7 +57,8 @@ from 配置.设置 import (
     运动检测阈值, 运动日志长度, 动作定义
 )
 from 配置.增强设置 import (
-    YOLO配置, 状态识别配置, 决策引擎配置, 模块启用配置, 性能配置
+    YOLO配置, 状态识别配置, 决策引擎配置, 模块启用配置, 性能配置, 流水线配置,
+    推理服务配置, 帧环配置
 )
 
 # 配置日志
@@ -73,19 +77,23 @@ class 增强版游戏AI机器人:
     支持模块降级和性能自适应
     """
     
-    def __init__(self, 模式: str = '主线任务', 启用增强: bool = True):
+    def __init__(self, 模式: str = '主线任务', 启用增强: bool = True,
+                 流水线模式: Optional[bool] = None):
         """
         初始化增强版机器人
         
         Args:
             模式: '主线任务' 或 '自动战斗'
             启用增强: 是否启用增强模块
+            流水线模式: 是否以多线程流水线方式运行，None 时使用流水线配置
         """
         self.模式 = 模式
         self.启用增强 = 启用增强
+        self.流水线模式 = 流水线配置.get("启用", False) if 流水线模式 is None else 流水线模式
         
         # 基础模型
         self.模型 = None
+        self.推理客户端 = None  # 启用推理服务时代替 self.模型
         self.动作权重 = None
         
         # 增强模块
@@ -95,6 +103,7 @@ class 增强版游戏AI机器人:
         
         # 模块状态
         self._YOLO可用 = False
+        self._异步检测 = False  # 检测在检测线程中进行，决策使用最近完成的结果
         self._状态识别可用 = False
         self._决策引擎可用 = False
         self._状态检测可用 = False  # 血量/蓝量检测 - 需求: 8.2
@@ -112,6 +121,17 @@ class 增强版游戏AI机器人:
         self.当前帧率 = 30.0
         self.检测计数器 = 0
         self.当前检测间隔 = YOLO配置.get("检测间隔", 3)
+        self.阶段统计: Dict[str, 阶段统计] = {}
+        self.端到端延迟 = 0.0
+        
+        # 运动检测帧缓存 (前帧, 当前帧, 后帧)，三个缓冲轮流复用
+        self._帧缓存: tuple = ()
+        
+        # 截取帧环（启用时截取直接写入槽位，检测和缓存按引用读取）
+        self.帧环: Optional[帧环] = None
+        
+        # 截取画面 → 模型输入 的预处理阶段，加载模型后按模型输入创建
+        self.预处理器: Optional[帧预处理器] = None
         
         # 上次检测结果缓存
         self._上次检测结果: List[检测结果] = []
@@ -147,6 +167,10 @@ class 增强版游戏AI机器人:
         """加载基础AI模型"""
         print("🔄 加载AI模型...")
         
+        if 推理服务配置.get("启用", False) and self._连接推理服务():
+            self._创建预处理器()
+            return True
+        
         self.模型 = inception_v3(
             模型输入宽度, 模型输入高度, 3, 学习率,
             输出类别=总动作数
@@ -159,6 +183,7 @@ class 增强版游戏AI机器人:
                 if os.path.exists(路径 + '.index') or os.path.exists(路径 + '.meta'):
                     self.模型.load(路径)
                     print(f"✅ 模型加载成功: {路径}")
+                    self._创建预处理器()
                     return True
             except Exception as e:
                 logger.warning(f"尝试加载 {路径} 失败: {e}")
@@ -167,6 +192,45 @@ class 增强版游戏AI机器人:
         print("❌ 未找到可用的模型文件")
         return False
     
+    def _连接推理服务(self) -> bool:
+        """
+        连接共享推理服务
+        
+        本入口每个进程只运行一个机器人。推理服务配置 跨进程 为 True 时，
+        各进程的机器人通过推理服务器共用一个推理会话，本进程只持有轻量客户端。
+        
+        Returns:
+            是否连接成功，失败时回退到独立加载模型
+        """
+        try:
+            from 核心.推理服务 import 获取共享客户端
+            from 配置.设置 import 获取推理配置
+            
+            推理配置 = 获取推理配置()
+            self.推理客户端 = 获取共享客户端(
+                推理配置.get("模型路径", 预训练模型路径), 配置=推理配置, 服务配置=推理服务配置
+            )
+            print(f"✅ 已连接共享推理服务: {self.推理客户端.模型路径}")
+            return True
+        except Exception as e:
+            logger.warning(f"连接推理服务失败，改为独立加载模型: {e}")
+            self.推理客户端 = None
+            return False
+    
+    def _创建预处理器(self) -> None:
+        """
+        按当前模型创建预处理器
+        
+        推理服务的规格（布局、缩放系数）由模型加载时确定；TFLearn 模型直接接收 uint8 像素。
+        流水线中预处理阶段、队列和推理阶段可能同时持有不同帧，缓冲组数按此设置。
+        """
+        if self.推理客户端 is not None:
+            规格 = self.推理客户端.获取预处理规格(模型输入宽度, 模型输入高度)
+        else:
+            规格 = 预处理规格(模型输入宽度, 模型输入高度, 缩放=None)
+        缓冲数 = 流水线配置.get("队列容量", 1) + 2 if self.流水线模式 else 1
+        self.预处理器 = 帧预处理器(规格, 缓冲数=缓冲数)
+    
     def 初始化增强模块(self) -> bool:
         """
         初始化增强模块（YOLO检测器、状态识别器、决策引擎）
@@ -220,8 +284,9 @@ class 增强版游戏AI机器人:
         """初始化YOLO检测器"""
         try:
             from 核心.目标检测器 import YOLO检测器
-            self.YOLO检测器 = YOLO检测器()
+            self.YOLO检测器 = YOLO检测器(启用异步=YOLO配置.get("异步检测", False))
             self._YOLO可用 = self.YOLO检测器.是否已加载()
+            self._异步检测 = self._YOLO可用 and self.YOLO检测器.获取异步检测状态().get("启用", False)
             if self._YOLO可用:
                 logger.info("YOLO检测器初始化成功")
             else:
@@ -234,7 +299,8 @@ class 增强版游戏AI机器人:
         """初始化状态识别器"""
         try:
             from 核心.状态识别器 import 状态识别器
-            self.状态识别器 = 状态识别器()
+            from 配置.设置 import 获取当前UI区域
+            self.状态识别器 = 状态识别器(UI区域=获取当前UI区域())
             self._状态识别可用 = True
             
             # 注册状态变更回调
@@ -371,17 +437,22 @@ class 增强版游戏AI机器人:
         elif 新状态 == 游戏状态.加载:
             logger.info("检测到加载状态，等待加载完成")
     
-    def 预测动作(self, 屏幕: np.ndarray) -> tuple:
+    def 预测动作(self, 屏幕: np.ndarray, 张量: Optional[np.ndarray] = None) -> tuple:
         """
         使用基础模型预测动作
         
         Args:
             屏幕: 游戏屏幕图像
+            张量: 预处理器生成的模型输入 (1, ...)，提供时直接使用
             
         Returns:
             (动作索引, 预测值列表)
         """
-        预测结果 = self.模型.predict([屏幕.reshape(模型输入宽度, 模型输入高度, 3)])[0]
+        输入 = 张量[0] if 张量 is not None else 屏幕.reshape(模型输入宽度, 模型输入高度, 3)
+        if self.推理客户端 is not None:
+            预测结果 = np.array(self.推理客户端.预测(输入))
+        else:
+            预测结果 = self.模型.predict([输入])[0]
         预测结果 = np.round(预测结果, decimals=2)
         
         加权预测 = np.array(预测结果) * self.动作权重
@@ -389,13 +460,15 @@ class 增强版游戏AI机器人:
         
         return 动作索引, list(预测结果)
     
-    def 增强决策(self, 屏幕: np.ndarray, 模型预测: List[float]) -> tuple:
+    def 增强决策(self, 屏幕: np.ndarray, 模型预测: List[float],
+                 引用: Optional[帧引用] = None) -> tuple:
         """
         使用增强模块进行决策
         
         Args:
             屏幕: 游戏屏幕图像
             模型预测: 基础模型的预测结果
+            引用: 屏幕所在的帧环槽位引用，检测缓存据此保存参考帧而不复制
             
         Returns:
             (动作索引, 动作名称, 决策来源)
@@ -408,15 +481,27 @@ class 增强版游戏AI机器人:
         if self._YOLO可用 and self.检测计数器 >= self.当前检测间隔:
             self.检测计数器 = 0
             try:
-                检测结果列表 = self.YOLO检测器.检测(屏幕)
+                if self._异步检测:
+                    # 按帧环引用提交，不复制画面；使用检测线程最近完成的结果
+                    self.YOLO检测器.异步检测(屏幕, 帧引用=引用)
+                    异步结果 = self.YOLO检测器.获取异步结果()
+                    if 异步结果 is not None:
+                        检测结果列表 = 异步结果
+                else:
+                    检测结果列表 = self.YOLO检测器.检测(屏幕, 帧引用=引用)
                 self._上次检测结果 = 检测结果列表
             except Exception as e:
                 logger.warning(f"YOLO检测失败: {e}")
         
+        # 本帧检测特征，状态识别与决策规则共用
+        特征 = 检测特征(检测结果列表)
+        
         # 执行状态识别
         if self._状态识别可用:
             try:
-                状态结果 = self.状态识别器.识别状态(屏幕, 检测结果列表)
+                # 本帧经过检测缓存查询时复用其灰度图
+                灰度图 = self.YOLO检测器.获取灰度图(屏幕) if self._YOLO可用 else None
+                状态结果 = self.状态识别器.识别状态(屏幕, 检测结果列表, 灰度图=灰度图, 特征=特征)
                 当前状态 = 状态结果.状态
                 self._上次状态 = 当前状态
             except Exception as e:
@@ -426,7 +511,7 @@ class 增强版游戏AI机器人:
         if self._决策引擎可用:
             try:
                 # 统计附近敌人
-                附近敌人数量 = len([r for r in 检测结果列表 if r.类型 == 实体类型.怪物])
+                附近敌人数量 = 特征.数量(实体类型.怪物)
                 
                 # 获取实际血量百分比 - 需求: 8.1, 8.2, 8.3
                 血量百分比 = self._获取血量百分比(屏幕)
@@ -437,7 +522,8 @@ class 增强版游戏AI机器人:
                     检测结果=检测结果列表,
                     模型预测=模型预测,
                     血量百分比=血量百分比,
-                    附近敌人数量=附近敌人数量
+                    附近敌人数量=附近敌人数量,
+                    特征缓存=特征
                 )
                 
                 # 执行决策
@@ -476,14 +562,21 @@ class 增强版游戏AI机器人:
         
         return 动作名称
     
-    def 更新性能监控(self, 帧时间: float):
+    def 更新性能监控(self, 帧时间: float,
+                     阶段统计: Optional[Dict[str, 阶段统计]] = None,
+                     端到端延迟: float = 0.0):
         """
         更新性能监控并自适应调整
         
         Args:
-            帧时间: 当前帧耗时（秒）
+            帧时间: 当前帧耗时（秒），流水线模式下为相邻两帧完成的间隔
+            阶段统计: 流水线各阶段的延迟与队列深度统计
+            端到端延迟: 流水线从截取到执行完成的平均延迟（毫秒）
         """
         self.帧时间日志.append(帧时间)
+        if 阶段统计 is not None:
+            self.阶段统计 = 阶段统计
+            self.端到端延迟 = 端到端延迟
         
         if len(self.帧时间日志) >= 10:
             平均帧时间 = mean(self.帧时间日志)
@@ -518,6 +611,7 @@ class 增强版游戏AI机器人:
         print("⚠️  增强模块不可用，使用基础模仿学习模式")
         self.启用增强 = False
         self._YOLO可用 = False
+        self._异步检测 = False
         self._状态识别可用 = False
         self._决策引擎可用 = False
     
@@ -603,6 +697,168 @@ class 增强版游戏AI机器人:
             if self.运动日志:
                 self.运动日志.popleft()
     
+    def _预处理(self, 屏幕: np.ndarray) -> tuple:
+        """
+        缩放、转换颜色并生成模型输入，结果写入预处理器的缓冲
+        
+        Returns:
+            (缩放后的图像, 模型输入张量)
+        """
+        if self.预处理器 is None:
+            self._创建预处理器()
+        return self.预处理器.处理(屏幕)
+    
+    def _更新运动检测(self, 屏幕缩放: np.ndarray) -> int:
+        """
+        计算运动量并推进三帧缓存
+        
+        最旧一帧的缓冲在计算完成后不再需要，新帧的模糊结果直接写入其中。
+        
+        Args:
+            屏幕缩放: 预处理后的当前帧
+            
+        Returns:
+            动作变化量
+        """
+        前帧, 当前帧, 后帧 = self._帧缓存
+        动作量 = 检测动作变化(前帧, 当前帧, 后帧, 屏幕缩放)
+        if 前帧.shape == 屏幕缩放.shape and 前帧.dtype == 屏幕缩放.dtype:
+            新帧 = cv2.blur(屏幕缩放, (4, 4), dst=前帧)
+        else:
+            新帧 = cv2.blur(屏幕缩放, (4, 4))
+        self._帧缓存 = (当前帧, 后帧, 新帧)
+        return 动作量
+    
+    def _初始化帧环(self, 帧形状: tuple) -> None:
+        """
+        按截取画面的形状创建帧环，并交给 YOLO 检测器（缓存、异步检测）使用
+        
+        Args:
+            帧形状: 截取画面的形状
+        """
+        try:
+            self.帧环 = 帧环(
+                槽数=帧环配置.get("槽数", 12),
+                帧形状=帧形状,
+                共享内存=帧环配置.get("共享内存", False)
+            )
+            if self._YOLO可用:
+                self.YOLO检测器.设置帧环(self.帧环)
+            logger.info(f"帧环已启用: {self.帧环.槽数} 槽, 帧形状 {帧形状}")
+        except Exception as e:
+            logger.warning(f"帧环创建失败，使用逐帧截取: {e}")
+            self.帧环 = None
+    
+    def _释放帧环(self) -> None:
+        """解除检测器对帧环的引用并关闭帧环"""
+        if self.帧环 is None:
+            return
+        if self._YOLO可用:
+            self.YOLO检测器.设置帧环(None)
+        self.帧环.关闭()
+        self.帧环 = None
+    
+    def _截取帧(self, 固定: bool = False) -> tuple:
+        """
+        截取一帧画面
+        
+        启用帧环时截取结果直接写入槽位，返回槽位的只读视图和引用；
+        需要跨线程使用时固定槽位，无法固定（槽位不足）时退回复制。
+        
+        Args:
+            固定: 是否固定槽位，之后需调用 帧环.释放(引用)
+            
+        Returns:
+            (屏幕, 帧引用或 None)
+        """
+        if self.帧环 is None:
+            return 截取屏幕(region=游戏窗口区域), None
+        
+        引用 = 截取到帧环(self.帧环, 游戏窗口区域)
+        if 固定 and not self.帧环.固定(引用):
+            return self.帧环.复制(引用), None
+        return self.帧环.读取(引用), 引用
+    
+    def _推理决策(self, 屏幕: np.ndarray, 屏幕缩放: np.ndarray, 增强可用: bool,
+                  引用: Optional[帧引用] = None, 张量: Optional[np.ndarray] = None) -> tuple:
+        """
+        预测动作并（可选）经过增强决策
+        
+        Returns:
+            (动作索引, 动作名称, 决策来源)
+        """
+        基础动作索引, 模型预测 = self.预测动作(屏幕缩放, 张量)
+        
+        if 增强可用 and self.启用增强:
+            return self.增强决策(屏幕, 模型预测, 引用)
+        
+        动作名称 = 动作定义.get(基础动作索引, {}).get("名称", f"动作{基础动作索引}")
+        return 基础动作索引, 动作名称, "model"
+    
+    def _执行并记录(self, 决策: tuple, 动作量: int) -> float:
+        """
+        执行动作并记录运动量
+        
+        Returns:
+            平均运动量
+        """
+        self.执行动作(决策[0])
+        self.运动日志.append(动作量)
+        return round(mean(self.运动日志), 3) if self.运动日志 else 0
+    
+    def _显示并检测卡住(self, 决策: tuple, 平均运动量: float, 增强可用: bool):
+        """显示当前状态，运动量过低时执行脱困"""
+        _, 动作名称, 来源 = 决策
+        状态标签 = f"[{self._上次状态.value}]" if 增强可用 else ""
+        来源标签 = f"({来源})" if 增强可用 else ""
+        print(f"🎯 {状态标签} {动作名称:10s} {来源标签} | 运动量: {平均运动量:8.1f} | 帧率: {self.当前帧率:.1f}")
+        
+        # 检测是否卡住
+        if 平均运动量 < 运动检测阈值 and len(self.运动日志) >= 运动日志长度:
+            self.处理卡住()
+    
+    def _创建流水线(self, 增强可用: bool) -> 帧流水线:
+        """
+        创建 截取 → 预处理 → 推理 → 执行 四阶段流水线
+        
+        阶段之间是单槽覆盖队列，下游忙时上游的旧帧被直接丢弃，
+        执行阶段总是作用于最新完成推理的帧。
+        """
+        def 截取() -> dict:
+            屏幕, 引用 = self._截取帧(固定=True)
+            return {"屏幕": 屏幕, "帧引用": 引用}
+        
+        def 预处理(数据: dict) -> None:
+            数据["屏幕缩放"], 数据["张量"] = self._预处理(数据["屏幕"])
+            数据["动作量"] = self._更新运动检测(数据["屏幕缩放"])
+        
+        def 推理(数据: dict) -> None:
+            数据["决策"] = self._推理决策(
+                数据["屏幕"], 数据["屏幕缩放"], 增强可用, 数据["帧引用"], 数据["张量"]
+            )
+        
+        def 执行(数据: dict, 帧间隔: float, 流水线: 帧流水线) -> None:
+            平均运动量 = self._执行并记录(数据["决策"], 数据["动作量"])
+            self.更新性能监控(
+                帧间隔,
+                阶段统计=流水线.获取统计(),
+                端到端延迟=流水线.获取端到端延迟()
+            )
+            self._显示并检测卡住(数据["决策"], 平均运动量, 增强可用)
+        
+        return 创建机器人流水线(
+            截取, 预处理, 推理, 执行,
+            队列容量=流水线配置.get("队列容量", 1),
+            最大连续错误=流水线配置.get("最大连续错误", 20),
+            帧结束回调=self._释放流水线帧
+        )
+    
+    def _释放流水线帧(self, 帧: 流水线帧) -> None:
+        """流水线帧完成或被丢弃时释放其固定的帧环槽位"""
+        引用 = 帧.数据.get("帧引用")
+        if 引用 is not None and self.帧环 is not None:
+            self.帧环.释放(引用)
+    
     def 运行(self):
         """运行机器人主循环"""
         import msvcrt
@@ -623,6 +879,8 @@ class 增强版游戏AI机器人:
             print(f"🎮 增强版游戏AI机器人 - {self.模式}模式")
         else:
             print(f"🎮 游戏AI机器人 - {self.模式}模式 (基础模式)")
+        if self.流水线模式:
+            print("   运行方式: 流水线 (截取/预处理/推理/执行 并行)")
         print("=" * 60)
         print("\n📋 操作说明:")
         print("  - 按 T 暂停/继续")
@@ -646,14 +904,18 @@ class 增强版游戏AI机器人:
         
         # 初始化帧缓存
         屏幕 = 截取屏幕(region=游戏窗口区域)
-        屏幕 = cv2.cvtColor(屏幕, cv2.COLOR_BGR2RGB)
-        屏幕 = cv2.resize(屏幕, (模型输入宽度, 模型输入高度))
+        屏幕缩放, _ = self._预处理(屏幕)
+        self._帧缓存 = (屏幕缩放.copy(), 屏幕缩放.copy(), 屏幕缩放.copy())
         
-        前帧 = 屏幕.copy()
-        当前帧 = 屏幕.copy()
-        后帧 = 屏幕.copy()
+        if 帧环配置.get("启用", False):
+            self._初始化帧环(屏幕.shape)
         
-        上次时间 = time.time()
+        流水线 = None
+        if self.流水线模式:
+            流水线 = self._创建流水线(增强可用)
+            if not 流水线.启动():
+                print("⚠️  流水线启动失败，改用顺序模式")
+                流水线 = None
         
         try:
             while True:
@@ -670,9 +932,13 @@ class 增强版游戏AI机器人:
                     已暂停 = not 已暂停
                     if 已暂停:
                         print("\n⏸️  已暂停")
+                        if 流水线:
+                            流水线.暂停()
                         无操作()
                     else:
                         print("\n▶️  继续运行")
+                        if 流水线:
+                            流水线.继续()
                     time.sleep(0.5)
                 
                 if 'I' in 按键 and 增强可用:
@@ -683,53 +949,36 @@ class 增强版游戏AI机器人:
                 if 增强可用 and self._决策引擎可用:
                     self._处理模型切换快捷键(按键)
                 
+                if 流水线:
+                    # 各阶段在独立线程中运行，主线程只负责按键
+                    if not 流水线.是否运行中():
+                        print(f"\n❌ 流水线已停止: {流水线.获取错误消息()}")
+                        break
+                    time.sleep(0.05)
+                    continue
+                
                 if not 已暂停:
                     循环开始时间 = time.time()
                     
-                    # 截取屏幕
-                    屏幕 = 截取屏幕(region=游戏窗口区域)
-                    屏幕RGB = cv2.cvtColor(屏幕, cv2.COLOR_BGR2RGB)
-                    屏幕缩放 = cv2.resize(屏幕RGB, (模型输入宽度, 模型输入高度))
+                    # 截取屏幕（顺序模式下本轮结束前槽位不会被覆盖，无需固定）
+                    屏幕, 引用 = self._截取帧()
+                    屏幕缩放, 张量 = self._预处理(屏幕)
                     
                     # 运动检测
-                    动作量 = 检测动作变化(前帧, 当前帧, 后帧, 屏幕缩放)
-                    
-                    # 更新帧缓存
-                    前帧 = 当前帧
-                    当前帧 = 后帧
-                    后帧 = 屏幕缩放.copy()
-                    后帧 = cv2.blur(后帧, (4, 4))
+                    动作量 = self._更新运动检测(屏幕缩放)
                     
-                    # 预测动作
-                    基础动作索引, 模型预测 = self.预测动作(屏幕缩放)
-                    
-                    # 决策
-                    if 增强可用 and self.启用增强:
-                        动作索引, 动作名称, 来源 = self.增强决策(屏幕, 模型预测)
-                    else:
-                        动作索引 = 基础动作索引
-                        动作名称 = 动作定义.get(动作索引, {}).get("名称", f"动作{动作索引}")
-                        来源 = "model"
+                    # 预测动作并决策
+                    决策 = self._推理决策(屏幕, 屏幕缩放, 增强可用, 引用, 张量)
                     
                     # 执行动作
-                    self.执行动作(动作索引)
-                    
-                    # 记录运动量
-                    self.运动日志.append(动作量)
-                    平均运动量 = round(mean(self.运动日志), 3) if self.运动日志 else 0
+                    平均运动量 = self._执行并记录(决策, 动作量)
                     
                     # 更新性能监控
                     循环时间 = time.time() - 循环开始时间
                     self.更新性能监控(循环时间)
                     
-                    # 显示状态
-                    状态标签 = f"[{self._上次状态.value}]" if 增强可用 else ""
-                    来源标签 = f"({来源})" if 增强可用 else ""
-                    print(f"🎯 {状态标签} {动作名称:10s} {来源标签} | 运动量: {平均运动量:8.1f} | 帧率: {self.当前帧率:.1f}")
-                    
-                    # 检测是否卡住
-                    if 平均运动量 < 运动检测阈值 and len(self.运动日志) >= 运动日志长度:
-                        self.处理卡住()
+                    # 显示状态并检测卡住
+                    self._显示并检测卡住(决策, 平均运动量, 增强可用)
                 
                 time.sleep(0.01)
         
@@ -737,7 +986,20 @@ class 增强版游戏AI机器人:
             print("\n\n⚠️  用户中断")
         
         finally:
+            if 流水线:
+                流水线.停止()
+                流水线.打印统计()
+            if self._异步检测:
+                # 先停止检测线程，释放排队任务固定的帧环槽位
+                self.YOLO检测器.停止异步检测()
+            self._释放帧环()
+            
             释放所有按键()
+            if self.推理客户端 is not None:
+                self.推理客户端.关闭()
+                self.推理客户端 = None
+            if self.决策引擎 is not None:
+                self.决策引擎.关闭推理引擎()
             print("\n✅ 机器人已停止")
             
             # 显示统计信息
@@ -758,6 +1020,13 @@ class 增强版游戏AI机器人:
         print(f"  当前帧率:   {self.当前帧率:.1f} FPS")
         print(f"  性能模式:   {'低性能' if self._已降级 else '正常'}")
         
+        # 显示流水线各阶段统计
+        if self.流水线模式 and self.阶段统计:
+            print("-" * 40)
+            print(f"  端到端延迟: {self.端到端延迟:.1f} ms")
+            for 统计 in self.阶段统计.values():
+                print(f"  {统计.名称:6s} {统计.平均延迟:6.1f} ms | 队列 {统计.队列深度} | 丢弃 {统计.丢弃次数}")
+        
         # 显示血量检测状态 - 需求: 8.1
         if self._状态检测可用 and self.状态检测器:
             print(f"  上次血量:   {self._上次有效血量*100:.1f}%")
@@ -833,7 +1102,14 @@ def 主程序():
     """主程序入口"""
     模式, 启用增强 = 显示模式菜单()
     
-    机器人 = 增强版游戏AI机器人(模式=模式, 启用增强=启用增强)
+    # 命令行 --流水线 / --顺序 覆盖配置中的默认运行方式
+    流水线模式 = None
+    if '--流水线' in sys.argv:
+        流水线模式 = True
+    elif '--顺序' in sys.argv:
+        流水线模式 = False
+    
+    机器人 = 增强版游戏AI机器人(模式=模式, 启用增强=启用增强, 流水线模式=流水线模式)
     机器人.运行()
 
 
@@ -27,7 +27,8 @@ from statistics import mean
 # 添加项目根目录到路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from 核心.屏幕截取 import 截取屏幕
+from 核心.屏幕截取 import 截取并缩放
+from 核心.帧预处理 import 帧预处理器, 预处理规格
 from 核心.键盘控制 import (
     按下按键, 释放按键, W, A, S, D,
     前进, 后退, 左移, 右移,
@@ -63,6 +64,8 @@ class 游戏AI机器人:
         self.模式 = 模式
         self.模型 = None
         self.动作权重 = None
+        # TFLearn 模型直接接收 uint8 像素，只需缩放和颜色转换
+        self.预处理器 = 帧预处理器(预处理规格(模型输入宽度, 模型输入高度, 缩放=None))
         self.运动日志 = deque(maxlen=运动日志长度)
         self.选择历史 = deque(maxlen=5)
         
@@ -314,9 +317,7 @@ class 游戏AI机器人:
         已暂停 = False
         
         # 初始化帧缓存 (用于运动检测)
-        屏幕 = 截取屏幕(region=游戏窗口区域)
-        屏幕 = cv2.cvtColor(屏幕, cv2.COLOR_BGR2RGB)
-        屏幕 = cv2.resize(屏幕, (模型输入宽度, 模型输入高度))
+        屏幕 = 截取并缩放(游戏窗口区域, 预处理器=self.预处理器)
         
         前帧 = 屏幕.copy()
         当前帧 = 屏幕.copy()
@@ -344,9 +345,7 @@ class 游戏AI机器人:
                 
                 if not 已暂停:
                     # 截取屏幕
-                    屏幕 = 截取屏幕(region=游戏窗口区域)
-                    屏幕 = cv2.cvtColor(屏幕, cv2.COLOR_BGR2RGB)
-                    屏幕 = cv2.resize(屏幕, (模型输入宽度, 模型输入高度))
+                    屏幕 = 截取并缩放(游戏窗口区域, 预处理器=self.预处理器)
                     
                     # 运动检测
                     动作量 = 检测动作变化(前帧, 当前帧, 后帧, 屏幕)
@@ -39,6 +39,10 @@ YOLO配置 = {
     "输入尺寸": (640, 640),
     "启用": True,
     "检测间隔": 3,
+    # 在检测线程中异步检测，决策使用最近完成的结果；启用帧环时按槽位引用提交，不复制画面
+    "异步检测": False,
+    # 推理后端: "auto" (模型路径为 .onnx 时用 ONNX Runtime), "ultralytics", "onnx"
+    "后端": "auto",
 }
 
 # 实体类型映射 (YOLO类别ID -> 实体类型)
@@ -57,6 +61,11 @@ YOLO配置 = {
     "置信度累积系数": 0.1,
     "UI检测启用": True,
     "启用": True,
+    "UI匹配阈值": 0.7,           # 模板匹配度超过该值认为检测到UI元素
+    "UI金字塔层数": 2,           # 粗匹配最多缩小的层数（每层边长减半），0 表示不使用金字塔
+    "UI金字塔最小模板边长": 16,   # 缩小后模板最短边不低于该值
+    "UI粗匹配容差": 0.15,        # 粗匹配阈值 = UI匹配阈值 - 容差，低于则不再精匹配
+    "UI区域边距": 16,            # 搜索区域向外扩展的像素，容忍界面位置的轻微偏移
 }
 
 # UI元素模板路径
@@ -68,6 +77,19 @@ UI模板路径 = {
     "加载界面": "资源/ui/loading.png",
 }
 
+# UI模板的搜索区域，对应配置档案 UIRegions 的字段名，None 表示搜索整个画面
+UI模板区域 = {
+    "对话框": "dialog_area",
+    "血条": "health_bar",
+    "菜单": None,
+    "死亡界面": None,
+    "加载界面": None,
+}
+
+# UI模板匹配顺序（与状态判定优先级一致），匹配到短路模板后不再匹配其余模板
+UI模板优先级 = ["加载界面", "死亡界面", "菜单", "对话框", "血条"]
+UI短路模板 = ("加载界面", "死亡界面")
+
 # 状态判定阈值
 状态判定阈值 = {
     "战斗_敌人距离": 200,
@@ -205,6 +227,41 @@ class 决策策略枚举(Enum):
     "自动降级": True,
 }
 
+# ==================== 流水线配置 ====================
+# 截取 → 预处理 → 推理 → 执行 分别在独立线程中运行，
+# 阶段之间用单槽覆盖队列连接，始终处理最新帧
+流水线配置 = {
+    "启用": False,  # 是否默认使用流水线模式
+    "队列容量": 1,  # 阶段间队列容量（满时丢弃最旧帧）
+    "最大连续错误": 20,  # 单阶段连续错误达到该值时停止运行
+}
+
+# ==================== 推理服务配置 ====================
+# 多个机器人共享一个推理会话，并发的单帧请求在等待窗口内合并为批次执行。
+# 跨进程时由推理服务器进程（python -m 核心.推理服务 <模型路径>）持有唯一的引擎，
+# 运行/增强机器人.py 的各个进程通过本地连接提交帧，整机只加载一份模型。
+推理服务配置 = {
+    "启用": False,  # 是否通过共享推理服务执行模型推理
+    "最大批次": 8,  # 单个批次的最大请求数
+    "等待窗口毫秒": 2.0,  # 收到首个请求后等待后续请求的时间
+    "队列容量": 64,  # 待处理请求上限，满时拒绝新请求
+    "请求超时": 1.0,  # 单次预测等待结果的最长时间（秒）
+    "跨进程": True,  # 是否连接推理服务器进程；False 时只在同一进程内共享
+    "自动启动": True,  # 推理服务器未运行时是否在后台启动
+    "启动超时": 30.0,  # 等待自动启动的服务器就绪的最长时间（秒）
+    "空闲退出秒数": 10.0,  # 客户端全部断开后服务器退出的等待时间，None 表示常驻
+    "地址": None,  # 服务器地址，None 时按模型路径生成（命名管道或 Unix 套接字）
+    "认证密钥": "mmorpg-ai-inference",  # 客户端与服务器的连接认证密钥
+}
+
+# ==================== 帧环配置 ====================
+# 截取直接写入预分配的帧槽，检测、缓存按槽位引用读取，不再逐帧复制整帧
+帧环配置 = {
+    "启用": False,  # 是否使用帧环
+    "槽数": 12,  # 槽位数，需覆盖流水线在途帧和缓存固定的参考帧
+    "共享内存": False,  # 是否分配在共享内存中，供其他进程连接读取
+}
+
 
 # ==================== 智能缓存配置 ====================
 # 检测结果缓存优化配置
@@ -216,6 +273,9 @@ class 决策策略枚举(Enum):
     "启用时间过期": True,  # 是否启用基于时间的过期
     "比较方法": "histogram",  # 帧比较方法: "histogram", "ssim", "mse", "hash"
     "预热帧数": 1,  # 预热帧数
+    "最大条目数": 8,  # 最多缓存的场景数，超出时按最近最少使用淘汰
+    "签名距离阈值": 10,  # 感知哈希汉明距离超过该值的场景直接跳过
+    "最大比较数": 2,  # 每次查询最多做完整相似度比较的场景数
     "配置文件路径": "配置/cache_config.json",  # 缓存配置文件路径
     "优先区域": [
         # 优先区域配置示例
@@ -53,6 +53,18 @@ logger = logging.getLogger(__name__)
 # 训练轮数
 训练轮数 = 10
 
+# 训练数据加载
+# 每次交给 model.fit 的样本数（跨文件打乱后组装）
+训练块样本数 = 450
+# 后台预取的训练块数
+预取训练块数 = 2
+# 组装训练块和数据增强的线程数
+数据加载线程数 = 2
+# 每个数据文件末尾留作验证的样本数
+每文件验证样本数 = 50
+# 固定验证集的样本数
+验证集样本数 = 200
+
 # ==================== 推理后端设置 ====================
 # 需求: 4.4 - 提供配置选项来选择首选的推理后端
 
@@ -268,6 +280,10 @@ logger = logging.getLogger(__name__)
 # 数据保存路径
 数据保存路径 = "数据/"
 
+# 录制预览窗口的刷新帧率 (0 表示无界面模式，不显示预览)
+# 预览在独立线程中刷新，不影响录制帧率
+录制预览帧率 = 10
+
 # ==================== 运动检测设置 ====================
 # 运动检测阈值 (低于此值认为卡住)
 运动检测阈值 = 800
@@ -689,6 +705,27 @@ def 获取当前配置档案名称() -> str:
     return ""
 
 
+def 获取当前UI区域():
+    """获取当前配置档案的UI区域，用于限定状态识别的模板搜索范围
+    
+    Returns:
+        UIRegions，配置管理不可用或没有档案时返回 None
+    """
+    if not 配置管理可用:
+        return None
+    
+    try:
+        manager = 获取配置管理器()
+        if manager:
+            profile = manager.get_current_profile()
+            if profile:
+                return profile.ui_regions
+    except Exception as e:
+        logger.error(f"获取当前UI区域失败: {e}")
+    
+    return None
+
+
 # ==================== 推理配置辅助函数 ====================
 # 需求: 4.4 - 提供配置选项来选择首选的推理后端
 
@@ -813,6 +850,16 @@ def 保存推理配置() -> bool:
         }
     }
     
+    # 保留性能基准测试 --autotune 写入的会话调优结果
+    if os.path.exists(推理配置路径):
+        try:
+            with open(推理配置路径, 'r', encoding='utf-8') as f:
+                原配置 = json.load(f)
+            if "会话调优" in 原配置:
+                配置数据["会话调优"] = 原配置["会话调优"]
+        except Exception as e:
+            logger.warning(f"读取原推理配置失败: {e}")
+    
     try:
         # 确保目录存在
         目录 = os.path.dirname(推理配置路径)